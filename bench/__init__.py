@@ -0,0 +1 @@
+"""Benchmark harness for the lab topologies (standard library only)."""
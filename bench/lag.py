@@ -0,0 +1,566 @@
+"""Sub-second replication lag and apply-queue sampling of the nodes of a topology.
+
+Every node is polled on its own connection, all on the same tick grid
+(`--lag-interval`, default 0.25 s), so that a slow or failed node does not
+delay the others. A tick reads, where the node has them:
+
+- `heartbeat_ms`: a heartbeat row (`bench.heartbeat`) is written on the
+  writable node every `--heartbeat` seconds with an increasing sequence
+  number; the lag of a node is how long ago the first heartbeat it has not
+  applied yet was committed on the writer (0 when it has the last one).
+  Both times are taken on the sampler's clock, so the clocks of the nodes
+  do not matter; the resolution is the heartbeat period.
+- `gtid_behind`: transactions of the writer's GTID position the node has
+  not executed (MySQL `gtid_executed` sets, MariaDB `gtid_current_pos`
+  sequence numbers); on Galera, `wsrep_last_committed` behind the most
+  advanced node.
+- `seconds_behind`: `Seconds_Behind_Master` (`Seconds_Behind_Source`) of
+  SHOW REPLICA STATUS (SHOW SLAVE STATUS on older servers), whole seconds.
+- `recv_queue`: Galera `wsrep_local_recv_queue`, or the transactions in
+  the group replication applier queue of an InnoDB cluster member.
+- `fc_paused`: Galera `wsrep_flow_control_paused` (fraction of the time
+  paused since the last FLUSH STATUS) and `fc_paused_interval`, the
+  fraction of the last interval, from `wsrep_flow_control_paused_ns`.
+
+A node that fails is reported in the ticks it missed and reconnected.
+`align` attaches the samples to the TPS timeline of a sysbench or load
+generator result (worst value of each node per interval); `--lag` on
+`bench.sysbench run` and `bench.loadgen run` samples during the benchmark
+and does it directly.
+
+Usage: python3 -m bench.lag sample --topology repli --duration 60 --lag-interval 0.2 --output reports/lag-repli.json
+       python3 -m bench.lag align reports/lag-repli.json reports/load_repli.json --output reports/load_repli_lag.json
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import re
+import sys
+import time
+
+from bench.mysqlwire import MySQLError, connect
+from bench.targets import TARGETS, resolve
+
+DEFAULT_INTERVAL = 0.25
+DEFAULT_HEARTBEAT = 0.1
+DEFAULT_TABLE = "bench.heartbeat"
+CONNECT_TIMEOUT = 2.0
+QUERY_TIMEOUT = 5.0
+METRICS = ("heartbeat_ms", "gtid_behind", "seconds_behind", "recv_queue", "fc_paused", "fc_paused_interval")
+WSREP_STATUS = ("wsrep_local_recv_queue", "wsrep_flow_control_paused", "wsrep_flow_control_paused_ns",
+                "wsrep_last_committed")
+_MISSING_TABLE = (1049, 1146)  # unknown database, unknown table: the heartbeat table is not there yet
+_TABLE = re.compile(r"^\w+\.\w+$")
+_MARIADB_GTID = re.compile(r"^(\d+)-(\d+)-(\d+)$")
+
+
+class LagError(Exception):
+    """The nodes cannot be sampled."""
+
+
+def parse_gtid_set(text):
+    """MySQL GTID set -> {(uuid, tag): [(first, last), ...]}."""
+    sets = {}
+    for part in (text or "").replace("\n", "").split(","):
+        uuid, *tokens = part.strip().split(":")
+        tag = ""
+        for token in tokens:
+            if token[:1].isdigit():
+                first, _, last = token.partition("-")
+                sets.setdefault((uuid.lower(), tag), []).append((int(first), int(last or first)))
+            else:
+                tag = token.lower()
+    return sets
+
+
+def parse_gtid_pos(text):
+    """MariaDB GTID position ("domain-server-seq,...") -> {domain: seq}."""
+    position = {}
+    for part in (text or "").split(","):
+        m = _MARIADB_GTID.match(part.strip())
+        if m:
+            position[int(m.group(1))] = max(position.get(int(m.group(1)), 0), int(m.group(3)))
+    return position
+
+
+def gtid_behind(reference, position):
+    """Transactions of `reference` missing from `position` (both parsed the same way, or integers)."""
+    if reference is None or position is None:
+        return None
+    if isinstance(reference, int):
+        return max(0, reference - position)
+    missing = 0
+    for key, intervals in reference.items():
+        if isinstance(intervals, int):  # MariaDB domain -> seq
+            missing += max(0, intervals - position.get(key, 0))
+            continue
+        for first, last in intervals:
+            overlap = sum(max(0, min(last, high) - max(first, low) + 1) for low, high in position.get(key, ()))
+            missing += last - first + 1 - overlap
+    return missing
+
+
+def _number(value, kind=int):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Heartbeat:
+    """Writes the heartbeat row and remembers, on the loop clock, when each sequence number was committed."""
+
+    def __init__(self, table, period):
+        self.table = table
+        self.period = period
+        self.seqs, self.commits = [], []
+        self.errors = 0
+
+    def lag_ms(self, seq, sent):
+        if seq is None or not self.seqs:
+            return None
+        # first heartbeat the node does not have (sequence numbers of failed writes are never committed)
+        missing = bisect.bisect_right(self.seqs, seq)
+        if missing == len(self.seqs) or self.commits[missing] >= sent:
+            return 0.0
+        return (sent - self.commits[missing]) * 1000
+
+    async def setup(self, conn):
+        schema = self.table.split(".")[0]
+        await conn.query(f"CREATE DATABASE IF NOT EXISTS `{schema}`")
+        await conn.query(f"CREATE TABLE IF NOT EXISTS {self.table} "
+                         "(id INT NOT NULL PRIMARY KEY, seq BIGINT NOT NULL, ts DATETIME(6) NOT NULL)")
+        rows = (await conn.query(f"SELECT COALESCE(MAX(seq), 0) FROM {self.table}"))["rows"]
+        self.seq = int(rows[0][0])
+
+    async def run(self, node, stop, loop, log):
+        conn = None
+        while not stop.is_set():
+            try:
+                if conn is None:
+                    conn = await node.connect()
+                self.seq += 1
+                await asyncio.wait_for(conn.query(f"REPLACE INTO {self.table} (id, seq, ts) "
+                                                  f"VALUES (1, {self.seq}, UTC_TIMESTAMP(6))"), QUERY_TIMEOUT)
+                self.seqs.append(self.seq)
+                self.commits.append(loop.time())
+            except (MySQLError, OSError, EOFError, asyncio.TimeoutError) as e:
+                if not self.errors:
+                    log(f"⚠️ Heartbeat write on {node.name} failed: {e or e.__class__.__name__}")
+                self.errors += 1
+                if conn is not None and not isinstance(e, MySQLError):
+                    conn.writer.close()
+                    conn = None
+            try:
+                await asyncio.wait_for(stop.wait(), self.period)
+            except asyncio.TimeoutError:
+                pass
+        if conn is not None:
+            await conn.close()
+
+
+class _Node:
+    """One node: what it is (detected once) and one reading per tick."""
+
+    def __init__(self, host, port, user, password):
+        self.name = str(port)
+        self.host, self.port, self.user, self.password = host, port, user, password
+        self.conn = None
+        self.fc_previous = None
+
+    async def connect(self):
+        return await connect(self.host, self.port, self.user, self.password, timeout=CONNECT_TIMEOUT)
+
+    async def _value(self, sql):
+        rows = (await self.conn.query(sql))["rows"]
+        return rows[0][0] if rows else None
+
+    async def _optional(self, sql):
+        try:
+            return await self._value(sql)
+        except MySQLError:
+            return None
+
+    async def _replica_status(self):
+        try:
+            result = await self.conn.query(self.status_sql)
+        except MySQLError:
+            if self.status_sql == "SHOW SLAVE STATUS":
+                raise
+            self.status_sql = "SHOW SLAVE STATUS"
+            result = await self.conn.query(self.status_sql)
+        return dict(zip(result["columns"], result["rows"][0])) if result["rows"] else None
+
+    async def open(self):
+        self.conn = await self.connect()
+        self.server = self.conn.server_version
+        self.mariadb = "mariadb" in self.server.lower()
+        self.galera = await self._optional("SELECT @@GLOBAL.wsrep_on") == "1"
+        self.status_sql = "SHOW REPLICA STATUS"
+        self.replica = await self._replica_status() is not None
+        self.group = await self._optional("SELECT MEMBER_ROLE FROM performance_schema.replication_group_members "
+                                          "WHERE MEMBER_ID = @@server_uuid")
+        read_only = await self._value("SELECT @@GLOBAL.read_only")
+        self.writable = read_only == "0" and not self.replica and self.group in (None, "PRIMARY")
+        if self.galera:
+            self.role = "galera"
+        elif self.group:
+            self.role = f"group {self.group.lower()}"
+        else:
+            self.role = "replica" if self.replica else "source"
+        return self
+
+    def describe(self):
+        return {"host": self.host, "port": self.port, "server": self.server, "role": self.role,
+                "writable": self.writable}
+
+    async def read(self, heartbeat, loop):
+        """(reading, position) of one tick; position is what `gtid_behind` compares."""
+        reading = dict.fromkeys(METRICS)
+        if self.conn is None:
+            self.conn = await self.connect()
+        if heartbeat:
+            sent = loop.time()
+            try:
+                seq = _number(await self._value(f"SELECT seq FROM {heartbeat.table} WHERE id = 1"))
+            except MySQLError as e:
+                if e.code not in _MISSING_TABLE:
+                    raise
+                seq = None
+            reading["heartbeat_ms"] = heartbeat.lag_ms(seq, sent)
+        if self.galera:
+            status = dict((await self.conn.query(
+                "SHOW GLOBAL STATUS WHERE Variable_name IN "
+                f"({', '.join(repr(name) for name in WSREP_STATUS)})"))["rows"])
+            reading["recv_queue"] = _number(status.get("wsrep_local_recv_queue"))
+            reading["fc_paused"] = _number(status.get("wsrep_flow_control_paused"), float)
+            paused_ns, now = _number(status.get("wsrep_flow_control_paused_ns")), loop.time()
+            if paused_ns is not None and self.fc_previous and now > self.fc_previous[1]:
+                reading["fc_paused_interval"] = round(
+                    max(0, paused_ns - self.fc_previous[0]) / ((now - self.fc_previous[1]) * 10 ** 9), 4)
+            self.fc_previous = (paused_ns, now) if paused_ns is not None else None
+            position = _number(status.get("wsrep_last_committed"))
+        elif self.mariadb:
+            position = parse_gtid_pos(await self._value("SELECT @@GLOBAL.gtid_current_pos"))
+        else:
+            position = parse_gtid_set(await self._value("SELECT @@GLOBAL.gtid_executed"))
+        if self.replica:
+            status = await self._replica_status() or {}
+            behind = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+            reading["seconds_behind"] = _number(behind)
+        if self.group:
+            reading["recv_queue"] = _number(await self._value(
+                "SELECT COUNT_TRANSACTIONS_REMOTE_IN_APPLIER_QUEUE "
+                "FROM performance_schema.replication_group_member_stats WHERE MEMBER_ID = @@server_uuid"))
+        return reading, position
+
+    async def close(self):
+        if self.conn is not None:
+            await self.conn.close()
+            self.conn = None
+
+
+class LagSampler:
+    """Samples the nodes of a topology until `stop()` is called.
+
+        sampler = await LagSampler("127.0.0.1", [3411, 3412, 3413], "root", "rootpass").open()
+        task = asyncio.ensure_future(sampler.run())
+        ...
+        sampler.stop()
+        result = await task
+    """
+
+    def __init__(self, host, ports, user, password, interval=DEFAULT_INTERVAL, heartbeat=DEFAULT_HEARTBEAT,
+                 table=DEFAULT_TABLE, log=print):
+        if not ports:
+            raise LagError("No nodes to sample: use a cluster topology (galera, repli, innodb) or --node")
+        if not _TABLE.match(table):
+            raise LagError(f"Heartbeat table must be written schema.table, got {table!r}")
+        self.nodes = [_Node(host, port, user, password) for port in ports]
+        self.interval = interval
+        self.heartbeat = _Heartbeat(table, heartbeat) if heartbeat else None
+        self.log = log
+        self._stop = asyncio.Event()
+
+    async def open(self):
+        """Connect to every node, detect what it is and create the heartbeat table on the writer."""
+        opened = await asyncio.gather(*(node.open() for node in self.nodes), return_exceptions=True)
+        for node, outcome in zip(self.nodes, opened):
+            if isinstance(outcome, BaseException):
+                await self.close()
+                raise LagError(f"Cannot sample {node.host}:{node.port}: {outcome or outcome.__class__.__name__}")
+        self.writer = next((node for node in self.nodes if node.writable), None)
+        if self.heartbeat and self.writer is None:
+            self.log("⚠️ No writable node: sampling without heartbeat")
+            self.heartbeat = None
+        if self.heartbeat:
+            try:
+                await self.heartbeat.setup(self.writer.conn)
+            except MySQLError as e:
+                await self.close()
+                raise LagError(f"Cannot create {self.heartbeat.table} on {self.writer.name}: {e}") from None
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    async def close(self):
+        for node in self.nodes:
+            await node.close()
+
+    async def _poll(self, node, ticks, start, loop):
+        tick, failures = 0, 0
+        while True:
+            tick = max(tick + 1, math.floor((loop.time() - start) / self.interval) + 1)
+            try:
+                await asyncio.wait_for(self._stop.wait(), start + tick * self.interval - loop.time())
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                reading, position = await asyncio.wait_for(node.read(self.heartbeat, loop), QUERY_TIMEOUT)
+                failures = 0
+            except (MySQLError, OSError, EOFError, asyncio.TimeoutError) as e:
+                reading, position = {**dict.fromkeys(METRICS), "error": str(e) or e.__class__.__name__}, None
+                if not failures:
+                    self.log(f"⚠️ {node.name}: {reading['error']}")
+                failures += 1
+                if node.conn is not None and not isinstance(e, MySQLError):
+                    node.conn.writer.close()
+                    node.conn = None
+            ticks.setdefault(tick, {})[node.name] = (reading, position, node)
+
+    def _finish(self, ticks, started):
+        samples = []
+        for tick in sorted(ticks):
+            readings = ticks[tick]
+            if any(node.galera for _, _, node in readings.values()):
+                positions = [p for _, p, _ in readings.values() if p is not None]
+                reference = max(positions) if positions else None
+            else:
+                reference = readings.get(self.writer.name, (None, None))[1] if self.writer else None
+            nodes = {}
+            for name, (reading, position, node) in readings.items():
+                if "error" not in reading:
+                    reading["gtid_behind"] = gtid_behind(reference, position)
+                nodes[name] = reading
+            samples.append({"time": round(tick * self.interval, 6), "epoch": started + tick * self.interval,
+                            "nodes": nodes})
+        return samples
+
+    async def run(self):
+        """Sample until stopped; return the JSON-ready result."""
+        loop = asyncio.get_running_loop()
+        start, started = loop.time(), time.time()
+        ticks = {}
+        writer = (asyncio.ensure_future(self.heartbeat.run(self.writer, self._stop, loop, self.log))
+                  if self.heartbeat else None)
+        try:
+            await asyncio.gather(*(self._poll(node, ticks, start, loop) for node in self.nodes))
+        finally:
+            self._stop.set()
+            if writer:
+                await writer
+            await self.close()
+        samples = self._finish(ticks, started)
+        return {
+            "tool": "lag", "interval": self.interval, "started": started, "elapsed": loop.time() - start,
+            "heartbeat": {"table": self.heartbeat.table, "period": self.heartbeat.period,
+                          "writer": self.writer.name, "errors": self.heartbeat.errors} if self.heartbeat else None,
+            "nodes": {node.name: node.describe() for node in self.nodes},
+            "summary": summarize(samples),
+            "samples": samples,
+        }
+
+
+def _stats(values):
+    values = sorted(values)
+    if not values:
+        return None
+    return {"mean": round(sum(values) / len(values), 3), "p95": values[max(0, math.ceil(len(values) * 0.95) - 1)],
+            "max": values[-1]}
+
+
+def summarize(samples):
+    """{node: {"samples", "errors", metric: {mean, p95, max}}} over every sample where the metric was read."""
+    summary = {}
+    for sample in samples:
+        for name, reading in sample["nodes"].items():
+            entry = summary.setdefault(name, {"samples": 0, "errors": 0, "values": {m: [] for m in METRICS}})
+            entry["samples"] += 1
+            entry["errors"] += "error" in reading
+            for metric in METRICS:
+                if reading.get(metric) is not None:
+                    entry["values"][metric].append(reading[metric])
+    return {name: {"samples": entry["samples"], "errors": entry["errors"],
+                   **{metric: _stats(values) for metric, values in entry.pop("values").items() if values}}
+            for name, entry in summary.items()}
+
+
+async def sample_during(work, host, ports, user, password, interval=DEFAULT_INTERVAL, heartbeat=DEFAULT_HEARTBEAT,
+                        table=DEFAULT_TABLE, log=print):
+    """Await `work` (e.g. a benchmark) while sampling the nodes; return (result of work, lag result)."""
+    try:
+        sampler = await LagSampler(host, ports, user, password, interval, heartbeat, table, log).open()
+    except LagError:
+        if asyncio.iscoroutine(work):
+            work.close()
+        raise
+    task = asyncio.ensure_future(sampler.run())
+    try:
+        result = await work
+    finally:
+        sampler.stop()
+        lag = await task
+    return result, lag
+
+
+def bench_timeline(result):
+    """[(start epoch, end epoch, row)] of the TPS timeline of a sysbench or load generator result."""
+    slots = []
+    if result.get("tool") == "loadgen":
+        for slot in result["timeline"]:
+            slots.append((slot["epoch"] - result["interval"], slot["epoch"],
+                          {"time": slot["time"], "tps": slot["ops_per_sec"], "latency_p95_ms": slot["latency_p95_ms"]}))
+    elif result.get("tool") == "sysbench":
+        for trial in result["trials"]:
+            previous = 0.0
+            for interval in trial["intervals"]:
+                latency = next((v for k, v in interval.items() if k.startswith("latency_p")), None)
+                slots.append((trial["started"] + previous, trial["started"] + interval["time"],
+                              {"trial": trial["trial"], "time": interval["time"], "tps": interval["tps"],
+                               f"latency_p{result.get('percentile', 95)}_ms": latency}))
+                previous = interval["time"]
+    else:
+        raise LagError(f"Not a sysbench or load generator result: {result.get('tool')!r}")
+    return slots
+
+
+def align(lag, result):
+    """The benchmark TPS timeline, each interval with the worst lag figures of every node sampled in it."""
+    samples = sorted(lag["samples"], key=lambda sample: sample["epoch"])
+    rows = []
+    for begin, end, row in bench_timeline(result):
+        nodes = {}
+        for sample in samples:
+            if begin < sample["epoch"] <= end:
+                for name, reading in sample["nodes"].items():
+                    worst = nodes.setdefault(name, {"samples": 0, "errors": 0, **dict.fromkeys(METRICS)})
+                    worst["samples"] += 1
+                    worst["errors"] += "error" in reading
+                    for metric in METRICS:
+                        if reading.get(metric) is not None:
+                            worst[metric] = max(reading[metric], worst[metric] if worst[metric] is not None
+                                                else reading[metric])
+        rows.append({**row, "epoch": end, "lag": nodes})
+    return rows
+
+
+def attach(result, lag):
+    """Add the lag samples and the aligned timeline to a benchmark result; return it."""
+    result["lag"] = {**lag, "timeline": align(lag, result)}
+    return result
+
+
+def _cell(value, digits=1):
+    return "-" if value is None else f"{value:.{digits}f}" if isinstance(value, float) else str(value)
+
+
+def format_summary(lag):
+    lines = [f"Lag of {len(lag['nodes'])} node(s) every {lag['interval']:g}s for {lag['elapsed']:.1f}s"
+             + (f", heartbeat on {lag['heartbeat']['writer']} every {lag['heartbeat']['period']:g}s"
+                if lag["heartbeat"] else "")]
+    lines.append(f"   {'node':<8} {'role':<16} {'heartbeat ms p95/max':>21} {'gtid max':>9} {'sbm max':>8} "
+                 f"{'queue max':>10} {'fc paused':>10} {'errors':>7}")
+    for name, node in lag["nodes"].items():
+        entry = lag["summary"].get(name, {})
+        heartbeat = entry.get("heartbeat_ms")
+        peak = {metric: (entry.get(metric) or {}).get("max") for metric in METRICS}
+        lines.append(f"   {name:<8} {node['role']:<16} "
+                     f"{_cell(heartbeat['p95']) + ' / ' + _cell(heartbeat['max']) if heartbeat else '-':>21} "
+                     f"{_cell(peak['gtid_behind']):>9} {_cell(peak['seconds_behind']):>8} "
+                     f"{_cell(peak['recv_queue']):>10} {_cell(peak['fc_paused_interval'], 3):>10} "
+                     f"{entry.get('errors', 0):>7}")
+    return "\n".join(lines)
+
+
+def format_timeline(rows):
+    lines = []
+    for row in rows:
+        cells = [f"{name} hb {_cell(node['heartbeat_ms'])} ms gtid {_cell(node['gtid_behind'])} "
+                 f"q {_cell(node['recv_queue'])}" + (f" ❌{node['errors']}" if node["errors"] else "")
+                 for name, node in row["lag"].items()]
+        lines.append(f"[ {row['time']:g}s ] tps {row['tps']:.1f} | " + " | ".join(cells))
+    return "\n".join(lines)
+
+
+def add_lag_arguments(parser):
+    """Sampling options of `sample`, also those of --lag in bench.sysbench and bench.loadgen."""
+    parser.add_argument("--lag-interval", type=float, default=DEFAULT_INTERVAL, help=f"Seconds between lag samples (default: {DEFAULT_INTERVAL:g}).")
+    parser.add_argument("--heartbeat", type=float, default=DEFAULT_HEARTBEAT, help=f"Seconds between heartbeat writes, 0 for none (default: {DEFAULT_HEARTBEAT:g}).")
+    parser.add_argument("--heartbeat-table", default=DEFAULT_TABLE, help=f"Heartbeat table on the writable node (default: {DEFAULT_TABLE}).")
+    parser.add_argument("--node", type=int, action="append", help="Port of a node to sample (repeatable, default: the nodes of the topology).")
+
+
+def lag_nodes(target, args):
+    """(host, ports) to sample for a `resolve` target and the options of add_lag_arguments."""
+    return target["host"], args.node or list(TARGETS[target["topology"]]["nodes"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sample replication lag and apply queues of the nodes of a topology.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sample = commands.add_parser("sample", help="Sample for a while.")
+    sample.add_argument("--topology", choices=sorted(k for k, v in TARGETS.items() if v["kind"] == "mysql"),
+                        default="repli", help="Topology whose nodes are sampled (default: repli).")
+    sample.add_argument("--duration", type=float, default=60, help="Seconds to sample (default: 60).")
+    sample.add_argument("--host", help="Host of the nodes (default: 127.0.0.1).")
+    sample.add_argument("--user", help="Database user (default: root).")
+    sample.add_argument("--password", help="Database password (default: $DB_ROOT_PASSWORD or rootpass).")
+    sample.add_argument("--output", help="Write the samples as JSON to this file.")
+    add_lag_arguments(sample)
+    aligned = commands.add_parser("align", help="Attach saved samples to the timeline of a benchmark result.")
+    aligned.add_argument("lag", help="JSON written by `sample --output`.")
+    aligned.add_argument("bench", help="JSON result of bench.sysbench or bench.loadgen.")
+    aligned.add_argument("--output", help="Write the benchmark result with the lag added (default: print the timeline).")
+    args = parser.parse_args(argv)
+
+    if args.command == "align":
+        try:
+            with open(args.lag) as f:
+                lag = json.load(f)
+            with open(args.bench) as f:
+                result = attach(json.load(f), lag)
+        except (OSError, ValueError, KeyError, LagError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(result, f, indent=2)
+        print(format_timeline(result["lag"]["timeline"]))
+        return 0
+
+    if args.duration <= 0 or args.lag_interval <= 0 or args.heartbeat < 0:
+        parser.error("--duration and --lag-interval must be positive, --heartbeat not negative")
+    target = resolve(args.topology, args.host, user=args.user, password=args.password)
+    host, ports = lag_nodes(target, args)
+    try:
+        _, lag = asyncio.run(sample_during(asyncio.sleep(args.duration), host, ports, target["user"],
+                                           target["password"], args.lag_interval, args.heartbeat,
+                                           args.heartbeat_table))
+    except LagError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(lag, f, indent=2)
+    print(format_summary(lag))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""asyncio load generator running weighted query mixes (bench/workloads.py) against a lab topology.
+
+Connections come from a fixed-size pool (bench/mysqlwire.py, MySQL protocol
+only) opened before the run. Two ways to apply load:
+
+- closed loop (`--mode closed`): `--concurrency` clients each send their
+  next query as soon as the previous one returns; throughput is what the
+  server sustains, latency is the service time.
+- open loop (`--mode open`): queries arrive at a constant `--rate` per
+  second whatever the response times, like independent users. Latency is
+  measured from the scheduled arrival, so time spent waiting for a pooled
+  connection counts and a stalled server shows up in the percentiles
+  instead of silently lowering the load (no coordinated omission). Arrivals
+  beyond `--max-inflight` outstanding queries are dropped and counted.
+
+Latencies go to HDR-style histograms (bench.stats.Histogram, microseconds)
+per query and overall; `--warmup` seconds run first and are not recorded.
+The result also holds a timeline of throughput, errors and p95/p99 per
+`--interval`, with wall-clock times to line up with other samplers; `--lag`
+samples the replication lag of the topology nodes during the run
+(bench/lag.py) and adds it to the result, aligned with that timeline.
+
+Usage: python3 -m bench.loadgen list
+       python3 -m bench.loadgen run --topology galera --workload employees --mode closed --concurrency 16 --time 60
+       python3 -m bench.loadgen run --topology repli --workload sakila --mode open --rate 500 --connections 32 --output reports/load.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from bench.lag import (LagError, add_lag_arguments, attach as attach_lag, format_summary as format_lag, lag_nodes,
+                       sample_during)
+from bench.mysqlwire import MySQLError, Pool, format_query
+from bench.stats import Histogram
+from bench.targets import TARGETS, resolve
+from bench.workloads import WORKLOADS, QueryMix, load_workload
+
+DEFAULT_CONNECTIONS = 8
+DEFAULT_TIME = 60
+DEFAULT_INTERVAL = 1.0
+DRAIN_TIMEOUT = 10.0
+_TRANSACTION_START = ("BEGIN", "START TRANSACTION")
+
+
+class LoadError(Exception):
+    """The load could not be applied (connection or configuration failure)."""
+
+
+class _Recorder:
+    """Latency histograms, error counts and timeline of the measured window."""
+
+    def __init__(self, names, measure_from, duration, interval):
+        self.measure_from = measure_from
+        self.end = measure_from + duration
+        self.interval = interval
+        self.slots = max(1, int(round(duration / interval)))
+        self.total = Histogram()
+        self.queries = {name: {"ops": 0, "errors": 0, "histogram": Histogram()} for name in names}
+        self.errors = {}
+        self.dropped = 0
+        self.timeline = [{"ops": 0, "errors": 0, "histogram": Histogram()} for _ in range(self.slots)]
+
+    def _slot(self, finished):
+        return self.timeline[min(self.slots - 1, max(0, int((finished - self.measure_from) / self.interval)))]
+
+    def record(self, name, scheduled, finished, error=None):
+        if not self.measure_from <= scheduled < self.end:
+            return
+        slot = self._slot(finished)
+        query = self.queries[name]
+        if error is not None:
+            query["errors"] += 1
+            slot["errors"] += 1
+            key, message = error
+            entry = self.errors.setdefault(key, {"count": 0, "message": message})
+            entry["count"] += 1
+            return
+        latency = int((finished - scheduled) * 1e6)
+        query["ops"] += 1
+        query["histogram"].record(latency)
+        slot["ops"] += 1
+        slot["histogram"].record(latency)
+        self.total.record(latency)
+
+    def drop(self, scheduled):
+        if self.measure_from <= scheduled < self.end:
+            self.dropped += 1
+
+
+async def _execute(pool, statements, params):
+    async with pool.acquire() as conn:
+        try:
+            for statement in statements:
+                await conn.query(format_query(statement, params))
+        except MySQLError:
+            if statements[0].strip().upper() in _TRANSACTION_START:
+                try:
+                    await conn.query("ROLLBACK")
+                except MySQLError:
+                    pass
+            raise
+
+
+async def _issue(pool, mix, recorder, scheduled, loop):
+    name, statements, params = mix.draw()
+    error = None
+    try:
+        await _execute(pool, statements, params)
+    except MySQLError as e:
+        error = (str(e.code), e.message[:200])
+    except (OSError, EOFError, asyncio.TimeoutError) as e:
+        error = ("connection", str(e) or e.__class__.__name__)
+    recorder.record(name, scheduled, loop.time(), error)
+
+
+async def _closed_loop(pool, mix, recorder, concurrency, end, loop):
+    async def client():
+        while True:
+            now = loop.time()
+            if now >= end:
+                return
+            await _issue(pool, mix, recorder, now, loop)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+async def _open_loop(pool, mix, recorder, rate, start, end, max_inflight, loop):
+    inflight = set()
+    period = 1.0 / rate
+    number = 0
+    while True:
+        scheduled = start + number * period
+        if scheduled >= end:
+            break
+        number += 1
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            recorder.drop(scheduled)
+            continue
+        task = asyncio.ensure_future(_issue(pool, mix, recorder, scheduled, loop))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    if inflight:
+        _, pending = await asyncio.wait(inflight, timeout=DRAIN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _report(recorder, loop, echo):
+    """Print each timeline slot once it is over."""
+    shown = 0
+    while shown < recorder.slots:
+        await asyncio.sleep(max(0.0, recorder.measure_from + (shown + 1) * recorder.interval - loop.time()))
+        slot = recorder.timeline[shown]
+        p95 = slot["histogram"].percentile(95)
+        echo(f"[ {(shown + 1) * recorder.interval:g}s ] ops/s: {slot['ops'] / recorder.interval:.1f} "
+             f"err/s: {slot['errors'] / recorder.interval:.1f} lat (ms,95%): {p95 / 1000 if p95 is not None else 0:.2f}")
+        shown += 1
+
+
+async def run_load(target, workload, mode="closed", connections=DEFAULT_CONNECTIONS, concurrency=None, rate=None,
+                   duration=DEFAULT_TIME, warmup=0, seed=None, interval=DEFAULT_INTERVAL, max_inflight=None,
+                   database=None, echo=None):
+    """Apply `workload` to a `bench.targets.resolve` target; return the JSON-ready result.
+
+    Raises LoadError when the pool cannot be opened or the settings are
+    inconsistent. `echo`, when given, receives one progress line per interval.
+    """
+    if target["kind"] != "mysql":
+        raise LoadError(f"{target['topology']}: the load generator only speaks the MySQL protocol")
+    if mode not in ("closed", "open"):
+        raise LoadError(f"Unknown mode {mode!r}, expected closed or open")
+    if mode == "open" and not (rate and rate > 0):
+        raise LoadError("The open loop mode needs a positive --rate")
+    concurrency = concurrency or connections
+    max_inflight = max_inflight or connections * 100
+    seed = seed if seed is not None else random.randrange(1 << 32)
+    mix = QueryMix(workload, random.Random(seed))
+    pool = Pool(connections, target["host"], target["port"], target["user"], target["password"],
+                database if database is not None else workload.get("database"))
+    try:
+        await pool.open()
+    except (MySQLError, OSError, EOFError, asyncio.TimeoutError) as e:
+        raise LoadError(f"Cannot connect to {target['host']}:{target['port']}: {e or e.__class__.__name__}") from None
+    loop = asyncio.get_running_loop()
+    try:
+        start = loop.time()
+        started = time.time()
+        recorder = _Recorder(mix.names, start + warmup, duration, interval)
+        end = recorder.end
+        reporter = asyncio.ensure_future(_report(recorder, loop, echo)) if echo else None
+        if mode == "closed":
+            await _closed_loop(pool, mix, recorder, concurrency, end, loop)
+        else:
+            await _open_loop(pool, mix, recorder, rate, start, end, max_inflight, loop)
+        if reporter:
+            await asyncio.wait([reporter], timeout=interval)
+            reporter.cancel()
+    finally:
+        await pool.close()
+
+    ops = recorder.total.count
+    errors = sum(entry["count"] for entry in recorder.errors.values())
+    epoch = started + warmup
+    return {
+        "tool": "loadgen",
+        **{k: target[k] for k in ("topology", "kind", "via", "host", "port")},
+        "workload": workload.get("name"), "database": pool.settings[4], "mode": mode,
+        "connections": connections, "concurrency": concurrency if mode == "closed" else None,
+        "rate": rate if mode == "open" else None, "time": duration, "warmup": warmup, "seed": seed,
+        "interval": interval, "started": epoch,
+        "summary": {
+            "ops": ops, "errors": errors, "dropped": recorder.dropped, "ops_per_sec": ops / duration,
+            "errors_per_sec": errors / duration, "latency_ms": recorder.total.summary(),
+        },
+        "queries": {
+            name: {"ops": query["ops"], "errors": query["errors"], "latency_ms": query["histogram"].summary(),
+                   "histogram": query["histogram"].to_dict()}
+            for name, query in recorder.queries.items()
+        },
+        "errors": recorder.errors,
+        "timeline": [
+            {"time": (number + 1) * interval, "epoch": epoch + (number + 1) * interval, "ops": slot["ops"],
+             "errors": slot["errors"], "ops_per_sec": slot["ops"] / interval,
+             "latency_p95_ms": _ms(slot["histogram"].percentile(95)),
+             "latency_p99_ms": _ms(slot["histogram"].percentile(99))}
+            for number, slot in enumerate(recorder.timeline)
+        ],
+        "histogram": recorder.total.to_dict(),
+    }
+
+
+def _ms(value):
+    return None if value is None else value / 1000
+
+
+def format_summary(result):
+    load = (f"{result['concurrency']} clients" if result["mode"] == "closed" else f"{result['rate']:g} queries/s offered")
+    summary = result["summary"]
+    lines = [f"{result['workload']} on {result['topology']} via {result['via']} ({result['host']}:{result['port']}), "
+             f"{result['mode']} loop, {load}, {result['connections']} connections, {result['time']}s after "
+             f"{result['warmup']}s warm-up (seed {result['seed']})",
+             f"   ops/s {summary['ops_per_sec']:.1f}  errors/s {summary['errors_per_sec']:.2f}  dropped {summary['dropped']}"]
+    for name, query in [("all", {"ops": summary["ops"], "latency_ms": summary["latency_ms"]}),
+                        *result["queries"].items()]:
+        latency = query["latency_ms"]
+        if latency["count"]:
+            lines.append(f"   {name:<20} {query['ops']:>9} ops  p50 {latency['p50']:8.2f}  p95 {latency['p95']:8.2f}  "
+                         f"p99 {latency['p99']:8.2f}  max {latency['max']:8.2f} ms")
+    for code, error in result["errors"].items():
+        lines.append(f"   ⚠️  {error['count']} x {code}: {error['message']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run weighted query mixes against a lab topology.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List the built-in workloads.")
+    run = commands.add_parser("run", help="Apply a workload.")
+    run.add_argument("--topology", choices=sorted(k for k, v in TARGETS.items() if v["kind"] == "mysql"),
+                     default="standalone", help="Topology to load (default: standalone).")
+    run.add_argument("--workload", default="employees", help="Built-in workload or JSON file (default: employees).")
+    run.add_argument("--mode", choices=["closed", "open"], default="closed", help="Closed loop or constant arrival rate (default: closed).")
+    run.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS, help=f"Pooled connections (default: {DEFAULT_CONNECTIONS}).")
+    run.add_argument("--concurrency", type=int, help="Closed loop clients (default: --connections).")
+    run.add_argument("--rate", type=float, help="Open loop arrivals per second.")
+    run.add_argument("--max-inflight", type=int, help="Open loop outstanding queries before arrivals are dropped (default: 100 per connection).")
+    run.add_argument("--time", type=float, default=DEFAULT_TIME, help=f"Measured seconds (default: {DEFAULT_TIME}).")
+    run.add_argument("--warmup", type=float, default=0, help="Seconds of load before measuring (default: 0).")
+    run.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help=f"Timeline resolution in seconds (default: {DEFAULT_INTERVAL:g}).")
+    run.add_argument("--seed", type=int, help="Seed of the query and parameter draws (default: random, reported).")
+    run.add_argument("--host", help="Override the host of the topology endpoint.")
+    run.add_argument("--port", type=int, help="Override the port of the topology endpoint.")
+    run.add_argument("--user", help="Database user (default: root).")
+    run.add_argument("--password", help="Database password (default: $DB_ROOT_PASSWORD or rootpass).")
+    run.add_argument("--database", help="Database to use instead of the workload's.")
+    run.add_argument("--read-only", action="store_true", help="Use the read port of topologies that split reads (repli, innodb).")
+    run.add_argument("--output", help="Write the result as JSON to this file.")
+    run.add_argument("--quiet", action="store_true", help="Do not print the per-interval progress.")
+    run.add_argument("--lag", action="store_true", help="Sample the replication lag of the topology nodes during the run (bench/lag.py).")
+    add_lag_arguments(run)
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name, workload in WORKLOADS.items():
+            total = sum(query.get("weight", 1) for query in workload["queries"])
+            print(f"{name} (database {workload['database']})")
+            for query in workload["queries"]:
+                print(f"   {query['name']:<20} {100.0 * query.get('weight', 1) / total:5.1f}%")
+        return 0
+
+    if args.connections < 1 or (args.concurrency is not None and args.concurrency < 1):
+        parser.error("--connections and --concurrency must be at least 1")
+    if args.time <= 0 or args.interval <= 0 or args.warmup < 0:
+        parser.error("--time and --interval must be positive, --warmup not negative")
+    if args.mode == "open" and not (args.rate and args.rate > 0):
+        parser.error("--mode open needs a positive --rate")
+    try:
+        workload = load_workload(args.workload)
+    except ValueError as e:
+        parser.error(str(e))
+    target = resolve(args.topology, args.host, args.port, args.user, args.password, read_only=args.read_only)
+    work = run_load(target, workload, args.mode, args.connections, args.concurrency, args.rate, args.time,
+                    args.warmup, args.seed, args.interval, args.max_inflight, args.database,
+                    echo=None if args.quiet else print)
+    try:
+        if args.lag:
+            host, ports = lag_nodes(target, args)
+            result = attach_lag(*asyncio.run(sample_during(work, host, ports, target["user"], target["password"],
+                                                           args.lag_interval, args.heartbeat, args.heartbeat_table)))
+        else:
+            result = asyncio.run(work)
+    except (LoadError, LagError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    print(format_summary(result))
+    if args.lag:
+        print(format_lag(result["lag"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
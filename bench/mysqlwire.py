@@ -0,0 +1,426 @@
+"""Minimal asyncio MySQL/MariaDB client (standard library only).
+
+Just enough of the client/server protocol to drive a workload: the
+handshake with `mysql_native_password` or `caching_sha2_password` (fast
+path, or full authentication with the server RSA key when no TLS is used),
+COM_QUERY with text result sets, and COM_QUIT. Parameters are interpolated
+client-side with `format_query`, as the usual Python connectors do.
+
+    conn = await connect("127.0.0.1", 3306, "root", "rootpass", "employees")
+    result = await conn.query(format_query("SELECT * FROM employees WHERE emp_no = %(id)s", {"id": 10001}))
+    await conn.close()
+
+`Pool` keeps a fixed number of connections and replaces the broken ones.
+"""
+import asyncio
+import base64
+import datetime
+import hashlib
+import os
+import struct
+
+# Capability flags
+CLIENT_LONG_PASSWORD = 0x1
+CLIENT_LONG_FLAG = 0x4
+CLIENT_CONNECT_WITH_DB = 0x8
+CLIENT_PROTOCOL_41 = 0x200
+CLIENT_TRANSACTIONS = 0x2000
+CLIENT_SECURE_CONNECTION = 0x8000
+CLIENT_MULTI_RESULTS = 0x20000
+CLIENT_PLUGIN_AUTH = 0x80000
+CLIENT_PLUGIN_AUTH_LENENC_CLIENT_DATA = 0x200000
+CLIENT_FLAGS = (CLIENT_LONG_PASSWORD | CLIENT_LONG_FLAG | CLIENT_PROTOCOL_41 | CLIENT_TRANSACTIONS
+                | CLIENT_SECURE_CONNECTION | CLIENT_MULTI_RESULTS | CLIENT_PLUGIN_AUTH
+                | CLIENT_PLUGIN_AUTH_LENENC_CLIENT_DATA)
+
+SERVER_MORE_RESULTS_EXISTS = 0x8
+COM_QUIT = 0x01
+COM_QUERY = 0x03
+UTF8MB4_GENERAL_CI = 45
+MAX_PACKET = 0xFFFFFF
+
+_ESCAPES = {"\0": "\\0", "\n": "\\n", "\r": "\\r", "\x1a": "\\Z", "'": "\\'", '"': '\\"', "\\": "\\\\"}
+
+
+class MySQLError(Exception):
+    """Error packet sent by the server (the connection stays usable)."""
+
+    def __init__(self, code, message, sqlstate=None):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+        self.sqlstate = sqlstate
+
+
+def literal(value):
+    """SQL literal of a Python value (None, bool, number, str, bytes, date or datetime)."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat(" ") if isinstance(value, datetime.datetime) else value.isoformat()
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "surrogateescape")
+    return "'" + "".join(_ESCAPES.get(c, c) for c in str(value)) + "'"
+
+
+def format_query(sql, params=None):
+    """`sql` with its `%(name)s` placeholders replaced by the literals of `params` (`sql` as is without params)."""
+    if params is None:
+        return sql
+    return sql % {name: literal(value) for name, value in params.items()}
+
+
+def _xor(data, mask):
+    return bytes(a ^ b for a, b in zip(data, mask))
+
+
+def scramble_native(password, nonce):
+    """mysql_native_password: SHA1(password) XOR SHA1(nonce + SHA1(SHA1(password)))."""
+    if not password:
+        return b""
+    stage1 = hashlib.sha1(password.encode()).digest()
+    return _xor(stage1, hashlib.sha1(nonce + hashlib.sha1(stage1).digest()).digest())
+
+
+def scramble_sha2(password, nonce):
+    """caching_sha2_password: SHA256(password) XOR SHA256(SHA256(SHA256(password)) + nonce)."""
+    if not password:
+        return b""
+    stage1 = hashlib.sha256(password.encode()).digest()
+    return _xor(stage1, hashlib.sha256(hashlib.sha256(stage1).digest() + nonce).digest())
+
+
+def _der_items(data):
+    """Top-level (tag, content) items of a DER encoding."""
+    items, pos = [], 0
+    while pos < len(data):
+        tag, size = data[pos], data[pos + 1]
+        pos += 2
+        if size & 0x80:
+            count = size & 0x7F
+            size = int.from_bytes(data[pos:pos + count], "big")
+            pos += count
+        items.append((tag, data[pos:pos + size]))
+        pos += size
+    return items
+
+
+def rsa_public_key(pem):
+    """(modulus, exponent) of a PEM public key, SubjectPublicKeyInfo or PKCS#1."""
+    lines = [line for line in pem.decode().strip().splitlines() if not line.startswith("-----")]
+    der = _der_items(base64.b64decode("".join(lines)))[0][1]
+    items = _der_items(der)
+    if items[0][0] == 0x30:  # SubjectPublicKeyInfo: algorithm, BIT STRING holding the PKCS#1 key
+        items = _der_items(_der_items(items[1][1][1:])[0][1])
+    return int.from_bytes(items[0][1], "big"), int.from_bytes(items[1][1], "big")
+
+
+def _mgf1(seed, length):
+    mask = b""
+    for counter in range((length + 19) // 20):
+        mask += hashlib.sha1(seed + counter.to_bytes(4, "big")).digest()
+    return mask[:length]
+
+
+def rsa_encrypt(pem, message):
+    """RSAES-OAEP (SHA-1, MGF1-SHA-1) encryption, the padding expected by caching_sha2_password."""
+    modulus, exponent = rsa_public_key(pem)
+    size = (modulus.bit_length() + 7) // 8
+    block = hashlib.sha1(b"").digest() + b"\0" * (size - len(message) - 42) + b"\x01" + message
+    seed = os.urandom(20)
+    masked_block = _xor(block, _mgf1(seed, len(block)))
+    encoded = b"\0" + _xor(seed, _mgf1(masked_block, 20)) + masked_block
+    return pow(int.from_bytes(encoded, "big"), exponent, modulus).to_bytes(size, "big")
+
+
+def _lenenc_int(data, pos):
+    first = data[pos]
+    if first < 0xFB:
+        return first, pos + 1
+    if first == 0xFB:
+        return None, pos + 1
+    size = {0xFC: 2, 0xFD: 3, 0xFE: 8}[first]
+    return int.from_bytes(data[pos + 1:pos + 1 + size], "little"), pos + 1 + size
+
+
+def _lenenc_str(data, pos):
+    size, pos = _lenenc_int(data, pos)
+    if size is None:
+        return None, pos
+    return data[pos:pos + size], pos + size
+
+
+def _lenenc(value):
+    if len(value) < 0xFB:
+        return bytes([len(value)]) + value
+    if len(value) < 1 << 16:
+        return b"\xfc" + struct.pack("<H", len(value)) + value
+    if len(value) < 1 << 24:
+        return b"\xfd" + struct.pack("<I", len(value))[:3] + value
+    return b"\xfe" + struct.pack("<Q", len(value)) + value
+
+
+def _error(payload):
+    code = struct.unpack("<H", payload[1:3])[0]
+    message, sqlstate = payload[3:], None
+    if message[:1] == b"#":
+        sqlstate, message = message[1:6].decode(), message[6:]
+    return MySQLError(code, message.decode(errors="replace"), sqlstate)
+
+
+def _ok(payload):
+    affected, pos = _lenenc_int(payload, 1)
+    insert_id, pos = _lenenc_int(payload, pos)
+    status = struct.unpack("<H", payload[pos:pos + 2])[0] if len(payload) >= pos + 2 else 0
+    return affected, insert_id, status
+
+
+def _is_eof(payload):
+    return payload[0] == 0xFE and len(payload) < 9
+
+
+class Connection:
+    """One client session; `query` calls must not overlap."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.seq = 0
+        self.server_version = None
+        self.thread_id = None
+
+    async def _read(self):
+        payload = b""
+        while True:
+            header = await self.reader.readexactly(4)
+            length = int.from_bytes(header[:3], "little")
+            self.seq = (header[3] + 1) % 256
+            payload += await self.reader.readexactly(length)
+            if length < MAX_PACKET:
+                return payload
+
+    def _write(self, payload):
+        while True:
+            chunk, payload = payload[:MAX_PACKET], payload[MAX_PACKET:]
+            self.writer.write(struct.pack("<I", len(chunk))[:3] + bytes([self.seq]) + chunk)
+            self.seq = (self.seq + 1) % 256
+            if len(chunk) < MAX_PACKET:
+                return
+
+    async def _handshake(self, user, password, database):
+        greeting = await self._read()
+        if greeting[0] == 0xFF:
+            raise _error(greeting)
+        if greeting[0] != 0x0A:
+            raise MySQLError(2000, f"unsupported protocol version {greeting[0]}")
+        end = greeting.index(b"\0", 1)
+        self.server_version = greeting[1:end].decode(errors="replace")
+        pos = end + 1
+        self.thread_id = struct.unpack("<I", greeting[pos:pos + 4])[0]
+        nonce = greeting[pos + 4:pos + 12]
+        pos += 13
+        capabilities = struct.unpack("<H", greeting[pos:pos + 2])[0]
+        plugin = "mysql_native_password"
+        if len(greeting) > pos + 2:
+            capabilities |= struct.unpack("<H", greeting[pos + 5:pos + 7])[0] << 16
+            nonce_length = greeting[pos + 7]
+            pos += 18
+            extra = max(13, nonce_length - 8)
+            nonce += greeting[pos:pos + extra].rstrip(b"\0")
+            pos += extra
+            if capabilities & CLIENT_PLUGIN_AUTH:
+                plugin = greeting[pos:].split(b"\0", 1)[0].decode() or plugin
+        flags = CLIENT_FLAGS & capabilities | CLIENT_PROTOCOL_41 | CLIENT_SECURE_CONNECTION
+        if database:
+            flags |= CLIENT_CONNECT_WITH_DB
+        auth = self._scramble(plugin, password, nonce)
+        response = struct.pack("<IIB", flags, MAX_PACKET, UTF8MB4_GENERAL_CI) + b"\0" * 23 + user.encode() + b"\0"
+        if flags & CLIENT_PLUGIN_AUTH_LENENC_CLIENT_DATA:
+            response += _lenenc(auth)
+        else:
+            response += bytes([len(auth)]) + auth
+        if database:
+            response += database.encode() + b"\0"
+        if flags & CLIENT_PLUGIN_AUTH:
+            response += plugin.encode() + b"\0"
+        self._write(response)
+        await self.writer.drain()
+        await self._authenticate(plugin, password, nonce)
+
+    @staticmethod
+    def _scramble(plugin, password, nonce):
+        if plugin == "mysql_native_password":
+            return scramble_native(password, nonce)
+        if plugin == "caching_sha2_password":
+            return scramble_sha2(password, nonce)
+        raise MySQLError(2059, f"authentication plugin {plugin!r} is not supported")
+
+    async def _authenticate(self, plugin, password, nonce):
+        while True:
+            packet = await self._read()
+            if packet[0] == 0x00:
+                return
+            if packet[0] == 0xFF:
+                raise _error(packet)
+            if packet[0] == 0xFE:  # authentication method switch
+                name, _, data = packet[1:].partition(b"\0")
+                plugin, nonce = name.decode(), data.rstrip(b"\0")
+                self._write(self._scramble(plugin, password, nonce))
+            elif packet[0] == 0x01 and plugin == "caching_sha2_password":
+                if packet[1:] == b"\x03":  # fast authentication succeeded, the OK packet follows
+                    continue
+                if packet[1:] == b"\x04":  # full authentication: ask for the server public key
+                    self._write(b"\x02")
+                    key = (await self._read())[1:]
+                    secret = (password or "").encode() + b"\0"
+                    secret = bytes(c ^ nonce[i % len(nonce)] for i, c in enumerate(secret))
+                    self._write(rsa_encrypt(key, secret))
+                else:
+                    raise MySQLError(2000, f"unexpected caching_sha2_password packet {packet[:2]!r}")
+            else:
+                raise MySQLError(2000, f"unexpected authentication packet {packet[:1]!r}")
+            await self.writer.drain()
+
+    async def query(self, sql):
+        """Run `sql` (possibly several statements); return the last result.
+
+        The result is {"columns", "rows", "affected_rows", "insert_id"};
+        values are str (or None for NULL). Raises MySQLError on SQL errors.
+        """
+        self.seq = 0
+        self._write(bytes([COM_QUERY]) + sql.encode())
+        await self.writer.drain()
+        while True:
+            # An error packet ends the whole multi-statement batch
+            result, status = await self._read_result()
+            if not status & SERVER_MORE_RESULTS_EXISTS:
+                return result
+
+    async def _read_result(self):
+        packet = await self._read()
+        if packet[0] == 0x00:
+            affected, insert_id, status = _ok(packet)
+            return {"columns": [], "rows": [], "affected_rows": affected, "insert_id": insert_id}, status
+        if packet[0] == 0xFF:
+            raise _error(packet)
+        if packet[0] == 0xFB:
+            raise MySQLError(2000, "LOAD DATA LOCAL INFILE is not supported")
+        count, _ = _lenenc_int(packet, 0)
+        columns = []
+        for _ in range(count):
+            definition, pos = await self._read(), 0
+            for _ in range(4):  # catalog, schema, table, org_table
+                _, pos = _lenenc_str(definition, pos)
+            columns.append(_lenenc_str(definition, pos)[0].decode(errors="replace"))
+        packet = await self._read()
+        if not _is_eof(packet):
+            raise MySQLError(2000, "missing EOF after the column definitions")
+        rows = []
+        while True:
+            packet = await self._read()
+            if packet[0] == 0xFF:
+                raise _error(packet)
+            if _is_eof(packet):
+                status = struct.unpack("<H", packet[3:5])[0] if len(packet) >= 5 else 0
+                return {"columns": columns, "rows": rows, "affected_rows": 0, "insert_id": 0}, status
+            row, pos = [], 0
+            for _ in range(count):
+                value, pos = _lenenc_str(packet, pos)
+                row.append(None if value is None else value.decode(errors="replace"))
+            rows.append(tuple(row))
+
+    async def close(self):
+        try:
+            self.seq = 0
+            self._write(bytes([COM_QUIT]))
+            await self.writer.drain()
+        except (OSError, RuntimeError):
+            pass
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+
+async def connect(host, port, user, password, database=None, timeout=10.0):
+    """Open an authenticated Connection; raise MySQLError, OSError or asyncio.TimeoutError."""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    conn = Connection(reader, writer)
+    try:
+        await asyncio.wait_for(conn._handshake(user, password or "", database), timeout)
+    except BaseException:
+        writer.close()
+        raise
+    return conn
+
+
+class Pool:
+    """Fixed-size connection pool; a connection released as broken is reopened on the next acquire.
+
+        async with pool.acquire() as conn:
+            await conn.query("SELECT 1")
+    """
+
+    def __init__(self, size, host, port, user, password, database=None, timeout=10.0):
+        self.size = size
+        self.settings = (host, port, user, password, database, timeout)
+        self.idle = asyncio.Queue()
+        self.connections = set()
+
+    async def open(self):
+        """Open every connection up front, so that connection errors show before the workload starts."""
+        opened = await asyncio.gather(*(connect(*self.settings) for _ in range(self.size)), return_exceptions=True)
+        failed = [result for result in opened if isinstance(result, BaseException)]
+        for conn in opened:
+            if isinstance(conn, Connection):
+                self.connections.add(conn)
+                self.idle.put_nowait(conn)
+        if failed:
+            await self.close()
+            raise failed[0]
+        return self
+
+    def acquire(self):
+        return _Lease(self)
+
+    async def _get(self):
+        conn = await self.idle.get()
+        if conn is None:
+            try:
+                conn = await connect(*self.settings)
+            except BaseException:
+                self.idle.put_nowait(None)
+                raise
+            self.connections.add(conn)
+        return conn
+
+    def _release(self, conn, broken=False):
+        if broken:
+            self.connections.discard(conn)
+            conn.writer.close()
+            conn = None
+        self.idle.put_nowait(conn)
+
+    async def close(self):
+        connections, self.connections = list(self.connections), set()
+        await asyncio.gather(*(conn.close() for conn in connections), return_exceptions=True)
+
+
+class _Lease:
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    async def __aenter__(self):
+        self.conn = await self.pool._get()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # SQL errors leave the session usable; anything else (I/O, cancellation) may not
+        self.pool._release(self.conn, broken=exc_type is not None and not issubclass(exc_type, MySQLError))
@@ -0,0 +1,256 @@
+"""Timed replay of a performance_schema trace (bench/trace.py) and per-digest latency comparison.
+
+Each captured session is replayed on a connection of its own, in its
+original order, and each statement is sent at its captured start time
+divided by `--speed` (2 = twice as fast, 0 = as fast as possible). When a
+session falls behind its schedule the statement goes out at once; the lag
+is reported, since a replay that cannot keep up no longer reproduces the
+original concurrency. Sessions switch schema (USE) as they did on the
+source.
+
+A digest trace has no sessions: the executions of each digest are spread
+evenly over the captured window and dealt round-robin to `--sessions`
+connections, using the sample statement of the digest.
+
+Statements whose text performance_schema truncated cannot be replayed and
+are skipped, as are SHUTDOWN/KILL; `--read-only` also skips everything but
+SELECT, SHOW, EXPLAIN, DESCRIBE and WITH. Latency on the target is measured
+by the client around each statement and compared per digest with the
+server latency captured on the source (on the lab's local network the
+round trip is small against it).
+
+Usage: python3 -m bench.replay reports/employees.trace.gz --topology galera --speed 1 --output reports/replay.json
+       python3 -m bench.replay reports/employees.trace.gz --port 3308 --speed 0 --read-only
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+
+from bench.mysqlwire import MySQLError, connect
+from bench.stats import Histogram
+from bench.targets import TARGETS, resolve
+from bench.trace import TraceError, read_trace
+
+DEFAULT_SESSIONS = 8
+REGRESSION_RATIO = 1.5
+_READ = re.compile(r"^\s*(\(\s*)*(SELECT|SHOW|EXPLAIN|DESC|DESCRIBE|WITH)\b", re.I)
+_NEVER = re.compile(r"^\s*(SHUTDOWN|KILL|RESTART)\b", re.I)
+
+
+def schedule(trace, sessions=DEFAULT_SESSIONS):
+    """{session: [event, ...]} to replay, each list in the original order."""
+    by_session = {}
+    if trace["header"]["source"] == "digest":
+        duration_us = trace["header"]["duration"] * 10 ** 6
+        digests = [d for d in trace["digests"].values() if d.get("count")]
+        events = []
+        for number, digest in enumerate(digests):
+            period = duration_us / digest["count"]
+            phase = period * number / len(digests)
+            for i in range(digest["count"]):
+                events.append({"start_us": int(phase + i * period), "schema": digest.get("schema"),
+                               "digest": digest["d"], "sql": digest.get("sample"), "truncated": False})
+        events.sort(key=lambda e: e["start_us"])
+        for number, event in enumerate(events):
+            by_session.setdefault(number % sessions, []).append(event)
+        return by_session
+    for event in sorted(trace["events"], key=lambda e: (e["start_us"], e["event_id"])):
+        by_session.setdefault(event["session"], []).append(event)
+    return by_session
+
+
+def skip_reason(event, read_only=False):
+    """Why `event` is not replayed, or None."""
+    if not event.get("sql"):
+        return "no_sample"
+    if event.get("truncated"):
+        return "truncated"
+    if _NEVER.match(event["sql"]) or (read_only and not _READ.match(event["sql"])):
+        return "filtered"
+    return None
+
+
+class _Results:
+
+    def __init__(self):
+        self.digests = {}
+        self.lag = Histogram()
+        self.skipped = {"truncated": 0, "filtered": 0, "no_sample": 0}
+        self.errors = {}
+
+    def digest(self, digest):
+        return self.digests.setdefault(digest, {"histogram": Histogram(), "errors": 0, "replayed": 0})
+
+    def error(self, digest, key, message):
+        self.digest(digest)["errors"] += 1
+        entry = self.errors.setdefault(key, {"count": 0, "message": message})
+        entry["count"] += 1
+
+
+async def _replay_session(events, target, speed, start, results, read_only, loop):
+    conn, schema = None, None
+    try:
+        for event in events:
+            reason = skip_reason(event, read_only)
+            if reason:
+                results.skipped[reason] += 1
+                continue
+            if speed:
+                scheduled = start + event["start_us"] / 10 ** 6 / speed
+                delay = scheduled - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                results.lag.record((loop.time() - scheduled) * 10 ** 6)
+            digest = event["digest"]
+            try:
+                if conn is None:
+                    conn = await connect(target["host"], target["port"], target["user"], target["password"],
+                                         event["schema"])
+                    schema = event["schema"]
+                elif event["schema"] and event["schema"] != schema:
+                    await conn.query(f"USE `{event['schema'].replace('`', '``')}`")
+                    schema = event["schema"]
+                sent = loop.time()
+                await conn.query(event["sql"])
+                entry = results.digest(digest)
+                entry["histogram"].record((loop.time() - sent) * 10 ** 6)
+                entry["replayed"] += 1
+            except MySQLError as e:
+                results.error(digest, str(e.code), e.message[:200])
+            except (OSError, EOFError, asyncio.TimeoutError) as e:
+                results.error(digest, "connection", str(e) or e.__class__.__name__)
+                if conn is not None:
+                    conn.writer.close()
+                conn = None
+    finally:
+        if conn is not None:
+            await conn.close()
+
+
+async def replay(trace, target, speed=1.0, read_only=False, sessions=DEFAULT_SESSIONS):
+    """Replay `trace` (from read_trace) against `target`; return (_Results, elapsed seconds)."""
+    plan = schedule(trace, sessions)
+    results = _Results()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*(_replay_session(events, target, speed, start, results, read_only, loop)
+                           for events in plan.values()))
+    return results, loop.time() - start
+
+
+def _ratio(target, source):
+    return round(target / source, 3) if target is not None and source else None
+
+
+def compare(trace, results, threshold=REGRESSION_RATIO):
+    """Per-digest rows (source and target latency in ms, ratios), the heaviest digests on the source first."""
+    source = {}
+    if trace["header"]["source"] == "digest":
+        for digest in trace["digests"].values():
+            if digest.get("count"):
+                source[digest["d"]] = ({"count": digest["count"], "mean": digest["latency_us"] / 1000},
+                                       digest["count"] * digest["latency_us"])
+    else:
+        histograms = {}
+        for event in trace["events"]:
+            histograms.setdefault(event["digest"], Histogram()).record(event["latency_us"])
+        source = {digest: (h.summary(), h.total) for digest, h in histograms.items()}
+    rows = []
+    for digest, (summary, total_us) in sorted(source.items(), key=lambda item: -item[1][1]):
+        measured = results.digests.get(digest, {"histogram": Histogram(), "errors": 0, "replayed": 0})
+        target = measured["histogram"].summary()
+        row = {"digest": digest, "text": trace["digests"].get(digest, {}).get("text"), "source_ms": summary,
+               "target_ms": target, "replayed": measured["replayed"], "errors": measured["errors"],
+               "mean_ratio": _ratio(target.get("mean"), summary.get("mean")),
+               "p95_ratio": _ratio(target.get("p95"), summary.get("p95"))}
+        ratio = row["p95_ratio"] if row["p95_ratio"] is not None else row["mean_ratio"]
+        row["regression"] = ratio is not None and ratio >= threshold
+        rows.append(row)
+    return rows
+
+
+def format_comparison(result, top=20):
+    source, target = result["source"], result["target"]
+    lag = result["lag_ms"]
+    lines = [f"Replay of {source.get('topology')} ({source.get('server')}) on {target['topology']} "
+             f"({target['host']}:{target['port']}, {result['server'] or '?'}) at speed {result['speed']:g}: "
+             f"{result['replayed']} statements in {result['elapsed']:.1f}s, {result['errors']} errors, "
+             f"skipped {', '.join(f'{k} {v}' for k, v in result['skipped'].items() if v) or 'none'}"]
+    if lag.get("count"):
+        lines.append(f"   schedule lag p50 {lag['p50']:.2f} ms, p99 {lag['p99']:.2f} ms, max {lag['max']:.2f} ms")
+    lines.append(f"   {'source ms':>21} {'target ms':>21}")
+    lines.append(f"   {'mean':>10} {'p95':>10} {'mean':>10} {'p95':>10}  {'ratio':>6}  {'count':>7}  digest")
+    for row in result["digests"][:top]:
+        src, dst = row["source_ms"], row["target_ms"]
+        ratio = row["p95_ratio"] if row["p95_ratio"] is not None else row["mean_ratio"]
+        cells = [src.get("mean"), src.get("p95"), dst.get("mean"), dst.get("p95")]
+        lines.append("   " + " ".join(f"{c:>10.3f}" if c is not None else f"{'-':>10}" for c in cells)
+                     + f"  {ratio if ratio is not None else '-':>6}  {row['replayed']:>7}  "
+                     + ("⚠️ " if row["regression"] else "") + (row["text"] or row["digest"] or "")[:70])
+    return "\n".join(lines)
+
+
+async def _server_version(target):
+    try:
+        conn = await connect(target["host"], target["port"], target["user"], target["password"])
+    except (MySQLError, OSError, EOFError, asyncio.TimeoutError) as e:
+        raise TraceError(f"Cannot connect to {target['host']}:{target['port']}: {e or e.__class__.__name__}") from None
+    await conn.close()
+    return conn.server_version
+
+
+def run(trace_path, target, speed=1.0, read_only=False, sessions=DEFAULT_SESSIONS, threshold=REGRESSION_RATIO):
+    """Replay a trace file against `target`; return the JSON-ready comparison."""
+    trace = read_trace(trace_path)
+    server = asyncio.run(_server_version(target))
+    started = time.time()
+    results, elapsed = asyncio.run(replay(trace, target, speed, read_only, sessions))
+    digests = compare(trace, results, threshold)
+    return {
+        "tool": "replay", "trace": trace_path, "source": trace["header"],
+        "target": {k: target[k] for k in ("topology", "host", "port")}, "server": server,
+        "speed": speed, "read_only": read_only, "started": started, "elapsed": elapsed,
+        "replayed": sum(row["replayed"] for row in digests), "skipped": results.skipped,
+        "errors": sum(entry["count"] for entry in results.errors.values()), "error_codes": results.errors,
+        "lag_ms": results.lag.summary(), "regressions": sum(row["regression"] for row in digests),
+        "digests": digests,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a performance_schema trace and compare latency per digest.")
+    parser.add_argument("trace", help="Trace file written by `python3 -m bench.trace capture`.")
+    parser.add_argument("--topology", choices=sorted(k for k, v in TARGETS.items() if v["kind"] == "mysql"),
+                        default="standalone", help="Topology to replay on (default: standalone).")
+    parser.add_argument("--host", help="Override the host of the topology endpoint.")
+    parser.add_argument("--port", type=int, help="Override the port of the topology endpoint.")
+    parser.add_argument("--user", help="Database user (default: root).")
+    parser.add_argument("--password", help="Database password (default: $DB_ROOT_PASSWORD or rootpass).")
+    parser.add_argument("--speed", type=float, default=1.0, help="Speed-up of the original timing, 0 for no waits (default: 1).")
+    parser.add_argument("--read-only", action="store_true", help="Only replay reads (SELECT, SHOW, EXPLAIN, DESCRIBE, WITH).")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help=f"Connections for digest traces (default: {DEFAULT_SESSIONS}).")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO, help=f"Target/source latency ratio flagged as a regression (default: {REGRESSION_RATIO}).")
+    parser.add_argument("--top", type=int, default=20, help="Digests to print (default: 20).")
+    parser.add_argument("--output", help="Write the comparison as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    if args.speed < 0 or args.sessions < 1:
+        parser.error("--speed must not be negative and --sessions at least 1")
+    target = resolve(args.topology, args.host, args.port, args.user, args.password)
+    try:
+        result = run(args.trace, target, args.speed, args.read_only, args.sessions, args.threshold)
+    except TraceError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    print(format_comparison(result, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Small statistics helpers shared by the benchmark tools."""
+import math
+import statistics
+
+# Two-sided 95% Student t quantiles by degrees of freedom (1-30); 1.96 beyond
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def confidence_interval(values):
+    """{"n", "mean", "stdev", "ci_low", "ci_high"} of `values` (95% Student t interval of the mean).
+
+    With a single value the interval is that value: one trial gives no
+    estimate of the spread.
+    """
+    values = [v for v in values if v is not None]
+    if not values:
+        return {"n": 0, "mean": None, "stdev": None, "ci_low": None, "ci_high": None}
+    mean = statistics.fmean(values)
+    if len(values) == 1:
+        return {"n": 1, "mean": mean, "stdev": 0.0, "ci_low": mean, "ci_high": mean}
+    stdev = statistics.stdev(values)
+    df = len(values) - 1
+    half = (T_95[df - 1] if df <= len(T_95) else 1.96) * stdev / math.sqrt(len(values))
+    return {"n": len(values), "mean": mean, "stdev": stdev, "ci_low": mean - half, "ci_high": mean + half}
+
+
+def bucket_percentile(buckets, percentile):
+    """Percentile of a histogram given as sorted (value, count) pairs: the first value reaching it."""
+    total = sum(count for _, count in buckets)
+    if not total:
+        return None
+    rank = math.ceil(total * percentile / 100.0)
+    seen = 0
+    for value, count in buckets:
+        seen += count
+        if seen >= rank:
+            return value
+    return buckets[-1][0]
+
+
+class Histogram:
+    """HDR-style latency histogram of non-negative integers (microseconds by convention).
+
+    Values below 2^`sub_bits` are counted exactly; above, each power of two
+    is split into 2^(`sub_bits` - 1) linear sub-buckets, so any recorded
+    value is known within 1/2^(`sub_bits` - 1) of itself (0.1% with the
+    default 11 bits, i.e. 3 significant digits) at a constant cost per
+    record, whatever the range. Counts are kept sparse.
+    """
+
+    def __init__(self, sub_bits=11):
+        self.sub_bits = sub_bits
+        self.half = 1 << (sub_bits - 1)
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        shift = value.bit_length() - self.sub_bits
+        if shift <= 0:
+            return value
+        return (shift + 1) * self.half + (value >> shift) - self.half
+
+    def _bounds(self, index):
+        """(lowest, highest) value counted at `index`."""
+        if index < 2 * self.half:
+            return index, index
+        shift = index // self.half - 1
+        low = (index - shift * self.half) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, value, count=1):
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percentile):
+        """Highest value equivalent to the one at `percentile` (0-100), bounded by the recorded maximum."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * percentile / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._bounds(index)[1], self.max)
+        return self.max
+
+    def summary(self, scale=1000.0, percentiles=(50, 90, 95, 99, 99.9)):
+        """{"count", "min", "mean", "p50", ..., "max"}, values divided by `scale` (microseconds to ms)."""
+        if not self.count:
+            return {"count": 0}
+        result = {"count": self.count, "min": self.min / scale, "mean": round(self.mean() / scale, 3)}
+        for pct in percentiles:
+            result[f"p{pct:g}"] = self.percentile(pct) / scale
+        result["max"] = self.max / scale
+        return result
+
+    def to_dict(self):
+        """JSON-ready form: sorted [lowest value, count] pairs of the non-empty buckets."""
+        return {"sub_bits": self.sub_bits, "count": self.count, "total": self.total, "min": self.min,
+                "max": self.max, "buckets": [[self._bounds(i)[0], self.counts[i]] for i in sorted(self.counts)]}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data.get("sub_bits", 11))
+        for value, count in data["buckets"]:
+            histogram.counts[histogram._index(value)] = count
+        histogram.count, histogram.total = data["count"], data["total"]
+        histogram.min, histogram.max = data["min"], data["max"]
+        return histogram
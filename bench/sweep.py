@@ -0,0 +1,375 @@
+"""Thread-scaling sweeps: throughput and tail latency from 1 to 256 clients, and where scaling stops.
+
+Each step runs the same workload with twice the concurrency of the
+previous one (`--threads 1,2,4,...` to choose others), with sysbench
+(bench/sysbench.py, the default) or the closed loop of the load generator
+(`--driver loadgen`, bench/loadgen.py). `find_knee` then looks for the
+saturation point: the last step before one that adds less than
+`--min-gain` throughput (10%) while p95 latency grows by `--latency-factor`
+(1.5x) or more. In a closed loop past saturation, doubling the clients
+doubles the queueing, so both conditions show up together. `--stop-on-knee`
+ends a sweep at the first step past the knee; a failing step (too many
+connections, timeouts) ends it too and is kept in the result.
+
+Several topologies run one after the other (`--topology` repeated), and
+`report` draws any number of saved sweeps on the same charts (throughput
+and p95 latency against threads, knees marked) in an HTML page.
+
+Usage: python3 -m bench.sweep run --topology galera --topology repli --topology innodb --profile standard --time 30 --prepare --output reports/sweep.json --html reports/sweep.html
+       python3 -m bench.sweep run --topology galera --driver loadgen --workload employees --max-threads 64
+       python3 -m bench.sweep report reports/sweep_galera.json reports/sweep_repli.json --html reports/sweep.html
+"""
+import argparse
+import asyncio
+import html
+import json
+import sys
+import time
+
+from bench.sysbench import PROFILES, BenchError, build_command, recreate_database, run_sysbench, run_trials
+from bench.targets import TARGETS, resolve
+
+MAX_THREADS = 256
+MIN_GAIN = 0.10
+LATENCY_FACTOR = 1.5
+DEFAULT_TIME = 30
+
+
+def thread_steps(min_threads=1, max_threads=MAX_THREADS):
+    """Powers of two from `min_threads` up to `max_threads` (both included when they are powers of two)."""
+    steps, threads = [], max(1, min_threads)
+    while threads <= max_threads:
+        steps.append(threads)
+        threads *= 2
+    return steps
+
+
+def find_knee(points, min_gain=MIN_GAIN, latency_factor=LATENCY_FACTOR):
+    """Saturation point of a sweep, or None while throughput still scales.
+
+    `points` are sorted by threads, with "tps" and "latency_p95_ms". The
+    knee is the last point before the first step that gains less than
+    `min_gain` throughput while its p95 latency is `latency_factor` times
+    higher. Failed steps (no "tps") are ignored.
+    """
+    points = [p for p in points if p.get("tps") is not None]
+    for previous, point in zip(points, points[1:]):
+        gain = point["tps"] / previous["tps"] - 1 if previous["tps"] else 0.0
+        before, after = previous.get("latency_p95_ms"), point.get("latency_p95_ms")
+        if gain < min_gain and before and after and after / before >= latency_factor:
+            return {"threads": previous["threads"], "tps": previous["tps"],
+                    "latency_p95_ms": previous["latency_p95_ms"],
+                    "reason": f"{point['threads']} threads: {gain:+.0%} throughput, p95 latency x{after / before:.1f}"}
+    return None
+
+
+def peak(points):
+    measured = [p for p in points if p.get("tps") is not None]
+    return max(measured, key=lambda p: p["tps"]) if measured else None
+
+
+def sysbench_step(target, profile, duration, warmup, trials, sysbench, echo):
+    """measure(threads) running sysbench; the point holds the trial means."""
+    def measure(threads):
+        result = run_trials(target, profile, threads, duration, warmup, trials, sysbench=sysbench, echo=echo)
+        point = {"threads": threads}
+        for metric, ci in result["summary"].items():
+            point[metric] = ci["mean"]
+            if ci["n"] > 1:
+                point[f"{metric}_ci"] = [ci["ci_low"], ci["ci_high"]]
+        return point
+
+    return measure
+
+
+def loadgen_step(target, workload, duration, warmup, seed):
+    """measure(threads) running the load generator closed loop with one connection per client."""
+    from bench.loadgen import run_load
+
+    def measure(threads):
+        result = asyncio.run(run_load(target, workload, "closed", connections=threads, concurrency=threads,
+                                      duration=duration, warmup=warmup, seed=seed))
+        latency = result["summary"]["latency_ms"]
+        return {"threads": threads, "tps": result["summary"]["ops_per_sec"], "latency_avg_ms": latency.get("mean"),
+                "latency_p95_ms": latency.get("p95"), "latency_p99_ms": latency.get("p99"),
+                "errors_per_sec": result["summary"]["errors_per_sec"]}
+
+    return measure
+
+
+def sweep(measure, steps, min_gain=MIN_GAIN, latency_factor=LATENCY_FACTOR, stop_on_knee=False,
+          errors=(BenchError,), log=print):
+    """Run `measure(threads)` for each step; return (points, knee).
+
+    An exception listed in `errors` is recorded in the failing point and
+    ends the sweep: higher concurrency would only fail the same way. A step
+    that measured no throughput counts as failed too.
+    """
+    points = []
+    knee = None
+    for threads in steps:
+        started = time.time()
+        try:
+            point = measure(threads)
+        except errors as e:
+            points.append({"threads": threads, "error": str(e)})
+            log(f"❌ {threads} threads: {e}")
+            break
+        point["elapsed"] = round(time.time() - started, 1)
+        points.append(point)
+        if point.get("tps") is None:
+            point["error"] = "no throughput measured"
+            log(f"❌ {threads} threads: {point['error']}")
+            break
+        log(f"📈 {threads:>4} threads: {point['tps']:10.1f} tps  p95 {_number(point.get('latency_p95_ms')):>9} ms  "
+            f"p99 {_number(point.get('latency_p99_ms')):>9} ms")
+        knee = find_knee(points, min_gain, latency_factor)
+        if knee and stop_on_knee:
+            log(f"🛑 Saturation at {knee['threads']} threads ({knee['reason']})")
+            break
+    return points, knee
+
+
+def load_sweeps(paths):
+    """Sweeps of saved results, either one sweep or {"sweeps": [...]} per file."""
+    sweeps = []
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        sweeps += data["sweeps"] if "sweeps" in data else [data]
+    return sweeps
+
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Thread Scaling - @TITLE@</title>
+    <script src="https://cdn.tailwindcss.com"></script>
+    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+    <style>
+        @import url('https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;600;700&display=swap');
+        body { font-family: 'Outfit', sans-serif; background-color: #0f172a; color: #f1f5f9; }
+        .glass { background: rgba(30, 41, 59, 0.7); backdrop-filter: blur(12px); border: 1px solid rgba(255, 255, 255, 0.1); }
+    </style>
+</head>
+<body class="p-8">
+    <div class="max-w-6xl mx-auto space-y-8">
+        <header class="glass p-8 rounded-3xl flex justify-between items-center">
+            <div>
+                <h1 class="text-4xl font-bold bg-gradient-to-r from-cyan-400 to-blue-500 bg-clip-text text-transparent">Thread Scaling</h1>
+                <p class="text-slate-400 mt-2 font-light">@TITLE@</p>
+            </div>
+            <span class="text-slate-500 text-xs font-mono">@DATE@</span>
+        </header>
+        <div class="grid grid-cols-1 md:grid-cols-3 gap-6">@CARDS@</div>
+        <div class="grid grid-cols-1 lg:grid-cols-2 gap-6">
+            <div class="glass p-8 rounded-3xl">
+                <h3 class="text-xl font-bold mb-6 text-cyan-400">Throughput (tps)</h3>
+                <div class="h-80"><canvas id="tpsChart"></canvas></div>
+            </div>
+            <div class="glass p-8 rounded-3xl">
+                <h3 class="text-xl font-bold mb-6 text-rose-400">p95 Latency (ms)</h3>
+                <div class="h-80"><canvas id="latencyChart"></canvas></div>
+            </div>
+        </div>
+        @TABLES@
+    </div>
+    <script>
+        const sweeps = @DATA@;
+        const colors = ['#22d3ee', '#a78bfa', '#f59e0b', '#34d399', '#f43f5e', '#60a5fa'];
+        const threads = [...new Set(sweeps.flatMap(s => s.points.map(p => p.threads)))].sort((a, b) => a - b);
+        function chart(id, metric, logarithmic) {
+            new Chart(document.getElementById(id), {
+                type: 'line',
+                data: {
+                    labels: threads,
+                    datasets: sweeps.map((s, i) => {
+                        const byThreads = Object.fromEntries(s.points.map(p => [p.threads, p[metric]]));
+                        return {
+                            label: s.label,
+                            data: threads.map(t => byThreads[t] ?? null),
+                            borderColor: colors[i % colors.length],
+                            backgroundColor: colors[i % colors.length],
+                            pointRadius: threads.map(t => s.knee && s.knee.threads === t ? 8 : 3),
+                            pointStyle: threads.map(t => s.knee && s.knee.threads === t ? 'rectRot' : 'circle'),
+                            spanGaps: true
+                        };
+                    })
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    plugins: { legend: { labels: { color: '#cbd5e1' } } },
+                    scales: {
+                        x: { title: { display: true, text: 'threads', color: '#94a3b8' }, ticks: { color: '#94a3b8' } },
+                        y: { type: logarithmic ? 'logarithmic' : 'linear', ticks: { color: '#94a3b8' } }
+                    }
+                }
+            });
+        }
+        chart('tpsChart', 'tps', false);
+        chart('latencyChart', 'latency_p95_ms', true);
+    </script>
+</body>
+</html>
+"""
+
+
+def _label(sweep_result):
+    workload = sweep_result.get("profile") or sweep_result.get("workload")
+    return f"{sweep_result['topology']} ({sweep_result['driver']}, {workload})"
+
+
+def _number(value, digits=2):
+    return "-" if value is None else f"{value:,.{digits}f}"
+
+
+def render_html(sweeps, title=None):
+    """HTML page comparing `sweeps` on shared throughput and latency charts."""
+    data = [{"label": _label(s), "knee": s.get("knee"),
+             "points": [{k: p.get(k) for k in ("threads", "tps", "latency_p95_ms")} for p in s["points"]]}
+            for s in sweeps]
+    cards, tables = [], []
+    for s in sweeps:
+        knee, best = s.get("knee"), peak(s["points"])
+        saturation = (f"{knee['threads']} threads" if knee else "not reached")
+        cards.append(
+            f'<div class="glass p-6 rounded-2xl"><div class="text-slate-500 text-xs uppercase font-bold mb-2">'
+            f'{html.escape(_label(s))}</div><div class="text-3xl font-bold text-cyan-400">{saturation}</div>'
+            f'<div class="text-slate-400 text-sm mt-2">peak {_number(best and best["tps"], 1)} tps at '
+            f'{best["threads"] if best else "-"} threads</div>'
+            f'<div class="text-slate-500 text-xs mt-1">{html.escape(knee["reason"]) if knee else ""}</div></div>')
+        rows = []
+        for p in s["points"]:
+            marker = ' class="bg-cyan-500/10 font-bold"' if knee and knee["threads"] == p["threads"] else ""
+            if "error" in p:
+                rows.append(f'<tr{marker}><td class="py-2 px-4">{p["threads"]}</td>'
+                            f'<td class="py-2 px-4 text-rose-400" colspan="4">{html.escape(p["error"])}</td></tr>')
+                continue
+            rows.append(f'<tr{marker}><td class="py-2 px-4">{p["threads"]}</td>'
+                        f'<td class="py-2 px-4">{_number(p.get("tps"), 1)}</td>'
+                        f'<td class="py-2 px-4">{_number(p.get("latency_p95_ms"))}</td>'
+                        f'<td class="py-2 px-4">{_number(p.get("latency_p99_ms"))}</td>'
+                        f'<td class="py-2 px-4">{_number(p.get("errors_per_sec"))}</td></tr>')
+        tables.append(
+            f'<div class="glass p-8 rounded-3xl"><h3 class="text-xl font-bold mb-4 text-blue-400">'
+            f'{html.escape(_label(s))}</h3><table class="w-full text-left text-sm font-mono">'
+            '<thead class="text-slate-500 text-xs uppercase"><tr><th class="py-2 px-4">Threads</th>'
+            '<th class="py-2 px-4">TPS</th><th class="py-2 px-4">p95 ms</th><th class="py-2 px-4">p99 ms</th>'
+            f'<th class="py-2 px-4">Errors/s</th></tr></thead><tbody>{"".join(rows)}</tbody></table></div>')
+    title = title or ", ".join(s["topology"] for s in sweeps)
+    return (REPORT_TEMPLATE
+            .replace("@DATA@", json.dumps(data).replace("</", "<\\/"))
+            .replace("@CARDS@", "".join(cards))
+            .replace("@TABLES@", "\n        ".join(tables))
+            .replace("@DATE@", time.strftime("%Y-%m-%d %H:%M:%S"))
+            .replace("@TITLE@", html.escape(title)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find where each topology stops scaling with concurrency.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Sweep the thread count on one or more topologies.")
+    run.add_argument("--topology", action="append", choices=sorted(TARGETS), help="Topology to sweep, repeatable (default: standalone).")
+    run.add_argument("--driver", choices=["sysbench", "loadgen"], default="sysbench", help="Workload driver (default: sysbench).")
+    run.add_argument("--profile", choices=sorted(PROFILES), default="standard", help="sysbench profile (default: standard).")
+    run.add_argument("--workload", default="employees", help="Load generator workload (default: employees).")
+    run.add_argument("--threads", help="Comma-separated thread counts (default: powers of two up to --max-threads).")
+    run.add_argument("--max-threads", type=int, default=MAX_THREADS, help=f"Highest thread count (default: {MAX_THREADS}).")
+    run.add_argument("--time", type=int, default=DEFAULT_TIME, help=f"Measured seconds per step (default: {DEFAULT_TIME}).")
+    run.add_argument("--warmup", type=int, default=5, help="Warm-up seconds per step (default: 5).")
+    run.add_argument("--trials", type=int, default=1, help="sysbench trials per step (default: 1).")
+    run.add_argument("--min-gain", type=float, default=MIN_GAIN, help=f"Throughput gain below which a step is flat (default: {MIN_GAIN}).")
+    run.add_argument("--latency-factor", type=float, default=LATENCY_FACTOR, help=f"p95 growth marking the knee (default: {LATENCY_FACTOR}).")
+    run.add_argument("--stop-on-knee", action="store_true", help="Stop a sweep at the first step past its knee.")
+    run.add_argument("--prepare", action="store_true", help="Recreate the sysbench tables of each topology first.")
+    run.add_argument("--host", help="Override the host of the topology endpoint.")
+    run.add_argument("--port", type=int, help="Override the port of the topology endpoint.")
+    run.add_argument("--password", help="Database password (default: $DB_ROOT_PASSWORD or rootpass).")
+    run.add_argument("--sysbench", default="sysbench", help="sysbench command, possibly prefixed (default: sysbench).")
+    run.add_argument("--output", help="Write the sweeps as JSON to this file.")
+    run.add_argument("--html", help="Write the comparison report to this file.")
+    run.add_argument("--verbose", action="store_true", help="Echo the sysbench output.")
+    report = commands.add_parser("report", help="Compare saved sweeps in one HTML report.")
+    report.add_argument("files", nargs="+", help="JSON files written by `run --output`.")
+    report.add_argument("--html", required=True, help="Report file to write.")
+    report.add_argument("--title", help="Report subtitle (default: the topologies).")
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        try:
+            sweeps = load_sweeps(args.files)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"Cannot read the sweeps: {e}")
+        with open(args.html, "w") as f:
+            f.write(render_html(sweeps, args.title))
+        print(f"📊 Report written to {args.html}")
+        return 0
+
+    try:
+        steps = ([int(t) for t in args.threads.split(",")] if args.threads else thread_steps(1, args.max_threads))
+    except ValueError:
+        parser.error("--threads takes comma-separated integers")
+    if not steps or min(steps) < 1:
+        parser.error("Thread counts must be at least 1")
+    if args.trials < 1:
+        parser.error("--trials must be at least 1")
+    if args.time <= 0 or args.warmup < 0:
+        parser.error("--time must be positive and --warmup not negative")
+    steps = sorted(set(steps))
+    workload = None
+    if args.driver == "loadgen":
+        from bench.loadgen import LoadError
+        from bench.workloads import load_workload
+        try:
+            workload = load_workload(args.workload)
+        except ValueError as e:
+            parser.error(str(e))
+        errors = (LoadError,)
+    else:
+        errors = (BenchError,)
+
+    sweeps = []
+    for topology in args.topology or ["standalone"]:
+        target = resolve(topology, args.host, args.port, password=args.password)
+        print(f"🔁 {topology}: {', '.join(map(str, steps))} threads, {args.time}s per step")
+        if args.driver == "loadgen":
+            measure = loadgen_step(target, workload, args.time, args.warmup, seed=1)
+        else:
+            if args.prepare:
+                try:
+                    recreate_database(target)
+                    run_sysbench(build_command(target, "prepare", args.profile, sysbench=args.sysbench),
+                                 echo=args.verbose)
+                except BenchError as e:
+                    print(f"❌ {topology}: {e}", file=sys.stderr)
+                    sweeps.append({"topology": topology, "driver": args.driver, "profile": args.profile,
+                                   "points": [{"threads": steps[0], "error": str(e)}], "knee": None})
+                    continue
+            measure = sysbench_step(target, args.profile, args.time, args.warmup, args.trials, args.sysbench,
+                                    args.verbose)
+        points, knee = sweep(measure, steps, args.min_gain, args.latency_factor, args.stop_on_knee, errors)
+        best = peak(points)
+        print(f"   {'saturation at ' + str(knee['threads']) + ' threads' if knee else 'no saturation found'}"
+              f"{', peak ' + format(best['tps'], '.1f') + ' tps at ' + str(best['threads']) + ' threads' if best else ''}")
+        sweeps.append({
+            "tool": "sweep", "driver": args.driver,
+            **{k: target[k] for k in ("topology", "kind", "via", "host", "port")},
+            "profile": args.profile if args.driver == "sysbench" else None,
+            "workload": workload.get("name") if workload else None,
+            "time": args.time, "warmup": args.warmup, "min_gain": args.min_gain,
+            "latency_factor": args.latency_factor, "points": points, "knee": knee, "peak": best,
+        })
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"sweeps": sweeps}, f, indent=2)
+    if args.html:
+        with open(args.html, "w") as f:
+            f.write(render_html(sweeps))
+        print(f"📊 Report written to {args.html}")
+    return 0 if all(peak(s["points"]) for s in sweeps) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
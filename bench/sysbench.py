@@ -0,0 +1,301 @@
+"""sysbench OLTP benchmarks against any lab topology, with results as JSON.
+
+The profiles are those of tests/test_perf_*.sh (light, standard, read,
+write). sysbench runs on this host against the published endpoint of the
+topology (see bench/targets.py), or through any command prefix given with
+`--sysbench` (e.g. `docker exec -i mariadb-galera_01-1 sysbench` together
+with `--host`/`--port`).
+
+A run reports every `--report-interval` seconds and ends with a latency
+histogram; `parse_output` turns both into per-interval TPS/QPS/latency and a
+summary with p95 and p99 computed from the histogram. `--warmup` seconds run
+first with statistics disabled (sysbench `--warmup-time`), so that cold
+caches do not weigh on the results. `--trials N` repeats the run and
+reports the mean of each metric with its 95% confidence interval. `--lag`
+samples the replication lag of the topology nodes during the trials
+(bench/lag.py) and aligns it with the per-interval TPS.
+
+Usage: python3 -m bench.sysbench prepare --topology galera --profile light
+       python3 -m bench.sysbench run --topology galera --profile light --threads 8 --warmup 10 --trials 3 --output reports/bench-galera.json
+       python3 -m bench.sysbench cleanup --topology galera --profile light
+       python3 -m bench.sysbench parse perf_raw_galera_20250101_120000.txt
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+
+from bench.lag import (LagError, add_lag_arguments, attach as attach_lag, format_summary as format_lag, lag_nodes,
+                       sample_during)
+from bench.stats import bucket_percentile, confidence_interval
+from bench.targets import TARGETS, resolve
+from dblab.loader import host_client
+
+DB_NAME = "sbtest"
+DEFAULT_THREADS = 4
+REPORT_INTERVAL = 1
+PERCENTILE = 95
+
+PROFILES = {
+    "light": {"script": "oltp_read_write", "tables": 1, "table_size": 1000, "time": 10},
+    "standard": {"script": "oltp_read_write", "tables": 1, "table_size": 100000, "time": 60},
+    "read": {"script": "oltp_read_only", "tables": 1, "table_size": 100000, "time": 60},
+    "write": {"script": "oltp_write_only", "tables": 1, "table_size": 100000, "time": 60},
+}
+
+# Metrics summarized across trials
+METRICS = ("tps", "qps", "latency_avg_ms", "latency_p95_ms", "latency_p99_ms", "errors_per_sec")
+
+_INTERVAL = re.compile(
+    r"^\[\s*([\d.]+)s\s*\]\s+thds:\s*(\d+)\s+tps:\s*([\d.]+)\s+qps:\s*([\d.]+)\s+"
+    r"\(r/w/o:\s*([\d.]+)/([\d.]+)/([\d.]+)\)\s+lat\s+\(ms,(\d+)%\):\s*([\d.]+)\s+"
+    r"err/s:\s*([\d.]+)\s+reconn/s:\s*([\d.]+)", re.M)
+_SUMMARY = [
+    ("reads", r"^\s*read:\s+(\d+)\s*$"),
+    ("writes", r"^\s*write:\s+(\d+)\s*$"),
+    ("other", r"^\s*other:\s+(\d+)\s*$"),
+    ("transactions", r"^\s*transactions:\s+(\d+)\s+\("),
+    ("tps", r"^\s*transactions:\s+\d+\s+\(([\d.]+) per sec\.\)"),
+    ("queries", r"^\s*queries:\s+(\d+)\s+\("),
+    ("qps", r"^\s*queries:\s+\d+\s+\(([\d.]+) per sec\.\)"),
+    ("errors", r"^\s*ignored errors:\s+(\d+)"),
+    ("errors_per_sec", r"^\s*ignored errors:\s+\d+\s+\(([\d.]+) per sec\.\)"),
+    ("reconnects", r"^\s*reconnects:\s+(\d+)"),
+    ("time_s", r"^\s*total time:\s+([\d.]+)s"),
+    ("events", r"^\s*total number of events:\s+(\d+)"),
+    ("latency_min_ms", r"^\s*min:\s+([\d.]+)\s*$"),
+    ("latency_avg_ms", r"^\s*avg:\s+([\d.]+)\s*$"),
+    ("latency_max_ms", r"^\s*max:\s+([\d.]+)\s*$"),
+]
+_SUMMARY = [(name, re.compile(pattern, re.M)) for name, pattern in _SUMMARY]
+_COUNTS = {"reads", "writes", "other", "transactions", "queries", "errors", "reconnects", "events"}
+_PERCENTILE = re.compile(r"^\s*(\d+)th percentile:\s+([\d.]+)\s*$", re.M)
+_HISTOGRAM_ROW = re.compile(r"^\s*([\d.]+)\s+\|\**\s+(\d+)\s*$")
+
+
+class BenchError(Exception):
+    """sysbench failed or printed no result."""
+
+
+def build_command(target, action, profile="light", threads=DEFAULT_THREADS, duration=None, warmup=0,
+                  report_interval=REPORT_INTERVAL, percentile=PERCENTILE, db=DB_NAME, sysbench="sysbench",
+                  extra=()):
+    """sysbench argv for `action` (prepare, run or cleanup) against a `bench.targets.resolve` target."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r}, expected one of {', '.join(PROFILES)}")
+    spec = PROFILES[profile]
+    port = target["port"] if action == "run" else target["prepare_port"]
+    argv = shlex.split(sysbench) + [spec["script"]]
+    if target["kind"] == "postgres":
+        argv += ["--db-driver=pgsql", f"--pgsql-host={target['host']}", f"--pgsql-port={port}",
+                 f"--pgsql-user={target['user']}", f"--pgsql-password={target['password']}", f"--pgsql-db={db}"]
+    else:
+        argv += ["--db-driver=mysql", f"--mysql-host={target['host']}", f"--mysql-port={port}",
+                 f"--mysql-user={target['user']}", f"--mysql-password={target['password']}", f"--mysql-db={db}"]
+    argv += [f"--tables={spec['tables']}", f"--table-size={spec['table_size']}"]
+    if action == "run":
+        argv += [f"--threads={threads}", f"--time={duration or spec['time']}", f"--report-interval={report_interval}",
+                 f"--percentile={percentile}", "--histogram=on"]
+        if warmup:
+            argv.append(f"--warmup-time={warmup}")
+    else:
+        argv.append("--threads=1")
+    return argv + list(extra) + [action]
+
+
+def recreate_database(target, db=DB_NAME, client="mariadb"):
+    """Drop and create the benchmark database on the prepare port, as the shell tests do."""
+    if target["kind"] == "postgres":
+        command = ["env", f"PGPASSWORD={target['password']}", "psql", "-h", target["host"],
+                   "-p", str(target["prepare_port"]), "-U", target["user"], "-v", "ON_ERROR_STOP=1"]
+        statements = [f"DROP DATABASE IF EXISTS {db}", f"CREATE DATABASE {db}"]
+        argv_list = [command + ["-c", statement] for statement in statements]
+    else:
+        command = host_client(target["host"], target["prepare_port"], target["password"], client=client,
+                              user=target["user"])
+        argv_list = [command + ["-e", f"DROP DATABASE IF EXISTS {db}; CREATE DATABASE {db};"]]
+    for argv in argv_list:
+        result = subprocess.run(argv, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise BenchError(f"Cannot recreate database {db}: {result.stderr.strip()}")
+
+
+def parse_output(text):
+    """Per-interval figures, summary and histogram percentiles of one sysbench run output."""
+    intervals = []
+    for m in _INTERVAL.finditer(text):
+        intervals.append({
+            "time": float(m.group(1)), "threads": int(m.group(2)), "tps": float(m.group(3)),
+            "qps": float(m.group(4)), "reads_per_sec": float(m.group(5)), "writes_per_sec": float(m.group(6)),
+            "other_per_sec": float(m.group(7)), f"latency_p{m.group(8)}_ms": float(m.group(9)),
+            "errors_per_sec": float(m.group(10)), "reconnects_per_sec": float(m.group(11)),
+        })
+    summary = {}
+    for name, pattern in _SUMMARY:
+        values = pattern.findall(text)
+        if values:
+            summary[name] = int(values[-1]) if name in _COUNTS else float(values[-1])
+    for pct, value in _PERCENTILE.findall(text):
+        summary[f"latency_p{pct}_ms"] = float(value)
+    buckets = []
+    if "Latency histogram" in text:
+        for line in text.split("Latency histogram", 1)[1].splitlines():
+            m = _HISTOGRAM_ROW.match(line)
+            if m:
+                buckets.append((float(m.group(1)), int(m.group(2))))
+    if buckets:
+        for pct in (50, 95, 99):
+            summary[f"latency_p{pct}_ms"] = bucket_percentile(buckets, pct)
+    return {"intervals": intervals, "summary": summary, "histogram": buckets}
+
+
+def run_sysbench(argv, echo=True):
+    """Run sysbench, echoing its output as it comes; return the output or raise BenchError."""
+    try:
+        process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                   errors="replace")
+    except OSError as e:
+        raise BenchError(f"Cannot run {argv[0]}: {e}") from None
+    lines = []
+    for line in process.stdout:
+        lines.append(line)
+        if echo:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+    if process.wait() != 0:
+        raise BenchError(f"sysbench exited with code {process.returncode}: {''.join(lines[-5:]).strip()}")
+    return "".join(lines)
+
+
+def summarize(trials):
+    """{metric: confidence interval} of the summaries of several trials."""
+    return {metric: confidence_interval([trial["summary"].get(metric) for trial in trials]) for metric in METRICS}
+
+
+def run_trials(target, profile="light", threads=DEFAULT_THREADS, duration=None, warmup=0, trials=1,
+               report_interval=REPORT_INTERVAL, percentile=PERCENTILE, sysbench="sysbench", extra=(), echo=True,
+               raw_prefix=None):
+    """Run `trials` sysbench runs; return the JSON-ready result with every trial and their summary.
+
+    With `raw_prefix` the raw output of trial N is also kept in
+    `<raw_prefix>.trialN.txt`.
+    """
+    argv = build_command(target, "run", profile, threads, duration, warmup, report_interval, percentile,
+                         sysbench=sysbench, extra=extra)
+    results = []
+    for number in range(1, trials + 1):
+        started = time.time()
+        output = run_sysbench(argv, echo=echo)
+        if raw_prefix:
+            with open(f"{raw_prefix}.trial{number}.txt", "w") as f:
+                f.write(output)
+        parsed = parse_output(output)
+        if "tps" not in parsed["summary"]:
+            raise BenchError(f"Trial {number}: no sysbench summary in the output")
+        results.append({"trial": number, "started": started, **parsed})
+    return {
+        "tool": "sysbench",
+        **{k: target[k] for k in ("topology", "kind", "via", "host", "port")},
+        "profile": profile, "script": PROFILES[profile]["script"], "threads": threads,
+        "time": duration or PROFILES[profile]["time"], "warmup": warmup, "percentile": percentile,
+        "trials": results, "summary": summarize(results),
+    }
+
+
+def format_summary(result):
+    lines = [f"{result['topology']} via {result['via']} ({result['host']}:{result['port']}), {result['script']}, "
+             f"{result['threads']} threads, {len(result['trials'])} trial(s) of {result['time']}s "
+             f"after {result['warmup']}s warm-up"]
+    for metric, ci in result["summary"].items():
+        if ci["n"]:
+            lines.append(f"   {metric:<16} {ci['mean']:>12.2f}  95% CI [{ci['ci_low']:.2f}, {ci['ci_high']:.2f}]  "
+                         f"n={ci['n']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run sysbench OLTP workloads against a lab topology.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for action in ("prepare", "run", "cleanup"):
+        sub = commands.add_parser(action, help=f"sysbench {action}.")
+        sub.add_argument("--topology", choices=sorted(TARGETS), default="standalone", help="Topology to benchmark (default: standalone).")
+        sub.add_argument("--profile", choices=sorted(PROFILES), default="light", help="Workload profile (default: light).")
+        sub.add_argument("--host", help="Override the host of the topology endpoint.")
+        sub.add_argument("--port", type=int, help="Override the port of the topology endpoint.")
+        sub.add_argument("--user", help="Database user (default: root, postgres for PostgreSQL).")
+        sub.add_argument("--password", help="Database password (default: $DB_ROOT_PASSWORD or rootpass).")
+        sub.add_argument("--sysbench", default="sysbench", help="sysbench command, possibly prefixed (default: sysbench).")
+        if action == "prepare":
+            sub.add_argument("--client", default="mariadb", help="Client used to recreate the database (default: mariadb).")
+        if action == "run":
+            sub.add_argument("--threads", type=int, default=DEFAULT_THREADS, help=f"Client threads (default: {DEFAULT_THREADS}).")
+            sub.add_argument("--time", type=int, help="Measured seconds per trial (default: the profile's).")
+            sub.add_argument("--warmup", type=int, default=0, help="Seconds run before each trial with statistics off (default: 0).")
+            sub.add_argument("--trials", type=int, default=1, help="Number of runs (default: 1).")
+            sub.add_argument("--report-interval", type=int, default=REPORT_INTERVAL, help=f"Seconds between interval reports (default: {REPORT_INTERVAL}).")
+            sub.add_argument("--percentile", type=int, default=PERCENTILE, help=f"Latency percentile of the interval reports (default: {PERCENTILE}).")
+            sub.add_argument("--read-only", action="store_true", help="Use the read port of topologies that split reads (repli, innodb).")
+            sub.add_argument("--output", help="Write the result as JSON to this file, with the raw outputs next to it.")
+            sub.add_argument("--quiet", action="store_true", help="Do not echo the sysbench output.")
+            sub.add_argument("--lag", action="store_true", help="Sample the replication lag of the topology nodes during the trials (bench/lag.py).")
+            add_lag_arguments(sub)
+    parse_parser = commands.add_parser("parse", help="Parse saved sysbench run outputs into JSON.")
+    parse_parser.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "parse":
+        results = []
+        for path in args.files:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                results.append({"file": path, **parse_output(f.read())})
+        print(json.dumps(results if len(results) > 1 else results[0], indent=2))
+        return 0
+
+    target = resolve(args.topology, args.host, args.port, args.user, args.password,
+                     read_only=getattr(args, "read_only", False))
+    try:
+        if args.command == "run":
+            if args.trials < 1:
+                parser.error("--trials must be at least 1")
+            raw_prefix = os.path.splitext(args.output)[0] if args.output else None
+            def trials():
+                return run_trials(target, args.profile, args.threads, args.time, args.warmup, args.trials,
+                                  args.report_interval, args.percentile, args.sysbench, echo=not args.quiet,
+                                  raw_prefix=raw_prefix)
+
+            async def in_thread():
+                # sysbench runs in a thread while the sampler polls the nodes on the event loop
+                return await asyncio.get_running_loop().run_in_executor(None, trials)
+
+            async def sampled():
+                return await sample_during(in_thread(), host, ports, target["user"], target["password"],
+                                           args.lag_interval, args.heartbeat, args.heartbeat_table)
+
+            if args.lag:
+                host, ports = lag_nodes(target, args)
+                result = attach_lag(*asyncio.run(sampled()))
+            else:
+                result = trials()
+            if args.output:
+                with open(args.output, "w") as f:
+                    json.dump(result, f, indent=2)
+            print(format_summary(result))
+            if args.lag:
+                print(format_lag(result["lag"]))
+            return 0
+        if args.command == "prepare":
+            recreate_database(target, client=args.client)
+        run_sysbench(build_command(target, args.command, args.profile, sysbench=args.sysbench))
+    except (BenchError, LagError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
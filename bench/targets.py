@@ -0,0 +1,46 @@
+"""SQL endpoints of the lab topologies, as published on the host.
+
+Benchmarks go through the same entry point as applications: Traefik for the
+standalone servers, HAProxy for Galera and replication, the router ports for
+the InnoDB cluster. Schema preparation, which must not be balanced across
+nodes, goes to `prepare_port` (the first node) instead.
+"""
+import os
+
+TARGETS = {
+    "standalone": {"kind": "mysql", "host": "127.0.0.1", "port": 3306, "prepare_port": 3306, "via": "traefik",
+                   "nodes": []},
+    "postgres": {"kind": "postgres", "host": "127.0.0.1", "port": 5432, "prepare_port": 5432, "via": "traefik",
+                 "nodes": []},
+    "galera": {"kind": "mysql", "host": "127.0.0.1", "port": 3306, "prepare_port": 3511, "via": "haproxy_galera",
+               "nodes": [3511, 3512, 3513]},
+    "repli": {"kind": "mysql", "host": "127.0.0.1", "port": 3406, "read_port": 3407, "prepare_port": 3411,
+              "via": "haproxy_repli", "nodes": [3411, 3412, 3413]},
+    "innodb": {"kind": "mysql", "host": "127.0.0.1", "port": 6446, "read_port": 6447, "prepare_port": 4411,
+               "via": "router", "nodes": [4411, 4412, 4413]},
+}
+
+DEFAULT_USER = {"mysql": "root", "postgres": "postgres"}
+
+
+def resolve(topology, host=None, port=None, user=None, password=None, read_only=False):
+    """Connection settings of `topology`, with overrides; raise ValueError on unknown topologies.
+
+    `read_only` picks the read port of topologies that split reads from
+    writes. The password defaults to DB_ROOT_PASSWORD, as in the shell tests.
+    """
+    if topology not in TARGETS:
+        raise ValueError(f"Unknown topology {topology!r}, expected one of {', '.join(TARGETS)}")
+    spec = TARGETS[topology]
+    default_port = spec.get("read_port", spec["port"]) if read_only else spec["port"]
+    return {
+        "topology": topology,
+        "kind": spec["kind"],
+        "via": spec["via"],
+        "host": host or spec["host"],
+        "port": port or default_port,
+        "prepare_port": port or spec["prepare_port"],
+        "nodes": [] if host or port else list(spec["nodes"]),
+        "user": user or DEFAULT_USER[spec["kind"]],
+        "password": password if password is not None else os.environ.get("DB_ROOT_PASSWORD", "rootpass"),
+    }
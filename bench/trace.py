@@ -0,0 +1,339 @@
+"""Workload capture from performance_schema into a compact trace file (replayed by bench/replay.py).
+
+Two sources:
+
+- `history` (default): statements are drained from
+  `events_statements_history_long` every `--interval` seconds while the
+  application runs. The table is a ring buffer written at the end of each
+  statement, so each poll reads the rows that ended after the previous one
+  (with a small overlap, de-duplicated on THREAD_ID/EVENT_ID). Every
+  top-level statement keeps its session, start time, server latency, rows
+  and full text, so a replay can reproduce the sessions and their timing.
+  When the ring wrapped between two polls the capture says so.
+- `digest`: two snapshots of `events_statements_summary_by_digest`, taken
+  `--duration` seconds apart; the trace holds, per digest, the executions
+  and mean latency of the window with a sample statement
+  (QUERY_SAMPLE_TEXT, MySQL 8.0 only). No per-session timing: a replay
+  spreads the executions evenly over the window.
+
+The statement history consumer is off by default in MySQL; conf/pfs.cnf
+turns it on for the lab servers and the capture enables it if needed. The
+capture session itself is excluded.
+
+A trace is gzip-compressed JSON lines: a header object, one {"d": digest,
+"text": ...} object per digest, then one array per statement with the
+fields of EVENT_FIELDS (times in microseconds from the capture start).
+
+Usage: python3 -m bench.trace capture --topology standalone --duration 60 --schema employees --output reports/employees.trace.gz
+       python3 -m bench.trace capture --source digest --duration 300 --output reports/digests.trace.gz
+       python3 -m bench.trace show reports/employees.trace.gz
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+
+from bench.mysqlwire import MySQLError, connect, literal
+from bench.targets import TARGETS, resolve
+
+TRACE_FORMAT = 1
+EVENT_FIELDS = ("start_us", "session", "event_id", "schema", "digest", "latency_us", "rows_sent", "errors", "sql",
+                "truncated")
+DEFAULT_INTERVAL = 1.0
+# Rows ending up to this long before the last seen end are read again (and de-duplicated)
+OVERLAP_PS = 10 ** 12
+CONSUMER = "events_statements_history_long"
+
+HISTORY_QUERY = (
+    "SELECT THREAD_ID, EVENT_ID, TIMER_START, TIMER_END, TIMER_WAIT, CURRENT_SCHEMA, DIGEST, DIGEST_TEXT, "
+    "SQL_TEXT, ROWS_SENT, ERRORS FROM performance_schema.events_statements_history_long "
+    "WHERE TIMER_END > {since} AND THREAD_ID <> {own} AND SQL_TEXT IS NOT NULL "
+    "AND EVENT_NAME LIKE 'statement/sql/%' "
+    "AND (NESTING_EVENT_TYPE IS NULL OR NESTING_EVENT_TYPE = 'TRANSACTION'){schemas} ORDER BY TIMER_END")
+DIGEST_QUERY = (
+    "SELECT SCHEMA_NAME, DIGEST, DIGEST_TEXT, COUNT_STAR, SUM_TIMER_WAIT, SUM_ROWS_SENT, SUM_ERRORS{sample} "
+    "FROM performance_schema.events_statements_summary_by_digest WHERE DIGEST IS NOT NULL{schemas}")
+
+
+class TraceError(Exception):
+    """The capture cannot run (performance_schema off, privileges) or the trace is unreadable."""
+
+
+class TraceWriter:
+    """Streams a trace: header first, each digest text once, then the statements."""
+
+    def __init__(self, path, header):
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self.digests = set()
+        self.events = 0
+        self._line({"trace": TRACE_FORMAT, **header})
+
+    def _line(self, value):
+        self.file.write(json.dumps(value, separators=(",", ":")) + "\n")
+
+    def digest(self, digest, text, **stats):
+        if digest not in self.digests or stats:
+            self.digests.add(digest)
+            self._line({"d": digest, "text": text, **stats})
+
+    def event(self, event):
+        self._line([event[field] for field in EVENT_FIELDS])
+        self.events += 1
+
+    def close(self, **footer):
+        self._line({"end": True, "events": self.events, **footer})
+        self.file.close()
+
+
+def read_trace(path):
+    """{"header", "digests": {digest: {...}}, "events": [dict], "footer"} of a trace file."""
+    trace = {"header": None, "digests": {}, "events": [], "footer": {}}
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                value = json.loads(line)
+                if isinstance(value, list):
+                    trace["events"].append(dict(zip(EVENT_FIELDS, value)))
+                elif "trace" in value:
+                    trace["header"] = value
+                elif "d" in value:
+                    trace["digests"][value["d"]] = value
+                elif value.get("end"):
+                    trace["footer"] = value
+    except (OSError, EOFError, ValueError) as e:
+        raise TraceError(f"Cannot read trace {path}: {e}") from None
+    if not trace["header"] or trace["header"]["trace"] != TRACE_FORMAT:
+        raise TraceError(f"{path} is not a trace file (format {TRACE_FORMAT})")
+    return trace
+
+
+def _int(value):
+    return int(value) if value not in (None, "") else 0
+
+
+def _schema_filter(column, schemas):
+    return f" AND {column} IN ({', '.join(literal(s) for s in schemas)})" if schemas else ""
+
+
+async def _value(query, sql):
+    rows = (await query(sql))["rows"]
+    return rows[0][0] if rows else None
+
+
+async def prepare_history(query, log=print):
+    """Check performance_schema and enable the long statement history; return (own thread id, text limit, timer)."""
+    if str(await _value(query, "SELECT @@performance_schema")) not in ("1", "ON"):
+        raise TraceError("performance_schema is OFF (see conf/pfs.cnf)")
+    enabled = await _value(query, f"SELECT ENABLED FROM performance_schema.setup_consumers WHERE NAME = '{CONSUMER}'")
+    if enabled != "YES":
+        log(f"⚙️  Enabling the {CONSUMER} consumer (statements before this point were not recorded)")
+        await query(f"UPDATE performance_schema.setup_consumers SET ENABLED = 'YES' WHERE NAME = '{CONSUMER}'")
+    own = _int(await _value(query, "SELECT THREAD_ID FROM performance_schema.threads "
+                                   "WHERE PROCESSLIST_ID = CONNECTION_ID()"))
+    limit = _int(await _value(query, "SELECT @@performance_schema_max_sql_text_length"))
+    # TIMER_START of the running statement is the current performance_schema time
+    now = _int(await _value(query, "SELECT TIMER_START FROM performance_schema.events_statements_current "
+                                   f"WHERE THREAD_ID = {own}"))
+    return own, limit, now
+
+
+class HistoryDrain:
+    """Turns successive reads of the history ring into new statements, once each."""
+
+    def __init__(self, own, base_ps, text_limit):
+        self.own = own
+        self.base = base_ps
+        self.last_end = base_ps
+        self.text_limit = text_limit
+        self.seen = {}
+        self.wrapped = 0
+
+    def sql(self, schemas=()):
+        return HISTORY_QUERY.format(since=max(0, self.last_end - OVERLAP_PS), own=self.own,
+                                    schemas=_schema_filter("CURRENT_SCHEMA", schemas))
+
+    def check_wrap(self, oldest_end):
+        """Count a wrap when the oldest row left in the ring ended after the last one read."""
+        if oldest_end is not None and _int(oldest_end) > self.last_end:
+            self.wrapped += 1
+            return True
+        return False
+
+    def feed(self, rows):
+        """New statements (dicts with EVENT_FIELDS plus "digest_text") among `rows` of HISTORY_QUERY."""
+        events = []
+        for thread, event_id, start, end, wait, schema, digest, digest_text, sql, rows_sent, errors in rows:
+            key = (thread, event_id)
+            end = _int(end)
+            if key in self.seen or end <= self.base:
+                continue
+            self.seen[key] = end
+            self.last_end = max(self.last_end, end)
+            events.append({
+                "start_us": max(0, (_int(start) - self.base) // 10 ** 6), "session": _int(thread),
+                "event_id": _int(event_id), "schema": schema, "digest": digest, "digest_text": digest_text,
+                "latency_us": _int(wait) // 10 ** 6, "rows_sent": _int(rows_sent), "errors": _int(errors),
+                "sql": sql, "truncated": bool(self.text_limit and len(sql.encode()) >= self.text_limit),
+            })
+        horizon = self.last_end - OVERLAP_PS
+        self.seen = {key: end for key, end in self.seen.items() if end >= horizon}
+        return sorted(events, key=lambda e: e["start_us"])
+
+
+async def capture_history(query, writer, duration, interval=DEFAULT_INTERVAL, schemas=(), log=print, clock=time.monotonic):
+    """Drain the statement history into `writer` for `duration` seconds; return the capture statistics."""
+    own, limit, now = await prepare_history(query, log)
+    drain = HistoryDrain(own, now, limit)
+    deadline = clock() + duration
+    polls = 0
+    while True:
+        oldest = await _value(query, "SELECT MIN(TIMER_END) FROM performance_schema.events_statements_history_long")
+        if drain.check_wrap(oldest):
+            log("⚠️  The history ring wrapped between two polls: statements were lost "
+                "(lower --interval or raise performance_schema_events_statements_history_long_size)")
+        for event in drain.feed((await query(drain.sql(schemas)))["rows"]):
+            if event["digest"]:
+                writer.digest(event["digest"], event["digest_text"])
+            writer.event(event)
+        polls += 1
+        remaining = deadline - clock()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(interval, remaining))
+    return {"polls": polls, "wraps": drain.wrapped, "events": writer.events, "text_limit": limit}
+
+
+def _digest_rows(rows, with_sample):
+    table = {}
+    for row in rows:
+        schema, digest, text, count, total, rows_sent, errors = row[:7]
+        table[(schema, digest)] = {"schema": schema, "text": text, "count": _int(count), "total_ps": _int(total),
+                                   "rows_sent": _int(rows_sent), "errors": _int(errors),
+                                   "sample": row[7] if with_sample else None}
+    return table
+
+
+def _digest_key(key):
+    """Trace key of a digest row: the digest, prefixed by its schema as the same digest may run in several."""
+    schema, digest = key
+    return f"{schema}:{digest}" if schema else digest
+
+
+async def capture_digests(query, writer, duration, schemas=(), log=print):
+    """Write the per-digest executions of the next `duration` seconds into `writer`; return statistics."""
+    if str(await _value(query, "SELECT @@performance_schema")) not in ("1", "ON"):
+        raise TraceError("performance_schema is OFF (see conf/pfs.cnf)")
+    schema_filter = _schema_filter("SCHEMA_NAME", schemas)
+    try:
+        sql = DIGEST_QUERY.format(sample=", QUERY_SAMPLE_TEXT", schemas=schema_filter)
+        before = _digest_rows((await query(sql))["rows"], True)
+    except MySQLError:
+        log("⚠️  No QUERY_SAMPLE_TEXT on this server: digests without a sample cannot be replayed")
+        sql = DIGEST_QUERY.format(sample="", schemas=schema_filter)
+        before = _digest_rows((await query(sql))["rows"], False)
+    await asyncio.sleep(duration)
+    after = _digest_rows((await query(sql))["rows"], "QUERY_SAMPLE_TEXT" in sql)
+    digests = 0
+    for key, stats in after.items():
+        previous = before.get(key, {"count": 0, "total_ps": 0, "rows_sent": 0, "errors": 0})
+        count = stats["count"] - previous["count"]
+        if count <= 0:
+            continue
+        digests += 1
+        writer.digest(_digest_key(key), stats["text"], schema=stats["schema"], sample=stats["sample"], count=count,
+                      latency_us=(stats["total_ps"] - previous["total_ps"]) // count // 10 ** 6,
+                      rows_sent=stats["rows_sent"] - previous["rows_sent"],
+                      errors=stats["errors"] - previous["errors"])
+    return {"digests": digests}
+
+
+async def capture(target, path, source="history", duration=60, interval=DEFAULT_INTERVAL, schemas=(), log=print):
+    """Capture from `target` (a bench.targets.resolve dict) into the trace file `path`; return statistics."""
+    try:
+        conn = await connect(target["host"], target["port"], target["user"], target["password"])
+    except (MySQLError, OSError, EOFError, asyncio.TimeoutError) as e:
+        raise TraceError(f"Cannot connect to {target['host']}:{target['port']}: {e or e.__class__.__name__}") from None
+    started = time.time()
+    writer = TraceWriter(path, {"source": source, "server": conn.server_version, "topology": target["topology"],
+                                "host": f"{target['host']}:{target['port']}", "started": started,
+                                "duration": duration, "schemas": list(schemas)})
+    try:
+        if source == "digest":
+            stats = await capture_digests(conn.query, writer, duration, schemas, log)
+        else:
+            stats = await capture_history(conn.query, writer, duration, interval, schemas, log)
+    except MySQLError as e:
+        raise TraceError(f"Capture failed: {e}") from None
+    finally:
+        writer.close(elapsed=round(time.time() - started, 3))
+        await conn.close()
+    return stats
+
+
+def format_trace(trace, top=10):
+    header, events = trace["header"], trace["events"]
+    lines = [f"{header['source']} trace of {header.get('topology')} ({header.get('host')}, {header.get('server')}), "
+             f"{header.get('duration')}s from {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['started']))}"]
+    if header["source"] == "digest":
+        digests = sorted(trace["digests"].values(), key=lambda d: -d.get("count", 0))
+        lines.append(f"   {len(digests)} digests, {sum(d.get('count', 0) for d in digests)} executions")
+        rows = [(d.get("count", 0), d.get("latency_us", 0) / 1000, d["text"]) for d in digests[:top]]
+    else:
+        per_digest = {}
+        for event in events:
+            entry = per_digest.setdefault(event["digest"], [0, 0])
+            entry[0] += 1
+            entry[1] += event["latency_us"]
+        lines.append(f"   {len(events)} statements, {len({e['session'] for e in events})} sessions, "
+                     f"{len(per_digest)} digests, {sum(e['truncated'] for e in events)} truncated")
+        ranked = sorted(per_digest.items(), key=lambda item: -item[1][1])[:top]
+        rows = [(count, total / count / 1000, trace["digests"].get(digest, {}).get("text") or digest)
+                for digest, (count, total) in ranked]
+    for count, mean_ms, text in rows:
+        lines.append(f"   {count:>8} x {mean_ms:9.3f} ms  {(text or '')[:90]}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Capture the statements of a server from performance_schema.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("capture", help="Record a trace.")
+    run.add_argument("--topology", choices=sorted(k for k, v in TARGETS.items() if v["kind"] == "mysql"),
+                     default="standalone", help="Topology to capture from (default: standalone).")
+    run.add_argument("--source", choices=["history", "digest"], default="history", help="Statement history or digest summary (default: history).")
+    run.add_argument("--duration", type=float, default=60, help="Seconds to capture (default: 60).")
+    run.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help=f"Seconds between history polls (default: {DEFAULT_INTERVAL:g}).")
+    run.add_argument("--schema", action="append", help="Only statements run in this schema (repeatable).")
+    run.add_argument("--host", help="Override the host of the topology endpoint.")
+    run.add_argument("--port", type=int, help="Override the port (e.g. one node: 3511).")
+    run.add_argument("--user", help="Database user (default: root).")
+    run.add_argument("--password", help="Database password (default: $DB_ROOT_PASSWORD or rootpass).")
+    run.add_argument("--output", required=True, help="Trace file to write (gzip JSON lines).")
+    show = commands.add_parser("show", help="Summarize a trace.")
+    show.add_argument("trace")
+    show.add_argument("--top", type=int, default=10, help="Digests to list (default: 10).")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "show":
+            print(format_trace(read_trace(args.trace), args.top))
+            return 0
+        if args.duration <= 0 or args.interval <= 0:
+            parser.error("--duration and --interval must be positive")
+        target = resolve(args.topology, args.host, args.port, args.user, args.password)
+        print(f"🎥 Capturing {args.source} from {target['host']}:{target['port']} for {args.duration:g}s...")
+        stats = asyncio.run(capture(target, args.output, args.source, args.duration, args.interval, args.schema or ()))
+    except TraceError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Capture interrupted, {args.output} holds what was read so far")
+        return 130
+    print(f"✅ Trace written to {args.output}: " + ", ".join(f"{k} {v}" for k, v in stats.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
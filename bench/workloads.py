@@ -0,0 +1,207 @@
+"""Weighted query mixes for the load generator (bench/loadgen.py).
+
+A workload names the database it runs in and a list of queries, each with a
+relative weight, SQL with `%(name)s` placeholders (a literal % is written
+%%) and a generator per parameter. A query whose `sql` is a list runs its
+statements in order on one connection, as one transaction when the list
+starts with BEGIN:
+
+    {"name": "payroll", "database": "employees", "queries": [
+        {"name": "salary_range", "weight": 60,
+         "sql": "SELECT emp_no, salary FROM salaries WHERE salary BETWEEN %(low)s AND %(low)s + 1000",
+         "params": {"low": {"int": [40000, 150000]}}},
+        {"name": "title", "weight": 40,
+         "sql": "SELECT COUNT(*) FROM titles WHERE title = %(title)s",
+         "params": {"title": {"choice": ["Engineer", "Staff"]}}}]}
+
+Parameter generators (bounds included):
+
+- {"int": [low, high]}: uniform integer
+- {"float": [low, high]}: uniform number rounded to 2 decimals
+- {"choice": [v1, v2, ...]}: one of the values
+- {"date": ["YYYY-MM-DD", "YYYY-MM-DD"]}: uniform date
+- {"text": length}: random lowercase letters
+
+The built-in `employees` and `sakila` workloads follow the datasets loaded
+by `make inject-employees` and `make inject-sakila`; a JSON file with the
+same structure defines a custom one.
+"""
+import datetime
+import json
+import string
+
+GENERATORS = ("int", "float", "choice", "date", "text")
+
+WORKLOADS = {
+    "employees": {
+        "name": "employees", "database": "employees",
+        "queries": [
+            {"name": "employee_by_pk", "weight": 30,
+             "sql": "SELECT emp_no, first_name, last_name, hire_date FROM employees WHERE emp_no = %(emp_no)s",
+             "params": {"emp_no": {"int": [10001, 499999]}}},
+            {"name": "salary_history", "weight": 20,
+             "sql": "SELECT salary, from_date, to_date FROM salaries WHERE emp_no = %(emp_no)s ORDER BY from_date",
+             "params": {"emp_no": {"int": [10001, 499999]}}},
+            {"name": "salary_range_scan", "weight": 20,
+             "sql": ("SELECT emp_no, salary FROM salaries WHERE salary BETWEEN %(low)s AND %(low)s + 500 "
+                     "AND to_date = '9999-01-01' LIMIT 200"),
+             "params": {"low": {"int": [40000, 150000]}}},
+            {"name": "dept_emp_join", "weight": 15,
+             "sql": ("SELECT e.emp_no, e.last_name, d.dept_name FROM dept_emp de "
+                     "JOIN employees e ON e.emp_no = de.emp_no JOIN departments d ON d.dept_no = de.dept_no "
+                     "WHERE de.dept_no = %(dept_no)s AND de.from_date >= %(since)s ORDER BY de.from_date LIMIT 100"),
+             "params": {"dept_no": {"choice": ["d001", "d002", "d003", "d004", "d005", "d006", "d007", "d008",
+                                               "d009"]},
+                        "since": {"date": ["1985-01-01", "2002-07-31"]}}},
+            {"name": "dept_avg_salary", "weight": 10,
+             "sql": ("SELECT de.dept_no, AVG(s.salary) FROM dept_emp de JOIN salaries s ON s.emp_no = de.emp_no "
+                     "WHERE de.dept_no = %(dept_no)s AND s.from_date BETWEEN %(since)s AND %(since)s + INTERVAL 30 DAY "
+                     "GROUP BY de.dept_no"),
+             "params": {"dept_no": {"choice": ["d001", "d002", "d003", "d004", "d005", "d006", "d007", "d008",
+                                               "d009"]},
+                        "since": {"date": ["1985-01-01", "2002-07-01"]}}},
+            {"name": "title_update", "weight": 5,
+             "sql": ["BEGIN",
+                     "SELECT title, from_date FROM titles WHERE emp_no = %(emp_no)s FOR UPDATE",
+                     "UPDATE employees SET hire_date = hire_date WHERE emp_no = %(emp_no)s",
+                     "COMMIT"],
+             "params": {"emp_no": {"int": [10001, 499999]}}},
+        ],
+    },
+    "sakila": {
+        "name": "sakila", "database": "sakila",
+        "queries": [
+            {"name": "film_by_pk", "weight": 25,
+             "sql": "SELECT film_id, title, rental_rate, length FROM film WHERE film_id = %(film_id)s",
+             "params": {"film_id": {"int": [1, 1000]}}},
+            {"name": "film_actors", "weight": 20,
+             "sql": ("SELECT a.first_name, a.last_name FROM film_actor fa JOIN actor a ON a.actor_id = fa.actor_id "
+                     "WHERE fa.film_id = %(film_id)s"),
+             "params": {"film_id": {"int": [1, 1000]}}},
+            {"name": "customer_rentals", "weight": 20,
+             "sql": ("SELECT r.rental_id, r.rental_date, f.title FROM rental r "
+                     "JOIN inventory i ON i.inventory_id = r.inventory_id JOIN film f ON f.film_id = i.film_id "
+                     "WHERE r.customer_id = %(customer_id)s ORDER BY r.rental_date DESC LIMIT 20"),
+             "params": {"customer_id": {"int": [1, 599]}}},
+            {"name": "category_revenue", "weight": 10,
+             "sql": ("SELECT c.name, SUM(p.amount) FROM payment p JOIN rental r ON r.rental_id = p.rental_id "
+                     "JOIN inventory i ON i.inventory_id = r.inventory_id "
+                     "JOIN film_category fc ON fc.film_id = i.film_id JOIN category c ON c.category_id = fc.category_id "
+                     "WHERE p.payment_date >= %(since)s AND p.payment_date < %(since)s + INTERVAL 7 DAY "
+                     "GROUP BY c.name"),
+             "params": {"since": {"date": ["2005-05-24", "2005-08-23"]}}},
+            {"name": "rental_insert", "weight": 20,
+             "sql": ["BEGIN",
+                     ("INSERT INTO rental (rental_date, inventory_id, customer_id, staff_id) "
+                      "VALUES (NOW(6), %(inventory_id)s, %(customer_id)s, %(staff_id)s)"),
+                     ("INSERT INTO payment (customer_id, staff_id, rental_id, amount, payment_date) "
+                      "VALUES (%(customer_id)s, %(staff_id)s, LAST_INSERT_ID(), %(amount)s, NOW())"),
+                     "COMMIT"],
+             "params": {"inventory_id": {"int": [1, 4581]}, "customer_id": {"int": [1, 599]},
+                        "staff_id": {"int": [1, 2]}, "amount": {"float": [0.99, 11.99]}}},
+            {"name": "rental_return", "weight": 5,
+             "sql": ("UPDATE rental SET return_date = NOW() WHERE customer_id = %(customer_id)s "
+                     "AND return_date IS NULL ORDER BY rental_date LIMIT 1"),
+             "params": {"customer_id": {"int": [1, 599]}}},
+        ],
+    },
+}
+
+
+def validate(workload):
+    """Raise ValueError when `workload` is not a usable query mix."""
+    if not isinstance(workload, dict) or not workload.get("queries"):
+        raise ValueError("A workload needs a non-empty 'queries' list")
+    names = set()
+    for number, query in enumerate(workload["queries"], 1):
+        label = query.get("name") or f"query #{number}"
+        if label in names:
+            raise ValueError(f"Duplicate query name {label!r}")
+        names.add(label)
+        if not isinstance(query.get("weight", 1), (int, float)) or query.get("weight", 1) < 0:
+            raise ValueError(f"{label}: the weight must be a non-negative number")
+        statements = query.get("sql")
+        if isinstance(statements, str):
+            statements = [statements]
+        if not statements or not all(isinstance(s, str) and s.strip() for s in statements):
+            raise ValueError(f"{label}: 'sql' must be a statement or a list of statements")
+        for name, spec in (query.get("params") or {}).items():
+            if not isinstance(spec, dict) or len(spec) != 1 or next(iter(spec)) not in GENERATORS:
+                raise ValueError(f"{label}: parameter {name!r} needs one generator among {', '.join(GENERATORS)}")
+            kind, arg = next(iter(spec.items()))
+            if kind in ("int", "float", "date") and not (isinstance(arg, list) and len(arg) == 2):
+                raise ValueError(f"{label}: {kind} generator of {name!r} needs [low, high]")
+            if kind == "date":
+                try:
+                    [datetime.date.fromisoformat(day) for day in arg]
+                except (TypeError, ValueError):
+                    raise ValueError(f"{label}: date generator of {name!r} needs ISO dates") from None
+            if kind == "choice" and not (isinstance(arg, list) and arg):
+                raise ValueError(f"{label}: choice generator of {name!r} needs a non-empty list")
+            if kind == "text" and not (isinstance(arg, int) and arg > 0):
+                raise ValueError(f"{label}: text generator of {name!r} needs a positive length")
+        for statement in statements:
+            try:
+                statement % {name: "" for name in query.get("params") or {}}
+            except (KeyError, ValueError, TypeError) as e:
+                raise ValueError(f"{label}: placeholder {e} has no parameter (literal % must be written %%)") from None
+    if not sum(query.get("weight", 1) for query in workload["queries"]):
+        raise ValueError("At least one query needs a positive weight")
+
+
+def load_workload(name_or_path):
+    """A built-in workload by name, or the workload of a JSON file; raise ValueError if invalid."""
+    if name_or_path in WORKLOADS:
+        workload = WORKLOADS[name_or_path]
+    else:
+        try:
+            with open(name_or_path) as f:
+                workload = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Unknown workload {name_or_path!r}: not a built-in ({', '.join(WORKLOADS)}) "
+                             "nor a file") from None
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{name_or_path}: invalid JSON ({e})") from None
+        if isinstance(workload, dict):
+            workload.setdefault("name", name_or_path)
+    validate(workload)
+    return workload
+
+
+def _generator(spec):
+    kind, arg = next(iter(spec.items()))
+    if kind == "int":
+        return lambda rng: rng.randint(arg[0], arg[1])
+    if kind == "float":
+        return lambda rng: round(rng.uniform(arg[0], arg[1]), 2)
+    if kind == "choice":
+        return lambda rng: rng.choice(arg)
+    if kind == "date":
+        low, high = (datetime.date.fromisoformat(day).toordinal() for day in arg)
+        return lambda rng: datetime.date.fromordinal(rng.randint(low, high))
+    return lambda rng: "".join(rng.choices(string.ascii_lowercase, k=arg))
+
+
+class QueryMix:
+    """Draws (query name, statements) pairs from a validated workload with a `random.Random`."""
+
+    def __init__(self, workload, rng):
+        self.rng = rng
+        self.queries = []
+        cumulative = 0
+        self.cum_weights = []
+        for query in workload["queries"]:
+            statements = query["sql"] if isinstance(query["sql"], list) else [query["sql"]]
+            generators = {name: _generator(spec) for name, spec in (query.get("params") or {}).items()}
+            self.queries.append((query.get("name") or f"query #{len(self.queries) + 1}", statements, generators))
+            cumulative += query.get("weight", 1)
+            self.cum_weights.append(cumulative)
+
+    @property
+    def names(self):
+        return [name for name, _, _ in self.queries]
+
+    def draw(self):
+        """(name, statements, params) of the next query."""
+        name, statements, generators = self.rng.choices(self.queries, cum_weights=self.cum_weights)[0]
+        return name, statements, {param: generate(self.rng) for param, generate in generators.items()}
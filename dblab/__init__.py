@@ -0,0 +1,15 @@
+"""Helper modules used by mysql_docker.py and the Makefile targets."""
+
+# Labels put on every container launched by mysql_docker.py
+LABEL_PREFIX = "io.multi-db-docker-env"
+MANAGED_LABEL = f"{LABEL_PREFIX}.managed"
+
+
+def managed_labels(env_name, db_type, version):
+    """Labels identifying a container launched by mysql_docker.py."""
+    return {
+        MANAGED_LABEL: "true",
+        f"{LABEL_PREFIX}.env": env_name,
+        f"{LABEL_PREFIX}.db_type": db_type,
+        f"{LABEL_PREFIX}.version": version,
+    }
@@ -0,0 +1,231 @@
+"""Event-driven container state for `mysql_docker.py watch`.
+
+The watcher seeds an in-memory state table with one inventory call, then
+follows the Docker events stream (server-side filtered on the managed label)
+and prints one JSON object per state change on stdout. When a container
+starts, its published database port is probed in the background (see
+dblab.probe) and a "ready" (or "unready") line follows, so scripts wait for
+usable databases instead of polling `docker ps`.
+"""
+import json
+import sys
+import threading
+import time
+
+from dblab import LABEL_PREFIX, MANAGED_LABEL
+from dblab.pool import POOL_ENV, POOL_LABEL, POOL_NAME_PREFIX
+from dblab.probe import wait_ready
+
+# Container port -> probe kind, in order of preference
+PROBED_PORTS = (("3306/tcp", "mysql"), ("5432/tcp", "postgres"), ("27017/tcp", "mongodb"))
+
+STATUS_BY_ACTION = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "destroy": "removed",
+}
+
+RECONNECT_DELAY = 2.0
+
+
+def _probe_target(ports):
+    """Return (kind, host port) of the first published database port in a `Ports` list or mapping."""
+    if isinstance(ports, dict):  # inspect format: {"3306/tcp": [{"HostPort": "20001"}]}
+        for container_port, kind in PROBED_PORTS:
+            bindings = ports.get(container_port)
+            if bindings:
+                return kind, int(bindings[0]["HostPort"])
+        return None, None
+    for container_port, kind in PROBED_PORTS:  # list format of the containers endpoint
+        number = int(container_port.split("/")[0])
+        for entry in ports or []:
+            if entry.get("PrivatePort") == number and entry.get("PublicPort"):
+                return kind, entry["PublicPort"]
+    return None, None
+
+
+def _env(name, labels):
+    """Environment of a container: its env label, or its name once a pool member has been claimed."""
+    env = labels.get(f"{LABEL_PREFIX}.env")
+    if POOL_LABEL in labels and env == POOL_ENV:
+        return None if not name or name.startswith(POOL_NAME_PREFIX) else name
+    return env
+
+
+class StateTable:
+    """Container rows keyed by full id, updated from inventory entries and events."""
+
+    def __init__(self):
+        self.rows = {}
+
+    @staticmethod
+    def _row(container_id, name, image, labels, status):
+        return {
+            "id": container_id[:12],
+            "name": name,
+            "image": image,
+            "env": _env(name, labels),
+            "status": status,
+            "health": None,
+            "exit_code": None,
+            "kind": None,
+            "port": None,
+            "ready": None,
+        }
+
+    def seed(self, entries):
+        """Load rows from low-level `containers` API entries; return the rows."""
+        self.rows = {}
+        for entry in entries:
+            row = self._row(entry["Id"], entry["Names"][0].lstrip("/"), entry["Image"], entry.get("Labels") or {},
+                            entry.get("State"))
+            if entry.get("State") == "running":
+                row["kind"], row["port"] = _probe_target(entry.get("Ports"))
+            self.rows[entry["Id"]] = row
+        return list(self.rows.values())
+
+    def apply(self, event):
+        """Update the table from one container event; return (action, row) or None when ignored."""
+        action = event.get("Action") or event.get("status") or ""
+        actor = event.get("Actor") or {}
+        container_id = actor.get("ID") or event.get("id")
+        attributes = actor.get("Attributes") or {}
+        if action.startswith("health_status"):
+            action, health = "health", action.partition(":")[2].strip() or attributes.get("health_status")
+        elif action not in STATUS_BY_ACTION and action != "rename":
+            return None
+        row = self.rows.get(container_id)
+        if row is None:
+            row = self._row(container_id, attributes.get("name"), attributes.get("image"), attributes, None)
+            self.rows[container_id] = row
+        if attributes.get("name"):
+            row["name"] = attributes["name"]
+            if POOL_LABEL in attributes:  # a pool member renamed by a claim
+                row["env"] = _env(row["name"], attributes)
+        if action == "health":
+            row["health"] = health
+        elif action in STATUS_BY_ACTION:
+            row["status"] = STATUS_BY_ACTION[action]
+        if action == "die":
+            row["exit_code"] = int(attributes["exitCode"]) if attributes.get("exitCode", "").isdigit() else None
+        if action in ("start", "restart", "unpause"):
+            row["exit_code"] = None
+        if action in ("die", "pause", "destroy"):
+            row["ready"] = False
+        if action == "destroy":
+            del self.rows[container_id]
+        return action, row
+
+
+class Watcher:
+    """Follow the events of managed containers and print JSON lines to `out`."""
+
+    def __init__(self, api, labels=None, probe=True, probe_timeout=120.0, out=None, prober=wait_ready):
+        self.api = api
+        self.labels = [MANAGED_LABEL] + list(labels or [])
+        self.probe = probe
+        self.probe_timeout = probe_timeout
+        self.out = out or sys.stdout
+        self.prober = prober
+        self.table = StateTable()
+        self.lock = threading.Lock()
+        self.probes = {}
+        self.threads = []
+
+    def emit(self, event, row, **extra):
+        record = {"time": round(time.time(), 3), "event": event, **row, **extra}
+        with self.lock:
+            self.out.write(json.dumps(record) + "\n")
+            self.out.flush()
+
+    def _filters(self):
+        return {"label": self.labels}
+
+    def _start_probe(self, container_id, row):
+        if not self.probe or row["port"] is None:
+            return
+        self._stop_probe(container_id)
+        stop = threading.Event()
+        self.probes[container_id] = stop
+
+        def run():
+            result = self.prober(f"{row['kind']}://127.0.0.1:{row['port']}", timeout=self.probe_timeout,
+                                 stop_event=stop)
+            if stop.is_set() or self.table.rows.get(container_id) is not row:
+                return
+            row["ready"] = result["ready"]
+            self.emit("ready" if result["ready"] else "unready", row,
+                      elapsed=round(result["elapsed"], 3), detail=result["detail"])
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.threads = [t for t in self.threads if t.is_alive()] + [thread]
+
+    def _stop_probe(self, container_id):
+        stop = self.probes.pop(container_id, None)
+        if stop:
+            stop.set()
+
+    def sync(self):
+        """Re-seed the table from one inventory call and print every row."""
+        for container_id in list(self.probes):
+            self._stop_probe(container_id)
+        rows = self.table.seed(self.api.containers(all=True, filters=self._filters()))
+        for container_id, row in self.table.rows.items():
+            self.emit("state", row)
+            if row["status"] == "running":
+                self._start_probe(container_id, row)
+        return rows
+
+    def handle(self, event):
+        """Apply one raw Docker event and emit the resulting state change."""
+        change = self.table.apply(event)
+        if change is None:
+            return None
+        action, row = change
+        container_id = (event.get("Actor") or {}).get("ID") or event.get("id")
+        if action in ("start", "restart", "unpause"):
+            row["ready"] = None
+            try:
+                ports = self.api.inspect_container(container_id)["NetworkSettings"]["Ports"] or {}
+                row["kind"], row["port"] = _probe_target(ports)
+            except Exception:
+                row["kind"], row["port"] = None, None
+        self.emit(action, row)
+        if action in ("start", "restart", "unpause"):
+            self._start_probe(container_id, row)
+        elif action in ("die", "pause", "destroy"):
+            self._stop_probe(container_id)
+        return row
+
+    def run(self, once=False):
+        """Seed, then follow the events stream forever (reconnecting if the daemon restarts).
+
+        With `once`, only print the current state (and readiness of running containers).
+        """
+        since = time.time()
+        self.sync()
+        if once:
+            for thread in self.threads:
+                thread.join()
+            return
+        filters = {"type": "container", **self._filters()}
+        while True:
+            try:
+                for event in self.api.events(since=int(since), filters=filters, decode=True):
+                    self.handle(event)
+                reason = "stream closed"
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                reason = str(e)
+            print(f"Docker events stream interrupted ({reason}), reconnecting...", file=sys.stderr)
+            time.sleep(RECONNECT_DELAY)
+            since = time.time()
+            self.sync()
+        for container_id in list(self.probes):
+            self._stop_probe(container_id)
@@ -0,0 +1,410 @@
+"""Parallel streaming loader for the test_db SQL datasets.
+
+The dump is indexed in one streaming pass over the files (following `source`
+directives). INSERT statements are grouped per table into byte-range chunks of
+at most `chunk_bytes`; every other statement keeps its order in a single
+control session. A control statement that must run before later data (DDL,
+USE, ...) starts a new phase. Within a phase the chunks are streamed from disk,
+line by line, into several client sessions at once with autocommit, unique
+checks, foreign key checks and, when no replica would miss the data, the binary
+log turned off. Memory depends on the number of chunks, never on the dump size.
+
+A client is any command reading SQL on stdin, usually
+`docker exec -i <container> mysql -uroot` or a host client over TCP (see
+`container_client` and `host_client`).
+
+Usage: python3 -m dblab.loader --container NAME --password PW --dataset employees
+       python3 -m dblab.loader --host 127.0.0.1 --port 3511 --client mariadb --dataset sakila
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+TEST_DB_DIR = Path(__file__).resolve().parent.parent / "test_db"
+DATASET_SCRIPTS = {
+    "employees": ["employees/employees.sql"],
+    "sakila": ["sakila/sakila-mv-schema.sql", "sakila/sakila-mv-data.sql"],
+}
+
+DEFAULT_WORKERS = 4
+DEFAULT_CHUNK_BYTES = 16 << 20
+DEFAULT_COMMIT_BYTES = 4 << 20
+MAX_SESSION_STATEMENT = 64 << 10
+
+_COND = rb"^\s*(?:/\*!\d*\s*)?"
+_DATA_RE = re.compile(_COND + rb"(?:INSERT|REPLACE)(?:\s+(?:IGNORE|LOW_PRIORITY|DELAYED|HIGH_PRIORITY))*\s+INTO\s+`?([^`\s(]+)`?", re.I)
+_SOURCE_RE = re.compile(rb"^\s*(?:source|\\\.)\s+(\S+?)\s*;?\s*$", re.I)
+_DELIMITER_RE = re.compile(rb"^\s*DELIMITER\s+(\S+)\s*$", re.I)
+_SKIP_RE = re.compile(_COND + rb"(?:LOCK\s+TABLES|UNLOCK\s+TABLES|ALTER\s+TABLE\s+\S+\s+(?:DISABLE|ENABLE)\s+KEYS)", re.I)
+_SESSION_RE = re.compile(_COND + rb"(?:SET\s+(?!GLOBAL\b|@@global\.)|USE\s)", re.I)
+_DEFER_RE = re.compile(_COND + rb"(?:SELECT|SHOW|FLUSH|DO|COMMIT|ANALYZE|OPTIMIZE|CHECKSUM|SET)\b", re.I)
+
+# Per-session settings of the data sessions
+DATA_SESSION_SQL = b"SET SESSION autocommit=0; SET SESSION unique_checks=0; SET SESSION foreign_key_checks=0;\n"
+NO_BINLOG_SQL = b"SET SESSION sql_log_bin=0;\n"
+
+
+class LoaderError(Exception):
+    """A client session failed while loading."""
+
+
+def _new_phase():
+    return {"before": [], "chunks": [], "after": [], "context": ()}
+
+
+def _add_segment(segments, path, start, end):
+    if segments and segments[-1][0] == path and segments[-1][2] == start:
+        segments[-1] = (path, segments[-1][1], end)
+    else:
+        segments.append((path, start, end))
+
+
+class _Indexer:
+
+    def __init__(self, chunk_bytes):
+        self.chunk_bytes = chunk_bytes
+        self.context = ()
+        self.phases = [_new_phase()]
+        self.data_bytes = 0
+        self.rows = 0
+        self.tables = set()
+
+    def control(self, path, start, end, first_line, text):
+        if _SKIP_RE.match(first_line):
+            return
+        phase = self.phases[-1]
+        session = _SESSION_RE.match(first_line) and text is not None
+        if phase["chunks"] and not (session or _DEFER_RE.match(first_line)):
+            phase = _new_phase()
+            phase["context"] = self.context
+            self.phases.append(phase)
+        _add_segment(phase["after"] if phase["chunks"] else phase["before"], path, start, end)
+        if session:
+            self.context = self.context + (text,)
+
+    def data(self, table, path, start, end, rows):
+        chunks = self.phases[-1]["chunks"]
+        last = chunks[-1] if chunks else None
+        if (last and last["table"] == table and last["path"] == path and last["end"] == start
+                and last["context"] is self.context and last["bytes"] + end - start <= self.chunk_bytes):
+            last["end"] = end
+            last["bytes"] += end - start
+            last["rows"] += rows
+        else:
+            chunks.append({"table": table, "path": path, "start": start, "end": end,
+                           "bytes": end - start, "rows": rows, "context": self.context})
+        self.data_bytes += end - start
+        self.rows += rows
+        self.tables.add(table)
+
+    def scan(self, path, depth=0):
+        if depth > 16:
+            raise ValueError(f"Too many nested source directives at {path}")
+        path = Path(path)
+        delimiter = b";"
+        offset = 0
+        start = table = first = text = None
+        rows = 0
+        with open(path, "rb") as f:
+            for line in f:
+                line_start, offset = offset, offset + len(line)
+                stripped = line.strip()
+                if start is None:
+                    if not stripped or stripped.startswith((b"--", b"#")):
+                        continue
+                    match = _SOURCE_RE.match(line)
+                    if match:
+                        self.scan(path.parent / match.group(1).decode(), depth + 1)
+                        continue
+                    match = _DELIMITER_RE.match(line)
+                    if match:
+                        delimiter = match.group(1)
+                        self.control(path, line_start, offset, line, None)
+                        continue
+                    start, first, rows = line_start, line, 0
+                    match = _DATA_RE.match(line) if delimiter == b";" else None
+                    table = match.group(1).decode() if match else None
+                    text = b"" if delimiter == b";" and _SESSION_RE.match(line) else None
+                if table:
+                    rows += line.count(b"),(") + stripped.endswith(b"),")
+                elif text is not None:
+                    text = text + line if len(text) < MAX_SESSION_STATEMENT else None
+                if stripped.endswith(delimiter):
+                    self._end_statement(path, start, offset, table, first, text, rows + bool(table))
+                    start = None
+        if start is not None:
+            self._end_statement(path, start, offset, table, first, text, rows + bool(table))
+
+    def _end_statement(self, path, start, end, table, first, text, rows):
+        if table:
+            self.data(table, path, start, end, rows)
+        else:
+            self.control(path, start, end, first, text)
+
+
+def index_dump(scripts, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Index SQL `scripts` (in order) into phases of control segments and per-table data chunks.
+
+    Returns {"phases", "bytes", "rows", "tables"}; each phase holds "before" and
+    "after" control segments (path, start, end), the data "chunks" and the
+    session "context" (SET/USE statements) in effect when it starts.
+    """
+    indexer = _Indexer(chunk_bytes)
+    for script in scripts:
+        indexer.scan(script)
+    return {"phases": indexer.phases, "bytes": indexer.data_bytes, "rows": indexer.rows,
+            "tables": sorted(indexer.tables)}
+
+
+def dataset_scripts(dataset, test_db_dir=TEST_DB_DIR):
+    return [Path(test_db_dir) / script for script in DATASET_SCRIPTS[dataset]]
+
+
+def container_client(container, password, client="mysql", user="root"):
+    """Client command running `client` inside `container` through `docker exec -i`."""
+    return ["docker", "exec", "-i", "-e", f"MYSQL_PWD={password}", container, client, f"-u{user}"]
+
+
+def host_client(host, port, password, client="mysql", user="root"):
+    """Client command connecting from this host over TCP."""
+    return ["env", f"MYSQL_PWD={password}", client, "-h", host, "-P", str(port), f"-u{user}"]
+
+
+def binlog_is_safe(client):
+    """True when no replica is connected (no binlog dump thread) and the server is not a Galera node."""
+    query = ("SELECT COUNT(*) FROM information_schema.processlist WHERE command LIKE 'Binlog Dump%'; "
+             "SHOW GLOBAL VARIABLES LIKE 'wsrep_on';")
+    try:
+        result = subprocess.run(client + ["-N", "-e", query], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    tokens = result.stdout.split()
+    if result.returncode != 0 or not tokens or not tokens[0].isdigit():
+        return False
+    return int(tokens[0]) == 0 and not (len(tokens) >= 3 and tokens[2].upper() == "ON")
+
+
+class _Session:
+    """One client process fed through its stdin; stderr spills to a temporary file."""
+
+    def __init__(self, client):
+        self.stderr = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(client, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self.stderr)
+        self.context = None
+
+    def write(self, data):
+        self.proc.stdin.write(data)
+
+    def replay(self, context, settings=b""):
+        if context is self.context:
+            return
+        known = self.context or ()
+        if context[:len(known)] != known:
+            known = ()
+        for statement in context[len(known):]:
+            self.write(statement if statement.endswith(b"\n") else statement + b"\n")
+        self.write(settings)
+        self.context = context
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        code = self.proc.wait()
+        self.stderr.seek(0)
+        error = self.stderr.read().decode(errors="replace").strip()
+        self.stderr.close()
+        if code != 0:
+            raise LoaderError(error.splitlines()[-1] if error else f"client exited with status {code}")
+
+
+class DatasetLoader:
+    """Load an index produced by `index_dump` over `workers` parallel sessions of `client`."""
+
+    def __init__(self, client, workers=DEFAULT_WORKERS, commit_bytes=DEFAULT_COMMIT_BYTES, binlog="auto",
+                 interval=1.0, log=print):
+        self.client = client
+        self.workers = max(1, workers)
+        self.commit_bytes = commit_bytes
+        self.binlog = binlog
+        self.interval = interval
+        self.log = log
+        self.lock = threading.Lock()
+        self.failed = threading.Event()
+        self.done_bytes = 0
+        self.done_rows = 0.0
+
+    def _stream(self, segments, session, on_line=None):
+        for path, start, end in segments:
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start
+                for line in f:
+                    if remaining <= 0 or self.failed.is_set():
+                        break
+                    session.write(line)
+                    remaining -= len(line)
+                    if on_line:
+                        on_line(line)
+            session.write(b"\n")
+
+    def _run_control(self, segments, context):
+        if not segments:
+            return
+        session = _Session(self.client)
+        try:
+            session.replay(context)
+            self._stream(segments, session)
+            session.write(b"COMMIT;\n")
+        except BrokenPipeError:
+            pass
+        session.close()
+
+    def _load_chunk(self, session, chunk, settings):
+        session.replay(chunk["context"], settings)
+        pending = [0]
+        ratio = chunk["rows"] / chunk["bytes"] if chunk["bytes"] else 0
+
+        def on_line(line):
+            pending[0] += len(line)
+            if pending[0] >= self.commit_bytes and line.rstrip().endswith(b";"):
+                session.write(b"COMMIT;\n")
+                self._account(pending[0], pending[0] * ratio)
+                pending[0] = 0
+
+        self._stream([(chunk["path"], chunk["start"], chunk["end"])], session, on_line)
+        session.write(b"COMMIT;\n")
+        self._account(pending[0], pending[0] * ratio)
+
+    def _account(self, nbytes, rows):
+        with self.lock:
+            self.done_bytes += nbytes
+            self.done_rows += rows
+
+    def _worker(self, queue, settings, errors):
+        session = _Session(self.client)
+        try:
+            while not self.failed.is_set():
+                with self.lock:
+                    if not queue:
+                        break
+                    chunk = queue.pop()
+                self._load_chunk(session, chunk, settings)
+        except BrokenPipeError:
+            pass
+        try:
+            session.close()
+        except LoaderError as e:
+            errors.append(e)
+            self.failed.set()
+
+    def _report(self, total_bytes, total_rows, started, stop):
+        last = (started, 0, 0.0)
+        while not stop.wait(self.interval):
+            now = time.monotonic()
+            with self.lock:
+                done_bytes, done_rows = self.done_bytes, self.done_rows
+            span = now - last[0] or 1e-9
+            self.log(f"📦 {100.0 * done_bytes / (total_bytes or 1):5.1f}%  "
+                     f"{int(done_rows):,} rows ({(done_rows - last[2]) / span:,.0f} rows/s)  "
+                     f"{done_bytes / 1e6:,.1f} MB ({(done_bytes - last[1]) / 1e6 / span:,.1f} MB/s)")
+            last = (now, done_bytes, done_rows)
+
+    def load(self, index):
+        """Run every phase of `index`; return the load statistics."""
+        skip_binlog = self.binlog == "skip" or (self.binlog == "auto" and binlog_is_safe(self.client))
+        settings = DATA_SESSION_SQL + (NO_BINLOG_SQL if skip_binlog else b"")
+        self.log(f"🚚 Loading {index['rows']:,} rows ({index['bytes'] / 1e6:,.1f} MB) of {len(index['tables'])} "
+                 f"table(s) over {self.workers} session(s), binlog {'off' if skip_binlog else 'on'}")
+        started = time.monotonic()
+        stop = threading.Event()
+        reporter = threading.Thread(target=self._report, args=(index["bytes"], index["rows"], started, stop),
+                                    daemon=True)
+        reporter.start()
+        try:
+            for phase in index["phases"]:
+                self._run_control(phase["before"], phase["context"])
+                if phase["chunks"]:
+                    # Largest chunks first (popped from the end) to balance the sessions
+                    queue = sorted(phase["chunks"], key=lambda c: c["bytes"])
+                    errors = []
+                    threads = [threading.Thread(target=self._worker, args=(queue, settings, errors))
+                               for _ in range(min(self.workers, len(queue)))]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    if errors:
+                        raise errors[0]
+                last_context = phase["chunks"][-1]["context"] if phase["chunks"] else phase["context"]
+                self._run_control(phase["after"], last_context)
+        finally:
+            stop.set()
+            reporter.join()
+        elapsed = max(time.monotonic() - started, 1e-9)
+        stats = {"rows": index["rows"], "bytes": index["bytes"], "tables": len(index["tables"]),
+                 "elapsed": elapsed, "rows_per_s": index["rows"] / elapsed,
+                 "mb_per_s": index["bytes"] / 1e6 / elapsed, "binlog": not skip_binlog}
+        self.log(f"✅ Loaded {stats['rows']:,} rows ({stats['bytes'] / 1e6:,.1f} MB) in {elapsed:.1f}s: "
+                 f"{stats['rows_per_s']:,.0f} rows/s, {stats['mb_per_s']:,.1f} MB/s")
+        return stats
+
+
+def load_scripts(client, scripts, workers=DEFAULT_WORKERS, chunk_bytes=DEFAULT_CHUNK_BYTES,
+                 commit_bytes=DEFAULT_COMMIT_BYTES, binlog="auto", log=print):
+    """Index and load `scripts` through `client`; return the load statistics."""
+    index = index_dump(scripts, chunk_bytes=chunk_bytes)
+    return DatasetLoader(client, workers=workers, commit_bytes=commit_bytes, binlog=binlog, log=log).load(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load SQL datasets over several parallel client sessions.")
+    parser.add_argument("scripts", nargs="*", help="SQL scripts to load, in order.")
+    parser.add_argument("--dataset", action="append", choices=sorted(DATASET_SCRIPTS), help="test_db dataset to load, may be repeated.")
+    parser.add_argument("--container", help="Container running the database (the client runs inside it).")
+    parser.add_argument("--host", help="Connect from this host over TCP instead of running the client in a container.")
+    parser.add_argument("--port", type=int, default=3306, help="TCP port with --host.")
+    parser.add_argument("--password", default=os.environ.get("MYSQL_PWD", ""), help="Root password (default: $MYSQL_PWD).")
+    parser.add_argument("--client", default="mysql", help="Client binary (mysql or mariadb).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel client sessions.")
+    parser.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_BYTES >> 20, help="Maximum size of one table chunk.")
+    parser.add_argument("--binlog", choices=["auto", "keep", "skip"], default="auto", help="Disable the binary log of the load sessions (auto: only without replicas and outside Galera).")
+    parser.add_argument("--dry-run", action="store_true", help="Print the load plan without loading.")
+    args = parser.parse_args()
+
+    scripts = [Path(s) for s in args.scripts]
+    for dataset in args.dataset or []:
+        scripts += dataset_scripts(dataset)
+    if not scripts:
+        parser.error("no script or --dataset given")
+    index = index_dump(scripts, chunk_bytes=args.chunk_mb << 20)
+    if args.dry_run:
+        for number, phase in enumerate(index["phases"], 1):
+            tables = sorted({c["table"] for c in phase["chunks"]})
+            print(f"phase {number}: {len(phase['before'])} control segment(s), {len(phase['chunks'])} chunk(s) "
+                  f"[{', '.join(tables)}], {len(phase['after'])} deferred segment(s)")
+        print(f"{index['rows']:,} rows, {index['bytes'] / 1e6:,.1f} MB")
+        return 0
+    if args.container:
+        client = container_client(args.container, args.password, client=args.client)
+    elif args.host:
+        client = host_client(args.host, args.port, args.password, client=args.client)
+    else:
+        parser.error("--container or --host is required")
+    try:
+        DatasetLoader(client, workers=args.workers, binlog=args.binlog).load(index)
+    except LoaderError as e:
+        print(f"❌ Load failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
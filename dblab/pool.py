@@ -0,0 +1,298 @@
+"""Warm container pool for mysql_docker.py.
+
+A pool member is a fully initialized MySQL/MariaDB/Percona container started
+ahead of time with a throw-away root password. `start` claims a ready member by
+renaming it from its pool name to the environment name: the rename is atomic on
+the Docker side and, since it addresses the member by its current name, only
+the first claimant succeeds (the others get NotFound), so it acts as the claim
+lock. The credentials are then reset in place, skipping the first-boot datadir
+initialization entirely.
+
+Pool configuration and claim timestamps live in `.pool.json`; members are found
+through their labels, so several processes can share one pool.
+"""
+import fcntl
+import json
+import os
+import secrets
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from dblab import LABEL_PREFIX, managed_labels
+from dblab.probe import ProbeError, parse_target, probe_once, wait_ready
+
+POOL_LABEL = f"{LABEL_PREFIX}.pool"
+POOL_SECRET_LABEL = f"{LABEL_PREFIX}.pool.secret"
+POOL_NAME_PREFIX = "pool-"
+POOL_ENV = "pool"
+
+DEFAULT_SIZE = 2
+DEFAULT_MAX = 4
+DEFAULT_IDLE_TTL = 6 * 3600
+READY_TIMEOUT = 300
+
+STATE_FILE = Path(__file__).resolve().parent.parent / ".pool.json"
+
+
+def _member_name(image):
+    return f"{POOL_NAME_PREFIX}{image.replace(':', '-').replace('/', '-')}-{secrets.token_hex(3)}"
+
+
+class _State:
+    """Read-modify-write access to the pool state file under an exclusive flock."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or STATE_FILE)
+
+    def __enter__(self):
+        self.lock = open(f"{self.path}.lock", "w")
+        fcntl.flock(self.lock, fcntl.LOCK_EX)
+        try:
+            with open(self.path) as f:
+                self.data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.data = {}
+        self.data.setdefault("images", {})
+        self.data.setdefault("last_claim", {})
+        return self.data
+
+    def __exit__(self, exc_type, *exc):
+        try:
+            if exc_type is None:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(self.data, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+        finally:
+            fcntl.flock(self.lock, fcntl.LOCK_UN)
+            self.lock.close()
+
+
+def load_config(state_path=None):
+    with _State(state_path) as data:
+        return dict(data["images"]), dict(data["last_claim"])
+
+
+def configure(image, size=DEFAULT_SIZE, max_size=DEFAULT_MAX, state_path=None):
+    """Declare (or update) the target size and per-image maximum of a pool.
+
+    Declaring a pool again also revives it when it was emptied for being idle.
+    """
+    if size > max_size:
+        raise ValueError(f"Pool size {size} exceeds the maximum {max_size} for {image}")
+    with _State(state_path) as data:
+        data["images"][image] = {"size": size, "max": max_size}
+        data["last_claim"][image] = time.time()
+
+
+def unconfigure(image, state_path=None):
+    with _State(state_path) as data:
+        data["images"].pop(image, None)
+        data["last_claim"].pop(image, None)
+
+
+def members(docker_client, image=None):
+    """Return unclaimed pool members (low-level API dicts), oldest first."""
+    filters = {"label": [f"{POOL_LABEL}={image}" if image else POOL_LABEL]}
+    found = [
+        c for c in docker_client.api.containers(all=True, filters=filters)
+        if c["Names"][0].lstrip("/").startswith(POOL_NAME_PREFIX)
+    ]
+    return sorted(found, key=lambda c: c.get("Created", 0))
+
+
+def _published_port(entry):
+    return next((p["PublicPort"] for p in entry.get("Ports") or []
+                 if p.get("PrivatePort") == 3306 and p.get("PublicPort")), None)
+
+
+def member_labels(image, labels=None):
+    """Labels of a member of the `image` pool: managed like any environment, plus the pool labels.
+
+    Docker labels cannot change after creation, so a claimed member keeps the
+    placeholder env label POOL_ENV; its environment is its container name.
+    """
+    db_type, _, version = image.partition(":")
+    return {**managed_labels(POOL_ENV, db_type, version or "latest"), **(labels or {}), POOL_LABEL: image}
+
+
+def create_member(docker_client, image, labels=None):
+    """Start one pool member and block until it answers the MySQL handshake."""
+    secret = secrets.token_urlsafe(24)
+    container = docker_client.containers.run(
+        image,
+        detach=True,
+        name=_member_name(image),
+        # Let Docker pick the host port atomically at bind time
+        ports={'3306/tcp': None},
+        labels={**member_labels(image, labels), POOL_SECRET_LABEL: secret},
+        environment={"MYSQL_ROOT_PASSWORD": secret, "MARIADB_ROOT_PASSWORD": secret},
+    )
+    container.reload()
+    port = container.attrs['NetworkSettings']['Ports']['3306/tcp'][0]['HostPort']
+    result = wait_ready(f"mysql://127.0.0.1:{port}", timeout=READY_TIMEOUT)
+    if not result["ready"]:
+        container.remove(force=True)
+        raise RuntimeError(f"Pool member for {image} never became ready: {result['detail']}")
+    return container.name
+
+
+def claim(docker_client, image, env_name, state_path=None):
+    """Rename a ready member of `image` to `env_name`; return (container, port, secret) or None."""
+    for entry in members(docker_client, image):
+        if entry.get("State") != "running":
+            continue
+        port = _published_port(entry)
+        if port is None:
+            continue
+        try:
+            probe_once(parse_target(f"mysql://127.0.0.1:{port}"), timeout=0.5)
+        except (OSError, ProbeError):
+            continue  # still warming up
+        try:
+            docker_client.api.rename(entry["Names"][0].lstrip("/"), env_name)
+        except Exception as e:
+            if getattr(e, "status_code", None) in (404, 409):
+                continue  # claimed concurrently: the pool name is gone (or the environment name is taken)
+            raise
+        container = docker_client.containers.get(entry["Id"])
+        with _State(state_path) as data:
+            data["last_claim"][image] = time.time()
+        return container, port, entry["Labels"][POOL_SECRET_LABEL]
+    # A miss is demand too: it keeps an idle-evicted pool from staying empty
+    with _State(state_path) as data:
+        if image in data["images"]:
+            data["last_claim"][image] = time.time()
+    return None
+
+
+def _sql_literal(value):
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def reset_credentials(container, secret, env_name, username, password):
+    """Replace the pool secret by the environment credentials inside a claimed member."""
+    database = f"{env_name}_db".replace("`", "")
+    pw = _sql_literal(password)
+    user = _sql_literal(username)
+    sql = (
+        f"ALTER USER IF EXISTS 'root'@'%' IDENTIFIED BY {pw}; "
+        f"ALTER USER IF EXISTS 'root'@'localhost' IDENTIFIED BY {pw}; "
+        f"CREATE DATABASE IF NOT EXISTS `{database}`; "
+        f"CREATE USER IF NOT EXISTS {user}@'%' IDENTIFIED BY {pw}; "
+        f"GRANT ALL PRIVILEGES ON `{database}`.* TO {user}@'%'; "
+        "FLUSH PRIVILEGES;"
+    )
+    client = container.exec_run(["sh", "-c", "command -v mariadb || command -v mysql"]).output.decode().strip()
+    exit_code, output = container.exec_run(
+        [client or "mysql", "-uroot", "-e", sql], environment={"MYSQL_PWD": secret}
+    )
+    if exit_code != 0:
+        raise RuntimeError(f"Credential reset failed: {output.decode(errors='replace').strip()}")
+
+
+@contextmanager
+def _refill_lock(image, state_path=None):
+    """Exclusive flock held by the refill of one image while it counts and creates members."""
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in image)
+    with open(f"{Path(state_path or STATE_FILE)}.{safe}.refill.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _refill_image(docker_client, name, spec, idle, labels, state_path, log):
+    with _refill_lock(name, state_path):
+        current = members(docker_client, name)
+        alive = [c for c in current if c.get("State") == "running"]
+        for dead in (c for c in current if c.get("State") != "running"):
+            docker_client.api.remove_container(dead["Id"], force=True)
+        keep = 0 if idle else spec["max"]
+        for surplus in alive[keep:]:
+            log(f"🧹 Evicting {surplus['Names'][0].lstrip('/')} ({'idle' if idle else 'over maximum'})")
+            docker_client.api.remove_container(surplus["Id"], force=True)
+        missing = 0 if idle else max(0, spec["size"] - len(alive))
+        if not missing:
+            return []
+        created = []
+        with ThreadPoolExecutor(max_workers=min(8, missing)) as executor:
+            futures = [executor.submit(create_member, docker_client, name, labels) for _ in range(missing)]
+            for future in futures:
+                try:
+                    created.append(future.result())
+                    log(f"🔥 Pool member ready: {created[-1]}")
+                except Exception as e:
+                    log(f"Error creating pool member: {e}")
+        return created
+
+
+def refill(docker_client, image=None, idle_ttl=DEFAULT_IDLE_TTL, labels=None, state_path=None, log=print):
+    """Bring each configured pool back to its target size and evict surplus or idle members.
+
+    Members of unconfigured images, dead members, members above the per-image
+    maximum and all members of images not claimed for `idle_ttl` seconds are
+    removed. An idle pool stays empty until the next claim attempt or `pool
+    add`, which make the next refill create its members again. Missing
+    members are created concurrently, under a per-image lock held from the
+    count to the last creation: concurrent refills of one image (one is
+    spawned per claim) wait for each other instead of each creating the
+    whole shortfall.
+    """
+    images, last_claim = load_config(state_path)
+    now = time.time()
+    for entry in members(docker_client):
+        member_image = entry["Labels"].get(POOL_LABEL)
+        if member_image not in images and (image is None or member_image == image):
+            log(f"🧹 Evicting {entry['Names'][0].lstrip('/')} (image no longer pooled)")
+            docker_client.api.remove_container(entry["Id"], force=True)
+    targets = {name: spec for name, spec in images.items() if not image or name == image}
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=min(8, len(targets))) as executor:
+        futures = [executor.submit(_refill_image, docker_client, name, spec,
+                                   idle_ttl and now - last_claim.get(name, now) > idle_ttl,
+                                   labels, state_path, log)
+                   for name, spec in targets.items()]
+        return [member for future in futures for member in future.result()]
+
+
+def refill_in_background(image):
+    """Spawn a detached `mysql_docker.py pool refill` so the caller never waits for it."""
+    script = Path(__file__).resolve().parent.parent / "mysql_docker.py"
+    subprocess.Popen(
+        [sys.executable, str(script), "pool", "refill", "--image", image],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+
+
+def status(docker_client, state_path=None):
+    """Return one row per configured or populated image: image, size, max, ready, warming, last claim."""
+    images, last_claim = load_config(state_path)
+    rows = {}
+    for entry in members(docker_client):
+        name = entry["Labels"].get(POOL_LABEL)
+        row = rows.setdefault(name, {"image": name, "running": 0, "stopped": 0})
+        row["running" if entry.get("State") == "running" else "stopped"] += 1
+    for name, spec in images.items():
+        rows.setdefault(name, {"image": name, "running": 0, "stopped": 0}).update(spec)
+    for row in rows.values():
+        row.setdefault("size", 0)
+        row.setdefault("max", 0)
+        row["last_claim"] = last_claim.get(row["image"])
+    return sorted(rows.values(), key=lambda r: r["image"])
+
+
+def run_daemon(docker_client, interval=10.0, idle_ttl=DEFAULT_IDLE_TTL, labels=None, state_path=None):
+    """Refill and evict forever, every `interval` seconds."""
+    while True:
+        try:
+            refill(docker_client, idle_ttl=idle_ttl, labels=labels, state_path=state_path)
+        except Exception as e:
+            print(f"Error refilling pool: {e}")
+        time.sleep(interval)
@@ -0,0 +1,174 @@
+"""Race-free host port allocation backed by an on-disk reservation registry.
+
+Ports are reserved in a small SQLite database (`.ports.db`) inside an
+exclusive write transaction, so concurrent launches in one or several
+processes never receive the same port. Allocation is next-fit: released ports
+are reused first from a FIFO, otherwise a persistent cursor walks the range, so
+the cost of an allocation does not depend on the number of reservations.
+
+The default range (20000-29999) stays below the Linux ephemeral range used by
+Docker when it picks host ports itself.
+"""
+import socket
+import time
+from pathlib import Path
+
+from dblab.store import Transaction, open_db
+
+DEFAULT_RANGE = (20000, 29999)
+REGISTRY_FILE = Path(__file__).resolve().parent.parent / ".ports.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reservations (
+    port INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    reserved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reservations_owner ON reservations(owner);
+CREATE TABLE IF NOT EXISTS released (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    port INTEGER UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class PortAllocationError(Exception):
+    """No port (or contiguous block) could be reserved."""
+
+
+def port_is_bindable(port, host=""):
+    """Return True when nothing on this host listens on `port`."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind((host, port))
+        except OSError:
+            return False
+    return True
+
+
+class PortRegistry:
+    """Lock-protected reservation registry for host ports in [low, high]."""
+
+    def __init__(self, path=None, port_range=DEFAULT_RANGE, check_bind=True):
+        self.path = Path(path or REGISTRY_FILE)
+        self.low, self.high = port_range
+        self.check_bind = check_bind
+        open_db(self.path, SCHEMA).close()
+
+    def _connect(self):
+        return Transaction(open_db(self.path))
+
+    def _usable(self, db, port):
+        if port < self.low or port > self.high:
+            return False
+        if db.execute("SELECT 1 FROM reservations WHERE port = ?", (port,)).fetchone():
+            return False
+        return not self.check_bind or port_is_bindable(port)
+
+    def _next_free(self, db):
+        # 1. Recently released ports, oldest first
+        while True:
+            row = db.execute("SELECT seq, port FROM released ORDER BY seq LIMIT 1").fetchone()
+            if row is None:
+                break
+            db.execute("DELETE FROM released WHERE seq = ?", (row[0],))
+            if self._usable(db, row[1]):
+                return row[1]
+        # 2. Never-used ports after the cursor, wrapping once around the range
+        row = db.execute("SELECT value FROM meta WHERE key = 'cursor'").fetchone()
+        cursor = row[0] if row and self.low <= row[0] <= self.high else self.low
+        size = self.high - self.low + 1
+        for offset in range(size):
+            port = self.low + (cursor - self.low + offset) % size
+            if self._usable(db, port):
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('cursor', ?)", (port + 1,))
+                return port
+        raise PortAllocationError(f"No free port left in {self.low}-{self.high}")
+
+    def _insert(self, db, owner, ports):
+        now = time.time()
+        db.executemany("INSERT INTO reservations (port, owner, reserved_at) VALUES (?, ?, ?)",
+                       [(port, owner, now) for port in ports])
+
+    def allocate(self, owner, count=1, contiguous=False):
+        """Reserve `count` ports for `owner`; `contiguous` asks for one consecutive block."""
+        with self._connect() as db:
+            if contiguous and count > 1:
+                ports = self._contiguous_block(db, count)
+                self._insert(db, owner, ports)
+            else:
+                ports = [self._reserve_one(db, owner) for _ in range(count)]
+        return ports
+
+    def _reserve_one(self, db, owner):
+        port = self._next_free(db)
+        self._insert(db, owner, [port])
+        return port
+
+    def _contiguous_block(self, db, count):
+        row = db.execute("SELECT value FROM meta WHERE key = 'cursor'").fetchone()
+        start = row[0] if row and self.low <= row[0] <= self.high else self.low
+        size = self.high - self.low + 1
+        offset = 0
+        while offset < size:
+            first = self.low + (start - self.low + offset) % size
+            if first + count - 1 > self.high:
+                offset += self.high - first + 1
+                continue
+            block = list(range(first, first + count))
+            busy = [p for p in block if not self._usable(db, p)]
+            if not busy:
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('cursor', ?)", (block[-1] + 1,))
+                return block
+            offset += busy[-1] - first + 1
+        raise PortAllocationError(f"No block of {count} free ports left in {self.low}-{self.high}")
+
+    def reserve_range(self, owner, first, last):
+        """Reserve every port of [first, last] for `owner`, or none of them."""
+        ports = list(range(first, last + 1))
+        with self._connect() as db:
+            taken = [p for p in ports
+                     if db.execute("SELECT 1 FROM reservations WHERE port = ?", (p,)).fetchone()]
+            if taken:
+                raise PortAllocationError(f"Ports already reserved: {', '.join(map(str, taken))}")
+            self._insert(db, owner, ports)
+            db.execute(f"DELETE FROM released WHERE port IN ({','.join('?' * len(ports))})", ports)
+        return ports
+
+    def release(self, owner=None, ports=None):
+        """Release the ports of `owner` (or the given `ports`); return the released ports."""
+        with self._connect() as db:
+            if ports is None:
+                ports = [r[0] for r in db.execute("SELECT port FROM reservations WHERE owner = ?", (owner,))]
+            if not ports:
+                return []
+            db.executemany("DELETE FROM reservations WHERE port = ?", [(p,) for p in ports])
+            db.executemany("INSERT OR IGNORE INTO released (port) VALUES (?)", [(p,) for p in ports])
+        return list(ports)
+
+    def reclaim(self, live_owners):
+        """Release every reservation whose owner is not in `live_owners`."""
+        live_owners = set(live_owners)
+        stale = [o for o in self.owners() if o not in live_owners]
+        released = []
+        for owner in stale:
+            released += self.release(owner)
+        return released
+
+    def owners(self):
+        with self._connect() as db:
+            return [r[0] for r in db.execute("SELECT DISTINCT owner FROM reservations ORDER BY owner")]
+
+    def lookup(self, owner):
+        with self._connect() as db:
+            return [r[0] for r in db.execute("SELECT port FROM reservations WHERE owner = ? ORDER BY port", (owner,))]
+
+    def reservations(self):
+        with self._connect() as db:
+            return [{"port": p, "owner": o, "reserved_at": t}
+                    for p, o, t in db.execute("SELECT port, owner, reserved_at FROM reservations ORDER BY port")]
+
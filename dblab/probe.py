@@ -0,0 +1,304 @@
+"""Protocol-level readiness probes for MySQL/MariaDB, PostgreSQL and MongoDB.
+
+Each probe opens a TCP connection to the published port and speaks just enough
+of the wire protocol to know that the server itself (not only a proxy or the
+docker-proxy listener) is accepting sessions:
+
+- MySQL/MariaDB: read the initial handshake greeting (protocol 10).
+- PostgreSQL: send an SSLRequest, then a startup packet; any authentication
+  request or non-transient error means the postmaster accepts connections.
+- MongoDB: send an OP_MSG ``hello`` command and check ``ok: 1``.
+
+Only the standard library is used so the Makefile can call it on any host:
+
+    python3 -m dblab.probe mysql://127.0.0.1:3306 postgres://127.0.0.1:5432
+"""
+import argparse
+import json
+import socket
+import ssl
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+DEFAULT_PORTS = {"mysql": 3306, "postgres": 5432, "mongo": 27017}
+
+KIND_ALIASES = {
+    "mysql": "mysql", "mariadb": "mysql", "percona": "mysql",
+    "postgres": "postgres", "postgresql": "postgres", "pg": "postgres",
+    "mongo": "mongo", "mongodb": "mongo",
+}
+
+# PostgreSQL SQLSTATEs meaning "retry later" rather than "server is up"
+PG_TRANSIENT_SQLSTATES = {"57P03", "53300"}
+
+PG_SSL_REQUEST_CODE = 80877103
+PG_PROTOCOL_V3 = 196608
+MONGO_OP_MSG = 2013
+
+
+class ProbeError(Exception):
+    """The server answered, but is not ready to accept sessions yet."""
+
+
+def parse_target(text):
+    """Parse ``kind[+tls]://host[:port]`` into a target dict."""
+    parts = urlsplit(text if "://" in text else f"mysql://{text}")
+    scheme = parts.scheme.lower()
+    tls = scheme.endswith("+tls")
+    kind = KIND_ALIASES.get(scheme[:-4] if tls else scheme)
+    if kind is None:
+        raise ValueError(f"Unknown target kind in '{text}' (expected mysql, postgres or mongo)")
+    query = parse_qs(parts.query)
+    tls = tls or query.get("tls", ["0"])[0] in ("1", "true", "yes")
+    return {
+        "kind": kind,
+        "host": parts.hostname or "127.0.0.1",
+        "port": parts.port or DEFAULT_PORTS[kind],
+        "tls": tls,
+        "label": text,
+    }
+
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ProbeError("connection closed by server")
+        buf += chunk
+    return bytes(buf)
+
+
+def _connect(host, port, timeout, tls=False):
+    sock = socket.create_connection((host, port), timeout=timeout)
+    sock.settimeout(timeout)
+    if tls:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        sock = context.wrap_socket(sock, server_hostname=host)
+    return sock
+
+
+def probe_mysql(host, port, timeout=2.0, tls=False):
+    """Read the MySQL handshake packet and return the server version."""
+    with _connect(host, port, timeout) as sock:
+        header = _recv_exact(sock, 4)
+        length = header[0] | (header[1] << 8) | (header[2] << 16)
+        payload = _recv_exact(sock, length)
+    if payload[0] == 0xFF:
+        code = struct.unpack("<H", payload[1:3])[0]
+        message = payload[3:]
+        if message[:1] == b"#":
+            message = message[6:]
+        raise ProbeError(f"MySQL error {code}: {message.decode(errors='replace')}")
+    if payload[0] != 0x0A:
+        raise ProbeError(f"unexpected MySQL protocol version {payload[0]}")
+    return payload[1:payload.index(b"\0", 1)].decode(errors="replace")
+
+
+def _pg_startup_packet(user="probe", database="probe"):
+    params = f"user\0{user}\0database\0{database}\0application_name\0dblab-probe\0\0".encode()
+    return struct.pack("!ii", 8 + len(params), PG_PROTOCOL_V3) + params
+
+
+def _pg_read_startup_reply(sock):
+    while True:
+        kind = _recv_exact(sock, 1)
+        length = struct.unpack("!i", _recv_exact(sock, 4))[0]
+        body = _recv_exact(sock, length - 4)
+        if kind == b"R":
+            return "accepting connections"
+        if kind == b"E":
+            fields = dict((f[:1], f[1:].decode(errors="replace")) for f in body.split(b"\0") if f)
+            sqlstate = fields.get(b"C", "")
+            if sqlstate in PG_TRANSIENT_SQLSTATES:
+                raise ProbeError(f"PostgreSQL {sqlstate}: {fields.get(b'M', '')}")
+            # Authentication or catalog errors still prove the server is up
+            return f"accepting connections ({sqlstate})"
+        if kind != b"N":
+            raise ProbeError(f"unexpected PostgreSQL message {kind!r}")
+
+
+def probe_postgres(host, port, timeout=2.0, tls=False):
+    """Negotiate SSLRequest + startup and report whether sessions are accepted."""
+    with _connect(host, port, timeout) as sock:
+        sock.sendall(struct.pack("!ii", 8, PG_SSL_REQUEST_CODE))
+        answer = _recv_exact(sock, 1)
+        if answer == b"N":
+            sock.sendall(_pg_startup_packet())
+            return _pg_read_startup_reply(sock)
+        if answer != b"S":
+            raise ProbeError(f"unexpected SSLRequest answer {answer!r}")
+    # The server wants TLS: a clear-text startup on a fresh socket is enough to
+    # get an answer (at worst a pg_hba rejection, which still means "ready").
+    with _connect(host, port, timeout) as sock:
+        sock.sendall(_pg_startup_packet())
+        return _pg_read_startup_reply(sock)
+
+
+def _bson_cstring(name):
+    return name.encode() + b"\0"
+
+
+def _bson_hello():
+    body = b"\x10" + _bson_cstring("hello") + struct.pack("<i", 1)
+    db = b"admin\0"
+    body += b"\x02" + _bson_cstring("$db") + struct.pack("<i", len(db)) + db
+    return struct.pack("<i", len(body) + 5) + body + b"\0"
+
+
+# Fixed-size BSON element types: type -> value size in bytes
+_BSON_FIXED = {0x01: 8, 0x07: 12, 0x08: 1, 0x09: 8, 0x0A: 0, 0x10: 4, 0x11: 8, 0x12: 8, 0x13: 16, 0x7F: 0, 0xFF: 0}
+
+
+def _bson_top_level(doc):
+    """Decode scalar top-level fields of a BSON document; nested values are skipped."""
+    fields = {}
+    pos = 4
+    while pos < len(doc) - 1:
+        etype = doc[pos]
+        end = doc.index(b"\0", pos + 1)
+        name = doc[pos + 1:end].decode(errors="replace")
+        pos = end + 1
+        if etype == 0x01:
+            fields[name] = struct.unpack("<d", doc[pos:pos + 8])[0]
+        elif etype == 0x08:
+            fields[name] = doc[pos] == 1
+        elif etype == 0x10:
+            fields[name] = struct.unpack("<i", doc[pos:pos + 4])[0]
+        elif etype == 0x12:
+            fields[name] = struct.unpack("<q", doc[pos:pos + 8])[0]
+        elif etype == 0x02:
+            size = struct.unpack("<i", doc[pos:pos + 4])[0]
+            fields[name] = doc[pos + 4:pos + 3 + size].decode(errors="replace")
+        if etype in _BSON_FIXED:
+            pos += _BSON_FIXED[etype]
+        elif etype in (0x02, 0x0D, 0x0E):
+            pos += 4 + struct.unpack("<i", doc[pos:pos + 4])[0]
+        elif etype in (0x03, 0x04, 0x0F):
+            pos += struct.unpack("<i", doc[pos:pos + 4])[0]
+        elif etype == 0x05:
+            pos += 5 + struct.unpack("<i", doc[pos:pos + 4])[0]
+        else:
+            break
+    return fields
+
+
+def probe_mongo(host, port, timeout=2.0, tls=False):
+    """Send an OP_MSG ``hello`` and return a short description of the node."""
+    payload = struct.pack("<I", 0) + b"\0" + _bson_hello()
+    message = struct.pack("<iiii", 16 + len(payload), 1, 0, MONGO_OP_MSG) + payload
+    with _connect(host, port, timeout, tls=tls) as sock:
+        sock.sendall(message)
+        length, _, _, opcode = struct.unpack("<iiii", _recv_exact(sock, 16))
+        body = _recv_exact(sock, length - 16)
+    if opcode != MONGO_OP_MSG or body[4] != 0:
+        raise ProbeError(f"unexpected MongoDB reply opcode {opcode}")
+    fields = _bson_top_level(body[5:])
+    if fields.get("ok") != 1:
+        raise ProbeError(f"MongoDB hello failed: {fields.get('errmsg', fields)}")
+    role = "primary" if fields.get("isWritablePrimary") else ("secondary" if fields.get("secondary") else "standalone/other")
+    return f"{role}, maxWireVersion={fields.get('maxWireVersion')}"
+
+
+PROBES = {"mysql": probe_mysql, "postgres": probe_postgres, "mongo": probe_mongo}
+
+
+def probe_once(target, timeout=2.0):
+    """Run a single probe; return a detail string or raise OSError/ProbeError."""
+    return PROBES[target["kind"]](target["host"], target["port"], timeout=timeout, tls=target["tls"])
+
+
+def wait_ready(target, timeout=120.0, connect_timeout=2.0, initial_delay=0.02, max_delay=0.5, stop_event=None):
+    """Probe `target` with exponential backoff until it is ready or `timeout` expires.
+
+    `target` is a dict from `parse_target` or a target string. Returns a result
+    dict with ``ready``, ``elapsed`` (seconds), ``attempts`` and ``detail``.
+    """
+    if isinstance(target, str):
+        target = parse_target(target)
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = initial_delay
+    attempts = 0
+    detail = "not probed"
+    while True:
+        attempts += 1
+        remaining = deadline - time.monotonic()
+        try:
+            detail = probe_once(target, timeout=max(0.05, min(connect_timeout, remaining)))
+            ready = True
+            break
+        except (OSError, ProbeError, ValueError, IndexError, struct.error) as e:
+            detail = str(e) or e.__class__.__name__
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or (stop_event is not None and stop_event.is_set()):
+            ready = False
+            break
+        if stop_event is not None:
+            stop_event.wait(min(delay, remaining))
+        else:
+            time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+    return {
+        "target": target["label"],
+        "kind": target["kind"],
+        "host": target["host"],
+        "port": target["port"],
+        "ready": ready,
+        "elapsed": round(time.monotonic() - started, 3),
+        "attempts": attempts,
+        "detail": detail,
+    }
+
+
+def wait_all(targets, timeout=120.0, max_workers=None, **kwargs):
+    """Wait for several targets concurrently; results keep the order of `targets`."""
+    targets = [parse_target(t) if isinstance(t, str) else t for t in targets]
+    if not targets:
+        return []
+    stop_event = kwargs.pop("stop_event", None) or threading.Event()
+    with ThreadPoolExecutor(max_workers=max_workers or len(targets)) as executor:
+        futures = [executor.submit(wait_ready, t, timeout=timeout, stop_event=stop_event, **kwargs) for t in targets]
+        try:
+            return [f.result() for f in futures]
+        except KeyboardInterrupt:
+            stop_event.set()
+            raise
+
+
+def format_result(result):
+    if result["ready"]:
+        return f"✅ {result['target']} ready in {result['elapsed']:.3f}s ({result['detail']})"
+    return f"❌ {result['target']} not ready after {result['elapsed']:.1f}s: {result['detail']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wait until database ports accept protocol-level sessions.")
+    parser.add_argument("targets", nargs="+", help="Targets as kind[+tls]://host[:port] (mysql, postgres, mongo).")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Overall timeout in seconds per target.")
+    parser.add_argument("--connect-timeout", type=float, default=2.0, help="Timeout of a single probe attempt.")
+    parser.add_argument("--max-delay", type=float, default=0.5, help="Upper bound of the backoff delay between attempts.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args(argv)
+
+    try:
+        targets = [parse_target(t) for t in args.targets]
+    except ValueError as e:
+        parser.error(str(e))
+    results = wait_all(targets, timeout=args.timeout, connect_timeout=args.connect_timeout, max_delay=args.max_delay)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(format_result(result))
+    return 0 if all(r["ready"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Resource profiles for mysql_docker.py launches.
+
+A launch can be limited in CPU and memory, keep its datadir on a tmpfs and
+receive a server option fragment sized to its memory budget (the memory limit
+minus the tmpfs datadir, which is charged to the same cgroup). The fragment
+follows the layout of conf/custom_*.cnf and is mounted in both include
+directories used by the MySQL, Percona and MariaDB images.
+"""
+import math
+import re
+
+MB = 1 << 20
+GB = 1 << 30
+
+# Memory kept outside the buffer pool for the server itself (dictionary, PFS, log buffers)
+BASE_OVERHEAD = 256 * MB
+# Memory budgeted per connection (thread stack and session buffers)
+PER_CONNECTION = 4 * MB
+MIN_BUDGET = 384 * MB
+POOL_CHUNK = 128 * MB
+
+PROFILES = {
+    # Durable settings, buffer pool at 70% of the budget
+    "bench": {"pool_ratio": 0.70, "max_connections": 1000, "extra": []},
+    # Many small instances on one host
+    "dense": {"pool_ratio": 0.50, "max_connections": 100, "extra": []},
+    # Throw-away data: relaxed durability for the fastest loads
+    "ephemeral": {"pool_ratio": 0.70, "max_connections": 1000, "extra": [
+        ("Flush the redo log once per second instead of at each commit", "innodb_flush_log_at_trx_commit", "2"),
+        ("Let the OS flush the binary log", "sync_binlog", "0"),
+        ("Disable the doublewrite buffer", "innodb_doublewrite", "0"),
+    ]},
+}
+
+CONF_TARGETS = ("/etc/mysql/conf.d/zz-profile.cnf", "/etc/my.cnf.d/zz-profile.cnf")
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([bkmgt]?)i?b?\s*$", re.I)
+_UNITS = {"": 1, "b": 1, "k": 1 << 10, "m": MB, "g": GB, "t": 1 << 40}
+
+
+def parse_size(text):
+    """Parse a Docker-style size ("512m", "2g", "1.5G", "1048576") into bytes."""
+    if isinstance(text, int):
+        return text
+    match = _SIZE_RE.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+def format_size(value):
+    """Format bytes with the largest exact unit understood by option files (G, M or K)."""
+    for suffix, unit in (("G", GB), ("M", MB), ("K", 1 << 10)):
+        if value >= unit and value % unit == 0:
+            return f"{value // unit}{suffix}"
+    return str(value)
+
+
+def size_settings(profile, memory, cpus=None, tmpfs_size=0):
+    """Return [(comment, option, value)] for `profile` within `memory` bytes (minus the tmpfs datadir)."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r} (choose from {', '.join(sorted(PROFILES))})")
+    spec = PROFILES[profile]
+    budget = memory - tmpfs_size
+    if budget < MIN_BUDGET:
+        raise ValueError(f"Memory budget {format_size(max(budget, 0))} is below {format_size(MIN_BUDGET)} "
+                         "(raise --memory or shrink --tmpfs-datadir)")
+    pool = max(POOL_CHUNK, int(budget * spec["pool_ratio"]) // POOL_CHUNK * POOL_CHUNK)
+    log_file = min(2 * GB, max(64 * MB, pool // 4 // MB * MB))
+    io_threads = max(1, min(64, math.ceil(cpus))) if cpus else 4
+    connections = max(20, min(spec["max_connections"], (budget - pool - BASE_OVERHEAD) // PER_CONNECTION))
+    percent = round(100 * spec["pool_ratio"])
+    return [
+        (f"InnoDB buffer pool size ({percent}% of the {format_size(budget)} budget)",
+         "innodb_buffer_pool_size", format_size(pool)),
+        ("Redo log file size (25% of the buffer pool, 64M-2G)", "innodb_log_file_size", format_size(log_file)),
+        ("Background read threads (one per CPU)", "innodb_read_io_threads", str(io_threads)),
+        ("Background write threads (one per CPU)", "innodb_write_io_threads", str(io_threads)),
+        (f"Connections fitting in the remaining memory ({format_size(PER_CONNECTION)} each)",
+         "max_connections", str(connections)),
+    ] + spec["extra"]
+
+
+def render_fragment(env_name, profile, memory, cpus=None, tmpfs_size=0):
+    """Render the option fragment of an environment."""
+    limits = [f"profile={profile}", f"memory={format_size(memory)}"]
+    if cpus:
+        limits.append(f"cpus={cpus:g}")
+    if tmpfs_size:
+        limits.append(f"tmpfs-datadir={format_size(tmpfs_size)}")
+    lines = [f"# Generated by mysql_docker.py for {env_name}: {' '.join(limits)}", "[mysqld]", "",
+             f"# --- Resource Profile ({profile}) ---"]
+    for comment, option, value in size_settings(profile, memory, cpus, tmpfs_size):
+        lines += [f"# {comment}", f"{option} = {value}"]
+    return "\n".join(lines) + "\n"
+
+
+def container_options(cpus=None, memory=None, tmpfs_size=None, fragment_path=None):
+    """Keyword arguments for `containers.run` applying the limits, tmpfs datadir and fragment."""
+    options = {}
+    if cpus:
+        options["nano_cpus"] = int(cpus * 1e9)
+    if memory:
+        # No swap so that runs under the same limit stay comparable
+        options["mem_limit"] = memory
+        options["memswap_limit"] = memory
+    if tmpfs_size:
+        options["tmpfs"] = {"/var/lib/mysql": f"rw,size={tmpfs_size},mode=0755"}
+    if fragment_path:
+        options["volumes"] = [f"{fragment_path}:{target}:ro" for target in CONF_TARGETS]
+    return options
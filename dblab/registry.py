@@ -0,0 +1,138 @@
+"""Indexed registry of the environments created by mysql_docker.py.
+
+Each environment is one row keyed by its name in `.environments.db` (SQLite),
+holding the image, host port, credentials and `.my.cnf` path. The
+`mysql.bashrc` alias file is a rendering of the registry, regenerated inside the
+same write transaction as every change so concurrent writers can never publish
+a stale file.
+"""
+import re
+import time
+from pathlib import Path
+
+from dblab.store import Transaction, open_db
+
+REGISTRY_FILE = Path(__file__).resolve().parent.parent / ".environments.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS environments (
+    name TEXT PRIMARY KEY,
+    db_type TEXT,
+    version TEXT,
+    image TEXT,
+    port INTEGER,
+    username TEXT,
+    password TEXT,
+    cnf_path TEXT,
+    container_id TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+FIELDS = ("db_type", "version", "image", "port", "username", "password", "cnf_path", "container_id")
+
+
+def bash_aliases(env_name, password):
+    """Return the Bash aliases generated for one environment."""
+    return [
+        f"alias {env_name}='docker exec -it {env_name} mysql -uroot -p\"{password}\"'",
+        f"alias {env_name}c='docker exec -i {env_name} mysql -uroot -p\"{password}\"'",
+        f"alias {env_name}dump='docker exec -it {env_name} mysqldump -uroot -p\"{password}\"'",
+        f"alias {env_name}flush='docker exec -it {env_name} mysql -uroot -p\"{password}\" -e \"FLUSH PRIVILEGES;\"'",
+        f"alias {env_name}dblist='docker exec -it {env_name} mysql -uroot -p\"{password}\" -e \"SHOW DATABASES;\"'",
+        f"alias {env_name}sh='docker exec -it {env_name} bash'",
+        f"alias {env_name}logs='docker logs {env_name}'",
+        f"alias {env_name}stop='docker stop {env_name}'",
+        f"alias {env_name}start='docker start {env_name}'",
+    ]
+
+
+def render_bashrc(entries):
+    """Render the full alias file for `entries` (registry rows)."""
+    blocks = []
+    for entry in entries:
+        lines = [f"export MYSQL_DEFAULTS_FILE_{entry['name']}={entry['cnf_path']}"]
+        lines += bash_aliases(entry["name"], entry["password"])
+        blocks.append("\n".join(lines) + "\n")
+    return "\n".join(blocks)
+
+
+_EXPORT_RE = re.compile(r"^export MYSQL_DEFAULTS_FILE_(\S+?)=(\S+)$")
+_ALIAS_RE = re.compile(r"^alias (\S+?)='docker exec -it \1 mysql -uroot -p\"(.*)\"'$")
+
+
+def parse_legacy_bashrc(text):
+    """Extract {name: {"cnf_path", "password"}} from an append-only mysql.bashrc."""
+    found = {}
+    for line in text.splitlines():
+        match = _EXPORT_RE.match(line)
+        if match:
+            found.setdefault(match.group(1), {})["cnf_path"] = match.group(2)
+            continue
+        match = _ALIAS_RE.match(line)
+        if match:
+            found.setdefault(match.group(1), {})["password"] = match.group(2)
+    return found
+
+
+class EnvironmentRegistry:
+    """CRUD access to the environment rows; `on_change(entries)` runs inside each write."""
+
+    def __init__(self, path=None, on_change=None):
+        self.path = Path(path or REGISTRY_FILE)
+        self.on_change = on_change
+        open_db(self.path, SCHEMA).close()
+
+    def _connect(self):
+        return Transaction(open_db(self.path))
+
+    @staticmethod
+    def _rows(db, where="", params=()):
+        cursor = db.execute(f"SELECT * FROM environments {where} ORDER BY name", params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _changed(self, db):
+        if self.on_change:
+            self.on_change(self._rows(db))
+
+    def add(self, name, **fields):
+        """Insert or update environment `name`; fields left as None keep their value."""
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown environment field(s): {', '.join(sorted(unknown))}")
+        with self._connect() as db:
+            existing = self._rows(db, "WHERE name = ?", (name,))
+            row = existing[0] if existing else {"name": name, "created_at": time.time()}
+            row.update({k: v for k, v in fields.items() if v is not None})
+            columns = ["name", "created_at"] + [f for f in FIELDS if f in row]
+            db.execute(
+                f"INSERT OR REPLACE INTO environments ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [row[c] for c in columns],
+            )
+            self._changed(db)
+        return row
+
+    def remove(self, name):
+        """Delete environment `name`; return the removed row or None."""
+        with self._connect() as db:
+            existing = self._rows(db, "WHERE name = ?", (name,))
+            if not existing:
+                return None
+            db.execute("DELETE FROM environments WHERE name = ?", (name,))
+            self._changed(db)
+        return existing[0]
+
+    def get(self, name):
+        with self._connect() as db:
+            rows = self._rows(db, "WHERE name = ?", (name,))
+        return rows[0] if rows else None
+
+    def all(self):
+        with self._connect() as db:
+            return self._rows(db)
+
+    def refresh(self):
+        """Re-run `on_change` without modifying anything (e.g. to rebuild the alias file)."""
+        with self._connect() as db:
+            self._changed(db)
@@ -0,0 +1,174 @@
+"""Dataset snapshot images for mysql_docker.py.
+
+Official MySQL/MariaDB images declare /var/lib/mysql as a volume, so a plain
+`docker commit` would not capture the data. A snapshot therefore copies the
+(cleanly shut down) datadir of a prepared environment into the image layer at
+SNAPSHOT_DATADIR and commits it with the engine's own entrypoint, plus
+`--datadir` pointing at the copy. Containers started from it find an
+initialized datadir and skip both first-boot initialization and dataset
+injection; overlayfs copy-on-write makes the start itself instant.
+
+Snapshots are keyed by the content hash of the dataset in the `test_db`
+submodule and the engine image id, so a submodule update or a new engine
+build never reuses stale data.
+"""
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+
+from dblab import LABEL_PREFIX
+
+SNAPSHOT_REPOSITORY = "multi-db-snapshot"
+SNAPSHOT_LABEL = f"{LABEL_PREFIX}.snapshot"
+SNAPSHOT_DATADIR = "/var/lib/mysql-snapshot"
+TEST_DB_DIR = Path(__file__).resolve().parent.parent / "test_db"
+
+# Dataset name -> (directory in test_db, schema that proves it was injected)
+DATASETS = {
+    "employees": ("employees", "employees"),
+    "sakila": ("sakila", "sakila"),
+}
+
+
+def _hash_tree(path):
+    """sha256 over relative paths and contents of every file below `path`."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d != ".git")
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode() + b"\0")
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dataset_hash(datasets, test_db_dir=TEST_DB_DIR):
+    """Content hash of the `datasets` directories of the test_db submodule.
+
+    Uses the git tree object ids when the checkout is clean (instant) and
+    falls back to hashing file contents otherwise.
+    """
+    test_db_dir = Path(test_db_dir)
+    parts = []
+    for dataset in sorted(datasets):
+        directory = DATASETS[dataset][0]
+        tree = None
+        try:
+            dirty = subprocess.run(["git", "-C", str(test_db_dir), "status", "--porcelain", "--", directory],
+                                   capture_output=True, text=True, check=True).stdout.strip()
+            if not dirty:
+                tree = subprocess.run(["git", "-C", str(test_db_dir), "rev-parse", f"HEAD:./{directory}"],
+                                      capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        parts.append(f"{dataset}={tree or _hash_tree(test_db_dir / directory)}")
+    return hashlib.sha256(";".join(parts).encode()).hexdigest()
+
+
+def snapshot_key(image_id, datasets, test_db_dir=TEST_DB_DIR):
+    return hashlib.sha256(f"{image_id}|{dataset_hash(datasets, test_db_dir)}".encode()).hexdigest()[:16]
+
+
+def snapshot_tag(image, datasets, key):
+    engine = image.replace("/", "-").replace(":", "-")
+    return f"{SNAPSHOT_REPOSITORY}:{engine}-{'+'.join(sorted(datasets))}-{key}"
+
+
+def find(docker_client, image, datasets):
+    """Return the snapshot image matching the current `image` build and datasets, or None."""
+    engine = docker_client.images.get(image)
+    key = snapshot_key(engine.id, datasets)
+    images = docker_client.images.list(filters={"label": f"{SNAPSHOT_LABEL}.key={key}"})
+    return images[0] if images else None
+
+
+def list_snapshots(docker_client):
+    rows = []
+    for image in docker_client.images.list(filters={"label": SNAPSHOT_LABEL}):
+        labels = image.labels or {}
+        rows.append({
+            "tag": image.tags[0] if image.tags else image.short_id,
+            "key": labels.get(f"{SNAPSHOT_LABEL}.key"),
+            "source_image": labels.get(f"{SNAPSHOT_LABEL}.source_image"),
+            "datasets": labels.get(f"{SNAPSHOT_LABEL}.datasets"),
+            "size_mb": round(image.attrs.get("Size", 0) / 1e6, 1),
+            "created": image.attrs.get("Created"),
+        })
+    return sorted(rows, key=lambda r: r["tag"])
+
+
+def _missing_schemas(container, password, datasets):
+    client = container.exec_run(["sh", "-c", "command -v mariadb || command -v mysql"]).output.decode().strip()
+    exit_code, output = container.exec_run([client or "mysql", "-uroot", "-N", "-e", "SHOW DATABASES"],
+                                           environment={"MYSQL_PWD": password})
+    if exit_code != 0:
+        raise RuntimeError(f"Cannot list databases: {output.decode(errors='replace').strip()}")
+    present = set(output.decode().split())
+    return [d for d in datasets if DATASETS[d][1] not in present]
+
+
+def create(docker_client, container, image, password, username, datasets, log=print):
+    """Commit the datadir of `container` (engine `image`, `datasets` injected) as a snapshot image."""
+    missing = _missing_schemas(container, password, datasets)
+    if missing:
+        raise RuntimeError(f"Dataset(s) not injected in {container.name}: {', '.join(missing)}")
+    engine = docker_client.images.get(image)
+    key = snapshot_key(engine.id, datasets)
+    tag = snapshot_tag(image, datasets, key)
+    config = engine.attrs["Config"]
+
+    log(f"🛑 Stopping {container.name} for a consistent datadir...")
+    container.stop(timeout=60)
+    helper = None
+    try:
+        helper = docker_client.containers.create(
+            engine.id,
+            entrypoint=["sh", "-c"],
+            command=[f"cp -a /var/lib/mysql {SNAPSHOT_DATADIR}"],
+            volumes_from=[container.id],
+            user="root",
+        )
+        helper.start()
+        status = helper.wait()
+        if status.get("StatusCode") != 0:
+            raise RuntimeError(f"Datadir copy failed: {helper.logs().decode(errors='replace')}")
+        entrypoint = config.get("Entrypoint") or []
+        cmd = (config.get("Cmd") or ["mysqld"]) + [f"--datadir={SNAPSHOT_DATADIR}"]
+        labels = {
+            SNAPSHOT_LABEL: "true",
+            f"{SNAPSHOT_LABEL}.key": key,
+            f"{SNAPSHOT_LABEL}.source_image": image,
+            f"{SNAPSHOT_LABEL}.datasets": ",".join(sorted(datasets)),
+            f"{SNAPSHOT_LABEL}.secret": password,
+            f"{SNAPSHOT_LABEL}.username": username or "",
+        }
+        changes = [
+            f"ENTRYPOINT {_json_list(entrypoint)}",
+            f"CMD {_json_list(cmd)}",
+            f"USER {config.get('User') or 'root'}",
+        ] + [f'LABEL "{k}"="{v}"' for k, v in labels.items()]
+        repository, tag_name = tag.split(":", 1)
+        log(f"📸 Committing {tag}...")
+        helper.commit(repository=repository, tag=tag_name, changes=changes)
+    finally:
+        if helper is not None:
+            helper.remove(force=True)
+        container.start()
+    return tag
+
+
+def _json_list(values):
+    return "[" + ", ".join('"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values) + "]"
+
+
+def remove(docker_client, tag_or_key):
+    """Remove a snapshot image by tag or key; return the removed tags."""
+    removed = []
+    for row in list_snapshots(docker_client):
+        if tag_or_key in (row["tag"], row["key"]):
+            docker_client.images.remove(row["tag"], force=True)
+            removed.append(row["tag"])
+    return removed
@@ -0,0 +1,32 @@
+"""Shared SQLite helpers for the on-disk registries in dblab."""
+import sqlite3
+
+
+def open_db(path, schema=None):
+    """Open `path` in autocommit mode with WAL journaling, creating `schema` if given."""
+    db = sqlite3.connect(path, timeout=30, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    if schema:
+        db.executescript(schema)
+    return db
+
+
+class Transaction:
+    """`with` wrapper running the block in one BEGIN IMMEDIATE transaction.
+
+    BEGIN IMMEDIATE takes the database write lock up front, which serializes
+    read-modify-write sequences across threads and processes.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, *exc):
+        try:
+            self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.db.close()
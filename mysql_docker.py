@@ -1,27 +1,77 @@
 import argparse
+import json
 import random
 import string
 import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from docker import from_env
 import docker 
 from pathlib import Path
 
+from dblab import LABEL_PREFIX, MANAGED_LABEL, events, loader, managed_labels, pool, profiles, snapshot
+from dblab.ports import PortAllocationError, PortRegistry
+from dblab.probe import format_result, parse_target, wait_all, wait_ready
+from dblab.registry import EnvironmentRegistry, bash_aliases, parse_legacy_bashrc, render_bashrc
+
 script_dir=Path(__file__).resolve().parent
-    
+BASHRC_PATH = script_dir / "mysql.bashrc"
+
+DEFAULT_WORKERS = 8
+RESOURCE_KEYS = ("cpus", "memory", "tmpfs_datadir", "profile")
+
+DB_IMAGE_KEYWORDS = ["mysql", "mariadb", "percona"]
+STATUS_FILTERS = {
+    "running": ["running", "restarting"],
+    "stopped": ["created", "exited", "paused", "dead"],
+}
+
+_client = None
+_client_lock = threading.Lock()
+_file_lock = threading.Lock()
+_ports = None
+_environments = None
+
+def get_docker_client():
+    """Return the process-wide Docker client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = from_env()
+        return _client
+
 def generate_password(length=64):
     """Generate a random password."""
     chars = string.ascii_letters + string.digits
     return ''.join(random.choice(chars) for _ in range(length))
 
-def find_free_port():
-    """Find a free port for forwarding that is not 3306."""
-    import socket
-    while True:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.bind(('', 0))
-            port = s.getsockname()[1]
-            if port != 3306:
-                return port
+def get_port_registry():
+    """Return the process-wide port reservation registry."""
+    global _ports
+    with _client_lock:
+        if _ports is None:
+            _ports = PortRegistry()
+        return _ports
+
+def find_free_port(owner="adhoc"):
+    """Reserve a free host port for `owner` in the on-disk port registry."""
+    return get_port_registry().allocate(owner)[0]
+
+def _atomic_write(file_path, content, mode=0o600):
+    """Write a file through a temporary sibling and rename it into place."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 def create_my_cnf(env_name, username, password, host="127.0.0.1", port=3306):
     """Create a .my.cnf file for easy connection."""
@@ -32,100 +82,380 @@ host={host}
 port={port}
 """
     file_path = f"{env_name}.my.cnf"
-    with open(file_path, 'w') as f:
-        f.write(config_content)
-    os.chmod(file_path, 0o600)  # Secure permissions
+    _atomic_write(file_path, config_content, 0o600)  # Secure permissions
     print("ℹ️ ", f"Configuration file generated: {file_path}")
+    return os.path.abspath(file_path)
+
+def prepare_resources(env_name, resources):
+    """Return `containers.run` options for the resource limits, writing the profile fragment if any.
+
+    A memory limit without an explicit profile uses the "bench" profile, so the
+    buffer pool always matches the limit.
+    """
+    resources = {k: v for k, v in (resources or {}).items() if v}
+    if not resources:
+        return {}
+    memory = profiles.parse_size(resources["memory"]) if resources.get("memory") else None
+    tmpfs_size = profiles.parse_size(resources["tmpfs_datadir"]) if resources.get("tmpfs_datadir") else 0
+    cpus = float(resources["cpus"]) if resources.get("cpus") else None
+    profile = resources.get("profile") or ("bench" if memory else None)
+    fragment_path = None
+    if profile:
+        if not memory:
+            raise ValueError("--profile needs --memory to size the configuration")
+        fragment_path = f"{env_name}.profile.cnf"
+        _atomic_write(fragment_path, profiles.render_fragment(env_name, profile, memory, cpus, tmpfs_size), 0o644)
+        print("ℹ️ ", f"Profile fragment generated: {fragment_path}")
+        fragment_path = os.path.abspath(fragment_path)
+    return profiles.container_options(cpus, memory, tmpfs_size, fragment_path)
+
+def _write_bashrc(entries):
+    """Regenerate mysql.bashrc from the registry rows (called inside the registry write lock)."""
+    content = render_bashrc(entries)
+    if content:
+        _atomic_write(BASHRC_PATH, content, 0o644)
+    elif os.path.exists(BASHRC_PATH):
+        os.remove(BASHRC_PATH)
+        print(f"{BASHRC_PATH} was empty and has been removed.")
 
-def generate_bash_alias(env_name, port, password):
-    """Generate useful Bash aliases for a MySQL environment."""
-    exporte = f"export MYSQL_DEFAULTS_FILE_{env_name}={script_dir}/{env_name}.my.cnf"
-    aliases = [
-        f"alias {env_name}='docker exec -it {env_name} mysql -uroot -p\"{password}\"'",
-        f"alias {env_name}c='docker exec -i {env_name} mysql -uroot -p\"{password}\"'",
-        f"alias {env_name}dump='docker exec -it {env_name} mysqldump -uroot -p\"{password}\"'",
-        f"alias {env_name}flush='docker exec -it {env_name} mysql -uroot -p\"{password}\" -e \"FLUSH PRIVILEGES;\"'",
-        f"alias {env_name}dblist='docker exec -it {env_name} mysql -uroot -p\"{password}\" -e \"SHOW DATABASES;\"'",
-        f"alias {env_name}sh='docker exec -it {env_name} bash'",
-        f"alias {env_name}logs='docker logs {env_name}'",
-        f"alias {env_name}stop='docker stop {env_name}'",
-        f"alias {env_name}start='docker start {env_name}'",
-    ]
-
-    bashrc_path = "mysql.bashrc"
-    with open(bashrc_path, 'a') as f:
-        f.write(f"{exporte}\n")
-        for alias in aliases:
-            f.write(f"{alias}\n")
-        f.write("\n")
-
-    print(f"Aliases added to {bashrc_path}:")
+def get_env_registry():
+    """Return the environment registry, importing a legacy append-only mysql.bashrc once."""
+    global _environments
+    with _client_lock:
+        if _environments is None:
+            _environments = EnvironmentRegistry(on_change=_write_bashrc)
+            if not _environments.all() and os.path.exists(BASHRC_PATH):
+                with open(BASHRC_PATH) as f:
+                    legacy = parse_legacy_bashrc(f.read())
+                for name, fields in legacy.items():
+                    if "password" in fields:
+                        _environments.add(name, **fields)
+        return _environments
+
+def generate_bash_alias(env_name, port, password, **fields):
+    """Record a MySQL environment in the registry and regenerate its Bash aliases."""
+    fields.setdefault("cnf_path", os.path.abspath(f"{env_name}.my.cnf"))
+    get_env_registry().add(env_name, port=port, password=password, **fields)
+
+    aliases = bash_aliases(env_name, password)
+    print(f"Aliases added to {BASHRC_PATH}:")
     for alias in aliases:
         print(f"  {alias}")
 
-def launch_container(env_name, db_type, version, username, password, debug=False):
+def launch_container(env_name, db_type, version, username, password, debug=False, docker_client=None, use_pool=True,
+                     from_snapshot=None, resources=None):
+    """Launch a Docker container for MySQL/MariaDB and return a per-environment result.
+
+    `from_snapshot` (a list of dataset names) starts the container from the
+    matching dataset snapshot image instead of an empty datadir. `resources`
+    ({"cpus", "memory", "tmpfs_datadir", "profile"}) limits the container and
+    sizes its configuration; such launches never use the warm pool.
+    """
     version = version or 'latest'
-    """Launch a Docker container for MySQL/MariaDB."""
     if debug:
       print("🐞 Debug: Initializing Docker client")
-    docker_client = from_env()
+    docker_client = docker_client or get_docker_client()
 
     image = f"{db_type}:{version}"
-    port = find_free_port()
     container_name = env_name
+    result = {"env_name": env_name, "image": image, "port": None, "status": "error", "error": None}
     if debug:
         print(f"🐞 Debug: Checking if container '{container_name}' exists")
     try:
         container = docker_client.containers.get(container_name)
         if container.status == "running":
           print(f"Container {container_name} is already running.")
+          result["status"] = "running"
         else:
             if debug:
                 print(f"🐞 Debug: Starting container '{container_name}'")
             container.start()
             print(f"Container {container_name} started successfully.")
-        return    
+            result["status"] = "started"
+        return result
     except docker.errors.NotFound:
       print(f"{container_name} not found")
-    except e:
+    except Exception as e:
       print(f"Erreur: {e}")
-      return
+      result["error"] = str(e)
+      return result
  
     if debug:
         print(f"🐞 Debug: Container '{container_name}' not found, attempting to run a new container")
     password = password or generate_password()
+    try:
+        if from_snapshot and (resources or {}).get("tmpfs_datadir"):
+            raise ValueError("--tmpfs-datadir cannot be combined with --from-snapshot")
+        run_options = prepare_resources(env_name, resources)
+    except ValueError as e:
+        print(f"Error: {e}")
+        result["error"] = str(e)
+        return result
+    run_image = image
+    snapshot_image = None
+    if from_snapshot:
+        try:
+            snapshot_image = snapshot.find(docker_client, image, from_snapshot)
+        except docker.errors.ImageNotFound:
+            snapshot_image = None
+        if snapshot_image is None:
+            result["error"] = f"No {'+'.join(from_snapshot)} snapshot for {image}"
+            print(f"Error: {result['error']} (create one with `snapshot create`)")
+            return result
+        run_image = snapshot_image.tags[0]
+    elif use_pool and not run_options and image in pool.load_config()[0]:
+        if claim_from_pool(docker_client, image, env_name, username, password, result, debug=debug,
+                           db_type=db_type, version=version):
+            return result
+    try:
+        port = find_free_port(env_name)
+    except PortAllocationError as e:
+        print(f"Error allocating port: {e}")
+        result["error"] = str(e)
+        return result
+    result["port"] = port
     try:
         if debug:
-            print(f"🐞 Debug: Running container with image '{image}', name '{container_name}', port '{port}'")
+            print(f"🐞 Debug: Running container with image '{run_image}', name '{container_name}', port '{port}'")
         container = docker_client.containers.run(
-            image,
+            run_image,
             detach=True,
             name=container_name,
             ports={'3306/tcp': port},
+            labels=managed_labels(env_name, db_type, version),
             environment={
                 "MYSQL_ROOT_PASSWORD": password,
                 "MYSQL_USER": username,
                 "MYSQL_PASSWORD": password,
                 "MYSQL_DATABASE": f"{env_name}_db"
-            }
+            },
+            **run_options
         )
         print(f"Container {db_type} v{version} launched successfully!")
         print(f"Container name: {container_name}")
         print(f"Access port: {port}")
     except docker.errors.ImageNotFound as e:
         print(f"Image Not Found '{version}': {e}")
-        return
+        result["error"] = f"Image Not Found '{image}'"
+        get_port_registry().release(env_name)
+        return result
     except Exception as e:
         print(f"Error launching container: {e}")
-    
-    if 'container' in locals() and container:
-        if 'container' in locals() and container:
-            create_my_cnf(env_name, username, password, port=port)
-            generate_bash_alias(env_name, port, password)
+        result["error"] = str(e)
+        get_port_registry().release(env_name)
+        return result
+    if snapshot_image is not None:
+        try:
+            adopt_snapshot(container, snapshot_image, env_name, username, password, port)
+        except Exception as e:
+            print(f"Error preparing snapshot container: {e}")
+            result["error"] = str(e)
+            container.remove(force=True)
+            get_port_registry().release(env_name)
+            return result
+        print(f"Dataset(s) {', '.join(from_snapshot)} preloaded from {run_image}.")
+
+    cnf_path = create_my_cnf(env_name, username, password, port=port)
+    generate_bash_alias(env_name, port, password, db_type=db_type, version=version, image=image,
+                        username=username, cnf_path=cnf_path, container_id=container.id)
+    result["status"] = "launched"
+    return result
+
+def adopt_snapshot(container, snapshot_image, env_name, username, password, port):
+    """Wait for a container started from a snapshot and give it the environment credentials."""
+    ready = wait_ready(f"mysql://127.0.0.1:{port}", timeout=pool.READY_TIMEOUT)
+    if not ready["ready"]:
+        raise RuntimeError(f"Snapshot container never became ready: {ready['detail']}")
+    secret = snapshot_image.labels[f"{snapshot.SNAPSHOT_LABEL}.secret"]
+    pool.reset_credentials(container, secret, env_name, username, password)
+
+def claim_from_pool(docker_client, image, env_name, username, password, result, debug=False, db_type=None,
+                    version=None):
+    """Take a warm member of the `image` pool for `env_name`; return True on success."""
+    if db_type is None:
+        db_type, _, version = image.partition(":")
+    claimed = pool.claim(docker_client, image, env_name)
+    if not claimed:
+        if debug:
+            print(f"🐞 Debug: No ready pool member for '{image}', falling back to a fresh container")
+        return False
+    container, port, secret = claimed
+    try:
+        pool.reset_credentials(container, secret, env_name, username, password)
+    except Exception as e:
+        print(f"Error resetting credentials of pool member: {e}")
+        container.remove(force=True)
+        return False
+    print(f"Container {env_name} claimed from the {image} pool.")
+    print(f"Access port: {port}")
+    result.update(port=port, status="claimed")
+    cnf_path = create_my_cnf(env_name, username, password, port=port)
+    generate_bash_alias(env_name, port, password, db_type=db_type, version=version, image=image,
+                        username=username, cnf_path=cnf_path, container_id=container.id)
+    pool.refill_in_background(image)
+    return True
+
+def manage_pool(args):
+    """Dispatch the `pool` sub-commands."""
+    docker_client = get_docker_client()
+    if args.pool_command == "add":
+        image = f"{args.db_type}:{args.version}"
+        pool.configure(image, size=args.size, max_size=args.max)
+        print(f"Pool {image}: size={args.size} max={args.max}")
+        if not args.no_fill:
+            pool.refill(docker_client, image=image)
+    elif args.pool_command == "remove":
+        image = f"{args.db_type}:{args.version}"
+        pool.unconfigure(image)
+        pool.refill(docker_client, image=image)
+    elif args.pool_command == "refill":
+        pool.refill(docker_client, image=args.image, idle_ttl=args.idle_ttl)
+    elif args.pool_command == "daemon":
+        pool.run_daemon(docker_client, interval=args.interval, idle_ttl=args.idle_ttl)
+    else:
+        print_table(["Image", "Size", "Max", "Running", "Stopped", "LastClaim"], [
+            [r["image"], r["size"], r["max"], r["running"], r["stopped"],
+             time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["last_claim"])) if r["last_claim"] else "-"]
+            for r in pool.status(docker_client)
+        ])
+
+def manage_snapshots(args):
+    """Dispatch the `snapshot` sub-commands."""
+    docker_client = get_docker_client()
+    if args.snapshot_command == "create":
+        entry = get_env_registry().get(args.env_name)
+        if entry is None or not entry["password"] or not entry["image"]:
+            print(f"Environment {args.env_name} is not registered with its image and password.")
+            raise SystemExit(1)
+        container = docker_client.containers.get(args.env_name)
+        try:
+            tag = snapshot.create(docker_client, container, entry["image"], entry["password"], entry["username"],
+                                  args.dataset or ["employees"])
+        except RuntimeError as e:
+            print(f"Error creating snapshot: {e}")
+            raise SystemExit(1)
+        print(f"Snapshot {tag} created.")
+    elif args.snapshot_command == "rm":
+        removed = snapshot.remove(docker_client, args.snapshot)
+        print(f"Removed: {' '.join(removed) or '-'}")
+    else:
+        print_table(["Tag", "Key", "Source", "Datasets", "SizeMB"], [
+            [r["tag"], r["key"], r["source_image"], r["datasets"], r["size_mb"]]
+            for r in snapshot.list_snapshots(docker_client)
+        ])
+
+def manage_ports(args):
+    """Dispatch the `ports` sub-commands."""
+    registry = get_port_registry()
+    if args.ports_command == "reserve":
+        try:
+            if args.range:
+                first, last = (int(p) for p in args.range.split("-"))
+                ports = registry.reserve_range(args.owner, first, last)
+            else:
+                ports = registry.allocate(args.owner, count=args.count, contiguous=args.contiguous)
+        except PortAllocationError as e:
+            print(f"Error reserving ports: {e}")
+            raise SystemExit(1)
+        print(" ".join(map(str, ports)))
+    elif args.ports_command == "release":
+        print(f"Released: {' '.join(map(str, registry.release(args.owner))) or '-'}")
+    elif args.ports_command == "reclaim":
+        live = [entry["Names"][0].lstrip("/") for entry in get_docker_client().api.containers(all=True)]
+        released = registry.reclaim(live + (args.keep or []))
+        print(f"Reclaimed: {' '.join(map(str, released)) or '-'}")
+    else:
+        print_table(["Port", "Owner", "ReservedAt"], [
+            [r["port"], r["owner"], time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["reserved_at"]))]
+            for r in registry.reservations()
+        ])
+
+def load_spec_file(spec_path, defaults):
+    """Load environment specs from a JSON file.
+
+    The file holds a list of objects (or an object with an "environments" list),
+    each with at least "env_name"; missing keys fall back to the CLI defaults.
+    """
+    with open(spec_path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("environments", [])
+    specs = []
+    for entry in data:
+        if isinstance(entry, str):
+            entry = {"env_name": entry}
+        if "env_name" not in entry:
+            raise ValueError(f"Spec entry without 'env_name' in {spec_path}: {entry}")
+        specs.append({**defaults, **entry})
+    return specs
+
+def launch_environments(specs, max_workers=DEFAULT_WORKERS, debug=False, use_pool=True, from_snapshot=None):
+    """Launch several environments concurrently with one shared Docker client.
+
+    Returns the list of per-environment results in the order of `specs`.
+    """
+    docker_client = get_docker_client()
+    results = {}
+    workers = max(1, min(max_workers, len(specs)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                launch_container,
+                spec["env_name"], spec["db_type"], spec.get("version"),
+                spec["username"], spec.get("password"),
+                debug=debug, docker_client=docker_client, use_pool=use_pool, from_snapshot=from_snapshot,
+                resources={key: spec.get(key) for key in RESOURCE_KEYS}
+            ): spec["env_name"]
+            for spec in specs
+        }
+        for future in as_completed(futures):
+            env_name = futures[future]
+            try:
+                results[env_name] = future.result()
+            except Exception as e:
+                results[env_name] = {"env_name": env_name, "image": None, "port": None, "status": "error", "error": str(e)}
+    return [results[spec["env_name"]] for spec in specs]
+
+def print_table(headers, data):
+    """Print rows as a left-aligned text table."""
+    column_widths = [max(len(str(row[i])) for row in data) for i in range(len(headers))] if data else [len(header) for header in headers]
+    column_widths = [max(len(header), width) for header, width in zip(headers, column_widths)]
+
+    def format_row(row):
+        return "  ".join(str(value).ljust(width) for value, width in zip(row, column_widths))
+
+    # Print header
+    print(format_row(headers))
+    print("  ".join("=" * width for width in column_widths))
+
+    # Print rows
+    for row in data:
+        print(format_row(row))
+
+def inject_datasets(env_name, datasets, workers=loader.DEFAULT_WORKERS, binlog="auto", password=None):
+    """Load test_db datasets into an environment over parallel client sessions."""
+    entry = get_env_registry().get(env_name) or {}
+    password = password or entry.get("password")
+    if not password:
+        print(f"No password known for {env_name} (register it with `info` or pass --password).")
+        raise SystemExit(1)
+    scripts = [script for dataset in datasets for script in loader.dataset_scripts(dataset)]
+    missing = [str(script) for script in scripts if not script.exists()]
+    if missing:
+        print(f"Missing dataset file(s): {', '.join(missing)} (run `git submodule update --init`).")
+        raise SystemExit(1)
+    container = get_docker_client().containers.get(env_name)
+    client = container.exec_run(["sh", "-c", "command -v mysql || command -v mariadb"]).output.decode().strip()
+    try:
+        loader.load_scripts(loader.container_client(env_name, password, client=client or "mysql"), scripts,
+                            workers=workers, binlog=binlog)
+    except loader.LoaderError as e:
+        print(f"Error injecting {', '.join(datasets)}: {e}")
+        raise SystemExit(1)
 
 def stop_container(env_name, debug=False):
     """Stop a Docker container."""
-    docker_client = from_env()
+    docker_client = get_docker_client()
     container_name = env_name
 
     try:
@@ -137,10 +467,10 @@ def stop_container(env_name, debug=False):
 
 def remove_environment(env_name, debug=False):
     """Remove Docker container, image, .my.cnf file, and alias for the given environment."""
-    docker_client = from_env()
+    docker_client = get_docker_client()
     container_name = env_name
-    my_cnf_path = f"{env_name}.my.cnf"
-    bashrc_path = "mysql.bashrc"
+    entry = get_env_registry().get(env_name) or {}
+    my_cnf_path = entry.get("cnf_path") or f"{env_name}.my.cnf"
 
     # Remove container
     try:
@@ -150,11 +480,19 @@ def remove_environment(env_name, debug=False):
     except Exception as e:
         print(f"Error removing container: {e}")
 
-    # Remove image
+    # Release reserved ports
+    released = get_port_registry().release(env_name)
+    if released:
+        print(f"Port(s) {', '.join(map(str, released))} released.")
+
+    # Remove image (snapshot images are only removed by `snapshot rm`)
     try:
         image_name = f"{container.image.tags[0]}"
-        docker_client.images.remove(image=image_name, force=True)
-        print(f"Image {image_name} removed successfully.")
+        if snapshot.SNAPSHOT_LABEL in (container.image.labels or {}):
+            print(f"Image {image_name} is a dataset snapshot, kept.")
+        else:
+            docker_client.images.remove(image=image_name, force=True)
+            print(f"Image {image_name} removed successfully.")
     except Exception as e:
         print(f"Error removing image: {e}")
 
@@ -165,67 +503,143 @@ def remove_environment(env_name, debug=False):
     else:
         print(f"Configuration file {my_cnf_path} does not exist.")
 
-    # Remove alias from bashrc
+    # Remove the resource profile fragment, if any
+    profile_path = os.path.join(os.path.dirname(os.path.abspath(my_cnf_path)), f"{env_name}.profile.cnf")
+    if os.path.exists(profile_path):
+        os.remove(profile_path)
+        print(f"Profile fragment {profile_path} removed successfully.")
+
+    # Remove the registry entry, which regenerates the aliases file
     try:
-        if os.path.exists(bashrc_path):
-            with open(bashrc_path, 'r') as f:
-                lines = f.readlines()
-            with open(bashrc_path, 'w') as f:
-                for line in lines:
-                    if f"{env_name}" not in line and line.strip():
-                        f.write(line)
-            # If the bashrc file is now empty, delete it
-            if os.path.getsize(bashrc_path) == 0:
-                os.remove(bashrc_path)
-                print(f"{bashrc_path} was empty and has been removed.")
-            else:
-                print(f"Alias for {env_name} removed from {bashrc_path}.")
-    except Exception as e:
-        print(f"Error removing alias: {e}")
+        if get_env_registry().remove(env_name):
+            print(f"Alias for {env_name} removed from {BASHRC_PATH}.")
     except Exception as e:
         print(f"Error removing alias: {e}")
 
-def list_containers(status_filter=None, debug=False):
-    """List all active Docker containers."""
-    docker_client = from_env()
-    try:
-        containers = docker_client.containers.list(all=True)
-    except Exception as e:
-        print(f"Error retrieving container list: {e}")
-        return
-    data = []
-    for container in containers:
-        if status_filter and container.status != status_filter:
+def _published_port(attrs, container_port='3306/tcp'):
+    """Return the host port bound to `container_port`, or None."""
+    port_bindings = attrs['NetworkSettings']['Ports'] or {}
+    if port_bindings.get(container_port):
+        return port_bindings[container_port][0]['HostPort']
+    return None
+
+def wait_for_environments(names, timeout=120.0, debug=False):
+    """Wait until each environment (or kind://host:port target) accepts sessions.
+
+    Environment names are resolved to their published 3306/tcp port and probed
+    with a MySQL handshake; all targets are probed concurrently.
+    """
+    targets = []
+    for name in names:
+        if "://" in name:
+            targets.append(parse_target(name))
             continue
-        try:
-            image = container.image.tags[0] if container.image.tags else "<none>"
-        except Exception:
-            image = "<image not found>"
-        if any(db in image.lower() for db in ["mysql", "mariadb", "percona"]):
-            name = container.name
-            status = "Running" if container.status == "running" else "Stopped"
-            port_bindings = container.attrs['NetworkSettings']['Ports']
-            if '3306/tcp' in port_bindings and port_bindings['3306/tcp']:
-                host_port = port_bindings['3306/tcp'][0]['HostPort']
-            else:
-                host_port = "<none>"
-            data.append([name, image, host_port, status])
+        container = get_docker_client().containers.get(name)
+        port = _published_port(container.attrs)
+        if port is None:
+            raise ValueError(f"Environment {name} does not publish port 3306")
+        target = parse_target(f"mysql://127.0.0.1:{port}")
+        target["label"] = name
+        targets.append(target)
+    if debug:
+        print(f"🐞 Debug: Probing {targets}")
+    return wait_all(targets, timeout=timeout)
 
-    # Print the results as a table
-    headers = ["Name", "Image", "HostPort", "Status"]
-    column_widths = [max(len(str(row[i])) for row in data) for i in range(len(headers))] if data else [len(header) for header in headers]
-    column_widths = [max(len(header), width) for header, width in zip(headers, column_widths)]
+def fetch_inventory(status_filter=None, labels=None, ancestors=None, all_images=False, docker_client=None):
+    """Return MySQL-family containers from a single low-level `containers` API call.
 
-    def format_row(row):
-        return "  ".join(str(value).ljust(width) for value, width in zip(row, column_widths))
+    By default only containers carrying the managed label are returned, filtered
+    server-side; `ancestors` filters by image instead, and `all_images` falls back
+    to matching image names of every container (still one API call).
+    """
+    docker_client = docker_client or get_docker_client()
+    filters = {}
+    if ancestors:
+        filters["ancestor"] = list(ancestors)
+    elif not all_images:
+        filters["label"] = [MANAGED_LABEL] + list(labels or [])
+    if status_filter:
+        filters["status"] = STATUS_FILTERS[status_filter]
+    inventory = []
+    for entry in docker_client.api.containers(all=True, filters=filters):
+        image = entry.get("Image") or "<none>"
+        if all_images and not ancestors and not any(db in image.lower() for db in DB_IMAGE_KEYWORDS):
+            continue
+        host_port = next(
+            (p["PublicPort"] for p in entry.get("Ports") or []
+             if p.get("PrivatePort") == 3306 and p.get("PublicPort")), None)
+        entry_labels = entry.get("Labels") or {}
+        inventory.append({
+            "name": (entry.get("Names") or ["/<none>"])[0].lstrip("/"),
+            "id": entry.get("Id", "")[:12],
+            "image": image,
+            "host_port": host_port,
+            "state": entry.get("State"),
+            "status": entry.get("Status"),
+            "db_type": entry_labels.get(f"{LABEL_PREFIX}.db_type"),
+            "version": entry_labels.get(f"{LABEL_PREFIX}.version"),
+        })
+    return sorted(inventory, key=lambda item: item["name"])
 
-    # Print header
-    print(format_row(headers))
-    print("  ".join("=" * width for width in column_widths))
+def list_containers(status_filter=None, debug=False, output_format="table", watch=None, labels=None, ancestors=None, all_images=False):
+    """List MySQL-family Docker containers as a table or JSON, optionally refreshing every `watch` seconds."""
+    docker_client = get_docker_client()
+    while True:
+        try:
+            inventory = fetch_inventory(status_filter, labels, ancestors, all_images, docker_client=docker_client)
+        except Exception as e:
+            print(f"Error retrieving container list: {e}")
+            return
+        if debug:
+            print(f"🐞 Debug: {len(inventory)} container(s) returned")
+        if watch:
+            print("\033[2J\033[H", end="")
+        if output_format == "json":
+            print(json.dumps(inventory, indent=2))
+        else:
+            data = [[item["name"], item["image"], item["host_port"] or "<none>",
+                     "Running" if item["state"] == "running" else "Stopped"] for item in inventory]
+            # Print the results as a table
+            print_table(["Name", "Image", "HostPort", "Status"], data)
+        if not watch:
+            return
+        try:
+            time.sleep(watch)
+        except KeyboardInterrupt:
+            return
 
-    # Print rows
-    for row in data:
-        print(format_row(row))
+def list_environments(output_format="table"):
+    """List registered environments from the registry, without querying Docker."""
+    entries = get_env_registry().all()
+    if output_format == "json":
+        print(json.dumps([{k: v for k, v in e.items() if k != "password"} for e in entries], indent=2))
+        return
+    print_table(["Name", "Image", "HostPort", "Created"], [
+        [e["name"], e["image"] or "<unknown>", e["port"] or "<none>",
+         time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e["created_at"]))]
+        for e in entries
+    ])
+
+def show_environment(env_name, port=None, username="admin", password=None):
+    """Print the registry entry of an environment, (re)generating its .my.cnf and aliases.
+
+    When `port` and `password` are given the entry is created or updated first.
+    """
+    registry = get_env_registry()
+    entry = registry.get(env_name)
+    if port is not None and password:
+        cnf_path = create_my_cnf(env_name, username, password, port=port)
+        generate_bash_alias(env_name, port, password, username=username, cnf_path=cnf_path)
+        entry = registry.get(env_name)
+    elif entry is None:
+        print(f"Environment {env_name} is not registered (pass PORT and --password to register it).")
+        raise SystemExit(1)
+    elif not os.path.exists(entry["cnf_path"] or ""):
+        entry["cnf_path"] = create_my_cnf(env_name, entry["username"] or username, entry["password"], port=entry["port"])
+        registry.add(env_name, cnf_path=entry["cnf_path"])
+    for key in ("name", "image", "port", "username", "cnf_path", "container_id"):
+        print(f"{key:<13}: {entry.get(key) or '-'}")
+    print(f"{'created_at':<13}: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['created_at']))}")
 
 def main(debug=False):
     parser = argparse.ArgumentParser(description="Manage MySQL/MariaDB containers.")
@@ -233,16 +647,94 @@ def main(debug=False):
 
     # Command to list environments
     list_parser = subparsers.add_parser("list", help="List all active environments.")
-    list_parser.add_argument("--status", choices=["running", "stopped"], help="Filter by container status.")
+    list_parser.add_argument("--live", action="store_true", help="Query Docker instead of the environment registry.")
+    list_parser.add_argument("--status", choices=["running", "stopped"], help="Filter by container status (implies --live).")
+    list_parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format.")
+    list_parser.add_argument("--watch", type=float, metavar="SECONDS", help="Refresh the listing every SECONDS (implies --live).")
+    list_parser.add_argument("--label", action="append", help="Extra label filter (key or key=value), may be repeated.")
+    list_parser.add_argument("--ancestor", action="append", help="List containers of this image instead of managed ones, may be repeated.")
+    list_parser.add_argument("--all-images", action="store_true", help="Include unmanaged containers whose image looks like MySQL/MariaDB/Percona.")
 
     # Command to start a container
-    start_parser = subparsers.add_parser("start", help="Start a new container.")
-    start_parser.add_argument("env_name", type=str, help="Logical name of the environment.")
+    start_parser = subparsers.add_parser("start", help="Start one or more new containers.")
+    start_parser.add_argument("env_names", type=str, nargs="*", metavar="env_name", help="Logical name(s) of the environment(s).")
+    start_parser.add_argument("--spec", type=str, help="JSON file listing environments (env_name, db_type, version, username, password).")
+    start_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Maximum number of environments launched concurrently.")
+    start_parser.add_argument("--no-pool", action="store_true", help="Never claim a warm pool member, always run a fresh container.")
+    start_parser.add_argument("--from-snapshot", type=str, metavar="DATASETS", help="Start from the dataset snapshot of the image (e.g. employees or employees,sakila).")
+    start_parser.add_argument("--cpus", type=float, help="CPU limit (e.g. 2 or 0.5).")
+    start_parser.add_argument("--memory", type=str, help="Memory limit without swap (e.g. 2g); sizes the configuration.")
+    start_parser.add_argument("--tmpfs-datadir", type=str, metavar="SIZE", help="Keep the datadir on a tmpfs of SIZE (counted in --memory).")
+    start_parser.add_argument("--profile", choices=sorted(profiles.PROFILES), help="Configuration profile sized to --memory (default with --memory: bench).")
     start_parser.add_argument("--db_type", choices=["mysql", "mariadb", "percona"], default="mysql", help="Database type.")
     start_parser.add_argument("--version", type=str, default="latest", help="Database version.")
     start_parser.add_argument("--username", type=str, default="admin", help="Username.")
     start_parser.add_argument("--password", type=str, help="Password (automatically generated if not provided).")
 
+    # Command to wait for readiness
+    wait_parser = subparsers.add_parser("wait", help="Wait until environments accept connections.")
+    wait_parser.add_argument("targets", type=str, nargs="+", help="Environment names or kind://host:port targets (mysql, postgres, mongo).")
+    wait_parser.add_argument("--timeout", type=float, default=120.0, help="Timeout in seconds.")
+
+    # Command to follow container events
+    watch_parser = subparsers.add_parser("watch", help="Stream state changes of managed containers as JSON lines.")
+    watch_parser.add_argument("--label", action="append", help="Extra label filter (key or key=value), may be repeated.")
+    watch_parser.add_argument("--no-probe", action="store_true", help="Do not probe database ports after a start.")
+    watch_parser.add_argument("--probe-timeout", type=float, default=120.0, help="Readiness probe timeout in seconds.")
+    watch_parser.add_argument("--once", action="store_true", help="Print the current state and exit.")
+
+    # Commands to manage the warm container pool
+    pool_parser = subparsers.add_parser("pool", help="Manage the pool of pre-initialized containers.")
+    pool_subparsers = pool_parser.add_subparsers(dest="pool_command")
+    pool_add = pool_subparsers.add_parser("add", help="Declare a pool and fill it.")
+    pool_add.add_argument("--db_type", choices=["mysql", "mariadb", "percona"], default="mysql", help="Database type.")
+    pool_add.add_argument("--version", type=str, default="latest", help="Database version.")
+    pool_add.add_argument("--size", type=int, default=pool.DEFAULT_SIZE, help="Number of ready members to keep.")
+    pool_add.add_argument("--max", type=int, default=pool.DEFAULT_MAX, help="Maximum number of members for this image.")
+    pool_add.add_argument("--no-fill", action="store_true", help="Only record the configuration.")
+    pool_rm = pool_subparsers.add_parser("remove", help="Remove a pool and its members.")
+    pool_rm.add_argument("--db_type", choices=["mysql", "mariadb", "percona"], default="mysql", help="Database type.")
+    pool_rm.add_argument("--version", type=str, default="latest", help="Database version.")
+    pool_refill = pool_subparsers.add_parser("refill", help="Refill pools and evict surplus or idle members once.")
+    pool_refill.add_argument("--image", type=str, help="Only refill this db_type:version pool.")
+    pool_refill.add_argument("--idle-ttl", type=float, default=pool.DEFAULT_IDLE_TTL, help="Evict members of pools not claimed for this many seconds (0 disables).")
+    pool_daemon = pool_subparsers.add_parser("daemon", help="Refill and evict continuously.")
+    pool_daemon.add_argument("--interval", type=float, default=10.0, help="Seconds between refills.")
+    pool_daemon.add_argument("--idle-ttl", type=float, default=pool.DEFAULT_IDLE_TTL, help="Evict members of pools not claimed for this many seconds (0 disables).")
+    pool_subparsers.add_parser("status", help="Show pool sizes and members.")
+
+    # Commands to manage dataset snapshot images
+    snapshot_parser = subparsers.add_parser("snapshot", help="Manage dataset snapshot images.")
+    snapshot_subparsers = snapshot_parser.add_subparsers(dest="snapshot_command")
+    snapshot_create = snapshot_subparsers.add_parser("create", help="Commit the datadir of an environment with injected datasets.")
+    snapshot_create.add_argument("env_name", type=str, help="Name of the environment holding the datasets.")
+    snapshot_create.add_argument("--dataset", action="append", choices=sorted(snapshot.DATASETS), help="Injected dataset (default: employees), may be repeated.")
+    snapshot_subparsers.add_parser("list", help="List snapshot images.")
+    snapshot_rm = snapshot_subparsers.add_parser("rm", help="Remove a snapshot image.")
+    snapshot_rm.add_argument("snapshot", type=str, help="Snapshot tag or key.")
+
+    # Commands to manage host port reservations
+    ports_parser = subparsers.add_parser("ports", help="Manage host port reservations.")
+    ports_subparsers = ports_parser.add_subparsers(dest="ports_command")
+    ports_subparsers.add_parser("list", help="List reserved ports.")
+    ports_reserve = ports_subparsers.add_parser("reserve", help="Reserve ports for an owner (e.g. a multi-node topology).")
+    ports_reserve.add_argument("owner", type=str, help="Owner name (environment or topology).")
+    ports_reserve.add_argument("--count", type=int, default=1, help="Number of ports to reserve.")
+    ports_reserve.add_argument("--contiguous", action="store_true", help="Reserve one block of consecutive ports.")
+    ports_reserve.add_argument("--range", type=str, metavar="FIRST-LAST", help="Reserve exactly this port range.")
+    ports_release = ports_subparsers.add_parser("release", help="Release every port of an owner.")
+    ports_release.add_argument("owner", type=str, help="Owner name.")
+    ports_reclaim = ports_subparsers.add_parser("reclaim", help="Release ports whose owner container no longer exists.")
+    ports_reclaim.add_argument("--keep", action="append", help="Owner to keep even without a container, may be repeated.")
+
+    # Command to load test_db datasets
+    inject_parser = subparsers.add_parser("inject", help="Load test_db datasets over parallel sessions.")
+    inject_parser.add_argument("env_name", type=str, help="Name of the environment.")
+    inject_parser.add_argument("--dataset", action="append", choices=sorted(loader.DATASET_SCRIPTS), help="Dataset to load (default: employees), may be repeated.")
+    inject_parser.add_argument("--workers", type=int, default=loader.DEFAULT_WORKERS, help="Parallel client sessions.")
+    inject_parser.add_argument("--binlog", choices=["auto", "keep", "skip"], default="auto", help="Disable the binary log of the load sessions (auto: only without replicas and outside Galera).")
+    inject_parser.add_argument("--password", type=str, help="Root password (default: the registered one).")
+
     # Command to stop a container
     stop_parser = subparsers.add_parser("stop", help="Stop a container.")
     stop_parser.add_argument("env_name", type=str, help="Name of the environment to stop.")
@@ -254,26 +746,76 @@ def main(debug=False):
     # Command to generate useful information
     info_parser = subparsers.add_parser("info", help="Generate useful information.")
     info_parser.add_argument("env_name", type=str, help="Name of the environment.")
-    info_parser.add_argument("port", type=int, help="Port used for the environment.")
+    info_parser.add_argument("port", type=int, nargs="?", help="Port used for the environment (registers or updates it, with --password).")
     info_parser.add_argument("--username", type=str, default="admin", help="Username.")
-    info_parser.add_argument("--password", type=str, required=True, help="Password.")
+    info_parser.add_argument("--password", type=str, help="Password.")
 
     parser.add_argument('--debug', action='store_true', help='Enable debug mode for detailed information')
     args = parser.parse_args()
 
     if args.debug:
         print("🐞 Debug: Arguments received -", vars(args))
-    if args.command == "list":
-        list_containers(status_filter=args.status, debug=args.debug)
+    if args.command == "list" and not (args.live or args.status or args.watch or args.label or args.ancestor or args.all_images):
+        list_environments(output_format=args.format)
+    elif args.command == "list":
+        list_containers(status_filter=args.status, debug=args.debug, output_format=args.format, watch=args.watch,
+                        labels=args.label, ancestors=args.ancestor, all_images=args.all_images)
     elif args.command == "start":
-        launch_container(args.env_name, args.db_type, args.version, args.username, args.password, debug=args.debug)
+        defaults = {"db_type": args.db_type, "version": args.version, "username": args.username, "password": args.password,
+                    "cpus": args.cpus, "memory": args.memory, "tmpfs_datadir": args.tmpfs_datadir, "profile": args.profile}
+        specs = [{**defaults, "env_name": env_name} for env_name in args.env_names]
+        if args.spec:
+            specs += load_spec_file(args.spec, defaults)
+        if not specs:
+            start_parser.error("at least one env_name or --spec is required")
+        names = [spec["env_name"] for spec in specs]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            start_parser.error(f"duplicate environment name(s): {', '.join(duplicates)}")
+        from_snapshot = args.from_snapshot.split(",") if args.from_snapshot else None
+        unknown = set(from_snapshot or []) - set(snapshot.DATASETS)
+        if unknown:
+            start_parser.error(f"unknown dataset(s): {', '.join(sorted(unknown))}")
+        if len(specs) == 1:
+            spec = specs[0]
+            result = launch_container(spec["env_name"], spec["db_type"], spec["version"], spec["username"], spec["password"],
+                                      debug=args.debug, use_pool=not args.no_pool, from_snapshot=from_snapshot,
+                                      resources={key: spec.get(key) for key in RESOURCE_KEYS})
+            if result["status"] == "error":
+                raise SystemExit(1)
+            return
+        results = launch_environments(specs, max_workers=args.workers, debug=args.debug, use_pool=not args.no_pool,
+                                      from_snapshot=from_snapshot)
+        print()
+        print_table(["Name", "Image", "HostPort", "Result"],
+                    [[r["env_name"], r["image"], r["port"] or "-", r["error"] or r["status"]] for r in results])
+        if any(r["status"] == "error" for r in results):
+            raise SystemExit(1)
+    elif args.command == "wait":
+        results = wait_for_environments(args.targets, timeout=args.timeout, debug=args.debug)
+        for result in results:
+            print(format_result(result))
+        if not all(r["ready"] for r in results):
+            raise SystemExit(1)
+    elif args.command == "watch":
+        watcher = events.Watcher(get_docker_client().api, labels=args.label, probe=not args.no_probe,
+                                 probe_timeout=args.probe_timeout)
+        watcher.run(once=args.once)
+    elif args.command == "pool":
+        manage_pool(args)
+    elif args.command == "snapshot":
+        manage_snapshots(args)
+    elif args.command == "ports":
+        manage_ports(args)
+    elif args.command == "inject":
+        inject_datasets(args.env_name, args.dataset or ["employees"], workers=args.workers, binlog=args.binlog,
+                        password=args.password)
     elif args.command == "stop":
         stop_container(args.env_name, debug=args.debug)
     elif args.command == "rm":
         remove_environment(args.env_name, debug=args.debug)
     elif args.command == "info":
-        create_my_cnf(args.env_name, args.username, args.password, port=args.port)
-        generate_bash_alias(args.env_name, args.port)
+        show_environment(args.env_name, port=args.port, username=args.username, password=args.password)
     else:
         parser.print_help()
 
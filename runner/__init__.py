@@ -0,0 +1,35 @@
+"""Helper modules used by interactive_runner.py, usable as a library.
+
+The public API is imported lazily so that `import runner` stays cheap:
+
+    from runner import load_plan, plan_steps, run
+    steps = plan_steps(load_plan("nightly.json"))
+    result = run(steps, install_type="nightly", dashboard=False)
+"""
+import importlib
+
+_EXPORTS = {
+    "builtin_steps": "runner.catalog",
+    "load_env": "runner.plans",
+    "load_plan": "runner.plans",
+    "plan_steps": "runner.plans",
+    "validate": "runner.scheduler",
+    "Scheduler": "runner.scheduler",
+    "Executor": "runner.executor",
+    "RunAborted": "runner.executor",
+    "run": "runner.executor",
+    "ReportWriter": "runner.report",
+    "Dashboard": "runner.dashboard",
+    "StepCache": "runner.cache",
+    "Monitor": "runner.telemetry",
+    "RunHistory": "runner.history",
+    "LogArchive": "runner.archive",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'runner' has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name]), name)
@@ -0,0 +1,269 @@
+"""Compressed step logs and their searchable archive.
+
+The report writes the step outputs through `open_log`, which compresses them
+on the fly when the file name ends with `.gz` (gzip) or `.zst` (zstd, needs
+the `zstandard` package); readers detect the format from the file content, so
+plain, gzip and zstd logs can be mixed (e.g. in the step cache).
+
+At the end of a run the logs are kept in `.runner-logs/<run>/` and their lines
+are indexed in `.runner-logs/index.db` (SQLite FTS5), so that a message can be
+found across the last `keep` runs without decompressing anything:
+
+Usage: python3 -m runner.archive search "Duplicate entry" [--step ID] [--stream stderr] [--run N]
+       python3 -m runner.archive list
+"""
+import argparse
+import collections
+import gzip
+import io
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+
+from dblab.store import Transaction, open_db
+
+ARCHIVE_DIR = ".runner-logs"
+INDEX_NAME = "index.db"
+KEEP_RUNS = 20
+READ_SIZE = 1 << 16
+
+# compression: file suffix
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Lines of log `id` are stored at rowids (id << 32) + line number, so that a
+# log is read back or deleted by rowid range
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    install_type TEXT,
+    dir TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    step_id TEXT NOT NULL,
+    name TEXT,
+    stream TEXT NOT NULL,
+    path TEXT NOT NULL,
+    bytes INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS lines USING fts5(text);
+"""
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd logs need the zstandard package (pip install zstandard), or use gzip") from None
+    return zstandard
+
+
+def check_compression(compression):
+    """Raise ValueError if `compression` is unknown or unavailable here."""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown log compression {compression!r}, expected one of {', '.join(COMPRESSIONS)}")
+    if compression == "zstd":
+        _zstd()
+
+
+def log_name(name, compression=None):
+    """`name` with the suffix of `compression` ("gzip", "zstd", "none" or None)."""
+    return name + COMPRESSIONS[compression or "none"]
+
+
+def _detect(path):
+    try:
+        with open(path, "rb") as f:
+            magic = f.read(4)
+    except FileNotFoundError:
+        return None
+    if magic.startswith(_GZIP_MAGIC):
+        return "gzip"
+    if magic == _ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+def open_log(path, mode="rt"):
+    """Open a log like `open`, compressed according to its suffix when writing, to its content when reading.
+
+    Appending to a compressed log adds a frame (gzip member), which readers
+    of both formats concatenate transparently.
+    """
+    binary = "b" in mode
+    if mode[0] == "r":
+        compression = _detect(path)
+    else:
+        compression = next((c for c, suffix in COMPRESSIONS.items() if suffix and path.endswith(suffix)), None)
+    text = {} if binary else {"encoding": "utf-8", "errors": "replace"}
+    if compression == "gzip":
+        return gzip.open(path, mode if binary else mode[0] + "t", **text)
+    if compression == "zstd":
+        zstandard = _zstd()
+        raw = open(path, mode[0] + "b")
+        if mode[0] == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return stream if binary else io.TextIOWrapper(stream, write_through=True, **text)
+    return open(path, mode, **text)
+
+
+def read_tail(path, size):
+    """The last `size` bytes of the log at `path`, decoded ("" if it is missing)."""
+    try:
+        if _detect(path) is None:
+            with open(path, "rb") as f:
+                f.seek(0, 2)
+                f.seek(max(0, f.tell() - size))
+                data = f.read()
+        else:
+            chunks, kept = collections.deque(), 0
+            with open_log(path, "rb") as f:
+                for chunk in iter(lambda: f.read(READ_SIZE), b""):
+                    chunks.append(chunk)
+                    kept += len(chunk)
+                    while kept - len(chunks[0]) >= size:
+                        kept -= len(chunks.popleft())
+            data = b"".join(chunks)[-size:]
+    except (OSError, EOFError):
+        return ""
+    return data.decode("utf-8", errors="replace")
+
+
+def copy_log(source, target):
+    """Copy a log, recompressing it when `target` asks for another format than `source` has."""
+    target_compression = next((c for c, suffix in COMPRESSIONS.items() if suffix and target.endswith(suffix)), None)
+    if _detect(source) == target_compression:
+        shutil.copyfile(source, target)
+        return
+    with open_log(source, "rb") as src, open_log(target, "wb") as dst:
+        shutil.copyfileobj(src, dst, READ_SIZE)
+
+
+def _query(text, raw=False):
+    # A phrase unless the caller writes FTS5 syntax (AND, OR, NEAR, prefix*)
+    return text if raw else '"' + text.replace('"', '""') + '"'
+
+
+class LogArchive:
+    """Keep the step logs of the last runs and search their lines."""
+
+    def __init__(self, path=ARCHIVE_DIR):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+        self.db_path = os.path.join(self.path, INDEX_NAME)
+        open_db(self.db_path, SCHEMA).close()
+
+    def _connect(self):
+        return Transaction(open_db(self.db_path))
+
+    @staticmethod
+    def _rows(db, query, params=()):
+        cursor = db.execute(query, params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def add(self, logs, install_type="", started=None):
+        """Archive and index one run; `logs` are dicts with step, name, stream and path. Returns the run id."""
+        with self._connect() as db:
+            run_id = db.execute("INSERT INTO runs (started, install_type, dir) VALUES (?, ?, '')",
+                                (started or time.time(), install_type)).lastrowid
+            run_dir = os.path.join(self.path, f"{run_id:05d}")
+            db.execute("UPDATE runs SET dir = ? WHERE id = ?", (run_dir, run_id))
+            os.makedirs(run_dir, exist_ok=True)
+            for log in logs:
+                if not os.path.exists(log["path"]):
+                    continue
+                target = os.path.join(run_dir, os.path.basename(log["path"]))
+                try:
+                    os.link(log["path"], target)
+                except OSError:
+                    shutil.copyfile(log["path"], target)
+                log_id = db.execute("INSERT INTO logs (run_id, step_id, name, stream, path, bytes) "
+                                    "VALUES (?, ?, ?, ?, ?, ?)",
+                                    (run_id, log["step"], log.get("name"), log["stream"], target,
+                                     os.path.getsize(target))).lastrowid
+                with open_log(target) as f:
+                    db.executemany("INSERT INTO lines (rowid, text) VALUES (?, ?)",
+                                   (((log_id << 32) + lineno, line.rstrip("\n"))
+                                    for lineno, line in enumerate(f, 1)))
+        return run_id
+
+    def evict(self, keep=KEEP_RUNS):
+        """Remove the runs older than the last `keep` ones, files and index entries."""
+        with self._connect() as db:
+            old = self._rows(db, "SELECT id, dir FROM runs ORDER BY id DESC LIMIT -1 OFFSET ?", (keep,))
+            for run in old:
+                for (log_id,) in db.execute("SELECT id FROM logs WHERE run_id = ?", (run["id"],)).fetchall():
+                    db.execute("DELETE FROM lines WHERE rowid BETWEEN ? AND ?",
+                               (log_id << 32, ((log_id + 1) << 32) - 1))
+                db.execute("DELETE FROM logs WHERE run_id = ?", (run["id"],))
+                db.execute("DELETE FROM runs WHERE id = ?", (run["id"],))
+        for run in old:
+            shutil.rmtree(run["dir"], ignore_errors=True)
+        return len(old)
+
+    def runs(self, limit=20):
+        with self._connect() as db:
+            return self._rows(db, "SELECT r.*, COUNT(l.id) AS logs, COALESCE(SUM(l.bytes), 0) AS bytes FROM runs r "
+                                  "LEFT JOIN logs l ON l.run_id = r.id GROUP BY r.id ORDER BY r.id DESC LIMIT ?",
+                              (limit,))
+
+    def search(self, text, run_id=None, step_id=None, stream=None, limit=50, raw=False):
+        """Matching lines, newest run first: run, step, name, stream, line, text, path."""
+        query = ("SELECT l.run_id AS run, l.step_id AS step, l.name, l.stream, lines.rowid & 4294967295 AS line, "
+                 "lines.text, l.path FROM lines JOIN logs l ON l.id = lines.rowid >> 32 WHERE lines MATCH ?")
+        params = [_query(text, raw)]
+        for column, value in (("l.run_id", run_id), ("l.step_id", step_id), ("l.stream", stream)):
+            if value is not None:
+                query += f" AND {column} = ?"
+                params.append(value)
+        with self._connect() as db:
+            return self._rows(db, query + " ORDER BY lines.rowid DESC LIMIT ?", params + [limit])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the archived step logs of the last runs.")
+    parser.add_argument("--dir", default=ARCHIVE_DIR, help=f"Archive directory (default: {ARCHIVE_DIR}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="List the archived runs.")
+    list_parser.add_argument("--limit", type=int, default=20)
+    search_parser = commands.add_parser("search", help="Find the log lines containing a phrase.")
+    search_parser.add_argument("text")
+    search_parser.add_argument("--run", type=int, help="Only this run.")
+    search_parser.add_argument("--step", help="Only this step id.")
+    search_parser.add_argument("--stream", choices=["stdout", "stderr"], help="Only this stream.")
+    search_parser.add_argument("--limit", type=int, default=50, help="Maximum number of lines (default: 50).")
+    search_parser.add_argument("--raw", action="store_true", help="TEXT is an FTS5 query (AND, OR, NEAR, prefix*).")
+    search_parser.add_argument("--json", action="store_true", help="Print the matches as JSON.")
+    args = parser.parse_args(argv)
+
+    archive = LogArchive(args.dir)
+    if args.command == "list":
+        for run in archive.runs(args.limit):
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"]))
+            print(f"{run['id']:>5}  {started}  {run['logs']:>3} logs {run['bytes'] >> 10:>8} KB  {run['install_type'] or ''}")
+        return 0
+    try:
+        rows = archive.search(args.text, args.run, args.step, args.stream, args.limit, args.raw)
+    except sqlite3.OperationalError as e:
+        parser.error(f"Invalid query {args.text!r}: {e}")
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            print(f"#{row['run']} {row['step']} {row['stream']}:{row['line']}: {row['text']}")
+    return 0 if rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Input-hashed cache of successful runner steps.
+
+A step may declare the files it depends on as glob patterns in `inputs`. Its
+cache key hashes the command with the path and content of every matching
+file, so a SUCCESS can be replayed, with its stored output, as long as none
+of them changed. A pattern matching nothing is part of the key as well, so a
+deleted output directory (e.g. `ssl/**`) invalidates the entry.
+
+Entries live in `<directory>/<key>/` (meta.json plus the step logs) and are
+evicted by age since last use and, oldest first, by total size.
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+CACHE_DIR = ".runner-cache"
+CACHE_VERSION = 1
+MAX_AGE = 7 * 86400
+MAX_BYTES = 512 << 20
+META = "meta.json"
+
+
+def input_files(patterns, root="."):
+    """Sorted files under `root` matching any of the glob `patterns` (recursive `**` allowed)."""
+    files = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(root, pattern), recursive=True):
+            if os.path.isfile(path):
+                files.add(os.path.relpath(path, root))
+    return sorted(files)
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def step_key(step, root="."):
+    """Cache key of `step`, or None when it declares no inputs."""
+    patterns = step.get("inputs")
+    if not patterns:
+        return None
+    digest = hashlib.sha256(f"v{CACHE_VERSION}\0{step['command']}\0".encode())
+    for pattern in sorted(patterns):
+        digest.update(f"pattern\0{pattern}\0".encode())
+    for path in input_files(patterns, root):
+        digest.update(f"file\0{path}\0{_file_digest(os.path.join(root, path))}\0".encode())
+    return digest.hexdigest()
+
+
+def _tree_size(path):
+    return sum(os.path.getsize(os.path.join(base, name)) for base, _, names in os.walk(path) for name in names)
+
+
+class StepCache:
+    """Store and replay successful step results keyed by `step_key`."""
+
+    def __init__(self, directory=CACHE_DIR, root=".", max_age=MAX_AGE, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.root = root
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+    def key(self, step):
+        return step_key(step, self.root)
+
+    def lookup(self, key):
+        """Return {"meta", "files": {name: path}} for `key` and mark it as used, or None."""
+        if not key:
+            return None
+        entry = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(entry, META)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - meta.get("used", 0) > self.max_age:
+            return None
+        meta["used"] = time.time()
+        meta["hits"] = meta.get("hits", 0) + 1
+        self._write_meta(entry, meta)
+        files = {name: os.path.join(entry, name) for name in meta.get("files", ())
+                 if os.path.exists(os.path.join(entry, name))}
+        return {"meta": meta, "files": files}
+
+    def store(self, key, step, files, duration=None):
+        """Store the successful result of `step`: `files` maps stored names to the logs to copy."""
+        if not key:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        entry = os.path.join(self.directory, key)
+        tmp_entry = f"{entry}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        os.makedirs(tmp_entry)
+        stored = []
+        for name, path in files.items():
+            if path and os.path.exists(path):
+                shutil.copyfile(path, os.path.join(tmp_entry, name))
+                stored.append(name)
+        now = time.time()
+        meta = {"key": key, "id": step["id"], "command": step["command"], "inputs": step.get("inputs", []),
+                "files": stored, "duration": duration, "created": now, "used": now, "hits": 0}
+        self._write_meta(tmp_entry, meta)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp_entry, entry)
+        return meta
+
+    def _write_meta(self, entry, meta):
+        tmp_path = os.path.join(entry, f"{META}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(entry, META))
+
+    def entries(self):
+        """[(used, size, key)] of the stored entries, least recently used first."""
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for key in os.listdir(self.directory):
+            entry = os.path.join(self.directory, key)
+            try:
+                with open(os.path.join(entry, META)) as f:
+                    used = json.load(f).get("used", 0)
+            except (OSError, ValueError):
+                used = 0  # Broken or interrupted entries go first
+            result.append((used, _tree_size(entry), key))
+        return sorted(result)
+
+    def evict(self):
+        """Remove entries unused for `max_age` seconds, then the oldest ones above `max_bytes`."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        now = time.time()
+        for used, size, key in entries:
+            if now - used > self.max_age or total > self.max_bytes:
+                shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+                total -= size
+                removed.append(key)
+        return removed
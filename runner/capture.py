@@ -0,0 +1,107 @@
+"""Concurrent capture of a command's stdout and stderr.
+
+Both pipes are drained at once with a selector, so a step writing a lot to
+stderr can no longer fill its pipe and block while stdout is being read.
+Chunks are handed over in arrival order, the complete interleaved output can
+be spilled to a file and only a bounded tail is kept in memory, so memory
+stays flat whatever the step prints.
+"""
+import codecs
+import collections
+import os
+import selectors
+import subprocess
+import sys
+
+READ_SIZE = 64 * 1024
+TAIL_BYTES = 64 * 1024
+STREAMS = ("stdout", "stderr")
+
+
+class TailBuffer:
+    """Ring buffer keeping the last `limit` characters appended to it."""
+
+    def __init__(self, limit=TAIL_BYTES):
+        self.limit = limit
+        self.chunks = collections.deque()
+        self.size = 0
+        self.total = 0
+
+    def append(self, text):
+        if not text:
+            return
+        self.total += len(text)
+        if len(text) >= self.limit:
+            self.chunks.clear()
+            self.chunks.append(text[-self.limit:])
+            self.size = self.limit
+            return
+        self.chunks.append(text)
+        self.size += len(text)
+        while self.size - len(self.chunks[0]) >= self.limit:
+            self.size -= len(self.chunks.popleft())
+
+    def getvalue(self):
+        text = "".join(self.chunks)
+        return text[-self.limit:]
+
+    @property
+    def truncated(self):
+        return self.total > self.limit
+
+
+def run(command, on_output=None, spill=None, tail_bytes=TAIL_BYTES, shell=True, **popen_kwargs):
+    """Run `command` and drain both of its streams until it exits.
+
+    `on_output(stream, text)` is called for each decoded chunk in arrival
+    order, `spill` is a binary file receiving the raw interleaved output.
+    Returns {"returncode", "tail", "truncated", "bytes": {stream: count},
+    "rusage": {"cpu_seconds", "max_rss"} or None}.
+    """
+    process = subprocess.Popen(command, shell=shell, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, **popen_kwargs)
+    tail = TailBuffer(tail_bytes)
+    counts = dict.fromkeys(STREAMS, 0)
+    decoders = {stream: codecs.getincrementaldecoder("utf-8")(errors="replace") for stream in STREAMS}
+
+    def deliver(stream, data, final=False):
+        text = decoders[stream].decode(data, final)
+        if text:
+            tail.append(text)
+            if on_output:
+                on_output(stream, text)
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(process.stdout, selectors.EVENT_READ, "stdout")
+        selector.register(process.stderr, selectors.EVENT_READ, "stderr")
+        try:
+            while selector.get_map():
+                for key, _ in selector.select():
+                    data = os.read(key.fd, READ_SIZE)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+                        deliver(key.data, b"", final=True)
+                        continue
+                    counts[key.data] += len(data)
+                    if spill:
+                        spill.write(data)
+                    deliver(key.data, data)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+    returncode, rusage = _wait(process)
+    return {"returncode": returncode, "tail": tail.getvalue(), "truncated": tail.truncated, "bytes": counts,
+            "rusage": rusage}
+
+
+def _wait(process):
+    """Reap `process`, returning its exit code and the resources used by it and its children."""
+    if not hasattr(os, "wait4"):
+        return process.wait(), None
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    max_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return process.returncode, {"cpu_seconds": usage.ru_utime + usage.ru_stime, "max_rss": max_rss}
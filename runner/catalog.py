@@ -0,0 +1,154 @@
+"""Built-in step plans of the runner: standalone servers, Galera and replication clusters."""
+from runner.i18n import STRINGS
+
+# Files whose content decides the result of `make test-config` (see runner/cache.py)
+CONFIG_INPUTS = ["docker-compose*.yml", "conf/**", "ssl/**", ".env", "scripts/*.sh", "tests/test_env.sh",
+                 "tests/test_config.sh", "tests/test_security_ssl.sh", "tests/test_profiles.sh"]
+
+TOPOLOGIES = ("standalone", "galera", "repli")
+
+VERSIONS = {
+    "MariaDB": ["11.8", "11.4", "10.11", "10.6"],
+    "MySQL": ["9.6", "8.4", "8.0", "5.7"],
+    "Percona": ["8.0"],
+    "PostgreSQL": ["17", "16"]
+}
+
+
+def builtin_steps(topology, lang='en', system="MariaDB", version="11.4"):
+    """(install type label, steps) of a built-in plan; `system` and `version` select the standalone server."""
+    # `up-galera` and `up-repli` run `gen-ssl` and `build-image` as Makefile prerequisites and rewrite
+    # ssl/, which `test-config` reads: the two steps share the "ssl" tag instead of depending on each other
+    if topology == 'galera':
+        return STRINGS[lang]['galera'], [
+            {
+                "id": "config",
+                "name": "Test Configuration" if lang == 'en' else "Test de Configuration",
+                "description": "Validates environment and SSL configuration." if lang == 'en' else "Valide l'environnement et la configuration SSL.",
+                "command": "make test-config",
+                "inputs": CONFIG_INPUTS,
+                "resources": ["ssl"]
+            },
+            {
+                "id": "start",
+                "name": "Start Galera" if lang == 'en' else "Démarrer Galera",
+                "description": "Starts the Galera cluster nodes and load balancer." if lang == 'en' else "Démarre les nœuds du cluster Galera et le répartiteur de charge.",
+                "command": "make up-galera",
+                "resources": ["stack", "ssl"]
+            },
+            {
+                "id": "inject",
+                "name": "Inject Data" if lang == 'en' else "Injecter les Données",
+                "description": "Injects the employees dataset into the cluster." if lang == 'en' else "Injecte le jeu de données des employés dans le cluster.",
+                "command": "make inject-employee-galera",
+                "needs": ["start"],
+                "resources": ["stack"]
+            },
+            {
+                "id": "verify",
+                "name": "Verify Galera" if lang == 'en' else "Vérifier Galera",
+                "description": "Runs functional tests on the Galera cluster." if lang == 'en' else "Exécute des tests fonctionnels sur le cluster Galera.",
+                "command": "make test-galera",
+                "needs": ["inject"]
+            },
+            {
+                "id": "perf",
+                "name": "Performance Test" if lang == 'en' else "Test de Performance",
+                "description": "Runs sysbench performance tests on Galera." if lang == 'en' else "Exécute des tests de performance sysbench sur Galera.",
+                "command": "make test-perf-galera PROFILE=light ACTION=run",
+                "needs": ["verify"]
+            }
+        ]
+    if topology == 'repli':
+        return STRINGS[lang]['repli'], [
+            {
+                "id": "config",
+                "name": "Test Configuration" if lang == 'en' else "Test de Configuration",
+                "description": "Validates environment and SSL configuration." if lang == 'en' else "Valide l'environnement et la configuration SSL.",
+                "command": "make test-config",
+                "inputs": CONFIG_INPUTS,
+                "resources": ["ssl"]
+            },
+            {
+                "id": "start",
+                "name": "Start Replication" if lang == 'en' else "Démarrer la Réplication",
+                "description": "Starts the Replication cluster nodes." if lang == 'en' else "Démarre les nœuds du cluster de réplication.",
+                "command": "make up-repli",
+                "resources": ["stack", "ssl"]
+            },
+            {
+                "id": "setup",
+                "name": "Setup Replication" if lang == 'en' else "Configurer la Réplication",
+                "description": "Configures Master/Slave relationship." if lang == 'en' else "Configure la relation Maître/Esclave.",
+                "command": "make setup-repli",
+                "needs": ["start"],
+                "resources": ["stack"]
+            },
+            {
+                "id": "inject",
+                "name": "Inject Data" if lang == 'en' else "Injecter les Données",
+                "description": "Injects the employees dataset into the master node." if lang == 'en' else "Injecte le jeu de données des employés dans le nœud maître.",
+                "command": "make inject-employee-repli",
+                "needs": ["setup"],
+                "resources": ["stack"]
+            },
+            {
+                "id": "verify",
+                "name": "Verify Replication" if lang == 'en' else "Vérifier la Réplication",
+                "description": "Runs functional tests on the replication setup." if lang == 'en' else "Exécute des tests fonctionnels sur la configuration de réplication.",
+                "command": "make test-repli",
+                "needs": ["inject"]
+            },
+            {
+                "id": "perf",
+                "name": "Performance Test" if lang == 'en' else "Test de Performance",
+                "description": "Runs sysbench performance tests on Replication." if lang == 'en' else "Exécute des tests de performance sysbench sur la réplication.",
+                "command": "make test-perf-repli PROFILE=light ACTION=run",
+                "needs": ["verify"]
+            }
+        ]
+    if topology != 'standalone':
+        raise ValueError(f"Unknown topology {topology!r} ({', '.join(TOPOLOGIES)})")
+    if version not in VERSIONS.get(system, ()):
+        raise ValueError(f"Unknown version {system} {version!r}")
+    # Makefile targets and compose profiles are named postgres17, not postgresql17
+    target = f"{'postgres' if system == 'PostgreSQL' else system.lower()}{version.replace('.', '')}"
+    pretty_name = f"{system} {version}"
+    return f"{'Standalone' if lang == 'en' else 'Autonome'} ({pretty_name})", [
+        {
+            "id": "config",
+            "name": "Test Configuration" if lang == 'en' else "Test de Configuration",
+            "description": "Validates environment and SSL configuration." if lang == 'en' else "Valide l'environnement et la configuration SSL.",
+            "command": "make test-config",
+            "inputs": CONFIG_INPUTS
+        },
+        {
+            "id": "start",
+            "name": f"{'Start' if lang == 'en' else 'Démarrer'} {pretty_name}",
+            "description": f"{'Starts the' if lang == 'en' else 'Démarre le conteneur'} {pretty_name} {'container.' if lang == 'en' else ''}",
+            "command": f"make {target}",
+            "resources": ["stack", "port:3306"]
+        },
+        {
+            "id": "status",
+            "name": "Check Status" if lang == 'en' else "Vérifier l'État",
+            "description": ("Shows the current status of the" if lang == 'en' else "Affiche l'état actuel du conteneur") + f" {pretty_name} {'container.' if lang == 'en' else ''}",
+            "command": "make status",
+            "needs": ["start"]
+        },
+        {
+            "id": "inject",
+            "name": "Inject Data" if lang == 'en' else "Injecter les Données",
+            "description": "Injects the employees dataset." if lang == 'en' else "Injecte le jeu de données des employés.",
+            "command": f"make inject-data service={target} db=employees",
+            "needs": ["start"]
+        },
+        {
+            "id": "verify",
+            "name": "Verify Integrity" if lang == 'en' else "Vérifier l'Intégrité",
+            "description": "Runs data integrity checks." if lang == 'en' else "Exécute des contrôles d'intégrité des données.",
+            # No inputs: it checks the running server after injection, which no file hash captures
+            "command": "make test-config",
+            "needs": ["inject"]
+        }
+    ]
@@ -0,0 +1,151 @@
+"""Live runner dashboard served on localhost.
+
+`GET /` returns the report page in live mode, `GET /events` streams the run
+as server-sent events: a `snapshot` event with the full state, then `delta`
+events with the steps whose status changed and the output appended since the
+previous event, batched every `batch_interval` seconds. `GET /files/<name>`
+serves the step logs, compressed ones with their Content-Encoding so that the
+browser shows them as text.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+ENCODINGS = {".gz": "gzip", ".zst": "zstd"}
+BATCH_INTERVAL = 0.2
+KEEPALIVE = 15
+
+
+def collect(subscriber, first, batch_interval=BATCH_INTERVAL):
+    """Drain `subscriber` for `batch_interval` after `first`: changed step indexes, merged output, finished flag."""
+    steps, output, finished = set(), [], False
+    deadline = time.monotonic() + batch_interval
+    event = first
+    while True:
+        if event[0] == "step":
+            steps.add(event[1])
+        elif event[0] == "output":
+            _, index, stream, attempt, text = event
+            if output and output[-1][:3] == [index + 1, stream, attempt]:
+                output[-1][3] += text
+            else:
+                output.append([index + 1, stream, attempt, text])
+        elif event[0] == "finished":
+            finished = True
+        remaining = deadline - time.monotonic()
+        if finished or remaining <= 0:
+            break
+        try:
+            event = subscriber.get(timeout=remaining)
+        except queue.Empty:
+            break
+    return sorted(steps), output, finished
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, content_type, body, encoding=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        writer = self.server.writer
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/index.html"):
+            self._send(200, "text/html; charset=utf-8", writer.render_shell("files", events_src="events").encode())
+        elif path == "/events":
+            self._stream(writer)
+        elif path.startswith("/files/") and "/" not in path[7:] and not path[7:].startswith("."):
+            file_path = os.path.join(writer.files_dir, path[7:])
+            if not os.path.isfile(file_path):
+                return self._send(404, "text/plain", b"Not found\n")
+            with open(file_path, "rb") as f:
+                self._send(200, "text/plain; charset=utf-8", f.read(),
+                           ENCODINGS.get(os.path.splitext(file_path)[1]))
+        else:
+            self._send(404, "text/plain", b"Not found\n")
+
+    def _event(self, name, data):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+        self.wfile.flush()
+
+    def _stream(self, writer):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        subscriber = writer.subscribe()
+        with self.server.streams_changed:
+            self.server.streams += 1
+        try:
+            snapshot = writer.state()
+            self._event("snapshot", snapshot)
+            finished = snapshot["finished"]
+            while not finished:
+                try:
+                    first = subscriber.get(timeout=KEEPALIVE)
+                except queue.Empty:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                if subscriber.overflow:
+                    # Too far behind: start again from a fresh snapshot
+                    subscriber.overflow = False
+                    while not subscriber.empty():
+                        subscriber.get_nowait()
+                    self._event("snapshot", writer.state())
+                    continue
+                steps, output, finished = collect(subscriber, first, self.server.batch_interval)
+                self._event("delta", {"header": writer.header(),
+                                      "steps": [writer.step_state(index, tails=False) for index in steps],
+                                      "output": output})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            writer.unsubscribe(subscriber)
+            with self.server.streams_changed:
+                self.server.streams -= 1
+                self.server.streams_changed.notify_all()
+
+
+class Dashboard:
+    """Serve the live dashboard of a ReportWriter in a background thread."""
+
+    def __init__(self, writer, host="127.0.0.1", port=DEFAULT_PORT, batch_interval=BATCH_INTERVAL):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.writer = writer
+        self.server.batch_interval = batch_interval
+        self.server.streams = 0
+        self.server.streams_changed = threading.Condition()
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=2):
+        """Stop serving once the open event streams sent the end of the run (or after `timeout`)."""
+        with self.server.streams_changed:
+            self.server.streams_changed.wait_for(lambda: self.server.streams == 0, timeout)
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,242 @@
+"""Execution of runner steps: scheduling, cache, telemetry, report, history and log archive.
+
+`run(steps)` runs a plan (from `runner.catalog.builtin_steps` or
+`runner.plans.plan_steps`) end to end and returns its statuses, history run id
+and trend; `Executor` runs the steps of an already started report.
+
+    from runner import load_plan, plan_steps, run
+    result = run(plan_steps(load_plan("nightly.json")), install_type="nightly", dashboard=False)
+"""
+import sys
+import time
+
+from runner import capture
+from runner.archive import ARCHIVE_DIR, KEEP_RUNS, LogArchive, check_compression, copy_log, open_log
+from runner.cache import CACHE_DIR, MAX_AGE, MAX_BYTES, StepCache
+from runner.dashboard import DEFAULT_PORT, Dashboard
+from runner.history import HISTORY_FILE, WINDOW, RunHistory, format_comparison, read_metrics
+from runner.i18n import STRINGS
+from runner.report import HEAD_BYTES, TAIL_BYTES, ReportWriter
+from runner.scheduler import Scheduler
+from runner.telemetry import INTERVAL, Monitor
+
+REPORT_FILE = "reports/run_report.html"
+
+
+class RunAborted(Exception):
+    """The run was stopped at a failed step (interactive mode)."""
+
+
+def run_command(command, on_output=None, spill_path=None, echo=True, lang='en'):
+    """Run `command`, echoing its output if asked; return the result of `capture.run`."""
+    print(f"\n{STRINGS[lang]['executing'].format(command)}")
+    if echo:
+        print("-" * 40)
+
+    # Both streams are drained at once and echoed as they come, in order;
+    # parallel steps only go to the report so that their outputs do not mix
+    def forward(stream, text):
+        if echo:
+            target = sys.stdout if stream == "stdout" else sys.stderr
+            target.write(text)
+            target.flush()
+        if on_output:
+            on_output(stream, text)
+
+    if spill_path:
+        with open_log(spill_path, "wb") as spill:
+            result = capture.run(command, on_output=forward, spill=spill)
+    else:
+        result = capture.run(command, on_output=forward)
+
+    if echo:
+        print("-" * 40)
+    return result
+
+
+def replay_cached(report, index, hit):
+    """Replay a stored SUCCESS with its output, as if the step had just run."""
+    report.set_status(index, "RUNNING")
+    for stream in ("stdout", "stderr"):
+        if stream in hit['files']:
+            with open_log(hit['files'][stream]) as f:
+                for chunk in iter(lambda: f.read(1 << 16), ""):
+                    report.append(index, stream, chunk)
+    if 'log' in hit['files']:
+        copy_log(hit['files']['log'], report.spill_path(index))
+    report.set_status(index, "SUCCESS", 0, cached=True)
+
+
+def create_report(install_type, steps, report_file=REPORT_FILE, lang='en', head_bytes=HEAD_BYTES,
+                  tail_bytes=TAIL_BYTES, compression=None):
+    labels = {key: STRINGS[lang][key] for key in ('logs', 'stdout', 'stderr', 'no_output', 'no_error')}
+    return ReportWriter(report_file, steps, install_type=install_type, labels=labels,
+                        title=STRINGS[lang]['dashboard'].strip(), lang=lang, head_bytes=head_bytes,
+                        tail_bytes=tail_bytes, compression=compression)
+
+
+def record_history(report, steps, install_type, path=HISTORY_FILE, window=WINDOW, thresholds=None, lang='en'):
+    """Store the run, show how it compares with the previous ones (in the report too); return (run id, trend)."""
+    state = report.state()
+    records = []
+    for i, (step, step_state) in enumerate(zip(steps, state['steps'])):
+        records.append({
+            'id': step['id'], 'command': step['command'], 'name': step['name'], 'status': step_state['status'],
+            'returncode': step_state['returncode'], 'duration': step_state['duration'], 'cached': step_state['cached'],
+            'metrics': read_metrics(report.log_paths(i)['stdout']) if step_state['status'] == "SUCCESS" else {},
+        })
+    history = RunHistory(path)
+    run_id = history.record(records, install_type=install_type, started=report.t0, ended=time.time())
+    trend = history.compare(run_id, window=window, thresholds=thresholds)
+    report.set_trend(trend)
+    regressions = [row for row in trend if row['regression']]
+    print(STRINGS[lang]['history'].format(run_id, path, len(regressions)))
+    for row in regressions:
+        print(format_comparison(row))
+    return run_id, trend
+
+
+def archive_logs(report, steps, install_type, path=ARCHIVE_DIR, keep=KEEP_RUNS, lang='en'):
+    """Keep and index the step outputs of a closed report, dropping runs beyond the last `keep`; return the run id."""
+    logs = []
+    for i, step in enumerate(steps):
+        for stream, log_path in report.log_paths(i).items():
+            if stream != 'log':
+                logs.append({'step': step['id'], 'name': step['name'], 'stream': stream, 'path': log_path})
+    archive = LogArchive(path)
+    run_id = archive.add(logs, install_type=install_type, started=report.t0)
+    archive.evict(keep)
+    print(STRINGS[lang]['archived'].format(run_id, path))
+    return run_id
+
+
+class Executor:
+    """Run `steps` into a started ReportWriter, through the scheduler.
+
+    In interactive mode every step is confirmed with `prompt` and a failed
+    step can be retried, skipped or stop the run (RunAborted).
+    """
+
+    def __init__(self, steps, report, workers=1, interactive=False, cache=None, monitor=None, lang='en',
+                 prompt=input):
+        self.steps = steps
+        self.report = report
+        # Prompts need the terminal: steps only run in parallel in automated mode
+        self.workers = 1 if interactive else max(1, workers)
+        self.interactive = interactive
+        self.cache = cache
+        self.monitor = monitor
+        self.lang = lang
+        self.text = STRINGS[lang]
+        self.prompt = prompt
+
+    def run_step(self, i, step):
+        text, report = self.text, self.report
+        print(f"\n[{i+1}/{len(self.steps)}] Step: {step['name']}")
+        print(f"Description: {step['description']}")
+
+        while True:
+            if self.interactive and self.prompt(text['run_step']).lower().strip() == 'n':
+                report.set_status(i, "SKIPPED")
+                return "SKIPPED"
+
+            hit = self.cache.lookup(self.cache.key(step)) if self.cache else None
+            if hit:
+                print(text['cached'].format(step['name']))
+                replay_cached(report, i, hit)
+                return "SUCCESS"
+
+            # Mark current as RUNNING in report, output is appended as it comes
+            report.set_status(i, "RUNNING")
+            started = time.time()
+            result = run_command(step['command'], on_output=lambda stream, chunk: report.append(i, stream, chunk),
+                                 spill_path=report.spill_path(i), echo=self.workers == 1, lang=self.lang)
+            returncode = result['returncode']
+            if self.monitor:
+                report.set_telemetry(i, self.monitor.step_summary(started, time.time(), result['rusage']))
+            status = "SUCCESS" if returncode == 0 else "FAILED"
+
+            if status == "FAILED" and self.interactive:
+                print(text['failed'].format(returncode))
+                retry = self.prompt(text['retry']).lower().strip() or 'r'
+                if retry == 'r':
+                    continue
+                if retry == 's':
+                    report.set_status(i, "FAILED", returncode)
+                    raise RunAborted(step['id'])
+
+            report.set_status(i, status, returncode)
+            if status == "SUCCESS":
+                if self.cache:
+                    # Keyed after the run: steps like gen-ssl create part of their own inputs
+                    self.cache.store(self.cache.key(step), step, report.log_paths(i), time.time() - started)
+                if self.workers > 1:
+                    print(text['done'].format(step['name']))
+            else:
+                print(text['failed'].format(f"{returncode} ({step['name']})"))
+            return status
+
+    def on_blocked(self, i, step, reason):
+        print(self.text['blocked'].format(step['name'], reason))
+        self.report.append(i, "stderr", f"{reason}\n")
+        self.report.set_status(i, "SKIPPED")
+
+    def run(self):
+        """Run every step; return their final statuses (see Scheduler.run)."""
+        # Interactive runs confirm every step, so a failure does not block the next ones
+        return Scheduler(self.steps, self.run_step, workers=self.workers, on_skip=self.on_blocked,
+                         keep_going=self.interactive).run()
+
+
+def run(steps, install_type="", interactive=False, jobs=4, lang='en', report_file=REPORT_FILE, cache=True,
+        cache_dir=CACHE_DIR, cache_max_age=MAX_AGE, cache_max_size=MAX_BYTES, telemetry=True,
+        sample_interval=INTERVAL, dashboard=True, port=DEFAULT_PORT, history=HISTORY_FILE, baseline_runs=WINDOW,
+        thresholds=None, log_compression="gzip", log_head=HEAD_BYTES, log_tail=TAIL_BYTES, archive=ARCHIVE_DIR,
+        archive_keep=KEEP_RUNS, prompt=input):
+    """Run `steps` with a report, live dashboard, cache, telemetry, history and log archive (each can be turned off).
+
+    Returns {"statuses", "run_id", "trend", "archive_run", "report"};
+    `history=None` skips recording, `archive=None` archiving the logs.
+    RunAborted propagates once the report is closed. Raises ValueError if
+    `log_compression` is not available.
+    """
+    check_compression(log_compression)
+    text = STRINGS[lang]
+    step_cache = None
+    if cache:
+        step_cache = StepCache(cache_dir, max_age=cache_max_age, max_bytes=cache_max_size)
+        step_cache.evict()
+    monitor = Monitor(interval=sample_interval).start() if telemetry else None
+
+    report = create_report(install_type, steps, report_file, lang, log_head, log_tail, log_compression)
+    report.start()
+    print(text['report_updated'].format(report_file))
+    server = None
+    if dashboard:
+        try:
+            server = Dashboard(report, port=port).start()
+            print(text['live_dashboard'].format(server.url))
+        except OSError as e:
+            print(text['no_live_dashboard'].format(port, e))
+
+    result = {"statuses": None, "run_id": None, "trend": [], "archive_run": None, "report": report_file}
+    try:
+        executor = Executor(steps, report, workers=jobs, interactive=interactive, cache=step_cache,
+                            monitor=monitor, lang=lang, prompt=prompt)
+        result["statuses"] = executor.run()
+        if monitor:
+            monitor.stop()
+            monitor = None
+        if history:
+            result["run_id"], result["trend"] = record_history(report, steps, install_type, history, baseline_runs,
+                                                               thresholds, lang)
+    finally:
+        if monitor:
+            monitor.stop()
+        report.close()
+        if archive:
+            result["archive_run"] = archive_logs(report, steps, install_type, archive, archive_keep, lang)
+        if server:
+            server.stop()
+    print(text['final_report'].format(report_file))
+    return result
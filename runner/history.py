@@ -0,0 +1,257 @@
+"""Run history and performance regression detection.
+
+Every runner run is recorded in a local SQLite database (`.runner-history.db`):
+one row per run, one per step (status, exit code, duration) and one per
+metric parsed from the step output (sysbench throughput and latency). A step
+is identified across runs by its id and command, so `make mariadb114` and
+`make mysql84` runs never share a baseline.
+
+`compare` checks a run against a rolling baseline, the median of the same
+step metric over the previous `window` runs where it succeeded, and flags the
+metrics that got worse by more than their threshold (percent). Steps replayed
+from the cache record no metrics: neither their duration nor their output
+belongs to the run.
+
+Usage: python3 -m runner.history compare [--run ID] [--window 5] [--threshold tps=5]
+       python3 -m runner.history list
+"""
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+
+from dblab.store import Transaction, open_db
+from runner.archive import read_tail
+
+HISTORY_FILE = ".runner-history.db"
+WINDOW = 5
+MIN_SAMPLES = 2
+# Durations below this change are noise whatever the percentage
+MIN_DURATION_DELTA = 1.0
+TAIL_BYTES = 256 << 10
+
+# metric: (unit, better, default threshold in percent)
+METRICS = {
+    "duration": ("s", "lower", 25.0),
+    "tps": ("tx/s", "higher", 10.0),
+    "qps": ("q/s", "higher", 10.0),
+    "latency_avg_ms": ("ms", "lower", 15.0),
+    "latency_p95_ms": ("ms", "lower", 15.0),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    ended REAL,
+    install_type TEXT,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    step_id TEXT NOT NULL,
+    command TEXT NOT NULL,
+    name TEXT,
+    status TEXT,
+    returncode INTEGER,
+    duration REAL,
+    cached INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, step_id)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    step_id TEXT NOT NULL,
+    command TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, step_id, metric)
+);
+CREATE INDEX IF NOT EXISTS metrics_series ON metrics (step_id, command, metric, run_id);
+"""
+
+_SYSBENCH = [
+    ("tps", re.compile(r"^\s*transactions:\s+\d+\s+\(([\d.]+) per sec\.\)", re.M)),
+    ("qps", re.compile(r"^\s*queries:\s+\d+\s+\(([\d.]+) per sec\.\)", re.M)),
+    ("latency_avg_ms", re.compile(r"^\s*avg:\s+([\d.]+)\s*$", re.M)),
+    ("latency_p95_ms", re.compile(r"^\s*95th percentile:\s+([\d.]+)\s*$", re.M)),
+]
+
+
+def parse_metrics(text):
+    """Benchmark metrics found in a step output; the last sysbench summary wins."""
+    metrics = {}
+    for name, pattern in _SYSBENCH:
+        values = pattern.findall(text)
+        if values:
+            metrics[name] = float(values[-1])
+    return metrics
+
+
+def read_metrics(path, tail_bytes=TAIL_BYTES):
+    """`parse_metrics` over the end of the log at `path`, compressed or not (summaries come last)."""
+    return parse_metrics(read_tail(path, tail_bytes))
+
+
+def parse_thresholds(items):
+    """{metric: percent} from "metric=percent" strings; raise ValueError on unknown metrics."""
+    thresholds = {}
+    for item in items or ():
+        metric, _, value = item.partition("=")
+        if metric not in METRICS or not value:
+            raise ValueError(f"Invalid threshold {item!r}, expected <metric>=<percent> with metric in "
+                             f"{', '.join(METRICS)}")
+        thresholds[metric] = float(value)
+    return thresholds
+
+
+def evaluate(metric, value, baseline, threshold):
+    """(change in percent, regression flag) of `value` against `baseline`."""
+    if not baseline:
+        return None, False
+    change = 100.0 * (value - baseline) / baseline
+    worse = change if METRICS[metric][1] == "lower" else -change
+    regression = worse > threshold
+    if metric == "duration" and abs(value - baseline) < MIN_DURATION_DELTA:
+        regression = False
+    return change, regression
+
+
+class RunHistory:
+    """Record runs and compare them with the previous ones."""
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        open_db(self.path, SCHEMA).close()
+
+    def _connect(self):
+        return Transaction(open_db(self.path))
+
+    @staticmethod
+    def _rows(db, query, params=()):
+        cursor = db.execute(query, params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def record(self, steps, install_type="", started=None, ended=None):
+        """Store one run; `steps` are dicts with id, command, name, status, returncode, duration, cached, metrics."""
+        status = "SUCCESS" if all(s["status"] in ("SUCCESS", "SKIPPED") for s in steps) else "FAILED"
+        with self._connect() as db:
+            cursor = db.execute("INSERT INTO runs (started, ended, install_type, status) VALUES (?, ?, ?, ?)",
+                                (started or time.time(), ended or time.time(), install_type, status))
+            run_id = cursor.lastrowid
+            for step in steps:
+                cached = bool(step.get("cached"))
+                db.execute("INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                           (run_id, step["id"], step["command"], step.get("name"), step["status"],
+                            step.get("returncode"), step.get("duration"), int(cached)))
+                if step["status"] != "SUCCESS" or cached:
+                    continue
+                metrics = dict(step.get("metrics") or {})
+                if step.get("duration") is not None:
+                    metrics["duration"] = step["duration"]
+                for metric, value in metrics.items():
+                    db.execute("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?, ?)",
+                               (run_id, step["id"], step["command"], metric, value))
+        return run_id
+
+    def runs(self, limit=20):
+        with self._connect() as db:
+            return self._rows(db, "SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,))
+
+    def last_run(self):
+        runs = self.runs(1)
+        return runs[0]["id"] if runs else None
+
+    def series(self, step_id, command, metric, before=None, limit=WINDOW):
+        """Values of a step metric over the last `limit` runs (before run `before`), oldest first."""
+        query = "SELECT run_id, value FROM metrics WHERE step_id = ? AND command = ? AND metric = ?"
+        params = [step_id, command, metric]
+        if before is not None:
+            query += " AND run_id < ?"
+            params.append(before)
+        with self._connect() as db:
+            rows = db.execute(query + " ORDER BY run_id DESC LIMIT ?", params + [limit]).fetchall()
+        return [value for _, value in reversed(rows)]
+
+    def compare(self, run_id=None, window=WINDOW, thresholds=None, min_samples=MIN_SAMPLES, history=20):
+        """Compare the metrics of `run_id` (default: the last run) with their rolling baseline.
+
+        Returns one row per step metric: step, metric, value, baseline
+        (median of the previous `window` values, None below `min_samples`),
+        change in percent, threshold, regression flag and the last `history`
+        values including this one (for trends).
+        """
+        run_id = run_id or self.last_run()
+        if run_id is None:
+            return []
+        limits = {metric: spec[2] for metric, spec in METRICS.items()}
+        limits.update(thresholds or {})
+        with self._connect() as db:
+            rows = self._rows(db, "SELECT m.step_id, m.command, m.metric, m.value, s.name FROM metrics m "
+                                  "JOIN steps s ON s.run_id = m.run_id AND s.step_id = m.step_id "
+                                  "WHERE m.run_id = ? ORDER BY s.rowid, m.metric", (run_id,))
+        results = []
+        for row in rows:
+            if row["metric"] not in METRICS:
+                continue
+            previous = self.series(row["step_id"], row["command"], row["metric"], before=run_id,
+                                   limit=max(window, history))
+            recent = previous[-window:]
+            baseline = statistics.median(recent) if len(recent) >= min_samples else None
+            change, regression = evaluate(row["metric"], row["value"], baseline, limits[row["metric"]])
+            results.append({
+                "step": row["step_id"], "name": row["name"], "command": row["command"], "metric": row["metric"],
+                "unit": METRICS[row["metric"]][0], "value": row["value"], "baseline": baseline,
+                "samples": len(recent), "change": change, "threshold": limits[row["metric"]],
+                "regression": regression, "history": (previous + [row["value"]])[-history:],
+            })
+        return results
+
+
+def format_comparison(row):
+    if row["baseline"] is None:
+        return f"   {row['step']} {row['metric']}: {row['value']:.2f} {row['unit']} (no baseline yet)"
+    flag = "⚠️  REGRESSION" if row["regression"] else "ok"
+    return (f"   {row['step']} {row['metric']}: {row['value']:.2f} {row['unit']} vs {row['baseline']:.2f} "
+            f"({row['change']:+.1f}%, threshold {row['threshold']:g}%) {flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the runner history and flag performance regressions.")
+    parser.add_argument("--db", default=HISTORY_FILE, help=f"History database (default: {HISTORY_FILE}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="List the last runs.")
+    list_parser.add_argument("--limit", type=int, default=20)
+    compare_parser = commands.add_parser("compare", help="Compare a run with the rolling baseline of previous runs.")
+    compare_parser.add_argument("--run", type=int, help="Run id (default: the last run).")
+    compare_parser.add_argument("--window", type=int, default=WINDOW, help=f"Previous runs in the baseline (default: {WINDOW}).")
+    compare_parser.add_argument("--min-samples", type=int, default=MIN_SAMPLES, help=f"Previous values needed for a baseline (default: {MIN_SAMPLES}).")
+    compare_parser.add_argument("--threshold", action="append", metavar="METRIC=PCT",
+                                help="Allowed degradation in percent, may be repeated (defaults: "
+                                     + ", ".join(f"{m}={spec[2]:g}" for m, spec in METRICS.items()) + ").")
+    compare_parser.add_argument("--json", action="store_true", help="Print the comparison as JSON.")
+    args = parser.parse_args(argv)
+
+    history = RunHistory(args.db)
+    if args.command == "list":
+        for run in history.runs(args.limit):
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"]))
+            print(f"{run['id']:>5}  {started}  {run['status'] or '':<8} {run['install_type'] or ''}")
+        return 0
+    try:
+        thresholds = parse_thresholds(args.threshold)
+    except ValueError as e:
+        parser.error(str(e))
+    rows = history.compare(args.run, window=args.window, thresholds=thresholds, min_samples=args.min_samples)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            print(format_comparison(row))
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Localized strings of the runner (English and French)."""
+
+STRINGS = {
+    'en': {
+        'select_type': "🏗️  Select Installation Type:",
+        'standalone': "1. Standalone (Select version)",
+        'galera': "2. Galera Cluster",
+        'repli': "3. Replication Cluster",
+        'choice': "Choice",
+        'interrupt': "\n👋 Runner interrupted.",
+        'select_sys': "\n🗄️  Select Database System:",
+        'select_ver': "\n🔢 Select {} Version:",
+        'invalid': "\n❌ Invalid choice or interrupted. Falling back to default.",
+        'run_step': "   Run this step? (Y/n) ",
+        'retry': "   Retry this step? [r]etry / [c]ontinue / [s]top (default: r): ",
+        'failed': "❌ Step failed with return code {}",
+        'done': "✅ Step completed: {}",
+        'cached': "♻️  Inputs unchanged, reusing the cached result of: {}",
+        'live_dashboard': "🌐 Live dashboard: {}",
+        'no_live_dashboard': "⚠️  Live dashboard not available on port {} ({}), use the report file.",
+        'blocked': "⏭️  Step skipped: {} ({})",
+        'plan_label': "Plan {} ({} entries)",
+        'history': "\n📈 Run #{} recorded in {}: {} regression(s) against the previous runs",
+        'archived': "🗄️  Logs archived as run #{} in {} (search: python3 -m runner.archive search TEXT)",
+        'executing': "\n📦 Executing: {}",
+        'report_updated': "\n✨ Report updated: {}",
+        'final_report': "\n✅ All steps completed. Final report: {}",
+        'mode_prompt': "Run mode ([a]uto / [i]nteractive - default: i)? ",
+        'mode_label': "Mode: {}",
+        'automan': "Automated (no prompts)",
+        'interactive': "Interactive",
+        'dashboard': "\n🚀 Test Runner Dashboard",
+        'logs': "Logs",
+        'stdout': "Standard Output",
+        'stderr': "Error / Stderr",
+        'no_output': "(no output)",
+        'no_error': "(no error output)",
+        'lang_choice': "Select Language / Sélectionnez la langue ([e]n / [f]r - default: e): "
+    },
+    'fr': {
+        'select_type': "🏗️  Sélectionnez le type d'installation :",
+        'standalone': "1. Autonome (Sélectionner la version)",
+        'galera': "2. Cluster Galera",
+        'repli': "3. Cluster de Réplication",
+        'choice': "Choix",
+        'interrupt': "\n👋 Exécution interrompue.",
+        'select_sys': "\n🗄️  Sélectionnez le système de base de données :",
+        'select_ver': "\n🔢 Sélectionnez la version de {} :",
+        'invalid': "\n❌ Choix invalide ou interrompu. Retour à la version par défaut.",
+        'run_step': "   Exécuter cette étape ? (O/n) ",
+        'retry': "   Réessayer cette étape ? [r]éessayer / [c]ontinuer / [s]topper (défaut : r) : ",
+        'failed': "❌ Étape échouée avec le code de sortie {}",
+        'done': "✅ Étape terminée : {}",
+        'cached': "♻️  Entrées inchangées, réutilisation du résultat en cache de : {}",
+        'live_dashboard': "🌐 Tableau de bord en direct : {}",
+        'no_live_dashboard': "⚠️  Tableau de bord en direct indisponible sur le port {} ({}), utilisez le fichier de rapport.",
+        'blocked': "⏭️  Étape ignorée : {} ({})",
+        'plan_label': "Plan {} ({} entrées)",
+        'history': "\n📈 Exécution n°{} enregistrée dans {} : {} régression(s) par rapport aux exécutions précédentes",
+        'archived': "🗄️  Journaux archivés sous le n°{} dans {} (recherche : python3 -m runner.archive search TEXTE)",
+        'executing': "\n📦 Exécution de : {}",
+        'report_updated': "\n✨ Rapport mis à jour : {}",
+        'final_report': "\n✅ Toutes les étapes sont terminées. Rapport final : {}",
+        'mode_prompt': "Mode d'exécution ([a]uto / [i]nteractive - défaut : i) ? ",
+        'mode_label': "Mode : {}",
+        'automan': "Automatisé (pas de confirmations)",
+        'interactive': "Interactif",
+        'dashboard': "\n🚀 Tableau de Bord de Test",
+        'logs': "Journaux",
+        'stdout': "Sortie Standard",
+        'stderr': "Erreurs / Stderr",
+        'no_output': "(pas de sortie)",
+        'no_error': "(pas de sortie d'erreur)",
+        'lang_choice': "Select Language / Sélectionnez la langue ([e]n / [f]r - default: e) : "
+    }
+}
@@ -0,0 +1,450 @@
+"""Declarative headless run plans.
+
+A plan file (JSON, or YAML with PyYAML installed) lists the topologies to
+verify without prompts:
+
+    {"name": "nightly", "entries": [
+        {"topology": "standalone", "service": "mariadb114", "dataset": "employees"},
+        {"topology": "standalone", "service": "postgres17"},
+        {"topology": "galera", "dataset": "employees"},
+        {"topology": "repli"}]}
+
+Every entry runs as its own compose project (`<plan>-<service|topology>-<n>`)
+so that several of them can run at once on one host. The `render` step turns
+the repository compose file into `.runs/<project>/compose.json`: container
+names are dropped, host ports are moved by the entry offset (`base_offset +
+n * port_step`), SSH ports are not published, the private subnet moves from
+A.B.C.0/24 to A.B.(C+slot).0/24 (slot = offset / port_step) in the compose
+file and in the bind-mounted configuration files (copied next to it), and
+writable bind mounts (data directories) get a directory of their own. A
+standalone service is published directly, without the shared Traefik proxy.
+
+Entries start, load their dataset and verify themselves with compose and the
+dblab tools rather than the Makefile targets, which use fixed ports and stop
+the other stacks. Each project is torn down (`down -v`) at the end of its
+entry, whatever the result, unless the plan or the runner asks to keep it.
+
+Usage: python3 -m runner.plans render docker-compose-galera.yml --project nightly-galera-1 --offset 1000 --slot 1
+"""
+import argparse
+import copy
+import ipaddress
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+RUNS_DIR = ".runs"
+BASE_OFFSET = 1000
+PORT_STEP = 1000
+DATASETS = ("employees", "sakila")
+SSH_PORT = 22
+MAX_WAIT = 300
+
+TOPOLOGIES = {
+    "standalone": {"compose": "docker-compose.yml"},
+    "galera": {"compose": "docker-compose-galera.yml", "nodes": ["galera_01", "galera_02", "galera_03"],
+               "ports": [3511, 3512, 3513], "proxy": "haproxy_galera", "subnet": "10.6.0"},
+    "repli": {"compose": "docker-compose-repli.yml", "nodes": ["mariadb_01", "mariadb_02", "mariadb_03"],
+              "ports": [3411, 3412, 3413], "proxy": "haproxy_repli", "subnet": "10.5.0"},
+}
+# Highest host port published by the repository compose files
+MAX_BASE_PORT = 8405
+_SERVICE_RE = re.compile(r"^(mysql|mariadb|percona|postgres)\d+$")
+_PROJECT_RE = re.compile(r"[^a-z0-9_-]+")
+
+TEXT = {
+    'en': {
+        'ssl': ("Generate SSL", "Generates the SSL certificates used by the clusters."),
+        'image': ("Build Image", "Builds the base node image."),
+        'render': ("Render {}", "Writes the isolated compose file of {}."),
+        'start': ("Start {}", "Starts {} on its own ports and network."),
+        'ready': ("Wait for {}", "Waits until {} accepts sessions."),
+        'setup': ("Setup Replication {}", "Configures the Master/Slave relationship of {}."),
+        'inject': ("Inject Data {}", "Injects the {} dataset into {}."),
+        'verify': ("Verify {}", "Checks that {} serves its data."),
+        'teardown': ("Tear Down {}", "Removes the containers and volumes of {}."),
+    },
+    'fr': {
+        'ssl': ("Générer SSL", "Génère les certificats SSL utilisés par les clusters."),
+        'image': ("Construire l'Image", "Construit l'image de base des nœuds."),
+        'render': ("Générer {}", "Écrit le fichier compose isolé de {}."),
+        'start': ("Démarrer {}", "Démarre {} sur ses propres ports et son propre réseau."),
+        'ready': ("Attendre {}", "Attend que {} accepte des sessions."),
+        'setup': ("Configurer la Réplication {}", "Configure la relation Maître/Esclave de {}."),
+        'inject': ("Injecter les Données {}", "Injecte le jeu de données {} dans {}."),
+        'verify': ("Vérifier {}", "Vérifie que {} sert ses données."),
+        'teardown': ("Arrêter {}", "Supprime les conteneurs et volumes de {}."),
+    }
+}
+
+
+def load_env(path=".env", environ=None):
+    """Export the KEY=VALUE lines of `path` that are not set yet, as the Makefile does, plus client passwords."""
+    environ = os.environ if environ is None else environ
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        lines = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        environ.setdefault(key.strip(), value.strip().strip("'\""))
+    environ.setdefault("DB_ROOT_PASSWORD", "rootpass")
+    environ.setdefault("MYSQL_PWD", environ["DB_ROOT_PASSWORD"])
+    environ.setdefault("PGPASSWORD", environ["DB_ROOT_PASSWORD"])
+    return environ
+
+
+def load_plan(path):
+    """Read and normalize a plan file; raise ValueError when it is invalid."""
+    with open(path) as f:
+        text = f.read()
+    if path.endswith((".yml", ".yaml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path}: YAML plans need PyYAML (pip install pyyaml), or write the plan as JSON")
+        data = yaml.safe_load(text)
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}")
+    return normalize(data, os.path.splitext(os.path.basename(path))[0])
+
+
+def _project_name(*parts):
+    return _PROJECT_RE.sub("-", "-".join(str(p) for p in parts).lower()).strip("-_")
+
+
+def normalize(data, default_name="plan"):
+    """Validate a plan and give every entry its project name, port offset and subnet slot."""
+    if not isinstance(data, dict) or not isinstance(data.get("entries"), list) or not data["entries"]:
+        raise ValueError("A plan is a mapping with a non-empty 'entries' list")
+    name = _project_name(data.get("name") or default_name) or "plan"
+    base_offset = int(data.get("base_offset", BASE_OFFSET))
+    port_step = int(data.get("port_step", PORT_STEP))
+    if port_step <= 0 or base_offset < port_step:
+        raise ValueError("'port_step' must be positive and 'base_offset' at least 'port_step', "
+                         "away from the ports and subnets of the default stacks")
+    plan = {"name": name, "keep": bool(data.get("keep", False)), "entries": []}
+    for n, raw in enumerate(data["entries"]):
+        if not isinstance(raw, dict):
+            raise ValueError(f"Entry {n + 1}: expected a mapping, got {raw!r}")
+        topology = raw.get("topology", "standalone")
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Entry {n + 1}: unknown topology {topology!r} ({', '.join(TOPOLOGIES)})")
+        service = raw.get("service")
+        if topology == "standalone":
+            if not service or not _SERVICE_RE.match(str(service)):
+                raise ValueError(f"Entry {n + 1}: a standalone entry needs a 'service' such as mariadb114 or postgres17")
+        elif service:
+            raise ValueError(f"Entry {n + 1}: 'service' only applies to standalone entries")
+        kind = "postgres" if service and service.startswith("postgres") else "mysql"
+        dataset = raw.get("dataset")
+        if dataset and (dataset not in DATASETS or kind == "postgres"):
+            raise ValueError(f"Entry {n + 1}: dataset {dataset!r} cannot be loaded into {service or topology} "
+                             f"(MySQL-compatible servers only: {', '.join(DATASETS)})")
+        offset = base_offset + n * port_step
+        slot = offset // port_step
+        if slot > 255 or MAX_BASE_PORT + offset > 65535:
+            raise ValueError(f"Entry {n + 1}: offset {offset} is out of range, lower 'base_offset' or 'port_step'")
+        spec = TOPOLOGIES[topology]
+        if topology == "standalone":
+            ports = [(5432 if kind == "postgres" else 3306) + offset]
+        else:
+            ports = [port + offset for port in spec["ports"]]
+        plan["entries"].append({
+            "project": _project_name(name, raw.get("name") or service or topology, n + 1),
+            "topology": topology, "service": service, "kind": kind, "dataset": dataset,
+            "compose": spec["compose"], "offset": offset, "slot": slot, "ports": ports,
+        })
+    return plan
+
+
+def _shift_subnets(config, slot):
+    """{"A.B.C.": "A.B.(C+slot)."} for the /24 subnets of the networks of `config`."""
+    prefixes = {}
+    for network in (config.get("networks") or {}).values():
+        for pool in ((network or {}).get("ipam") or {}).get("config") or []:
+            subnet = ipaddress.ip_network(pool.get("subnet", ""), strict=False) if pool.get("subnet") else None
+            if subnet and subnet.version == 4 and subnet.prefixlen == 24:
+                a, b, c, _ = str(subnet.network_address).split(".")
+                if int(c) + slot > 255:
+                    raise ValueError(f"Subnet {subnet} cannot move by {slot}")
+                prefixes[f"{a}.{b}.{c}."] = f"{a}.{b}.{int(c) + slot}."
+    return prefixes
+
+
+def _replace(text, prefixes):
+    for old, new in prefixes.items():
+        text = re.sub(r"(?<![\d.])" + re.escape(old), new, text)
+    return text
+
+
+def _offset_port(port, offset):
+    """A published port moved by `offset`, or None for SSH ports (short or long syntax)."""
+    if isinstance(port, dict):
+        if int(port.get("target", 0)) == SSH_PORT:
+            return None
+        port = dict(port)
+        if port.get("published") not in (None, ""):
+            port["published"] = str(int(port["published"]) + offset)
+        return port
+    parts = str(port).split(":")
+    if int(parts[-1].split("/")[0]) == SSH_PORT:
+        return None
+    if len(parts) >= 2:
+        parts[-2] = str(int(parts[-2]) + offset)
+    return ":".join(parts)
+
+
+def isolate(config, project, offset, slot, run_dir, service=None, exists=os.path.exists, isdir=os.path.isdir):
+    """Return (config, mounts): `config` rewritten to run as `project` next to other copies of itself.
+
+    `mounts` lists the bind mounts to prepare under `run_dir` as
+    (kind, source, destination): "copy" for files (subnet rewritten), "dir" for
+    fresh writable directories. With `service`, only that service is kept and
+    its database port is published at its default port plus `offset`.
+    """
+    config = copy.deepcopy(config)
+    config["name"] = project
+    prefixes = _shift_subnets(config, slot)
+    services = config.get("services") or {}
+    if service:
+        if service not in services:
+            raise ValueError(f"Service {service!r} is not defined in the compose file")
+        services = {service: services[service]}
+        port = 5432 if service.startswith("postgres") else 3306
+        services[service]["ports"] = [{"target": port, "published": str(port), "protocol": "tcp"}]
+    config["services"] = services
+    mounts, seen = [], {}
+    for name, svc in services.items():
+        svc.pop("container_name", None)
+        svc.pop("profiles", None)
+        depends = svc.pop("depends_on", None)
+        if isinstance(depends, dict):
+            depends = {k: v for k, v in depends.items() if k in services}
+        elif isinstance(depends, list):
+            depends = [k for k in depends if k in services]
+        if depends:
+            svc["depends_on"] = depends
+        labels = svc.get("labels")
+        # Routing labels would make a running shared Traefik proxy pick up the copy
+        if isinstance(labels, dict):
+            svc["labels"] = {k: v for k, v in labels.items() if not k.startswith("traefik.")}
+        elif isinstance(labels, list):
+            svc["labels"] = [label for label in labels if not label.startswith("traefik.")]
+        if "ports" in svc:
+            svc["ports"] = [p for p in (_offset_port(port, offset) for port in svc["ports"]) if p is not None]
+        volumes = []
+        for volume in svc.get("volumes") or []:
+            volume, mount = _isolate_volume(volume, name, run_dir, seen, exists, isdir)
+            volumes.append(volume)
+            if mount:
+                mounts.append(mount)
+        if volumes:
+            svc["volumes"] = volumes
+    for section in ("networks", "volumes"):
+        for item in (config.get(section) or {}).values():
+            # Explicit names would be shared by every project
+            if isinstance(item, dict) and not item.get("external"):
+                item.pop("name", None)
+    if prefixes:
+        config = json.loads(_replace(json.dumps(config), prefixes))
+    return config, [(kind, source, dest, prefixes) for kind, source, dest in mounts]
+
+
+def _isolate_volume(volume, service, run_dir, seen, exists, isdir):
+    if isinstance(volume, str):
+        parts = volume.split(":")
+        if len(parts) < 2 or not parts[0].startswith((".", "/")):
+            return volume, None
+        volume = {"type": "bind", "source": parts[0], "target": parts[1], "read_only": "ro" in parts[2:]}
+    if volume.get("type") != "bind":
+        return volume, None
+    source = volume["source"]
+    if volume.get("read_only") and exists(source) and isdir(source):
+        return volume, None  # Shared read-only directories such as ./ssl
+    if exists(source) and not isdir(source):
+        kind = "copy"
+    elif volume.get("read_only"):
+        return volume, None
+    else:
+        kind = "dir"
+    if source not in seen:
+        base = os.path.basename(source.rstrip("/")) or service
+        dest = os.path.join(run_dir, "mounts", base)
+        n = 1
+        while dest in seen.values():
+            n += 1
+            dest = os.path.join(run_dir, "mounts", f"{base}.{n}")
+        seen[source] = dest
+        mount = (kind, source, dest)
+    else:
+        mount = None
+    volume = dict(volume)
+    volume["source"] = os.path.abspath(seen[source])
+    return volume, mount
+
+
+def materialize(mounts):
+    """Create the per-project copies listed by `isolate`."""
+    for kind, source, dest, prefixes in mounts:
+        if kind == "dir":
+            os.makedirs(dest, exist_ok=True)
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            with open(source, encoding="utf-8") as f:
+                text = f.read()
+        except UnicodeDecodeError:
+            shutil.copyfile(source, dest)
+            continue
+        with open(dest, "w", encoding="utf-8") as f:
+            f.write(_replace(text, prefixes))
+
+
+def render(compose_file, project, offset, slot, service=None, runs_dir=RUNS_DIR):
+    """Write `<runs_dir>/<project>/compose.json` from `docker compose config` and return its path."""
+    command = ["docker", "compose", "-f", compose_file]
+    if service:
+        command += ["--profile", service]
+    command += ["config", "--format", "json", "--no-interpolate"]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed: {result.stderr.strip()}")
+    run_dir = os.path.join(runs_dir, project)
+    config, mounts = isolate(json.loads(result.stdout), project, offset, slot, run_dir, service=service)
+    shutil.rmtree(os.path.join(run_dir, "mounts"), ignore_errors=True)
+    os.makedirs(run_dir, exist_ok=True)
+    materialize(mounts)
+    path = os.path.join(run_dir, "compose.json")
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+    return path
+
+
+def _compose(entry, runs_dir=RUNS_DIR):
+    return f"docker compose -p {entry['project']} -f {runs_dir}/{entry['project']}/compose.json"
+
+
+def _wait_synced(port):
+    # Same check as `make up-galera`, bounded for unattended runs; grouped so a `&&` chain skips it as a whole
+    return (f"{{ n=0; until mariadb -h 127.0.0.1 -P {port} -u root -e \"SHOW STATUS LIKE 'wsrep_local_state_comment'\" "
+            f"2>/dev/null | grep -q Synced; do n=$((n+1)); [ $n -lt {MAX_WAIT} ] || exit 1; sleep 1; done; }}")
+
+
+def _client(entry, port, sql):
+    if entry["kind"] == "postgres":
+        return f"psql -h 127.0.0.1 -p {port} -U postgres -c \"{sql}\""
+    binary = "mysql" if entry["service"] and entry["service"].startswith(("mysql", "percona")) else "mariadb"
+    return f"{binary} -h 127.0.0.1 -P {port} -u root -e \"{sql}\""
+
+
+_DATASET_CHECK = {"employees": "SELECT COUNT(*) AS employees FROM employees.employees",
+                  "sakila": "SELECT COUNT(*) AS films FROM sakila.film"}
+
+
+def entry_steps(entry, keep=False, lang='en'):
+    """Steps of one plan entry, ids prefixed with its project name."""
+    project, compose, ports = entry["project"], _compose(entry), entry["ports"]
+    text = TEXT[lang]
+    spec = TOPOLOGIES[entry["topology"]]
+    steps = []
+
+    def add(key, command, needs=(), *args, **extra):
+        name, description = text[key]
+        steps.append({"id": f"{project}.{key}", "name": name.format(project),
+                      "description": description.format(*(args or (project,))),
+                      "command": command, "needs": [n if n in ("ssl", "image") else f"{project}.{n}" for n in needs],
+                      **extra})
+
+    render_args = f"{entry['compose']} --project {project} --offset {entry['offset']} --slot {entry['slot']}"
+    if entry["service"]:
+        render_args += f" --service {entry['service']}"
+    add("render", f"python3 -m runner.plans render {render_args}")
+    if entry["topology"] == "galera":
+        nodes = spec["nodes"]
+        start = [f"MARIADB_GALERA_BOOTSTRAP=1 {compose} up -d --no-recreate {nodes[0]}", _wait_synced(ports[0])]
+        for node, port in zip(nodes[1:], ports[1:]):
+            start += [f"{compose} up -d --no-recreate {node}", _wait_synced(port)]
+        start.append(f"{compose} up -d --no-recreate {spec['proxy']}")
+        add("start", " && ".join(start), ["render", "ssl", "image"])
+        ready = "start"
+    else:
+        add("start", f"{compose} up -d", ["render", "ssl", "image"] if entry["topology"] == "repli" else ["render"])
+        targets = " ".join(f"{entry['kind']}://127.0.0.1:{port}" for port in ports)
+        add("ready", f"python3 -m dblab.probe {targets} --timeout {MAX_WAIT}", ["start"])
+        ready = "ready"
+    if entry["topology"] == "repli":
+        add("setup", f"MASTER_IP={spec['subnet'].rsplit('.', 1)[0]}.{entry['slot']}.11 MASTER_PORT={ports[0]} "
+                     f"SLAVE1_PORT={ports[1]} SLAVE2_PORT={ports[2]} bash ./scripts/setup_repli.sh", [ready])
+        ready = "setup"
+    checks = []
+    if entry["dataset"]:
+        client = "mysql" if entry["service"] and entry["service"].startswith(("mysql", "percona")) else "mariadb"
+        add("inject", f"python3 -m dblab.loader --host 127.0.0.1 --port {ports[0]} --client {client} "
+                      f"--dataset {entry['dataset']}", [ready], entry["dataset"], project)
+        ready = "inject"
+        checks.append(_client(entry, ports[-1], _DATASET_CHECK[entry["dataset"]]))
+    if entry["topology"] == "galera":
+        checks.append(_client(entry, ports[0], "SHOW STATUS LIKE 'wsrep_cluster_size'") + " | grep -qw 3")
+    elif entry["topology"] == "repli":
+        checks += [_client(entry, port, "SHOW SLAVE STATUS\\G") + " | grep -q 'Slave_SQL_Running: Yes'"
+                   for port in ports[1:]]
+    if not checks:
+        checks.append(_client(entry, ports[0], "SELECT VERSION()"))
+    add("verify", " && ".join(checks), [ready])
+    if not keep:
+        add("teardown", f"{compose} down -v --remove-orphans", [step["id"].split(".", 1)[1] for step in steps],
+            always=True)
+    return steps
+
+
+def plan_steps(plan, keep=False, lang='en'):
+    """Runner steps of a normalized plan: shared SSL and image steps, then every entry."""
+    keep = keep or plan["keep"]
+    steps = []
+    if any(entry["topology"] != "standalone" for entry in plan["entries"]):
+        text = TEXT[lang]
+        steps += [
+            {"id": "ssl", "name": text['ssl'][0], "description": text['ssl'][1], "command": "make gen-ssl",
+             "inputs": ["scripts/gen_ssl.sh", "ssl/**"], "resources": ["ssl"]},
+            {"id": "image", "name": text['image'][0], "description": text['image'][1], "command": "make build-image",
+             "inputs": ["Dockerfile", "scripts/start_mariadb.sh", "conf/supervisord.conf", "id_rsa*"],
+             "resources": ["image"]},
+        ]
+    for entry in plan["entries"]:
+        steps += entry_steps(entry, keep=keep, lang=lang)
+    return steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the isolated compose file of a plan entry.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    render_parser = commands.add_parser("render", help="Write .runs/<project>/compose.json from a compose file.")
+    render_parser.add_argument("compose", help="Compose file of the topology.")
+    render_parser.add_argument("--project", required=True, help="Compose project name.")
+    render_parser.add_argument("--offset", type=int, required=True, help="Added to every published host port.")
+    render_parser.add_argument("--slot", type=int, required=True, help="Added to the third byte of the private subnets.")
+    render_parser.add_argument("--service", help="Standalone service to keep (and publish directly).")
+    render_parser.add_argument("--runs-dir", default=RUNS_DIR, help=f"Directory of the rendered projects (default: {RUNS_DIR}).")
+    args = parser.parse_args(argv)
+    try:
+        path = render(args.compose, args.project, args.offset, args.slot, service=args.service, runs_dir=args.runs_dir)
+    except (RuntimeError, ValueError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"✅ {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
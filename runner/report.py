@@ -0,0 +1,797 @@
+"""Incremental report engine for interactive_runner.py.
+
+The report is split in three parts so that its cost no longer grows with the
+size of the step outputs:
+
+- `run_report.html`: a static shell written once, which renders the run from
+  the state file and polls it while the run is in progress;
+- `run_report_files/state.json` (and `state.js`, the same data loadable from a
+  `file://` page): step statuses, timings, log sizes and a bounded head and
+  tail of each output, rewritten atomically at most every `flush_interval`
+  seconds;
+- `run_report_files/NN-<id>.stdout.log` / `.stderr.log`: the complete outputs,
+  only ever appended to, and `NN-<id>.log` with both streams interleaved in
+  arrival order (see `spill_path`); with `compression` they are streamed to
+  `.log.gz` / `.log.zst` files instead (see runner/archive.py).
+"""
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from runner.archive import log_name, open_log
+from runner.capture import TailBuffer
+
+FLUSH_INTERVAL = 0.5
+HEAD_BYTES = 16 * 1024
+TAIL_BYTES = 16 * 1024
+STATE_NAME = "state"
+
+SHELL_TEMPLATE = """<!DOCTYPE html>
+<html lang="@LANG@">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>@TITLE@</title>
+    <script src="https://cdn.tailwindcss.com"></script>
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&family=Fira+Code:wght@400;500&display=swap" rel="stylesheet">
+    <style>
+        :root {
+            --glass: rgba(255, 255, 255, 0.03);
+            --glass-border: rgba(255, 255, 255, 0.08);
+            --bg: #0b0e14;
+        }
+        body {
+            font-family: 'Inter', sans-serif;
+            background: radial-gradient(circle at 0% 0%, #1e293b 0%, #0f172a 50%, #020617 100%);
+            color: #f1f5f9;
+            min-height: 100vh;
+        }
+        .glass {
+            background: var(--glass);
+            backdrop-filter: blur(16px);
+            -webkit-backdrop-filter: blur(16px);
+            border: 1px solid var(--glass-border);
+            border-radius: 1.5rem;
+            box-shadow: 0 8px 32px 0 rgba(0, 0, 0, 0.37);
+        }
+        .status-success { color: #10b981; text-shadow: 0 0 10px rgba(16, 185, 129, 0.3); }
+        .status-failure { color: #f43f5e; text-shadow: 0 0 10px rgba(244, 63, 94, 0.3); }
+        .status-skipped { color: #94a3b8; }
+        .code-block {
+            font-family: 'Fira Code', monospace;
+            background: rgba(0, 0, 0, 0.4);
+            border: 1px solid rgba(255, 255, 255, 0.03);
+            box-shadow: inset 0 2px 4px 0 rgba(0, 0, 0, 0.06);
+        }
+        pre {
+            white-space: pre-wrap;
+            word-wrap: break-word;
+        }
+        .step-card {
+            transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
+        }
+        .step-card:hover {
+            transform: translateY(-4px);
+            border-color: rgba(255, 255, 255, 0.15);
+            background: rgba(255, 255, 255, 0.05);
+        }
+        .gradient-text {
+            background: linear-gradient(135deg, #60a5fa 0%, #34d399 100%);
+            -webkit-background-clip: text;
+            -webkit-text-fill-color: transparent;
+        }
+        ::-webkit-scrollbar { width: 8px; }
+        ::-webkit-scrollbar-track { background: rgba(0, 0, 0, 0.2); }
+        ::-webkit-scrollbar-thumb { background: rgba(255, 255, 255, 0.1); border-radius: 4px; }
+        ::-webkit-scrollbar-thumb:hover { background: rgba(255, 255, 255, 0.2); }
+
+        .status-running {
+            color: #60a5fa;
+            text-shadow: 0 0 15px rgba(96, 165, 250, 0.4);
+            animation: pulse-blue 2s infinite;
+        }
+        @keyframes pulse-blue {
+            0%, 100% { opacity: 1; }
+            50% { opacity: 0.7; }
+        }
+        .header-compact { padding-bottom: 2rem; margin-bottom: 2rem; }
+        .step-compact { margin-bottom: 1.5rem !important; }
+    </style>
+    <script>
+        const STATE_SRC = '@STATE_SRC@';
+        const EVENTS_SRC = '@EVENTS_SRC@';
+        const HEAD_CHARS = @HEAD_CHARS@;
+        const TAIL_CHARS = @TAIL_CHARS@;
+        const FILES_DIR = '@FILES_DIR@';
+        const STATUS_STYLES = {
+            SUCCESS: ['status-success', 'bg-emerald-500/20', '<svg class="w-7 h-7 text-emerald-500" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2.5" d="M5 13l4 4L19 7"></path></svg>'],
+            FAILED: ['status-failure', 'bg-rose-500/20', '<svg class="w-7 h-7 text-rose-500" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2.5" d="M6 18L18 6M6 6l12 12"></path></svg>'],
+            RUNNING: ['status-running text-blue-400', 'bg-blue-500/20', '<svg class="w-7 h-7 text-blue-500 animate-spin" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 4v5h.582m15.356 2A8.001 8.001 0 004.582 9m0 0H9m11 11v-5h-.581m0 0a8.003 8.003 0 01-15.357-2m15.357 2H15"></path></svg>'],
+            PENDING: ['text-amber-400', 'bg-amber-500/20', '<svg class="w-7 h-7 text-amber-500 opacity-50" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z"></path></svg>'],
+            SKIPPED: ['status-skipped', 'bg-slate-500/20', '<svg class="w-7 h-7 text-slate-500" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M20 12H4"></path></svg>']
+        };
+        const TIMELINE_COLORS = {SUCCESS: 'bg-emerald-500/70', FAILED: 'bg-rose-500/70', RUNNING: 'bg-blue-500/70 animate-pulse'};
+        let finished = false;
+        let focused = null;
+
+        function formatBytes(n) {
+            if (n < 1024) return n + ' B';
+            if (n < 1048576) return (n / 1024).toFixed(1) + ' KB';
+            return (n / 1048576).toFixed(1) + ' MB';
+        }
+
+        function outputPanel(stream, label, color, dot) {
+            return `<div class="space-y-3">
+                <div class="flex items-center gap-2">
+                    <div class="w-2 h-2 rounded-full ${dot}"></div>
+                    <h3 class="text-xs font-bold uppercase tracking-widest text-slate-500">${label}</h3>
+                    <a data-field="${stream}-link" class="text-[10px] text-slate-500 hover:text-blue-400 ml-auto" target="_blank"></a>
+                </div>
+                <div class="code-block p-5 rounded-xl border border-white/5 h-[32rem] overflow-y-auto ${color} text-sm scrollbar-thin">
+                    <pre class="leading-relaxed" data-field="${stream}"></pre>
+                </div>
+            </div>`;
+        }
+
+        function createStep(step, labels) {
+            const section = document.createElement('section');
+            section.id = 'step-' + step.index + '-' + step.id;
+            section.className = 'step-card glass p-4 md:p-5 relative overflow-hidden step-compact';
+            section.innerHTML = `
+    <div class="flex flex-col md:flex-row md:items-center justify-between gap-4 mb-4 relative z-10">
+        <div class="flex items-center gap-4">
+            <span class="text-[9px] font-black uppercase tracking-[0.1em] px-2 py-0.5 rounded-full bg-slate-800 text-slate-400 border border-slate-700">Step ${step.index}</span>
+            <div>
+                <h2 class="text-xl font-bold text-white tracking-tight" data-field="name"></h2>
+                <p class="text-slate-400 text-xs font-light leading-relaxed" data-field="description"></p>
+            </div>
+        </div>
+        <div class="flex items-center gap-4 glass px-4 py-2 bg-white/[0.02]">
+            <div class="text-right">
+                <p class="text-lg font-black tracking-tight" data-field="status"></p>
+                <p class="text-[10px] text-slate-500" data-field="duration"></p>
+            </div>
+            <div class="w-10 h-10 rounded-xl flex items-center justify-center relative overflow-hidden" data-field="icon"></div>
+        </div>
+    </div>
+    <div class="hidden flex flex-wrap items-center gap-x-6 gap-y-2 mb-4 text-[11px] text-slate-400 relative z-10" data-field="telemetry"></div>
+    <details class="group/details">
+        <summary class="flex items-center gap-2 cursor-pointer list-none text-slate-500 hover:text-blue-400 transition-colors mb-2">
+            <svg class="w-3 h-3 transition-transform group-open/details:rotate-90" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 5l7 7-7 7"></path></svg>
+            <span class="text-[10px] font-bold uppercase tracking-widest">${labels.logs}</span>
+        </summary>
+        <div class="space-y-4 pt-3 border-t border-white/5 relative z-10">
+            <div class="code-block p-3 rounded-lg border border-white/5 text-blue-300 flex items-center gap-4">
+                <code class="text-xs font-medium leading-relaxed" data-field="command"></code>
+                <a data-field="log-link" class="text-[10px] text-slate-500 hover:text-blue-400 ml-auto" target="_blank"></a>
+            </div>
+            <div class="grid grid-cols-1 lg:grid-cols-2 gap-6 pt-4">
+                ${outputPanel('stdout', labels.stdout, 'text-emerald-300', 'bg-emerald-500')}
+                ${outputPanel('stderr', labels.stderr, 'text-rose-300', 'bg-rose-500')}
+            </div>
+        </div>
+    </details>`;
+            document.getElementById('steps').appendChild(section);
+            return section;
+        }
+
+        function setText(section, field, text) {
+            const el = section.querySelector(`[data-field="${field}"]`);
+            if (el && el.textContent !== text) el.textContent = text;
+            return el;
+        }
+
+        // Head and tail of a stream, with the size of what lies between them (in the full log only)
+        const encoder = new TextEncoder();
+        function joinOutput(output) {
+            const head = output.head || '';
+            const omitted = output.truncated ? output.bytes - encoder.encode(head + output.tail).length : 0;
+            if (omitted <= 0) return head + output.tail;
+            return head + `\\n… ${formatBytes(omitted)} omitted, see the full log ↗ …\\n` + output.tail;
+        }
+
+        function renderOutput(section, stream, output, empty) {
+            const el = section.querySelector(`[data-field="${stream}"]`);
+            const link = section.querySelector(`[data-field="${stream}-link"]`);
+            const text = output.bytes ? joinOutput(output) : empty;
+            if (el.textContent !== text) {
+                const box = el.parentElement;
+                const atBottom = box.scrollTop + box.clientHeight >= box.scrollHeight - 4;
+                el.textContent = text;
+                if (atBottom) box.scrollTop = box.scrollHeight;
+            }
+            if (output.bytes) {
+                link.textContent = formatBytes(output.bytes) + ' ↗';
+                link.href = FILES_DIR + '/' + output.log;
+            }
+        }
+
+        function formatSeconds(s) {
+            return s == null ? '–' : s.toFixed(1) + ' s';
+        }
+
+        function sparkline(values, color, title) {
+            if (!values || values.length < 2) return '';
+            const max = Math.max(...values, 1e-9);
+            const points = values.map((v, i) => `${(100 * i / (values.length - 1)).toFixed(1)},${(20 - 18 * v / max).toFixed(1)}`).join(' ');
+            return `<span class="inline-flex items-center gap-1" title="${title} (max ${max.toFixed(1)})">
+                <span class="text-[9px] uppercase tracking-widest text-slate-500">${title}</span>
+                <svg viewBox="0 0 100 20" preserveAspectRatio="none" class="w-24 h-5"><polyline fill="none" stroke="${color}" stroke-width="1.5" points="${points}"/></svg>
+            </span>`;
+        }
+
+        function telemetryFigures(t) {
+            const io = (a, b) => formatBytes(a || 0) + ' / ' + formatBytes(b || 0);
+            const host = t.host, docker = t.docker;
+            return [
+                ['CPU', formatSeconds(t.cpu_seconds)],
+                ['Peak RSS', t.max_rss != null ? formatBytes(t.max_rss) : '–'],
+                ['Host CPU', host ? host.cpu_pct.toFixed(0) + '%' : '–'],
+                ['Disk R/W', host ? io(host.disk_read, host.disk_write) : '–'],
+                ['Net RX/TX', host ? io(host.net_rx, host.net_tx) : '–'],
+                ['Containers CPU', docker ? formatSeconds(docker.cpu_seconds) : '–'],
+                ['Containers mem', docker ? formatBytes(docker.mem_peak) : '–'],
+                ['Containers I/O', docker ? io(docker.blk_read, docker.blk_write) : '–'],
+                ['Containers net', docker ? io(docker.net_rx, docker.net_tx) : '–']
+            ];
+        }
+
+        function renderTelemetry(section, step) {
+            const box = section.querySelector('[data-field="telemetry"]');
+            const t = step.telemetry;
+            const key = JSON.stringify(t);
+            if (!t || box.dataset.key === key) return;
+            box.dataset.key = key;
+            box.classList.remove('hidden');
+            box.innerHTML = telemetryFigures(t).filter(([, value]) => value !== '–').map(([label, value]) =>
+                `<span><span class="text-[9px] uppercase tracking-widest text-slate-500">${label}</span> <span class="text-slate-200 font-medium">${value}</span></span>`).join('')
+                + sparkline(t.series.host_cpu, '#60a5fa', 'host cpu %') + sparkline(t.series.host_mem, '#a78bfa', 'host mem MB')
+                + sparkline(t.series.docker_cpu, '#34d399', 'containers cpu %') + sparkline(t.series.docker_mem, '#fbbf24', 'containers mem MB');
+        }
+
+        function renderSummary(state) {
+            const steps = state.steps.filter(step => step.telemetry);
+            if (!steps.length) return;
+            document.getElementById('telemetry').classList.remove('hidden');
+            const table = document.getElementById('telemetry-table');
+            table.innerHTML = '';
+            const addRow = (cells, header) => {
+                const row = table.insertRow();
+                cells.forEach(text => {
+                    const cell = document.createElement(header ? 'th' : 'td');
+                    cell.className = header ? 'pb-2 pr-4 text-left text-[9px] uppercase tracking-widest text-slate-500'
+                                            : 'py-1.5 pr-4 whitespace-nowrap border-t border-white/5';
+                    cell.textContent = text;
+                    row.appendChild(cell);
+                });
+            };
+            addRow(['Step', 'Wall'].concat(telemetryFigures(steps[0].telemetry).map(([label]) => label)), true);
+            steps.forEach(step => addRow([step.index + '. ' + step.name, formatSeconds(step.telemetry.wall)]
+                .concat(telemetryFigures(step.telemetry).map(([, value]) => value))));
+        }
+
+        function renderTimeline(state) {
+            if (!state.steps.some(step => step.offset != null)) return;
+            document.getElementById('timeline').classList.remove('hidden');
+            const total = Math.max(state.elapsed, 0.001);
+            const rows = document.getElementById('timeline-rows');
+            state.steps.forEach(step => {
+                let row = document.getElementById('timeline-' + step.index);
+                if (!row) {
+                    row = document.createElement('div');
+                    row.id = 'timeline-' + step.index;
+                    row.className = 'flex items-center gap-3';
+                    row.innerHTML = `<span class="w-48 truncate text-[11px] text-slate-400"></span>
+                        <div class="relative flex-1 h-3 rounded-full bg-white/[0.03]"><div class="bar absolute top-0 h-full rounded-full"></div></div>`;
+                    row.querySelector('span').textContent = step.index + '. ' + step.name;
+                    rows.appendChild(row);
+                }
+                const bar = row.querySelector('.bar');
+                if (step.offset == null) {
+                    bar.style.width = '0';
+                    return;
+                }
+                bar.style.left = (100 * step.offset / total) + '%';
+                bar.style.width = Math.max(0.5, 100 * step.duration / total) + '%';
+                bar.className = 'bar absolute top-0 h-full rounded-full ' + (TIMELINE_COLORS[step.status] || 'bg-slate-500/70');
+                bar.title = `+${step.offset.toFixed(1)} s, ${step.duration.toFixed(1)} s`;
+            });
+            document.getElementById('timeline-total').textContent = total.toFixed(1) + ' s';
+        }
+
+        function renderTrend(state) {
+            const rows = state.trend || [];
+            if (!rows.length) return;
+            document.getElementById('trend').classList.remove('hidden');
+            const regressions = rows.filter(row => row.regression).length;
+            document.getElementById('trend-regressions').textContent = regressions ? regressions + ' regression(s)' : 'no regression';
+            const table = document.getElementById('trend-table');
+            table.innerHTML = '<tr>' + ['Step', 'Metric', 'This run', 'Baseline', 'Change', 'History', ''].map(label =>
+                `<th class="pb-2 pr-4 text-left text-[9px] uppercase tracking-widest text-slate-500">${label}</th>`).join('') + '</tr>';
+            rows.forEach(row => {
+                const tr = table.insertRow();
+                const cells = [row.name || row.step, row.metric, row.value.toFixed(2) + ' ' + row.unit,
+                               row.baseline == null ? '–' : row.baseline.toFixed(2) + ' ' + row.unit,
+                               row.change == null ? '–' : (row.change > 0 ? '+' : '') + row.change.toFixed(1) + '%'];
+                cells.forEach(text => {
+                    const cell = tr.insertCell();
+                    cell.className = 'py-1.5 pr-4 whitespace-nowrap border-t border-white/5';
+                    cell.textContent = text;
+                });
+                const history = tr.insertCell();
+                history.className = 'py-1.5 pr-4 border-t border-white/5';
+                history.innerHTML = sparkline(row.history, row.regression ? '#f43f5e' : '#60a5fa', row.history.length + ' runs');
+                const flag = tr.insertCell();
+                flag.className = 'py-1.5 border-t border-white/5 font-bold ' + (row.regression ? 'text-rose-400' : 'text-slate-500');
+                flag.textContent = row.regression ? `▲ over ${row.threshold}%` : '';
+            });
+        }
+
+        function render(state) {
+            if (!state) return;
+            const labels = state.labels;
+            document.getElementById('started').textContent = state.started;
+            document.getElementById('install-type').textContent = state.install_type;
+            document.getElementById('total').textContent = state.steps.length;
+            document.getElementById('passed').textContent = state.steps.filter(s => s.status === 'SUCCESS').length;
+            document.getElementById('failed').textContent = state.steps.filter(s => s.status === 'FAILED').length;
+            let running = null;
+            state.steps.forEach(step => {
+                const section = document.getElementById('step-' + step.index + '-' + step.id) || createStep(step, labels);
+                const [statusClass, statusBg, icon] = STATUS_STYLES[step.status] || STATUS_STYLES.SKIPPED;
+                setText(section, 'name', step.name);
+                setText(section, 'description', step.description);
+                setText(section, 'command', step.command);
+                setText(section, 'duration', (step.duration != null ? step.duration.toFixed(1) + ' s' : '') + (step.cached ? ' · cached' : ''));
+                const status = setText(section, 'status', step.status);
+                status.className = 'text-lg font-black tracking-tight ' + statusClass;
+                const iconBox = section.querySelector('[data-field="icon"]');
+                if (iconBox.dataset.status !== step.status) {
+                    iconBox.dataset.status = step.status;
+                    iconBox.className = 'w-10 h-10 rounded-xl flex items-center justify-center relative overflow-hidden ' + statusBg;
+                    iconBox.innerHTML = '<div class="absolute inset-0 bg-current opacity-10 animate-pulse"></div>' + icon;
+                }
+                if (step.log) {
+                    const logLink = setText(section, 'log-link', 'full log ↗');
+                    logLink.href = FILES_DIR + '/' + step.log;
+                }
+                renderTelemetry(section, step);
+                renderOutput(section, 'stdout', step.stdout, labels.no_output);
+                renderOutput(section, 'stderr', step.stderr, labels.no_error);
+                if (step.status === 'RUNNING') running = section;
+            });
+            const target = running || [...document.querySelectorAll('section[id^="step-"]')].filter(
+                s => /SUCCESS|FAILED/.test(s.querySelector('[data-field="status"]').textContent)).pop();
+            if (target && target !== focused) {
+                if (focused) focused.classList.remove('ring-2', 'ring-blue-500/50');
+                if (running) {
+                    running.querySelector('details').open = true;
+                    running.classList.add('ring-2', 'ring-blue-500/50');
+                }
+                target.scrollIntoView({ behavior: 'smooth', block: 'center' });
+                focused = target;
+            }
+            renderTimeline(state);
+            renderSummary(state);
+            renderTrend(state);
+            finished = state.finished;
+            document.getElementById('live-status').textContent = finished ? 'Execution Complete' : 'Live • updated ' + state.updated;
+        }
+
+        // Live mode: a snapshot, then deltas carrying changed steps and new output only
+        let liveState = null;
+
+        function applyDelta(delta) {
+            Object.assign(liveState, delta.header);
+            delta.steps.forEach(step => {
+                const current = liveState.steps[step.index - 1];
+                ['stdout', 'stderr'].forEach(stream => {
+                    const same = step.attempt === current.attempt;
+                    step[stream].head = same ? current[stream].head : '';
+                    step[stream].tail = same ? current[stream].tail : '';
+                });
+                liveState.steps[step.index - 1] = step;
+            });
+            delta.output.forEach(([index, stream, attempt, text]) => {
+                const current = liveState.steps[index - 1];
+                if (current.attempt !== attempt) return;
+                // Same head and tail as the state files: the head collects what the tail drops
+                const output = current[stream];
+                const all = output.tail + text;
+                output.tail = all.slice(-TAIL_CHARS);
+                const dropped = all.length - output.tail.length;
+                if (dropped > 0) {
+                    output.truncated = true;
+                    if (output.head.length < HEAD_CHARS) {
+                        output.head += all.slice(0, Math.min(dropped, HEAD_CHARS - output.head.length));
+                    }
+                }
+            });
+        }
+
+        function connect() {
+            const source = new EventSource(EVENTS_SRC);
+            source.addEventListener('snapshot', e => {
+                liveState = JSON.parse(e.data);
+                render(liveState);
+            });
+            source.addEventListener('delta', e => {
+                if (!liveState) return;
+                applyDelta(JSON.parse(e.data));
+                render(liveState);
+                if (liveState.finished) source.close();
+            });
+        }
+
+        function loadState() {
+            const script = document.createElement('script');
+            script.src = STATE_SRC + '?t=' + Date.now();
+            script.onload = () => { script.remove(); render(window.RUN_STATE); };
+            script.onerror = () => script.remove();
+            document.head.appendChild(script);
+        }
+
+        window.onload = () => {
+            if (EVENTS_SRC) return connect();
+            loadState();
+            const timer = setInterval(() => finished ? clearInterval(timer) : loadState(), 1000);
+        };
+    </script>
+</head>
+<body class="p-6 md:p-12 text-slate-100">
+    <div class="max-w-6xl mx-auto">
+        <header class="header-compact relative">
+            <div class="absolute -top-12 -left-12 w-48 h-48 bg-blue-500/10 rounded-full blur-3xl"></div>
+            <div class="absolute -top-12 -right-12 w-48 h-48 bg-emerald-500/10 rounded-full blur-3xl"></div>
+
+            <div class="relative text-center">
+                <h1 class="text-4xl font-black tracking-tight mb-3 gradient-text">
+                    @TITLE@
+                </h1>
+                <p class="text-slate-400 text-sm font-light">
+                    Real-time dashboard for <span class="text-slate-200 font-medium">test_db</span>
+                </p>
+                <div id="live-status" class="mt-2 text-[10px] uppercase tracking-[0.3em] text-blue-400/60 font-bold">
+                    Loading…
+                </div>
+                <div class="flex flex-wrap justify-center gap-4 mt-6">
+                    <div class="glass px-4 py-2 flex flex-col items-center min-w-[120px]">
+                        <span class="text-[9px] uppercase tracking-[0.1em] text-slate-500 font-bold">Type</span>
+                        <span id="install-type" class="text-sm font-semibold text-slate-200"></span>
+                    </div>
+                    <div class="glass px-4 py-2 flex flex-col items-center min-w-[120px]">
+                        <span class="text-[9px] uppercase tracking-[0.1em] text-cyan-500/60 font-bold">Date</span>
+                        <span id="started" class="text-sm font-semibold text-slate-200"></span>
+                    </div>
+                    <div class="glass px-4 py-2 flex flex-col items-center min-w-[80px]">
+                        <span class="text-[9px] uppercase tracking-[0.1em] text-slate-500 font-bold">Steps</span>
+                        <span id="total" class="text-xl font-black text-white"></span>
+                    </div>
+                    <div class="glass px-4 py-2 border-emerald-500/20 flex flex-col items-center min-w-[80px]">
+                        <span class="text-[9px] uppercase tracking-[0.1em] text-emerald-500/60 font-bold">Passed</span>
+                        <span id="passed" class="text-xl font-black text-emerald-400"></span>
+                    </div>
+                    <div class="glass px-4 py-2 border-rose-500/20 flex flex-col items-center min-w-[80px]">
+                        <span class="text-[9px] uppercase tracking-[0.1em] text-rose-500/60 font-bold">Failed</span>
+                        <span id="failed" class="text-xl font-black text-rose-400"></span>
+                    </div>
+                </div>
+            </div>
+        </header>
+
+        <section id="timeline" class="glass p-4 md:p-5 mb-8 hidden">
+            <div class="flex items-center justify-between mb-3">
+                <h3 class="text-xs font-bold uppercase tracking-widest text-slate-500">Timeline</h3>
+                <span id="timeline-total" class="text-[10px] text-slate-500"></span>
+            </div>
+            <div id="timeline-rows" class="space-y-2"></div>
+        </section>
+
+        <section id="telemetry" class="glass p-4 md:p-5 mb-8 hidden overflow-x-auto">
+            <h3 class="text-xs font-bold uppercase tracking-widest text-slate-500 mb-3">Resources</h3>
+            <table id="telemetry-table" class="text-[11px] text-slate-300"></table>
+        </section>
+
+        <section id="trend" class="glass p-4 md:p-5 mb-8 hidden overflow-x-auto">
+            <div class="flex items-center justify-between mb-3">
+                <h3 class="text-xs font-bold uppercase tracking-widest text-slate-500">Trend vs previous runs</h3>
+                <span id="trend-regressions" class="text-[10px] text-slate-500"></span>
+            </div>
+            <table id="trend-table" class="text-[11px] text-slate-300"></table>
+        </section>
+
+        <main id="steps" class="space-y-4 relative">
+            <div class="absolute left-6 top-0 bottom-0 w-px bg-gradient-to-b from-blue-500/20 via-slate-500/10 to-transparent hidden lg:block"></div>
+        </main>
+
+        <footer class="mt-20 text-center text-slate-500 text-sm font-medium tracking-wide">
+            Generated by www.lightpath.fr Runner
+        </footer>
+    </div>
+</body>
+</html>
+"""
+
+
+def _atomic_write(path, content):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class _Output:
+    """One step stream: append-only log file plus its bounded head and tail in memory."""
+
+    def __init__(self, path, head_bytes=HEAD_BYTES, tail_bytes=TAIL_BYTES):
+        self.path = path
+        self.file = None
+        self.bytes = 0
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = []
+        self.head_size = 0
+        self.tail = TailBuffer(tail_bytes)
+
+    def append(self, text):
+        if self.file is None:
+            self.file = open_log(self.path, "at")
+        self.file.write(text)
+        self.bytes += len(text.encode("utf-8", errors="replace"))
+        if self.head_size < self.head_bytes:
+            part = text[:self.head_bytes - self.head_size]
+            self.head.append(part)
+            self.head_size += len(part)
+        self.tail.append(text)
+
+    def flush(self):
+        if self.file:
+            self.file.flush()
+
+    def reset(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.bytes = 0
+        self.head = []
+        self.head_size = 0
+        self.tail = TailBuffer(self.tail_bytes)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def state(self):
+        tail = self.tail.getvalue()
+        # The head only holds what the tail lost, empty until the tail is truncated
+        head = "".join(self.head)[:self.tail.total - len(tail)]
+        return {"log": os.path.basename(self.path), "bytes": self.bytes, "head": head, "tail": tail,
+                "truncated": self.tail.truncated}
+
+
+class ReportWriter:
+    """Maintain the report of one run; every method is thread-safe."""
+
+    def __init__(self, report_file, steps, install_type="", labels=None, title="Test Runner Dashboard", lang="en",
+                 flush_interval=FLUSH_INTERVAL, head_bytes=HEAD_BYTES, tail_bytes=TAIL_BYTES, compression=None):
+        self.report_file = report_file
+        self.files_dir = os.path.splitext(report_file)[0] + "_files"
+        self.install_type = install_type
+        self.labels = labels or {}
+        self.title = title
+        self.lang = lang
+        self.flush_interval = flush_interval
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.compression = compression
+        self.started = _now()
+        self.t0 = time.time()
+        self.finished = False
+        self.lock = threading.Lock()
+        self.dirty = True
+        self.stop = threading.Event()
+        self.flusher = None
+        self.subscribers = []
+        self.trend = []
+        self.steps = []
+        for index, step in enumerate(steps, 1):
+            prefix = os.path.join(self.files_dir, f"{index:02d}-{step['id']}")
+            self.steps.append({
+                "step": step, "status": "PENDING", "returncode": None, "started_at": None, "ended_at": None,
+                "attempt": 0,
+                "spill": log_name(f"{prefix}.log", compression),
+                "outputs": {stream: _Output(log_name(f"{prefix}.{stream}.log", compression), head_bytes, tail_bytes)
+                            for stream in ("stdout", "stderr")},
+            })
+
+    def start(self):
+        """Write the shell and the initial state, then flush in the background."""
+        os.makedirs(self.files_dir, exist_ok=True)
+        self.started, self.t0 = _now(), time.time()
+        for entry in self.steps:
+            for output in entry["outputs"].values():
+                output.reset()
+            if os.path.exists(entry["spill"]):
+                os.remove(entry["spill"])
+        files_dir = os.path.basename(self.files_dir)
+        _atomic_write(self.report_file, self.render_shell(files_dir, f"{files_dir}/{STATE_NAME}.js"))
+        self.flush()
+        self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flusher.start()
+
+    def render_shell(self, files_dir, state_src="", events_src=""):
+        """The report page, rendering from `state_src` (polled) or `events_src` (server-sent events)."""
+        return (SHELL_TEMPLATE.replace("@TITLE@", self.title).replace("@LANG@", self.lang)
+                .replace("@FILES_DIR@", files_dir).replace("@STATE_SRC@", state_src)
+                .replace("@EVENTS_SRC@", events_src).replace("@HEAD_CHARS@", str(self.head_bytes))
+                .replace("@TAIL_CHARS@", str(self.tail_bytes)))
+
+    def subscribe(self, maxsize=10000):
+        """Return a queue receiving ("step", index), ("output", index, stream, attempt, text), ("header",) and ("finished",).
+
+        A subscriber too slow to keep up gets its `overflow` flag set and
+        should start again from `state()`.
+        """
+        subscriber = queue.Queue(maxsize)
+        subscriber.overflow = False
+        with self.lock:
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def _notify(self, event):
+        # Called with the lock held
+        for subscriber in self.subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                subscriber.overflow = True
+
+    def _flush_loop(self):
+        while not self.stop.wait(self.flush_interval):
+            self.flush()
+
+    def set_status(self, index, status, returncode=None, cached=False):
+        """Set the status of step `index` (0-based); RUNNING starts its clock, final statuses stop it."""
+        with self.lock:
+            entry = self.steps[index]
+            entry["status"] = status
+            entry["cached"] = cached
+            if status == "RUNNING":
+                entry["started_at"], entry["ended_at"], entry["returncode"] = time.time(), None, None
+                entry["attempt"] += 1
+                for output in entry["outputs"].values():
+                    output.reset()
+            else:
+                # Ends compressed streams, so that the logs are complete files
+                for output in entry["outputs"].values():
+                    output.close()
+                if status in ("SUCCESS", "FAILED"):
+                    entry["ended_at"] = time.time()
+                    entry["returncode"] = returncode
+            self.dirty = True
+            self._notify(("step", index))
+
+    def spill_path(self, index):
+        """Path of the interleaved output log of step `index`, written by the capture layer."""
+        return self.steps[index]["spill"]
+
+    def set_telemetry(self, index, telemetry):
+        """Attach the resource figures of step `index` (see runner/telemetry.py)."""
+        with self.lock:
+            self.steps[index]["telemetry"] = telemetry
+            self.dirty = True
+            self._notify(("step", index))
+
+    def set_trend(self, trend):
+        """Attach the comparison of this run with the previous ones (see runner/history.py)."""
+        with self.lock:
+            self.trend = trend
+            self.dirty = True
+            self._notify(("header",))
+
+    def log_paths(self, index):
+        """Close and return the logs of step `index` as {"stdout", "stderr", "log"} paths."""
+        with self.lock:
+            entry = self.steps[index]
+            for output in entry["outputs"].values():
+                output.close()
+            return {"stdout": entry["outputs"]["stdout"].path, "stderr": entry["outputs"]["stderr"].path,
+                    "log": entry["spill"]}
+
+    def append(self, index, stream, text):
+        """Append `text` to the `stream` ("stdout" or "stderr") log of step `index`."""
+        with self.lock:
+            entry = self.steps[index]
+            entry["outputs"][stream].append(text)
+            self.dirty = True
+            self._notify(("output", index, stream, entry["attempt"], text))
+
+    def state(self):
+        with self.lock:
+            return self._state()
+
+    def header(self):
+        """Run-level fields of the state, without the steps."""
+        with self.lock:
+            return self._header(time.time())
+
+    def step_state(self, index, tails=True):
+        """State of step `index` (0-based); without `tails` the outputs only carry their sizes."""
+        with self.lock:
+            return self._step_state(index, time.time(), tails)
+
+    def _header(self, now):
+        ends = [entry["ended_at"] or now for entry in self.steps if entry["started_at"] is not None]
+        elapsed = (now if not self.finished else max(ends, default=self.t0)) - self.t0
+        return {"title": self.title, "install_type": self.install_type, "started": self.started, "updated": _now(),
+                "elapsed": elapsed, "finished": self.finished, "labels": self.labels,
+                "trend": self.trend}
+
+    def _step_state(self, index, now, tails=True):
+        entry = self.steps[index]
+        started, ended = entry["started_at"], entry["ended_at"]
+        outputs = {stream: output.state() for stream, output in entry["outputs"].items()}
+        if not tails:
+            for output in outputs.values():
+                del output["head"], output["tail"]
+        return {
+            "index": index + 1,
+            **{k: entry["step"].get(k, "") for k in ("id", "name", "description", "command")},
+            "status": entry["status"],
+            "attempt": entry["attempt"],
+            "needs": list(entry["step"].get("needs", ())),
+            "resources": list(entry["step"].get("resources", ())),
+            "returncode": entry["returncode"],
+            "cached": entry.get("cached", False),
+            "telemetry": entry.get("telemetry"),
+            "log": os.path.basename(entry["spill"]) if os.path.exists(entry["spill"]) else None,
+            "offset": None if started is None else started - self.t0,
+            "duration": None if started is None else (ended or now) - started,
+            **outputs,
+        }
+
+    def _state(self):
+        now = time.time()
+        return {**self._header(now), "steps": [self._step_state(index, now) for index in range(len(self.steps))]}
+
+    def flush(self, force=False):
+        """Flush the logs and rewrite the state files if anything changed."""
+        with self.lock:
+            running = any(entry["status"] == "RUNNING" for entry in self.steps)
+            if not (self.dirty or force or running):
+                return False
+            for entry in self.steps:
+                for output in entry["outputs"].values():
+                    output.flush()
+            state = json.dumps(self._state())
+            self.dirty = False
+        base = os.path.join(self.files_dir, STATE_NAME)
+        _atomic_write(f"{base}.json", state)
+        _atomic_write(f"{base}.js", f"window.RUN_STATE = {state};\n")
+        return True
+
+    def close(self, finished=True):
+        """Stop the background flusher and write the final state."""
+        self.stop.set()
+        if self.flusher:
+            self.flusher.join()
+        with self.lock:
+            self.finished = finished
+            for entry in self.steps:
+                for output in entry["outputs"].values():
+                    output.close()
+            self._notify(("finished",))
+        self.flush(force=True)
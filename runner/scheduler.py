@@ -0,0 +1,171 @@
+"""Dependency-aware scheduling of runner steps.
+
+A step may declare the ids of the steps it `needs` and the `resources` it
+holds while running, free-form tags such as "port:3306" or "compose:galera".
+Steps run as soon as their dependencies are done, up to `workers` at once, and
+two steps sharing a resource tag never overlap. When several steps are ready
+the one listed first wins, so a single worker runs the plan in list order.
+
+A step whose dependency failed is blocked (not run) unless `keep_going` is
+set; a dependency skipped on purpose (interactive mode) counts as done. A
+step marked `always` (e.g. a teardown) runs once its dependencies are over,
+whatever their result.
+"""
+import threading
+
+DONE = ("SUCCESS", "SKIPPED")
+
+
+def validate(steps):
+    """Raise ValueError on duplicate ids, unknown dependencies or cycles."""
+    ids = [step["id"] for step in steps]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate step ids in plan: {ids}")
+    for step in steps:
+        unknown = set(step.get("needs", ())) - set(ids)
+        if unknown:
+            raise ValueError(f"Step {step['id']!r} needs unknown step(s): {', '.join(sorted(unknown))}")
+    order = topological_order(steps)
+    if len(order) != len(steps):
+        stuck = sorted(set(ids) - {steps[i]["id"] for i in order})
+        raise ValueError(f"Dependency cycle between steps: {', '.join(stuck)}")
+
+
+def topological_order(steps):
+    """Indexes of `steps` in dependency order, list order first (cycles are left out)."""
+    position = {step["id"]: index for index, step in enumerate(steps)}
+    placed, order = set(), []
+    progress = True
+    while progress:
+        progress = False
+        for index, step in enumerate(steps):
+            if index not in placed and all(position[need] in placed for need in step.get("needs", ())
+                                           if need in position):
+                placed.add(index)
+                order.append(index)
+                progress = True
+                break
+    return order
+
+
+class Scheduler:
+    """Run `run_step(index, step) -> status` over a plan, honouring needs and resources.
+
+    `on_skip(index, step, reason)` is called for steps skipped because a
+    dependency failed. With one worker, steps run in the calling thread.
+    """
+
+    def __init__(self, steps, run_step, workers=1, on_skip=None, keep_going=False):
+        validate(steps)
+        self.keep_going = keep_going
+        self.steps = steps
+        self.run_step = run_step
+        self.workers = max(1, workers)
+        self.on_skip = on_skip
+        self.position = {step["id"]: index for index, step in enumerate(steps)}
+        self.statuses = [None] * len(steps)
+        self.running = set()
+        self.held = set()
+        self.error = None
+        self.cond = threading.Condition()
+
+    def _needs(self, index):
+        return [self.position[need] for need in self.steps[index].get("needs", ())]
+
+    def _resources(self, index):
+        return set(self.steps[index].get("resources", ()))
+
+    def _done(self, status):
+        return status in DONE or self.keep_going and status is not None
+
+    def _skip_blocked(self):
+        """Block pending steps whose dependencies failed or were blocked themselves."""
+        if self.keep_going:
+            return
+        changed = True
+        while changed:
+            changed = False
+            for index in range(len(self.steps)):
+                if self.statuses[index] is not None or index in self.running or self.steps[index].get("always"):
+                    continue
+                failed = [self.steps[n]["id"] for n in self._needs(index) if self.statuses[n] not in (None, *DONE)]
+                if failed:
+                    self.statuses[index] = "BLOCKED"
+                    changed = True
+                    if self.on_skip:
+                        self.on_skip(index, self.steps[index], f"dependency failed: {', '.join(failed)}")
+
+    def _ready(self):
+        ready, held = [], set(self.held)
+        for index in range(len(self.steps)):
+            if self.statuses[index] is not None or index in self.running:
+                continue
+            done = (lambda status: status is not None) if self.steps[index].get("always") else self._done
+            if not all(done(self.statuses[n]) for n in self._needs(index)):
+                continue
+            resources = self._resources(index)
+            if resources & held:
+                continue
+            ready.append(index)
+            held |= resources
+        return ready
+
+    def _start(self, index):
+        self.running.add(index)
+        self.held |= self._resources(index)
+
+    def _finish(self, index, status):
+        self.running.discard(index)
+        self.held -= self._resources(index)
+        self.statuses[index] = status
+
+    def _worker(self, index):
+        status = "FAILED"
+        try:
+            status = self.run_step(index, self.steps[index])
+        except BaseException as e:
+            with self.cond:
+                self.error = self.error or e
+        finally:
+            with self.cond:
+                self._finish(index, status)
+                self.cond.notify_all()
+
+    def _run_inline(self, index):
+        # Called with the condition held; prompts and exits of run_step behave as in a plain loop
+        status = "FAILED"
+        self._start(index)
+        self.cond.release()
+        try:
+            status = self.run_step(index, self.steps[index])
+        finally:
+            self.cond.acquire()
+            self._finish(index, status)
+
+    def run(self):
+        """Run the plan to completion and return the final status of each step.
+
+        Steps skipped because of a failed dependency end as "BLOCKED". An
+        exception raised by `run_step` stops scheduling and is re-raised once
+        the running steps are over.
+        """
+        with self.cond:
+            while True:
+                if self.error is None:
+                    self._skip_blocked()
+                    ready = self._ready()[:self.workers - len(self.running)]
+                else:
+                    ready = []
+                if not ready and not self.running:
+                    break
+                if not ready:
+                    self.cond.wait()
+                elif self.workers == 1:
+                    self._run_inline(ready[0])
+                else:
+                    for index in ready:
+                        self._start(index)
+                        threading.Thread(target=self._worker, args=(index,), daemon=True).start()
+        if self.error is not None:
+            raise self.error
+        return list(self.statuses)
@@ -0,0 +1,234 @@
+"""Resource telemetry of runner steps.
+
+A `Monitor` samples the host (/proc/stat, /proc/meminfo, /proc/diskstats,
+/proc/net/dev) every `interval` seconds and the running containers (`docker
+stats`, in its own thread since each call takes about a second) for the whole
+run. `step_summary` turns the samples taken while a step ran into its
+figures: wall time, CPU seconds and peak RSS of the step's own processes (from
+the rusage of the command), host CPU and memory, disk and network bytes, and
+container CPU seconds, memory, block I/O and network bytes, with short series
+for sparklines.
+
+Host figures cover the whole machine: steps running in parallel share them.
+"""
+import collections
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+INTERVAL = 1.0
+SERIES_POINTS = 60
+MAX_SAMPLES = 100000
+SECTOR = 512
+
+# Interfaces carrying container traffic, already counted per container by docker stats
+_VIRTUAL_NET = ("lo", "veth", "docker", "br-")
+# Block devices stacked on other ones or not backed by a disk
+_VIRTUAL_DISK = ("loop", "ram", "zram", "dm-", "sr")
+_SIZE_RE = re.compile(r"^\s*([\d.]+)\s*([kKMGTP]?i?B)\s*$")
+_UNITS = {"B": 1, "kB": 1e3, "KB": 1e3, "MB": 1e6, "GB": 1e9, "TB": 1e12, "PB": 1e15,
+          "KiB": 1 << 10, "MiB": 1 << 20, "GiB": 1 << 30, "TiB": 1 << 40, "PiB": 1 << 50}
+
+
+def parse_docker_size(text):
+    """Bytes of a docker stats size ("648B", "1.2kB", "10.5MiB"); 0 when unparsable."""
+    match = _SIZE_RE.match(text or "")
+    if not match or match.group(2) not in _UNITS:
+        return 0
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def _pair(text):
+    first, _, second = (text or "").partition("/")
+    return parse_docker_size(first), parse_docker_size(second)
+
+
+def parse_docker_stats(output):
+    """{container name: {cpu_pct, mem, net_rx, net_tx, blk_read, blk_write}} from `docker stats --format '{{json .}}'`."""
+    containers = {}
+    for line in output.splitlines():
+        try:
+            row = json.loads(line)
+        except ValueError:
+            continue
+        net_rx, net_tx = _pair(row.get("NetIO"))
+        blk_read, blk_write = _pair(row.get("BlockIO"))
+        try:
+            cpu_pct = float(row.get("CPUPerc", "0").rstrip("%") or 0)
+        except ValueError:
+            cpu_pct = 0.0
+        containers[row.get("Name") or row.get("ID")] = {
+            "cpu_pct": cpu_pct, "mem": _pair(row.get("MemUsage"))[0],
+            "net_rx": net_rx, "net_tx": net_tx, "blk_read": blk_read, "blk_write": blk_write,
+        }
+    return containers
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def read_host(proc="/proc"):
+    """Cumulative host counters, or None without /proc."""
+    stat = _read(f"{proc}/stat")
+    if stat is None:
+        return None
+    cpu = [int(v) for v in stat.splitlines()[0].split()[1:]]
+    # idle + iowait are not busy time
+    sample = {"cpu_total": sum(cpu[:8]), "cpu_idle": cpu[3] + (cpu[4] if len(cpu) > 4 else 0)}
+    meminfo = {}
+    for line in (_read(f"{proc}/meminfo") or "").splitlines():
+        key, _, value = line.partition(":")
+        meminfo[key] = int(value.split()[0]) * 1024 if value.split() else 0
+    sample["mem_used"] = meminfo.get("MemTotal", 0) - meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+    sample["disk_read"] = sample["disk_write"] = 0
+    for line in (_read(f"{proc}/diskstats") or "").splitlines():
+        fields = line.split()
+        if len(fields) < 10 or fields[2].startswith(_VIRTUAL_DISK) or not os.path.exists(f"/sys/block/{fields[2]}"):
+            continue
+        sample["disk_read"] += int(fields[5]) * SECTOR
+        sample["disk_write"] += int(fields[9]) * SECTOR
+    sample["net_rx"] = sample["net_tx"] = 0
+    for line in (_read(f"{proc}/net/dev") or "").splitlines()[2:]:
+        name, _, counters = line.partition(":")
+        if name.strip().startswith(_VIRTUAL_NET):
+            continue
+        counters = counters.split()
+        sample["net_rx"] += int(counters[0])
+        sample["net_tx"] += int(counters[8])
+    return sample
+
+
+def read_docker(timeout=10):
+    """Stats of the running containers, or None when docker is not usable."""
+    if not shutil.which("docker"):
+        return None
+    try:
+        result = subprocess.run(["docker", "stats", "--no-stream", "--format", "{{json .}}"],
+                                capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return parse_docker_stats(result.stdout)
+
+
+def _downsample(values, points=SERIES_POINTS):
+    if len(values) <= points:
+        return [round(v, 2) for v in values]
+    step = len(values) / points
+    return [round(max(values[int(i * step):int((i + 1) * step)] or [0]), 2) for i in range(points)]
+
+
+class Monitor:
+    """Sample host and container statistics in background threads for the whole run."""
+
+    def __init__(self, interval=INTERVAL, docker=True, host_reader=read_host, docker_reader=read_docker):
+        self.interval = interval
+        self.docker = docker
+        self.host_reader = host_reader
+        self.docker_reader = docker_reader
+        self.host = collections.deque(maxlen=MAX_SAMPLES)
+        self.containers = collections.deque(maxlen=MAX_SAMPLES)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def start(self):
+        self.sample_host()
+        self.threads = [threading.Thread(target=self._loop, args=(self.sample_host,), daemon=True)]
+        if self.docker:
+            self.threads.append(threading.Thread(target=self._loop, args=(self.sample_docker,), daemon=True))
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=15)
+        self.sample_host()
+
+    def _loop(self, sample):
+        while not self.stop_event.wait(self.interval):
+            sample()
+
+    def sample_host(self):
+        sample = self.host_reader()
+        if sample is not None:
+            with self.lock:
+                self.host.append((time.time(), sample))
+
+    def sample_docker(self):
+        sample = self.docker_reader()
+        if sample is None:
+            return
+        with self.lock:
+            self.containers.append((time.time(), sample))
+
+    def _window(self, samples, started, ended):
+        with self.lock:
+            inside = [s for s in samples if started <= s[0] <= ended]
+            before = [s for s in samples if s[0] < started]
+            after = [s for s in samples if s[0] > ended]
+        # Cumulative counters are read between the samples bracketing the step
+        return before[-1:] + inside + after[:1]
+
+    def step_summary(self, started, ended, rusage=None):
+        """Figures of a step which ran from `started` to `ended` (epoch seconds)."""
+        if time.time() - ended < self.interval:
+            # Close the window with fresh counters rather than the previous tick
+            self.sample_host()
+        summary = {"wall": ended - started, "cpu_seconds": None, "max_rss": None, "host": None, "docker": None,
+                   "series": {}}
+        if rusage:
+            summary["cpu_seconds"] = rusage["cpu_seconds"]
+            summary["max_rss"] = rusage["max_rss"]
+        host = self._window(self.host, started, ended)
+        if len(host) >= 2:
+            first, last = host[0][1], host[-1][1]
+            cpu_series = []
+            for (_, a), (_, b) in zip(host, host[1:]):
+                total = b["cpu_total"] - a["cpu_total"]
+                cpu_series.append(100.0 * (total - (b["cpu_idle"] - a["cpu_idle"])) / total if total > 0 else 0.0)
+            total = last["cpu_total"] - first["cpu_total"]
+            summary["host"] = {
+                "cpu_pct": 100.0 * (total - (last["cpu_idle"] - first["cpu_idle"])) / total if total > 0 else 0.0,
+                "mem_peak": max(sample["mem_used"] for _, sample in host[1:]),
+                **{key: max(0, last[key] - first[key]) for key in ("disk_read", "disk_write", "net_rx", "net_tx")},
+            }
+            summary["series"]["host_cpu"] = _downsample(cpu_series)
+            summary["series"]["host_mem"] = _downsample([sample["mem_used"] / (1 << 20) for _, sample in host[1:]])
+        containers = self._window(self.containers, started, ended)
+        if containers:
+            summary["docker"] = self._docker_summary(containers)
+            summary["series"]["docker_cpu"] = _downsample([sum(c["cpu_pct"] for c in sample.values())
+                                                           for _, sample in containers])
+            summary["series"]["docker_mem"] = _downsample([sum(c["mem"] for c in sample.values()) / (1 << 20)
+                                                           for _, sample in containers])
+        return summary
+
+    @staticmethod
+    def _docker_summary(samples):
+        cpu_seconds = 0.0
+        for (t0, _), (t1, sample) in zip(samples, samples[1:]):
+            cpu_seconds += sum(c["cpu_pct"] for c in sample.values()) / 100.0 * (t1 - t0)
+        totals = {key: 0 for key in ("blk_read", "blk_write", "net_rx", "net_tx")}
+        first = samples[0][1]
+        names = set().union(*(sample.keys() for _, sample in samples))
+        for name in names:
+            seen = [sample[name] for _, sample in samples if name in sample]
+            # Containers created during the step start their counters at zero
+            base = first.get(name, {key: 0 for key in totals}) if len(samples) > 1 else seen[0]
+            for key in totals:
+                totals[key] += max(0, seen[-1][key] - base[key])
+        return {"containers": len(names), "cpu_seconds": cpu_seconds,
+                "mem_peak": max(sum(c["mem"] for c in sample.values()) for _, sample in samples), **totals}
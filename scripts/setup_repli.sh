@@ -7,12 +7,14 @@ if [ -f .env ]; then
     export "$(grep -v '^#' .env | xargs)"
 fi
 
-MASTER_IP="10.5.0.11"
-MASTER_PORT=3411
-SLAVE1_PORT=3412
-SLAVE2_PORT=3413
+# Overridable to configure an isolated copy of the cluster (see runner/plans.py)
+MASTER_IP="${MASTER_IP:-10.5.0.11}"
+MASTER_PORT="${MASTER_PORT:-3411}"
+SLAVE1_PORT="${SLAVE1_PORT:-3412}"
+SLAVE2_PORT="${SLAVE2_PORT:-3413}"
 USER="root"
 DB_PASS="${DB_ROOT_PASSWORD:-rootpass}"
+PASS="${PASS:-$DB_PASS}"
 REPLI_USER="${REPLI_USER:-repli_user}"
 REPLI_PASS="${REPLI_PASS:-replipass}"
 
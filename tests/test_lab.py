@@ -136,6 +136,15 @@ class TestDatabaseLab(unittest.TestCase):
             self.assertTrue(val >= 10000, f"Long history size too low: {val}")
             print(f"✅ performance_schema_events_transactions_history_long_size is {val}")
 
+        # Statement history used by the workload capture
+        res = self.run_mysql_query("SHOW VARIABLES LIKE 'performance_schema_events_statements_history_long_size'")
+        self.assertEqual(res.returncode, 0)
+        parts = res.stdout.strip().split()
+        if len(parts) >= 2:
+            val = int(parts[1])
+            self.assertTrue(val >= 50000, f"Statement history size too low: {val}")
+            print(f"✅ performance_schema_events_statements_history_long_size is {val}")
+
     def test_performance_schema_consumers(self):
         """Verify Performance Schema consumers (MySQL only)."""
         if self.run_mysql_query("SELECT 1").returncode != 0:
@@ -151,5 +160,10 @@ class TestDatabaseLab(unittest.TestCase):
         self.assertIn("YES", res.stdout)
         print("✅ Consumer events_transactions_history_long is enabled")
 
+        res = self.run_mysql_query("SELECT enabled FROM performance_schema.setup_consumers WHERE NAME = 'events_statements_history_long'")
+        self.assertEqual(res.returncode, 0)
+        self.assertIn("YES", res.stdout)
+        print("✅ Consumer events_statements_history_long is enabled")
+
 if __name__ == '__main__':
     unittest.main()
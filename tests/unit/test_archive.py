@@ -0,0 +1,78 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from runner.archive import LogArchive, check_compression, copy_log, log_name, main, open_log, read_tail
+
+
+class TestLogFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_appends_to_a_compressed_log_are_read_back(self):
+        path = self.path(log_name("step.log", "gzip"))
+        self.assertTrue(path.endswith(".log.gz"))
+        for text in ("first\n", "second\n"):
+            with open_log(path, "at") as f:
+                f.write(text)
+        with open_log(path) as f:
+            self.assertEqual(f.read(), "first\nsecond\n")
+        self.assertEqual(read_tail(path, 7), "second\n")
+        plain = self.path("step.log")
+        copy_log(path, plain)
+        with open(plain) as f:
+            self.assertEqual(f.read(), "first\nsecond\n")
+        self.assertEqual(read_tail(plain, 7), "second\n")
+        copy_log(plain, self.path("copy.log.gz"))
+        with gzip.open(self.path("copy.log.gz"), "rt") as f:
+            self.assertEqual(f.read(), "first\nsecond\n")
+        self.assertEqual(read_tail(self.path("missing.log"), 10), "")
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            check_compression("bzip2")
+        check_compression("gzip")
+
+
+class TestLogArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = LogArchive(os.path.join(self.tmp.name, "archive"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def add_run(self, *lines):
+        path = os.path.join(self.tmp.name, "01-inject.stderr.log.gz")
+        with open_log(path, "wt") as f:
+            f.write("".join(f"{line}\n" for line in lines))
+        return self.archive.add([{"step": "inject", "name": "Inject", "stream": "stderr", "path": path},
+                                 {"step": "inject", "stream": "stdout", "path": os.path.join(self.tmp.name, "none")}])
+
+    def test_search_and_eviction(self):
+        first = self.add_run("loading employees", "ERROR 1062 (23000): Duplicate entry '10001'")
+        second = self.add_run("ERROR 2013: Lost connection", "Duplicate entry again")
+        rows = self.archive.search("Duplicate entry")
+        self.assertEqual([(r["run"], r["line"]) for r in rows], [(second, 2), (first, 2)])
+        self.assertEqual(rows[1]["text"], "ERROR 1062 (23000): Duplicate entry '10001'")
+        self.assertTrue(os.path.exists(rows[0]["path"]))
+        self.assertEqual(len(self.archive.search("ERROR", run_id=first, stream="stderr")), 1)
+        self.assertEqual(self.archive.search("ERROR", stream="stdout"), [])
+        self.assertEqual(len(self.archive.search("Lost OR loading", raw=True)), 2)
+        self.assertEqual(self.archive.evict(keep=1), 1)
+        self.assertEqual([r["run"] for r in self.archive.search("Duplicate entry")], [second])
+        self.assertEqual([r["id"] for r in self.archive.runs()], [second])
+        self.assertEqual(main(["--dir", self.archive.path, "search", "nothing like this"]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+
+from runner.cache import StepCache, input_files, step_key
+
+STEP = {"id": "config", "command": "make test-config", "inputs": ["conf/**", "ssl/**", "Dockerfile"]}
+
+
+class TestStepCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("conf/custom.cnf", "[mysqld]\n")
+        self.write("Dockerfile", "FROM mariadb\n")
+        self.cache = StepCache(os.path.join(self.root, ".runner-cache"), root=self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_key_follows_inputs(self):
+        key = step_key(STEP, self.root)
+        self.assertEqual(step_key(STEP, self.root), key)
+        self.assertIsNone(step_key({"id": "start", "command": "make up"}, self.root))
+        self.assertNotEqual(step_key({**STEP, "command": "make other"}, self.root), key)
+        self.write("ssl/ca.pem", "cert")
+        with_ssl = step_key(STEP, self.root)
+        self.assertNotEqual(with_ssl, key)
+        self.write("conf/custom.cnf", "[mysqld]\nmax_connections = 10\n")
+        self.assertNotEqual(step_key(STEP, self.root), with_ssl)
+        self.assertEqual(input_files(STEP["inputs"], self.root), ["Dockerfile", "conf/custom.cnf", "ssl/ca.pem"])
+
+    def test_store_and_replay(self):
+        key = self.cache.key(STEP)
+        self.assertIsNone(self.cache.lookup(key))
+        stdout = self.write("logs/out.log", "all good\n")
+        meta = self.cache.store(key, STEP, {"stdout": stdout, "stderr": os.path.join(self.root, "missing")}, 1.5)
+        self.assertEqual(meta["files"], ["stdout"])
+        hit = self.cache.lookup(key)
+        with open(hit["files"]["stdout"]) as f:
+            self.assertEqual(f.read(), "all good\n")
+        self.assertEqual((hit["meta"]["hits"], hit["meta"]["duration"]), (1, 1.5))
+        self.write("Dockerfile", "FROM mysql\n")
+        self.assertIsNone(self.cache.lookup(self.cache.key(STEP)))
+
+    def test_eviction_by_age_and_size(self):
+        stdout = self.write("logs/out.log", "x" * 4096)
+        for n in range(3):
+            self.cache.store(f"key{n}", {**STEP, "id": f"step{n}"}, {"stdout": stdout})
+            time.sleep(0.01)
+        self.cache.lookup("key0")  # Most recently used now
+        self.cache.max_bytes = 2 * 4096 + 2048
+        self.assertEqual(self.cache.evict(), ["key1"])
+        self.cache.max_age = 0
+        time.sleep(0.01)
+        self.assertEqual(sorted(self.cache.evict()), ["key0", "key2"])
+        self.assertEqual(self.cache.entries(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import io
+import sys
+import unittest
+
+from runner.capture import TailBuffer, run
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+class TestTailBuffer(unittest.TestCase):
+
+    def test_keeps_last_characters(self):
+        tail = TailBuffer(10)
+        for chunk in ("abc", "defg", "hijkl", "mn"):
+            tail.append(chunk)
+        self.assertEqual(tail.getvalue(), "efghijklmn")
+        self.assertTrue(tail.truncated)
+        self.assertLessEqual(sum(len(c) for c in tail.chunks), 10 + 5)
+
+    def test_large_chunk_replaces_content(self):
+        tail = TailBuffer(4)
+        tail.append("ab")
+        tail.append("0123456789")
+        self.assertEqual(tail.getvalue(), "6789")
+        self.assertEqual(tail.total, 12)
+
+
+class TestRun(unittest.TestCase):
+
+    def test_heavy_stderr_does_not_block(self):
+        # 4 MB on stderr before any stdout would fill a pipe read only after exit
+        code = "import sys; sys.stderr.write('e' * (4 << 20)); sys.stderr.flush(); print('done')"
+        seen = []
+        result = run(python(code), on_output=lambda stream, text: seen.append(stream), shell=False, tail_bytes=1024)
+        self.assertEqual(result["returncode"], 0)
+        self.assertEqual(result["bytes"], {"stdout": 5, "stderr": 4 << 20})
+        self.assertTrue(result["tail"].endswith("done\n"))
+        self.assertLessEqual(len(result["tail"]), 1024)
+        self.assertEqual(seen[-1], "stdout")
+
+    def test_interleaved_order_and_spill(self):
+        code = ("import sys, time\n"
+                "for n in range(3):\n"
+                "    sys.stdout.write(f'out{n}\\n'); sys.stdout.flush(); time.sleep(0.05)\n"
+                "    sys.stderr.write(f'err{n}\\n'); sys.stderr.flush(); time.sleep(0.05)\n"
+                "sys.exit(3)\n")
+        spill, chunks = io.BytesIO(), []
+        result = run(python(code), on_output=lambda stream, text: chunks.append(text), spill=spill, shell=False)
+        self.assertEqual(result["returncode"], 3)
+        expected = "out0\nerr0\nout1\nerr1\nout2\nerr2\n"
+        self.assertEqual("".join(chunks), expected)
+        self.assertEqual(spill.getvalue().decode(), expected)
+        self.assertFalse(result["truncated"])
+
+    def test_split_utf8_is_decoded(self):
+        code = ("import sys, time\n"
+                "data = 'é'.encode()\n"
+                "sys.stdout.buffer.write(data[:1]); sys.stdout.flush(); time.sleep(0.05)\n"
+                "sys.stdout.buffer.write(data[1:]); sys.stdout.flush()\n")
+        self.assertEqual(run(python(code), shell=False)["tail"], "é")
+
+
+if __name__ == '__main__':
+    unittest.main()
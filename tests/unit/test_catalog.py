@@ -0,0 +1,41 @@
+import unittest
+
+from runner.catalog import TOPOLOGIES, VERSIONS, builtin_steps
+from runner.scheduler import validate
+
+
+class TestCatalog(unittest.TestCase):
+
+    def test_builtin_plans_are_valid(self):
+        for topology in TOPOLOGIES:
+            for lang in ("en", "fr"):
+                label, steps = builtin_steps(topology, lang)
+                self.assertTrue(label)
+                validate(steps)
+                self.assertTrue(all(s["name"] and s["description"] for s in steps))
+
+    def test_cluster_plans_leave_prerequisites_to_make(self):
+        for topology in ("galera", "repli"):
+            commands = [s["command"] for s in builtin_steps(topology)[1]]
+            self.assertNotIn("make gen-ssl", commands)
+            self.assertNotIn("make build-image", commands)
+
+    def test_standalone_targets(self):
+        label, steps = builtin_steps("standalone", system="PostgreSQL", version="17")
+        self.assertIn("PostgreSQL 17", label)
+        commands = {s["id"]: s["command"] for s in steps}
+        self.assertEqual(commands["start"], "make postgres17")
+        self.assertEqual(commands["inject"], "make inject-data service=postgres17 db=employees")
+        self.assertEqual(builtin_steps("standalone", system="MySQL", version="8.4")[1][1]["command"], "make mysql84")
+        self.assertIn("10.6", VERSIONS["MariaDB"])
+        self.assertNotIn("inputs", {s["id"]: s for s in steps}["verify"])  # never replayed from the cache
+
+    def test_unknown_topology_or_version(self):
+        with self.assertRaises(ValueError):
+            builtin_steps("ndb")
+        with self.assertRaises(ValueError):
+            builtin_steps("standalone", system="MySQL", version="11.4")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import http.client
+import json
+import os
+import queue
+import tempfile
+import unittest
+
+from runner.dashboard import Dashboard, collect
+from runner.report import ReportWriter
+
+STEPS = [
+    {"id": "config", "name": "Test Configuration", "description": "", "command": "make test-config"},
+    {"id": "start", "name": "Start", "description": "", "command": "make mysql84"},
+]
+
+
+def read_event(response):
+    name, data = None, None
+    while True:
+        line = response.fp.readline().decode().rstrip("\n")
+        if line.startswith("event: "):
+            name = line[7:]
+        elif line.startswith("data: "):
+            data = json.loads(line[6:])
+        elif not line and name:
+            return name, data
+
+
+class TestCollect(unittest.TestCase):
+
+    def test_merges_consecutive_output(self):
+        subscriber = queue.Queue()
+        for event in [("output", 0, "stdout", 1, "b\n"), ("output", 0, "stderr", 1, "e\n"), ("step", 1),
+                      ("output", 0, "stderr", 1, "f\n"), ("finished",)]:
+            subscriber.put(event)
+        steps, output, finished = collect(subscriber, ("output", 0, "stdout", 1, "a\n"), batch_interval=1)
+        self.assertEqual(steps, [1])
+        self.assertEqual(output, [[1, "stdout", 1, "a\nb\n"], [1, "stderr", 1, "e\nf\n"]])
+        self.assertTrue(finished)
+
+
+class TestDashboard(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.writer = ReportWriter(os.path.join(self.tmp.name, "run_report.html"), STEPS, flush_interval=60)
+        self.writer.start()
+        self.dashboard = Dashboard(self.writer, port=0, batch_interval=0.05).start()
+        self.port = self.dashboard.server.server_address[1]
+
+    def tearDown(self):
+        self.writer.close()
+        self.dashboard.stop()
+        self.tmp.cleanup()
+
+    def get(self, path):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        connection.request("GET", path)
+        return connection.getresponse()
+
+    def test_page_and_files(self):
+        page = self.get("/").read().decode()
+        self.assertIn("const EVENTS_SRC = 'events';", page)
+        self.writer.set_status(0, "RUNNING")
+        self.writer.append(0, "stdout", "hello\n")
+        self.writer.log_paths(0)
+        self.assertEqual(self.get("/files/01-config.stdout.log").read(), b"hello\n")
+        self.assertEqual(self.get("/files/../run_report.html").status, 404)
+
+    def test_snapshot_then_deltas(self):
+        response = self.get("/events")
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        name, snapshot = read_event(response)
+        self.assertEqual((name, [s["status"] for s in snapshot["steps"]]), ("snapshot", ["PENDING", "PENDING"]))
+        self.writer.set_status(0, "RUNNING")
+        self.writer.append(0, "stdout", "line 1\n")
+        self.writer.append(0, "stdout", "line 2\n")
+        deltas = []
+        while not any(d["output"] for d in deltas):
+            name, delta = read_event(response)
+            deltas.append(delta)
+        step = deltas[0]["steps"][0]
+        self.assertEqual((step["index"], step["status"], step["attempt"]), (1, "RUNNING", 1))
+        self.assertNotIn("tail", step["stdout"])
+        self.assertEqual("".join(text for d in deltas for _, _, _, text in d["output"]), "line 1\nline 2\n")
+        self.writer.set_status(0, "SUCCESS", 0)
+        self.writer.close()
+        while not delta["header"]["finished"]:
+            name, delta = read_event(response)
+        self.assertEqual(response.fp.readline(), b"")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import io
+import json
+import threading
+import unittest
+
+from dblab import LABEL_PREFIX, MANAGED_LABEL
+from dblab.events import StateTable, Watcher
+from dblab.pool import POOL_ENV, POOL_LABEL
+
+CID = "a" * 64
+
+
+def event(action, **attributes):
+    return {"Type": "container", "Action": action, "time": 1,
+            "Actor": {"ID": CID, "Attributes": {"name": "m84", "image": "mysql:8.4", **attributes}}}
+
+
+class FakeAPI:
+
+    def __init__(self, entries=(), host_port="20001"):
+        self.entries = list(entries)
+        self.host_port = host_port
+        self.filters = None
+
+    def containers(self, all=False, filters=None):
+        self.filters = filters
+        return self.entries
+
+    def inspect_container(self, container_id):
+        return {"NetworkSettings": {"Ports": {"3306/tcp": [{"HostIp": "0.0.0.0", "HostPort": self.host_port}]}}}
+
+
+class FakeProber:
+
+    def __init__(self, ready=True):
+        self.ready = ready
+        self.targets = []
+        self.called = threading.Event()
+
+    def __call__(self, target, timeout, stop_event):
+        self.targets.append(target)
+        self.called.set()
+        return {"ready": self.ready, "elapsed": 0.25, "detail": "handshake 8.4.0"}
+
+
+class TestStateTable(unittest.TestCase):
+
+    def test_lifecycle(self):
+        table = StateTable()
+        self.assertEqual(table.apply(event("create", **{f"{LABEL_PREFIX}.env": "m84"}))[1]["status"], "created")
+        self.assertEqual(table.rows[CID]["env"], "m84")
+        self.assertEqual(table.apply(event("start"))[1]["status"], "running")
+        self.assertEqual(table.apply(event("health_status: healthy"))[1]["health"], "healthy")
+        action, row = table.apply(event("die", exitCode="137"))
+        self.assertEqual((action, row["status"], row["exit_code"], row["ready"]), ("die", "exited", 137, False))
+        self.assertEqual(table.apply(event("rename", name="m84b"))[1]["name"], "m84b")
+        self.assertEqual(table.apply(event("destroy"))[1]["status"], "removed")
+        self.assertEqual(table.rows, {})
+
+    def test_claimed_pool_member_takes_its_name_as_env(self):
+        table = StateTable()
+        labels = {f"{LABEL_PREFIX}.env": POOL_ENV, POOL_LABEL: "mysql:8.4"}
+        table.seed([{"Id": CID, "Names": ["/pool-mysql-8.4-abc123"], "Image": "mysql:8.4", "State": "exited",
+                     "Labels": labels}])
+        self.assertIsNone(table.rows[CID]["env"])
+        self.assertEqual(table.apply(event("rename", name="app1", **labels))[1]["env"], "app1")
+        self.assertEqual(StateTable().seed([{"Id": CID, "Names": ["/app1"], "Image": "mysql:8.4",
+                                             "State": "exited", "Labels": labels}])[0]["env"], "app1")
+
+    def test_noise_is_ignored(self):
+        table = StateTable()
+        self.assertIsNone(table.apply(event("exec_start: mysql -e SELECT 1")))
+        self.assertIsNone(table.apply(event("attach")))
+        self.assertEqual(table.rows, {})
+
+    def test_seed_reads_published_port(self):
+        table = StateTable()
+        rows = table.seed([{"Id": CID, "Names": ["/m84"], "Image": "mysql:8.4", "State": "running",
+                            "Labels": {f"{LABEL_PREFIX}.env": "m84"},
+                            "Ports": [{"PrivatePort": 3306, "PublicPort": 20005, "Type": "tcp"}]}])
+        self.assertEqual((rows[0]["name"], rows[0]["kind"], rows[0]["port"]), ("m84", "mysql", 20005))
+
+
+class TestWatcher(unittest.TestCase):
+
+    def lines(self, out):
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_start_is_joined_with_readiness_probe(self):
+        out, prober = io.StringIO(), FakeProber()
+        watcher = Watcher(FakeAPI(), out=out, prober=prober)
+        watcher.handle(event("start"))
+        self.assertTrue(prober.called.wait(5))
+        for thread in watcher.threads:
+            thread.join(5)
+        records = self.lines(out)
+        self.assertEqual([r["event"] for r in records], ["start", "ready"])
+        self.assertEqual(prober.targets, ["mysql://127.0.0.1:20001"])
+        self.assertTrue(records[1]["ready"])
+        self.assertEqual(records[1]["elapsed"], 0.25)
+
+    def test_once_prints_state_filtered_on_managed_label(self):
+        out = io.StringIO()
+        api = FakeAPI([{"Id": CID, "Names": ["/m84"], "Image": "mysql:8.4", "State": "exited", "Labels": {}}])
+        Watcher(api, labels=["team=db"], out=out, prober=FakeProber()).run(once=True)
+        self.assertEqual(api.filters, {"label": [MANAGED_LABEL, "team=db"]})
+        self.assertEqual([(r["event"], r["name"], r["status"]) for r in self.lines(out)], [("state", "m84", "exited")])
+
+
+if __name__ == '__main__':
+    unittest.main()
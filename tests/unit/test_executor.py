@@ -0,0 +1,79 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from runner.archive import LogArchive
+from runner.executor import RunAborted, run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def step(step_id, command, needs=()):
+    return {"id": step_id, "name": step_id.title(), "description": step_id, "command": command,
+            "needs": list(needs)}
+
+
+class Prompt:
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+
+    def __call__(self, text):
+        return self.answers.pop(0)
+
+
+class TestRun(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.options = {"report_file": os.path.join(self.tmp.name, "report.html"), "cache": False,
+                        "telemetry": False, "dashboard": False, "history": None, "archive": None}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_quietly(self, steps, **options):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            return run(steps, "test", **dict(self.options, **options))
+
+    def test_automated_run_with_history(self):
+        steps = [step("one", "echo one"), step("two", "exit 3", ["one"]), step("three", "echo three", ["two"])]
+        history = os.path.join(self.tmp.name, "history.db")
+        archive = os.path.join(self.tmp.name, "logs")
+        result = self.run_quietly(steps, history=history, archive=archive)
+        self.assertEqual(result["statuses"], ["SUCCESS", "FAILED", "BLOCKED"])
+        self.assertEqual(result["run_id"], 1)
+        self.assertEqual([row["step"] for row in LogArchive(archive).search("one")], ["one"])
+        self.assertEqual([row["step"] for row in result["trend"]], ["one"])
+        self.assertTrue(os.path.exists(result["report"]))
+
+    def test_interactive_skip_retry_and_stop(self):
+        steps = [step("one", "echo one"), step("two", "exit 1")]
+        result = self.run_quietly(steps, interactive=True, prompt=Prompt("n", "y", "c"))
+        self.assertEqual(result["statuses"], ["SKIPPED", "FAILED"])
+        with self.assertRaises(RunAborted):
+            self.run_quietly(steps[1:], interactive=True, prompt=Prompt("y", "r", "y", "s"))
+
+
+class TestDryRun(unittest.TestCase):
+
+    def test_plan_is_printed_without_running(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ci.json")
+            with open(path, "w") as f:
+                f.write('{"entries": [{"topology": "standalone", "service": "mysql84"}]}')
+            output = subprocess.run([sys.executable, os.path.join(ROOT, "interactive_runner.py"), "--plan", path,
+                                     "--dry-run", "--json"], capture_output=True, text=True, cwd=tmp, check=True)
+            self.assertFalse(os.path.exists(os.path.join(tmp, ".runs")))
+        plan = json.loads(output.stdout)
+        self.assertEqual(plan["steps"][0]["id"], "ci-mysql84-1.render")
+        self.assertTrue(plan["steps"][-1]["always"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from runner.history import RunHistory, evaluate, parse_metrics, parse_thresholds, read_metrics
+
+SYSBENCH = """
+SQL statistics:
+    queries performed:
+        read:                            140000
+    transactions:                        10000  (166.58 per sec.)
+    queries:                             200000 (3331.60 per sec.)
+
+Latency (ms):
+         min:                                    2.10
+         avg:                                    6.00
+         max:                                   50.12
+         95th percentile:                        9.91
+"""
+
+
+def step(step_id="perf", status="SUCCESS", duration=10.0, cached=False, **metrics):
+    return {"id": step_id, "command": f"make {step_id}", "name": step_id.title(), "status": status,
+            "returncode": 0 if status == "SUCCESS" else 1, "duration": duration, "cached": cached,
+            "metrics": metrics}
+
+
+class TestParsing(unittest.TestCase):
+
+    def test_sysbench_summary(self):
+        self.assertEqual(parse_metrics("warm-up\n" + SYSBENCH.replace("166.58", "100.00") + SYSBENCH),
+                         {"tps": 166.58, "qps": 3331.6, "latency_avg_ms": 6.0, "latency_p95_ms": 9.91})
+        self.assertEqual(parse_metrics("no benchmark here"), {})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "perf.stdout.log")
+            with open(path, "w") as f:
+                f.write("x" * 1000 + SYSBENCH)
+            self.assertEqual(read_metrics(path, tail_bytes=len(SYSBENCH))["tps"], 166.58)
+            self.assertEqual(read_metrics(os.path.join(tmp, "missing")), {})
+
+    def test_thresholds_and_direction(self):
+        self.assertEqual(parse_thresholds(["tps=5", "duration=30"]), {"tps": 5.0, "duration": 30.0})
+        with self.assertRaises(ValueError):
+            parse_thresholds(["speed=5"])
+        self.assertEqual(evaluate("tps", 80.0, 100.0, 10), (-20.0, True))
+        self.assertEqual(evaluate("tps", 120.0, 100.0, 10), (20.0, False))
+        self.assertEqual(evaluate("latency_p95_ms", 12.0, 10.0, 15), (20.0, True))
+        self.assertEqual(evaluate("duration", 1.5, 1.0, 25), (50.0, False))  # Below the noise floor
+        self.assertEqual(evaluate("tps", 80.0, None, 10), (None, False))
+
+
+class TestRunHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history = RunHistory(os.path.join(self.tmp.name, "history.db"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rolling_baseline_flags_regressions(self):
+        for tps, duration in ((100, 60), (104, 61), (98, 59), (300, 10)):
+            self.history.record([step(duration=duration, tps=tps), step("config", duration=1.0)], "Galera")
+        last = self.history.record([step(duration=70, tps=85), step("config", duration=1.1)], "Galera")
+        rows = {(row["step"], row["metric"]): row for row in self.history.compare(window=3)}
+        tps = rows[("perf", "tps")]
+        self.assertEqual((tps["baseline"], tps["samples"], tps["regression"]), (104, 3, True))
+        self.assertEqual(tps["history"], [100, 104, 98, 300, 85])
+        self.assertEqual(rows[("perf", "duration")]["baseline"], 59)
+        self.assertFalse(rows[("perf", "duration")]["regression"])
+        self.assertTrue(self.history.compare(last, window=3, thresholds={"duration": 15})[0]["regression"])
+        self.assertFalse(rows[("config", "duration")]["regression"])
+        self.assertEqual(self.history.runs(1)[0]["install_type"], "Galera")
+
+    def test_failed_and_cached_steps_record_no_metrics(self):
+        self.history.record([step(tps=100)])
+        run = self.history.record([step(status="FAILED", tps=10), step("config", cached=True, duration=0.1)])
+        self.assertEqual(self.history.compare(run), [])
+        self.assertEqual(self.history.runs(1)[0]["status"], "FAILED")
+        self.assertEqual(self.history.series("perf", "make perf", "tps"), [100])
+        rows = self.history.compare(self.history.record([step(tps=50)]), min_samples=1)
+        self.assertEqual([(r["metric"], r["baseline"], r["regression"]) for r in rows],
+                         [("duration", 10.0, False), ("tps", 100.0, True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
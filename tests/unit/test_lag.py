@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+import unittest
+
+from bench.lag import LagError, align, gtid_behind, main, parse_gtid_pos, parse_gtid_set, sample_during
+from bench.loadgen import main as loadgen_main
+from test_loadgen import FakeMySQL
+
+
+class Cluster:
+    """Heartbeat writes received by the fake source, with their time."""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.writes = []
+
+    def applied(self, delay):
+        """Last heartbeat sequence number of a node applying `delay` seconds behind."""
+        seqs = [seq for at, seq in self.writes if at <= time.monotonic() - delay]
+        return seqs[-1] if seqs else 7  # the row left by an earlier run
+
+
+class FakeNode(FakeMySQL):
+    """MariaDB node of a replication or Galera cluster applying `delay` seconds behind the source."""
+
+    def __init__(self, cluster, replica=False, delay=0.0, galera=False):
+        super().__init__(version="10.11.8-MariaDB-log")
+        self.cluster, self.replica, self.delay_behind, self.galera = cluster, replica, delay, galera
+
+    def respond(self, sql):
+        cluster = self.cluster
+        seq = cluster.applied(self.delay_behind)
+        if sql == "SELECT @@GLOBAL.wsrep_on":
+            return self._resultset(["wsrep_on"], [("1" if self.galera else "0",)])
+        if sql in ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS"):
+            rows = [("Yes", str(int(self.delay_behind)))] if self.replica else []
+            return self._resultset(["Slave_SQL_Running", "Seconds_Behind_Master"], rows)
+        if "replication_group_members" in sql:
+            return self._error(1146, "42S02", "Table 'performance_schema.replication_group_members' doesn't exist")
+        if sql == "SELECT @@GLOBAL.read_only":
+            return self._resultset(["read_only"], [("1" if self.replica else "0",)])
+        if sql.startswith("REPLACE INTO bench.heartbeat"):
+            cluster.writes.append((time.monotonic(), int(re.search(r"VALUES \(1, (\d+)", sql).group(1))))
+        elif "MAX(seq)" in sql:
+            return self._resultset(["seq"], [("7",)])
+        elif sql.startswith("SELECT seq FROM bench.heartbeat"):
+            return self._resultset(["seq"], [(str(seq),)])
+        elif sql == "SELECT @@GLOBAL.gtid_current_pos":
+            return self._resultset(["pos"], [(f"0-1-{100 + seq}",)])
+        elif sql.startswith("SHOW GLOBAL STATUS"):
+            paused_ns = int((time.monotonic() - cluster.start) * 0.5 * 10 ** 9)  # flow control half of the time
+            return self._resultset(["Variable_name", "Value"], [
+                ("wsrep_local_recv_queue", str(int(self.delay_behind * 10))), ("wsrep_flow_control_paused", "0.5"),
+                ("wsrep_flow_control_paused_ns", str(paused_ns)), ("wsrep_last_committed", str(100 + seq))])
+        return super().respond(sql)
+
+
+async def sampled(nodes, seconds=1.0, **options):
+    servers = [await node.__aenter__() for node in nodes]
+    try:
+        _, lag = await sample_during(asyncio.sleep(seconds), "127.0.0.1", [s.port for s in servers], "root", "secret",
+                                     interval=0.05, heartbeat=0.02, log=lambda *_: None, **options)
+        return lag, [str(s.port) for s in servers]
+    finally:
+        for server in servers:
+            await server.__aexit__()
+
+
+class TestPositions(unittest.TestCase):
+
+    def test_gtid_distance(self):
+        source = parse_gtid_set("3e11fa47-71ca-11e1-9e33-c80aa9429562:1-10:15,\nAAAA:etl:1-3")
+        replica = parse_gtid_set("3E11FA47-71CA-11E1-9E33-C80AA9429562:1-8")
+        self.assertEqual(gtid_behind(source, replica), 2 + 1 + 3)
+        self.assertEqual(gtid_behind(source, source), 0)
+        self.assertEqual(gtid_behind(parse_gtid_pos("0-1-100,1-2-50"), parse_gtid_pos("0-1-90")), 60)
+        self.assertEqual(gtid_behind(120, 117), 3)
+        self.assertIsNone(gtid_behind(None, 3))
+
+
+class TestSampler(unittest.TestCase):
+
+    def test_replication(self):
+        cluster = Cluster()
+        lag, (source, late, current) = asyncio.run(sampled(
+            [FakeNode(cluster), FakeNode(cluster, replica=True, delay=0.3), FakeNode(cluster, replica=True)]))
+        self.assertEqual([lag["nodes"][n]["role"] for n in (source, late, current)], ["source", "replica", "replica"])
+        self.assertEqual(lag["heartbeat"]["writer"], source)
+        self.assertGreater(len(lag["samples"]), 10)
+        summary = lag["summary"]
+        self.assertTrue(200 <= summary[late]["heartbeat_ms"]["p95"] <= 450, summary[late])
+        self.assertLess(summary[current]["heartbeat_ms"]["max"], 100)
+        self.assertGreaterEqual(summary[late]["gtid_behind"]["max"], 5)
+        self.assertEqual(summary[source]["gtid_behind"]["max"], 0)
+        self.assertEqual(summary[late]["seconds_behind"]["max"], 0)
+        self.assertNotIn("seconds_behind", summary[source])
+        json.dumps(lag)
+
+    def test_galera(self):
+        cluster = Cluster()
+        lag, names = asyncio.run(sampled([FakeNode(cluster, galera=True), FakeNode(cluster, galera=True),
+                                          FakeNode(cluster, galera=True, delay=0.2)], seconds=0.8))
+        summary = lag["summary"]
+        self.assertEqual({node["role"] for node in lag["nodes"].values()}, {"galera"})
+        self.assertEqual(summary[names[2]]["recv_queue"]["max"], 2)
+        self.assertAlmostEqual(summary[names[0]]["fc_paused_interval"]["mean"], 0.5, delta=0.15)
+        self.assertGreater(summary[names[2]]["gtid_behind"]["max"], 0)
+        self.assertEqual(summary[names[0]]["fc_paused"]["max"], 0.5)
+
+    def test_unreachable_node(self):
+        async def scenario():
+            async with FakeMySQL() as server:
+                port = server.port
+            work = asyncio.sleep(1)
+            with self.assertRaises(LagError):
+                await sample_during(work, "127.0.0.1", [port], "root", "secret", log=lambda *_: None)
+            self.assertIsNone(work.cr_frame)  # not left pending
+
+        asyncio.run(scenario())
+        with self.assertRaises(LagError):
+            asyncio.run(sample_during(asyncio.sleep(0), "127.0.0.1", [], "root", "secret"))
+
+
+class TestAlign(unittest.TestCase):
+
+    LAG = {"samples": [
+        {"epoch": 100.5, "nodes": {"3412": {"heartbeat_ms": 10.0, "gtid_behind": 1}}},
+        {"epoch": 101.0, "nodes": {"3412": {"heartbeat_ms": 30.0, "gtid_behind": 4}}},
+        {"epoch": 101.5, "nodes": {"3412": {"heartbeat_ms": 5.0, "gtid_behind": 0}}},
+        {"epoch": 101.75, "nodes": {"3412": {"heartbeat_ms": None, "error": "Connection refused"}}},
+    ]}
+
+    def test_loadgen_and_sysbench_timelines(self):
+        load = {"tool": "loadgen", "interval": 1.0, "timeline": [
+            {"time": 1.0, "epoch": 101.0, "ops_per_sec": 50.0, "latency_p95_ms": 2.0},
+            {"time": 2.0, "epoch": 102.0, "ops_per_sec": 40.0, "latency_p95_ms": 3.0}]}
+        rows = align(self.LAG, load)
+        self.assertEqual([row["tps"] for row in rows], [50.0, 40.0])
+        self.assertEqual((rows[0]["lag"]["3412"]["heartbeat_ms"], rows[0]["lag"]["3412"]["gtid_behind"]), (30.0, 4))
+        self.assertEqual((rows[1]["lag"]["3412"]["heartbeat_ms"], rows[1]["lag"]["3412"]["errors"]), (5.0, 1))
+
+        bench = {"tool": "sysbench", "percentile": 95, "trials": [{"trial": 1, "started": 100.0, "intervals": [
+            {"time": 1.0, "tps": 10.0, "latency_p95_ms": 3.0}, {"time": 2.0, "tps": 12.0, "latency_p95_ms": 4.0}]}]}
+        rows = align(self.LAG, bench)
+        self.assertEqual([row["lag"]["3412"]["samples"] for row in rows], [2, 2])
+        self.assertEqual(rows[1]["latency_p95_ms"], 4.0)
+        with self.assertRaises(LagError):
+            align(self.LAG, {"tool": "sweep"})
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            lag_path, bench_path, output = (os.path.join(tmp, name) for name in ("lag.json", "load.json", "out.json"))
+            with open(lag_path, "w") as f:
+                json.dump(self.LAG, f)
+            with open(bench_path, "w") as f:
+                json.dump({"tool": "loadgen", "interval": 1.0, "timeline": [
+                    {"time": 1.0, "epoch": 101.0, "ops_per_sec": 50.0, "latency_p95_ms": 2.0}]}, f)
+            self.assertEqual(main(["align", lag_path, bench_path, "--output", output]), 0)
+            with open(output) as f:
+                self.assertEqual(json.load(f)["lag"]["timeline"][0]["lag"]["3412"]["heartbeat_ms"], 30.0)
+            self.assertEqual(main(["align", lag_path, os.path.join(tmp, "missing.json")]), 1)
+
+    def test_load_generator_samples_during_the_run(self):
+        cluster = Cluster()
+
+        async def scenario(output):
+            nodes = [await node.__aenter__() for node in (FakeNode(cluster), FakeNode(cluster, replica=True, delay=0.1))]
+            try:
+                async with FakeMySQL() as server:
+                    args = ["run", "--port", str(server.port), "--password", "secret", "--time", "1", "--quiet",
+                            "--interval", "0.5", "--workload", "employees", "--lag", "--lag-interval", "0.1",
+                            "--node", str(nodes[0].port), "--node", str(nodes[1].port), "--output", output]
+                    return await asyncio.get_running_loop().run_in_executor(None, loadgen_main, args)
+            finally:
+                for node in nodes:
+                    await node.__aexit__()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "load.json")
+            self.assertEqual(asyncio.run(scenario(output)), 0)
+            with open(output) as f:
+                result = json.load(f)
+            timeline = result["lag"]["timeline"]
+            self.assertEqual(len(timeline), 2)
+            self.assertTrue(all(len(row["lag"]) == 2 and row["tps"] > 0 for row in timeline))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import glob
+import os
+import sys
+import tempfile
+import unittest
+
+from dblab.loader import DATA_SESSION_SQL, NO_BINLOG_SQL, DatasetLoader, LoaderError, index_dump
+
+# Stand-in client: stores its whole stdin in a new file, fails on "FAIL"
+FAKE_CLIENT = """
+import sys, tempfile
+data = sys.stdin.buffer.read()
+with tempfile.NamedTemporaryFile(dir=sys.argv[1], suffix=".sql", delete=False) as f:
+    f.write(data)
+if b"FAIL" in data:
+    sys.stderr.write("ERROR 1064 (42000): syntax error\\n")
+    sys.exit(1)
+"""
+
+MAIN_SCRIPT = """-- test dataset
+DROP DATABASE IF EXISTS shop;
+CREATE DATABASE shop;
+USE shop;
+SET NAMES utf8mb4;
+CREATE TABLE customers (id INT PRIMARY KEY);
+CREATE TABLE orders (id INT PRIMARY KEY);
+DELIMITER ;;
+CREATE TRIGGER t AFTER INSERT ON orders FOR EACH ROW BEGIN
+  INSERT INTO audit VALUES (NEW.id);
+END;;
+DELIMITER ;
+SELECT 'LOADING customers' as 'INFO';
+source customers.dump ;
+SELECT 'LOADING orders' as 'INFO';
+LOCK TABLES `orders` WRITE;
+INSERT INTO `orders` VALUES (1),(2),(3);
+INSERT INTO `orders` VALUES (4);
+UNLOCK TABLES;
+SET AUTOCOMMIT=0;
+INSERT INTO `orders` VALUES (5);
+COMMIT;
+CREATE TABLE late (id INT);
+INSERT INTO late VALUES (1);
+SELECT 'done';
+"""
+
+CUSTOMERS_DUMP = """INSERT INTO `customers` VALUES (1),
+(2),
+(3);
+INSERT INTO `customers` VALUES (4),(5);
+"""
+
+
+class TestLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = os.path.join(self.tmp.name, "out")
+        os.mkdir(self.out)
+        self.script = self.write("shop.sql", MAIN_SCRIPT)
+        self.write("customers.dump", CUSTOMERS_DUMP)
+        self.client = [sys.executable, "-c", FAKE_CLIENT, self.out]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def sessions(self):
+        contents = []
+        for path in glob.glob(os.path.join(self.out, "*.sql")):
+            with open(path, "rb") as f:
+                contents.append(f.read())
+        return contents
+
+    def test_index_groups_inserts_per_table_and_phase(self):
+        index = index_dump([self.script])
+        self.assertEqual(index["tables"], ["customers", "late", "orders"])
+        self.assertEqual(index["rows"], 11)
+        first, second = index["phases"]
+        self.assertEqual(sorted({c["table"] for c in first["chunks"]}), ["customers", "orders"])
+        self.assertEqual([c["table"] for c in second["chunks"]], ["late"])
+        # The INSERT inside the trigger body stays a control statement
+        self.assertNotIn("audit", index["tables"])
+
+    def test_chunks_are_split_by_size(self):
+        index = index_dump([self.script], chunk_bytes=1)
+        customers = [c for c in index["phases"][0]["chunks"] if c["table"] == "customers"]
+        self.assertEqual(len(customers), 2)
+        self.assertEqual(sum(c["rows"] for c in customers), 5)
+
+    def test_load_sends_every_insert_once_with_session_settings(self):
+        stats = DatasetLoader(self.client, workers=3, binlog="skip", log=lambda msg: None).load(
+            index_dump([self.script], chunk_bytes=1))
+        sessions = self.sessions()
+        everything = b"".join(sessions)
+        for row in (b"(1),\n(2),\n(3);", b"(4),(5);", b"(1),(2),(3);", b"VALUES (4);", b"VALUES (5);", b"late VALUES (1)"):
+            self.assertEqual(everything.count(row), 1, row)
+        data_sessions = [s for s in sessions if DATA_SESSION_SQL in s]
+        self.assertTrue(data_sessions)
+        self.assertTrue(all(NO_BINLOG_SQL in s and b"USE shop;" in s for s in data_sessions))
+        self.assertNotIn(b"LOCK TABLES", everything)
+        self.assertEqual(stats["rows"], 11)
+        self.assertFalse(stats["binlog"])
+
+    def test_failed_session_raises(self):
+        self.write("customers.dump", "INSERT INTO `customers` VALUES (FAIL);\n")
+        with self.assertRaises(LoaderError) as ctx:
+            DatasetLoader(self.client, workers=2, binlog="keep", log=lambda msg: None).load(index_dump([self.script]))
+        self.assertIn("syntax error", str(ctx.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
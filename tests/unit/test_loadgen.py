@@ -0,0 +1,253 @@
+import asyncio
+import json
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+from bench.loadgen import LoadError, main, run_load
+from bench.mysqlwire import MySQLError, Pool, connect, format_query, scramble_native, scramble_sha2
+from bench.stats import Histogram
+from bench.targets import resolve
+from bench.workloads import WORKLOADS, QueryMix, load_workload, validate
+
+NONCE = b"abcdefghij0123456789"
+
+
+class FakeMySQL:
+    """Stand-in MySQL server: checks the password scramble and answers COM_QUERY.
+
+    SELECTs return one row, statements containing 'dup' fail with error
+    1062, anything else returns OK; each query takes `delay` seconds.
+    Subclasses answer differently by overriding `respond`.
+    """
+
+    def __init__(self, password="secret", plugin="mysql_native_password", delay=0.0, version="8.4.0-fake"):
+        self.password = password
+        self.version = version
+        self.plugin = plugin
+        self.delay = delay
+        self.queries = []
+        self.sessions = 0
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._session, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @staticmethod
+    def _packet(seq, payload):
+        return struct.pack("<I", len(payload))[:3] + bytes([seq]) + payload
+
+    @staticmethod
+    async def _read(reader):
+        header = await reader.readexactly(4)
+        return header[3], await reader.readexactly(int.from_bytes(header[:3], "little"))
+
+    @classmethod
+    def _error(cls, code, state, message):
+        return cls._packet(1, b"\xff" + struct.pack("<H", code) + b"#" + state.encode() + message.encode())
+
+    @classmethod
+    def _resultset(cls, columns, rows):
+        def lenenc(value):
+            return b"\xfb" if value is None else bytes([len(value)]) + value.encode()
+
+        packets = [bytes([len(columns)])]
+        packets += [b"\x03def\x00\x00\x00" + lenenc(name) + b"\x00" + b"\x0c" + b"\0" * 12 for name in columns]
+        packets.append(b"\xfe\0\0\x02\0")
+        packets += [b"".join(lenenc(value) for value in row) for row in rows]
+        packets.append(b"\xfe\0\0\x02\0")
+        return b"".join(cls._packet(seq, packet) for seq, packet in enumerate(packets, 1))
+
+    def respond(self, sql):
+        """Packets answering `sql`."""
+        if "dup" in sql:
+            return self._error(1062, "23000", "Duplicate entry")
+        if sql.startswith("SELECT"):
+            return self._resultset(["n"], [("42",)])
+        return self._packet(1, b"\x00\x01\x05\x02\x00\x00\x00")
+
+    def _greeting(self):
+        capabilities = 0x200 | 0x8000 | 0x20000 | 0x80000 | 0x200000 | 0x8
+        return (b"\x0a" + self.version.encode() + b"\0" + struct.pack("<I", 7) + NONCE[:8] + b"\0"
+                + struct.pack("<HBHH", capabilities & 0xFFFF, 45, 2, capabilities >> 16)
+                + bytes([21]) + b"\0" * 10 + NONCE[8:] + b"\0" + self.plugin.encode() + b"\0")
+
+    async def _session(self, reader, writer):
+        self.sessions += 1
+        try:
+            writer.write(self._packet(0, self._greeting()))
+            seq, response = await self._read(reader)
+            user, rest = response[32:].split(b"\0", 1)
+            auth = rest[1:1 + rest[0]]
+            scramble = scramble_native if self.plugin == "mysql_native_password" else scramble_sha2
+            if auth != scramble(self.password, NONCE):
+                writer.write(self._packet(seq + 1, b"\xff" + struct.pack("<H", 1045) + b"#28000Access denied"))
+                return
+            if self.plugin == "caching_sha2_password":
+                writer.write(self._packet(seq + 1, b"\x01\x03"))
+                seq += 1
+            writer.write(self._packet(seq + 1, b"\x00\x00\x00\x02\x00\x00\x00"))
+            while True:
+                _, command = await self._read(reader)
+                if command[:1] == b"\x01":
+                    return
+                sql = command[1:].decode()
+                self.queries.append(sql)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(self.respond(sql))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+WORKLOAD = {"name": "mix", "database": "employees", "queries": [
+    {"name": "read", "weight": 3, "sql": "SELECT n FROM t WHERE id = %(id)s", "params": {"id": {"int": [1, 9]}}},
+    {"name": "write", "weight": 1, "sql": ["BEGIN", "INSERT INTO t VALUES (%(v)s)", "COMMIT"],
+     "params": {"v": {"text": 4}}},
+    {"name": "dup", "weight": 1, "sql": ["BEGIN", "INSERT INTO dup VALUES (1)", "COMMIT"]},
+]}
+
+
+def target(port):
+    return resolve("standalone", host="127.0.0.1", port=port, password="secret")
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_percentiles_within_precision(self):
+        histogram = Histogram()
+        values = list(range(1, 1000001, 7))
+        for value in values:
+            histogram.record(value)
+        for pct in (50, 95, 99, 99.9):
+            exact = values[int(len(values) * pct / 100) - 1]
+            self.assertAlmostEqual(histogram.percentile(pct) / exact, 1.0, delta=0.002)
+        self.assertEqual((histogram.min, histogram.max, histogram.count), (1, values[-1], len(values)))
+        self.assertLess(len(histogram.counts), 12000)
+        copy = Histogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+        self.assertEqual(copy.percentile(99), histogram.percentile(99))
+        self.assertEqual(copy.merge(histogram).count, 2 * len(values))
+        self.assertEqual(Histogram().summary(), {"count": 0})
+
+
+class TestWorkloads(unittest.TestCase):
+
+    def test_builtins_and_validation(self):
+        for name in WORKLOADS:
+            self.assertIs(load_workload(name), WORKLOADS[name])
+        with self.assertRaises(ValueError):
+            validate({"queries": [{"name": "q", "sql": "SELECT %(x)s"}], "params": {}})
+        with self.assertRaises(ValueError):
+            validate({"queries": [{"sql": "SELECT %(x)s", "params": {"y": {"int": [1, 2]}}}]})
+        with self.assertRaises(ValueError):
+            validate({"queries": [{"sql": "SELECT 1", "params": {"x": {"gauss": [1, 2]}}}]})
+        with self.assertRaises(ValueError):
+            load_workload("no-such-workload")
+
+    def test_weighted_draws_are_reproducible(self):
+        draws = [QueryMix(WORKLOAD, random.Random(1)).draw() for _ in range(2)]
+        self.assertEqual(draws[0], draws[1])
+        mix = QueryMix(WORKLOAD, random.Random(7))
+        names = [mix.draw()[0] for _ in range(5000)]
+        self.assertAlmostEqual(names.count("read") / len(names), 0.6, delta=0.03)
+        self.assertEqual(format_query("SELECT %(s)s, %(n)s", {"s": "it's\\", "n": None}), "SELECT 'it\\'s\\\\', NULL")
+
+
+class TestClient(unittest.TestCase):
+
+    def test_authentication_and_queries(self):
+        async def scenario(plugin):
+            async with FakeMySQL(plugin=plugin) as server:
+                conn = await connect("127.0.0.1", server.port, "root", "secret", "employees")
+                result = await conn.query("SELECT n FROM t")
+                self.assertEqual((result["columns"], result["rows"]), (["n"], [("42",)]))
+                self.assertEqual((await conn.query("INSERT INTO t VALUES (1)"))["insert_id"], 5)
+                with self.assertRaises(MySQLError) as raised:
+                    await conn.query("INSERT INTO dup VALUES (1)")
+                self.assertEqual(raised.exception.code, 1062)
+                self.assertEqual((await conn.query("SELECT 1"))["rows"], [("42",)])
+                await conn.close()
+                with self.assertRaises(MySQLError):
+                    await connect("127.0.0.1", server.port, "root", "wrong")
+                pool = Pool(2, "127.0.0.1", server.port, "root", "secret")
+                await pool.open()
+                async with pool.acquire() as conn:
+                    await conn.query("SELECT 1")
+                await pool.close()
+                self.assertEqual(server.sessions, 4)
+
+        for plugin in ("mysql_native_password", "caching_sha2_password"):
+            asyncio.run(scenario(plugin))
+
+
+class TestLoad(unittest.TestCase):
+
+    def test_closed_loop(self):
+        async def scenario():
+            async with FakeMySQL(delay=0.002) as server:
+                result = await run_load(target(server.port), WORKLOAD, "closed", connections=2, concurrency=4,
+                                        duration=0.5, warmup=0.1, seed=3, interval=0.25)
+                return result, server
+
+        result, server = asyncio.run(scenario())
+        summary = result["summary"]
+        self.assertGreater(summary["ops"], 20)
+        self.assertEqual(result["errors"]["1062"]["count"], result["queries"]["dup"]["errors"])
+        self.assertGreater(result["queries"]["dup"]["errors"], 0)
+        self.assertIn("ROLLBACK", server.queries)
+        self.assertGreaterEqual(summary["latency_ms"]["p50"], 2.0)
+        self.assertEqual(len(result["timeline"]), 2)
+        self.assertEqual(sum(slot["ops"] for slot in result["timeline"]), summary["ops"])
+        self.assertEqual((result["database"], result["concurrency"]), ("employees", 4))
+        json.dumps(result)
+
+    def test_open_loop_keeps_the_arrival_rate(self):
+        async def scenario():
+            async with FakeMySQL(delay=0.02) as server:
+                return await run_load(target(server.port), {"queries": [{"name": "q", "sql": "SELECT 1"}]}, "open",
+                                      connections=2, rate=200, duration=0.5, seed=1)
+
+        result = asyncio.run(scenario())
+        # 2 connections serve 100 queries/s: the 200/s arrivals queue, and the wait is part of the latency
+        self.assertEqual(result["summary"]["ops"] + result["summary"]["dropped"], 100)
+        self.assertGreater(result["summary"]["latency_ms"]["p99"], 200)
+
+    def test_connection_failure(self):
+        async def scenario():
+            async with FakeMySQL(password="other") as server:
+                await run_load(target(server.port), WORKLOAD, duration=0.1)
+
+        with self.assertRaises(LoadError):
+            asyncio.run(scenario())
+        with self.assertRaises(LoadError):
+            asyncio.run(run_load(resolve("postgres"), WORKLOAD, duration=0.1))
+
+    def test_cli_writes_json(self):
+        async def scenario(output):
+            async with FakeMySQL() as server:
+                args = ["run", "--port", str(server.port), "--password", "secret", "--time", "0.3", "--quiet",
+                        "--workload", workload, "--output", output]
+                return await asyncio.get_running_loop().run_in_executor(None, main, args)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            workload = os.path.join(tmp, "mix.json")
+            with open(workload, "w") as f:
+                json.dump(WORKLOAD, f)
+            output = os.path.join(tmp, "load.json")
+            self.assertEqual(asyncio.run(scenario(output)), 0)
+            with open(output) as f:
+                self.assertEqual(json.load(f)["workload"], "mix")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+
+from runner.plans import isolate, load_env, load_plan, materialize, normalize, plan_steps
+from runner.scheduler import validate
+
+GALERA = {
+    "name": "multi-db-docker-env",
+    "networks": {"backend_galera": {"name": "multi-db-docker-env_backend_galera", "driver": "bridge",
+                                    "ipam": {"config": [{"subnet": "10.6.0.0/24"}]}}},
+    "services": {
+        "galera_01": {
+            "image": "mariadb_ssh:004",
+            "environment": {"MARIADB_ROOT_PASSWORD": "${DB_ROOT_PASSWORD}"},
+            "ports": [{"mode": "ingress", "target": 22, "published": "22001", "protocol": "tcp"},
+                      {"mode": "ingress", "target": 3306, "published": "3511", "protocol": "tcp"}],
+            "volumes": [{"type": "bind", "source": "@/gdatadir_01", "target": "/var/lib/mysql"},
+                        {"type": "bind", "source": "@/conf/gcustom_1.cnf", "target": "/etc/mysql/999.cnf",
+                         "read_only": True},
+                        {"type": "bind", "source": "@/ssl", "target": "/etc/mysql/ssl", "read_only": True}],
+            "networks": {"backend_galera": {"ipv4_address": "10.6.0.11"}},
+        },
+        "haproxy_galera": {
+            "image": "haproxy:latest", "container_name": "haproxy_galera",
+            "ports": ["3306:3306", "8404:8404"],
+            "networks": {"backend_galera": {"ipv4_address": "10.6.0.100"}},
+            "depends_on": {"galera_01": {"condition": "service_started"}},
+        },
+    },
+}
+
+STANDALONE = {
+    "services": {
+        "traefik": {"image": "traefik:v2.11", "container_name": "traefik-db-proxy", "ports": ["3306:3306"]},
+        "mariadb114": {"image": "mariadb:11.4", "container_name": "mariadb-11.4", "profiles": ["mariadb114"],
+                       "labels": {"traefik.enable": "true", "lab": "db"}, "depends_on": ["traefik"],
+                       "volumes": [{"type": "volume", "source": "mariadb_11_4_data", "target": "/var/lib/mysql"}]},
+    },
+    "volumes": {"mariadb_11_4_data": {"name": "multi-db-docker-env_mariadb_11_4_data"}},
+}
+
+
+class TestPlan(unittest.TestCase):
+
+    def test_normalize_offsets_and_projects(self):
+        plan = normalize({"name": "Nightly Run", "entries": [
+            {"topology": "standalone", "service": "postgres17"},
+            {"topology": "galera", "dataset": "employees"},
+            {"topology": "repli"}]})
+        self.assertEqual([e["project"] for e in plan["entries"]],
+                         ["nightly-run-postgres17-1", "nightly-run-galera-2", "nightly-run-repli-3"])
+        self.assertEqual([e["ports"] for e in plan["entries"]], [[6432], [5511, 5512, 5513], [6411, 6412, 6413]])
+        self.assertEqual([e["slot"] for e in plan["entries"]], [1, 2, 3])
+        for bad in ({"entries": []}, {"entries": [{"topology": "ndb"}]}, {"entries": [{"topology": "standalone"}]},
+                    {"entries": [{"topology": "standalone", "service": "postgres17", "dataset": "employees"}]},
+                    {"base_offset": 0, "entries": [{"topology": "galera"}]}):
+            with self.assertRaises(ValueError):
+                normalize(bad)
+
+    def test_steps_are_isolated_per_entry(self):
+        plan = normalize({"name": "ci", "entries": [{"topology": "galera", "dataset": "employees"},
+                                                    {"topology": "standalone", "service": "mysql84"}]})
+        steps = plan_steps(plan)
+        validate(steps)
+        ids = [s["id"] for s in steps]
+        self.assertEqual(ids[:2], ["ssl", "image"])
+        self.assertIn("ci-galera-1.inject", ids)
+        teardown = steps[ids.index("ci-mysql84-2.teardown")]
+        self.assertTrue(teardown["always"])
+        self.assertEqual(teardown["needs"], [f"ci-mysql84-2.{k}" for k in ("render", "start", "ready", "verify")])
+        self.assertIn("-p ci-mysql84-2 -f .runs/ci-mysql84-2/compose.json down -v", teardown["command"])
+        self.assertIn("--port 4511 --client mariadb --dataset employees", steps[ids.index("ci-galera-1.inject")]["command"])
+        self.assertIn("mysql://127.0.0.1:5306", steps[ids.index("ci-mysql84-2.ready")]["command"])
+        self.assertFalse(any(s["id"].endswith("teardown") for s in plan_steps(plan, keep=True)))
+
+    def test_failed_galera_node_start_stops_the_chain(self):
+        plan = normalize({"entries": [{"topology": "galera"}]})
+        start = next(s for s in plan_steps(plan) if s["id"].endswith(".start"))["command"]
+        # `docker compose up` of the first node fails; the Synced wait must not run
+        fakes = "docker() { return 3; }; mariadb() { touch waited; echo Synced; }; "
+        with tempfile.TemporaryDirectory() as tmp:
+            result = subprocess.run(["bash", "-c", fakes + start], cwd=tmp, timeout=10)
+            self.assertEqual(result.returncode, 3)
+            self.assertFalse(os.path.exists(os.path.join(tmp, "waited")))
+
+    def test_load_plan_and_env(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "smoke.json")
+            with open(path, "w") as f:
+                json.dump({"entries": [{"topology": "repli"}]}, f)
+            self.assertEqual(load_plan(path)["entries"][0]["project"], "smoke-repli-1")
+            with open(path, "w") as f:
+                f.write("{broken")
+            with self.assertRaises(ValueError):
+                load_plan(path)
+            env_path = os.path.join(tmp, ".env")
+            with open(env_path, "w") as f:
+                f.write("# comment\nDB_ROOT_PASSWORD='secret'\nEXISTING=new")
+            environ = load_env(env_path, {"EXISTING": "old"})
+        self.assertEqual(environ, {"EXISTING": "old", "DB_ROOT_PASSWORD": "secret", "MYSQL_PWD": "secret",
+                                   "PGPASSWORD": "secret"})
+
+
+class TestIsolate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "conf"))
+        os.makedirs(os.path.join(self.root, "ssl"))
+        with open(os.path.join(self.root, "conf", "gcustom_1.cnf"), "w") as f:
+            f.write('wsrep_cluster_address="gcomm://10.6.0.11,10.6.0.12"\nproxy_protocol_networks=10.5.0.0/24,10.6.0.0/24\n')
+        self.config = json.loads(json.dumps(GALERA).replace("@", self.root))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cluster_copy(self):
+        run_dir = os.path.join(self.root, ".runs", "p1")
+        config, mounts = isolate(self.config, "p1", 1000, 2, run_dir)
+        self.assertEqual(config["name"], "p1")
+        self.assertNotIn("name", config["networks"]["backend_galera"])
+        self.assertEqual(config["networks"]["backend_galera"]["ipam"]["config"][0]["subnet"], "10.6.2.0/24")
+        node, proxy = config["services"]["galera_01"], config["services"]["haproxy_galera"]
+        self.assertEqual([p["published"] for p in node["ports"]], ["4511"])
+        self.assertEqual(node["networks"]["backend_galera"]["ipv4_address"], "10.6.2.11")
+        self.assertEqual(proxy["ports"], ["4306:3306", "9404:8404"])
+        self.assertNotIn("container_name", proxy)
+        datadir, cnf, ssl = (v["source"] for v in node["volumes"])
+        self.assertEqual(datadir, os.path.join(run_dir, "mounts", "gdatadir_01"))
+        self.assertEqual(cnf, os.path.join(run_dir, "mounts", "gcustom_1.cnf"))
+        self.assertEqual(ssl, os.path.join(self.root, "ssl"))
+        self.assertEqual(self.config["services"]["galera_01"]["ports"][1]["published"], "3511")
+        materialize(mounts)
+        self.assertTrue(os.path.isdir(datadir))
+        with open(cnf) as f:
+            self.assertEqual(f.read(), 'wsrep_cluster_address="gcomm://10.6.2.11,10.6.2.12"\n'
+                                       'proxy_protocol_networks=10.5.0.0/24,10.6.2.0/24\n')
+
+    def test_standalone_service(self):
+        config, mounts = isolate(STANDALONE, "p2", 2000, 2, "/tmp/p2", service="mariadb114")
+        self.assertEqual(list(config["services"]), ["mariadb114"])
+        service = config["services"]["mariadb114"]
+        self.assertEqual(service["ports"], [{"target": 3306, "published": "5306", "protocol": "tcp"}])
+        self.assertEqual(service["labels"], {"lab": "db"})
+        self.assertNotIn("depends_on", service)
+        self.assertNotIn("profiles", service)
+        self.assertEqual(config["volumes"], {"mariadb_11_4_data": {}})
+        self.assertEqual(mounts, [])
+        with self.assertRaises(ValueError):
+            isolate(STANDALONE, "p2", 2000, 2, "/tmp/p2", service="mysql84")
+
+
+if __name__ == '__main__':
+    unittest.main()
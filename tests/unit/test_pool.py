@@ -0,0 +1,189 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from dblab import LABEL_PREFIX, MANAGED_LABEL, pool
+
+
+class APIError(Exception):
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeAPI:
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.removed = []
+        self.lock = threading.Lock()
+
+    def containers(self, all=False, filters=None):
+        wanted = filters["label"][0]
+        key, _, value = wanted.partition("=")
+        return [dict(e) for e in self.entries
+                if key in e["Labels"] and (not value or e["Labels"][key] == value)]
+
+    def rename(self, name, new_name):
+        with self.lock:
+            entry = next((e for e in self.entries if e["Names"][0] == f"/{name}"), None)
+            if entry is None:
+                raise APIError(404, f"No such container: {name}")
+            entry["Names"] = [f"/{new_name}"]
+
+    def remove_container(self, container_id, force=False):
+        self.removed.append(container_id)
+        self.entries = [e for e in self.entries if e["Id"] != container_id]
+
+
+class FakeClient:
+
+    def __init__(self, entries):
+        self.api = FakeAPI(entries)
+
+
+def member(idx, image="mysql:8.4", state="running", port=None):
+    return {
+        "Id": f"id{idx}",
+        "Names": [f"/pool-mysql-8.4-{idx}"],
+        "Created": idx,
+        "State": state,
+        "Ports": [{"PrivatePort": 3306, "PublicPort": port}] if port else [],
+        "Labels": {pool.POOL_LABEL: image, pool.POOL_SECRET_LABEL: "s"},
+    }
+
+
+class FakeContainers:
+
+    def __init__(self):
+        self.runs = []
+
+    def run(self, image, **options):
+        self.runs.append(options)
+        container = mock.Mock(attrs={"NetworkSettings": {"Ports": {"3306/tcp": [{"HostPort": "20001"}]}}})
+        container.name = options["name"]
+        return container
+
+
+class TestPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = os.path.join(self.tmp.name, "pool.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_configure_rejects_size_above_max(self):
+        with self.assertRaises(ValueError):
+            pool.configure("mysql:8.4", size=5, max_size=2, state_path=self.state)
+
+    def test_refill_evicts_surplus_dead_and_unpooled(self):
+        pool.configure("mysql:8.4", size=0, max_size=2, state_path=self.state)
+        client = FakeClient([member(1), member(2), member(3), member(4, state="exited"),
+                             member(5, image="mariadb:11.4")])
+        pool.refill(client, state_path=self.state, log=lambda *_: None)
+        self.assertEqual(sorted(client.api.removed), ["id3", "id4", "id5"])
+
+    def test_refill_evicts_idle_pools(self):
+        pool.configure("mysql:8.4", size=0, max_size=2, state_path=self.state)
+        with pool._State(self.state) as data:
+            data["last_claim"]["mysql:8.4"] = time.time() - 100
+        client = FakeClient([member(1), member(2)])
+        pool.refill(client, idle_ttl=10, state_path=self.state, log=lambda *_: None)
+        self.assertEqual(client.api.entries, [])
+
+    def test_idle_pool_is_revived_by_add_or_a_claim_attempt(self):
+        pool.configure("mysql:8.4", size=1, max_size=2, state_path=self.state)
+        with pool._State(self.state) as data:
+            data["last_claim"]["mysql:8.4"] = time.time() - 100
+        client = FakeClient([member(1)])
+        with mock.patch.object(pool, "create_member", return_value="pool-new") as create:
+            pool.refill(client, idle_ttl=10, state_path=self.state, log=lambda *_: None)
+            self.assertEqual((client.api.entries, create.call_count), ([], 0))
+            self.assertIsNone(pool.claim(client, "mysql:8.4", "env1", state_path=self.state))
+            self.assertEqual(pool.refill(client, idle_ttl=10, state_path=self.state, log=lambda *_: None),
+                             ["pool-new"])
+            with pool._State(self.state) as data:
+                data["last_claim"]["mysql:8.4"] = time.time() - 100
+            pool.configure("mysql:8.4", size=2, max_size=2, state_path=self.state)
+            pool.refill(client, idle_ttl=10, state_path=self.state, log=lambda *_: None)
+            self.assertEqual(create.call_count, 3)
+
+    def test_concurrent_refills_create_the_shortfall_once(self):
+        pool.configure("mysql:8.4", size=2, max_size=2, state_path=self.state)
+        client = FakeClient([])
+        created = []
+
+        def create(docker_client, image, labels=None):
+            time.sleep(0.05)  # the member exists only once it is ready
+            created.append(member(len(created) + 1))
+            client.api.entries.append(created[-1])
+            return created[-1]["Names"][0]
+
+        with mock.patch.object(pool, "create_member", side_effect=create):
+            threads = [threading.Thread(target=pool.refill, args=(client,),
+                                        kwargs={"image": "mysql:8.4", "state_path": self.state, "log": lambda *_: None})
+                       for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(created), 2)
+
+    def test_members_are_labelled_as_managed_on_every_path(self):
+        pool.configure("mariadb:11.4", size=1, max_size=1, state_path=self.state)
+        client = FakeClient([])
+        client.containers = FakeContainers()
+        with mock.patch.object(pool, "wait_ready", return_value={"ready": True}):
+            pool.refill(client, state_path=self.state, log=lambda *_: None)
+        labels = client.containers.runs[0]["labels"]
+        self.assertEqual(labels[MANAGED_LABEL], "true")
+        self.assertEqual((labels[f"{LABEL_PREFIX}.db_type"], labels[f"{LABEL_PREFIX}.version"]), ("mariadb", "11.4"))
+        self.assertEqual((labels[f"{LABEL_PREFIX}.env"], labels[pool.POOL_LABEL]), (pool.POOL_ENV, "mariadb:11.4"))
+
+    def test_concurrent_claims_of_one_member(self):
+        pool.configure("mysql:8.4", size=1, max_size=1, state_path=self.state)
+        client = FakeClient([member(1, port=20001)])
+        client.containers = mock.Mock()
+        listed = threading.Barrier(2)
+        results = {}
+
+        def claimant(env_name):
+            results[env_name] = pool.claim(client, "mysql:8.4", env_name, state_path=self.state)
+
+        # Both claimants list the member before either renames it
+        with mock.patch.object(pool, "probe_once", side_effect=lambda *a, **k: listed.wait(5)):
+            threads = [threading.Thread(target=claimant, args=(name,)) for name in ("env1", "env2")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(sorted(r is None for r in results.values()), [False, True])
+        self.assertIn(client.api.entries[0]["Names"][0], ("/env1", "/env2"))
+
+    def test_claim_propagates_unexpected_rename_errors(self):
+        client = FakeClient([member(1, port=20001)])
+        client.api.rename = mock.Mock(side_effect=APIError(500, "daemon down"))
+        with mock.patch.object(pool, "probe_once"), self.assertRaises(APIError):
+            pool.claim(client, "mysql:8.4", "env1", state_path=self.state)
+
+    def test_claim_skips_members_still_warming(self):
+        pool.configure("mysql:8.4", size=1, max_size=1, state_path=self.state)
+        client = FakeClient([member(1, port=1)])
+        self.assertIsNone(pool.claim(client, "mysql:8.4", "env1", state_path=self.state))
+
+    def test_status_merges_config_and_members(self):
+        pool.configure("mysql:8.4", size=1, max_size=3, state_path=self.state)
+        rows = pool.status(FakeClient([member(1), member(2, state="exited")]), state_path=self.state)
+        self.assertEqual(rows[0]["running"], 1)
+        self.assertEqual(rows[0]["stopped"], 1)
+        self.assertEqual(rows[0]["max"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
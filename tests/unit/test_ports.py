@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from dblab.ports import PortAllocationError, PortRegistry
+
+
+class TestPortRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ports.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def registry(self, port_range=(21000, 21009)):
+        return PortRegistry(self.path, port_range=port_range, check_bind=False)
+
+    def test_allocations_are_unique_and_persistent(self):
+        first = self.registry().allocate("env1", count=3)
+        second = self.registry().allocate("env2", count=3)
+        self.assertEqual(len(set(first + second)), 6)
+        self.assertEqual(self.registry().lookup("env1"), sorted(first))
+
+    def test_concurrent_allocations_never_collide(self):
+        registry = self.registry(port_range=(21000, 21199))
+        results = []
+
+        def worker(idx):
+            results.extend(registry.allocate(f"env{idx}", count=5))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(results), 100)
+        self.assertEqual(len(set(results)), 100)
+
+    def test_contiguous_block_skips_reserved_ports(self):
+        registry = self.registry()
+        registry.reserve_range("fixed", 21002, 21002)
+        block = registry.allocate("galera", count=3, contiguous=True)
+        self.assertEqual(block, list(range(block[0], block[0] + 3)))
+        self.assertNotIn(21002, block)
+
+    def test_reserve_range_is_all_or_nothing(self):
+        registry = self.registry()
+        registry.reserve_range("a", 21000, 21001)
+        with self.assertRaises(PortAllocationError):
+            registry.reserve_range("b", 21001, 21003)
+        self.assertEqual(registry.lookup("b"), [])
+
+    def test_release_reuses_ports_first_and_exhaustion(self):
+        registry = self.registry(port_range=(21000, 21002))
+        ports = registry.allocate("env1", count=3)
+        with self.assertRaises(PortAllocationError):
+            registry.allocate("env2")
+        registry.release("env1", ports=[ports[1]])
+        self.assertEqual(registry.allocate("env2"), [ports[1]])
+
+    def test_reclaim_drops_owners_without_container(self):
+        registry = self.registry()
+        registry.allocate("alive")
+        registry.allocate("gone", count=2)
+        self.assertEqual(len(registry.reclaim({"alive"})), 2)
+        self.assertEqual(registry.owners(), ["alive"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from dblab import probe
+
+
+class FakeServer:
+    """Single-purpose TCP server answering each connection with `handler(conn)`."""
+
+    def __init__(self, handler, delay=0.0):
+        self.handler = handler
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.delay = delay
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    def __enter__(self):
+        if not self.delay:
+            self.sock.listen()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.sock.close()
+
+    def _serve(self):
+        if self.delay:
+            time.sleep(self.delay)
+            self.sock.listen()
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    self.handler(conn)
+                except OSError:
+                    pass
+
+
+def mysql_greeting(conn):
+    payload = b"\x0a" + b"8.4.0-fake\0" + b"\0" * 40
+    conn.sendall(struct.pack("<I", len(payload))[:3] + b"\0" + payload)
+
+
+def mysql_error(conn):
+    payload = b"\xff" + struct.pack("<H", 1040) + b"#08004Too many connections"
+    conn.sendall(struct.pack("<I", len(payload))[:3] + b"\0" + payload)
+
+
+def postgres_handler(sqlstate=None):
+    def handler(conn):
+        conn.recv(8)
+        conn.sendall(b"N")
+        conn.recv(1024)
+        if sqlstate:
+            body = b"SFATAL\0C" + sqlstate.encode() + b"\0Mnope\0\0"
+            conn.sendall(b"E" + struct.pack("!i", len(body) + 4) + body)
+        else:
+            conn.sendall(b"R" + struct.pack("!ii", 8, 10))
+    return handler
+
+
+def mongo_hello(conn):
+    header = conn.recv(16)
+    length = struct.unpack("<i", header[:4])[0]
+    conn.recv(length - 16)
+    doc = b"\x08isWritablePrimary\0\x01" + b"\x10maxWireVersion\0" + struct.pack("<i", 21)
+    doc += b"\x01ok\0" + struct.pack("<d", 1.0)
+    doc = struct.pack("<i", len(doc) + 5) + doc + b"\0"
+    body = struct.pack("<I", 0) + b"\0" + doc
+    conn.sendall(struct.pack("<iiii", 16 + len(body), 2, 1, probe.MONGO_OP_MSG) + body)
+
+
+class TestParseTarget(unittest.TestCase):
+
+    def test_defaults_and_aliases(self):
+        self.assertEqual(probe.parse_target("127.0.0.1")["port"], 3306)
+        target = probe.parse_target("pg://db:5611")
+        self.assertEqual((target["kind"], target["host"], target["port"]), ("postgres", "db", 5611))
+        self.assertTrue(probe.parse_target("mongodb+tls://127.0.0.1:27411")["tls"])
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            probe.parse_target("redis://127.0.0.1:6379")
+
+
+class TestProbes(unittest.TestCase):
+
+    def test_mysql_greeting(self):
+        with FakeServer(mysql_greeting) as srv:
+            self.assertEqual(probe.probe_mysql("127.0.0.1", srv.port), "8.4.0-fake")
+
+    def test_mysql_error_is_not_ready(self):
+        with FakeServer(mysql_error) as srv:
+            with self.assertRaises(probe.ProbeError):
+                probe.probe_mysql("127.0.0.1", srv.port)
+
+    def test_postgres_ready_and_starting_up(self):
+        with FakeServer(postgres_handler()) as srv:
+            self.assertEqual(probe.probe_postgres("127.0.0.1", srv.port), "accepting connections")
+        with FakeServer(postgres_handler("28P01")) as srv:
+            self.assertIn("28P01", probe.probe_postgres("127.0.0.1", srv.port))
+        with FakeServer(postgres_handler("57P03")) as srv:
+            with self.assertRaises(probe.ProbeError):
+                probe.probe_postgres("127.0.0.1", srv.port)
+
+    def test_mongo_hello(self):
+        with FakeServer(mongo_hello) as srv:
+            self.assertIn("primary", probe.probe_mongo("127.0.0.1", srv.port))
+
+
+class TestWait(unittest.TestCase):
+
+    def test_wait_for_late_listener(self):
+        with FakeServer(mysql_greeting, delay=0.3) as srv:
+            result = probe.wait_ready(f"mysql://127.0.0.1:{srv.port}", timeout=5, max_delay=0.05)
+        self.assertTrue(result["ready"])
+        self.assertGreater(result["attempts"], 1)
+        self.assertLess(result["elapsed"], 1.0)
+
+    def test_wait_all_reports_each_target(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            closed_port = s.getsockname()[1]
+        with FakeServer(mysql_greeting) as srv:
+            results = probe.wait_all(
+                [f"mysql://127.0.0.1:{srv.port}", f"mysql://127.0.0.1:{closed_port}"], timeout=0.3
+            )
+        self.assertEqual([r["ready"] for r in results], [True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from dblab import profiles
+from dblab.profiles import GB, MB, container_options, parse_size, render_fragment, size_settings
+
+
+def settings(*args, **kwargs):
+    return {option: value for _, option, value in size_settings(*args, **kwargs)}
+
+
+class TestProfiles(unittest.TestCase):
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("512m"), 512 * MB)
+        self.assertEqual(parse_size("2G"), 2 * GB)
+        self.assertEqual(parse_size("1.5g"), 1536 * MB)
+        self.assertEqual(parse_size("2gb"), 2 * GB)
+        self.assertEqual(parse_size("1048576"), MB)
+        with self.assertRaises(ValueError):
+            parse_size("two gigs")
+
+    def test_buffer_pool_follows_memory_limit(self):
+        small, large = settings("bench", 1 * GB), settings("bench", 8 * GB)
+        self.assertEqual(small["innodb_buffer_pool_size"], "640M")
+        self.assertEqual(large["innodb_buffer_pool_size"], "5632M")
+        self.assertEqual(large["innodb_log_file_size"], "1408M")
+        self.assertEqual(settings("dense", 1 * GB)["innodb_buffer_pool_size"], "512M")
+
+    def test_tmpfs_datadir_is_taken_from_the_budget(self):
+        self.assertEqual(settings("bench", 4 * GB, tmpfs_size=2 * GB)["innodb_buffer_pool_size"],
+                         settings("bench", 2 * GB)["innodb_buffer_pool_size"])
+        with self.assertRaises(ValueError):
+            size_settings("bench", 1 * GB, tmpfs_size=1 * GB)
+
+    def test_io_threads_and_connections(self):
+        limited = settings("bench", 2 * GB, cpus=2.5)
+        self.assertEqual((limited["innodb_read_io_threads"], limited["innodb_write_io_threads"]), ("3", "3"))
+        self.assertEqual(settings("bench", 2 * GB)["innodb_read_io_threads"], "4")
+        self.assertEqual(settings("dense", 16 * GB)["max_connections"], str(profiles.PROFILES["dense"]["max_connections"]))
+        self.assertEqual(settings("bench", 512 * MB)["max_connections"], "20")
+
+    def test_ephemeral_relaxes_durability(self):
+        self.assertEqual(settings("ephemeral", 2 * GB)["innodb_flush_log_at_trx_commit"], "2")
+        self.assertNotIn("innodb_flush_log_at_trx_commit", settings("bench", 2 * GB))
+
+    def test_fragment_layout(self):
+        text = render_fragment("m84", "bench", 2 * GB, cpus=2)
+        self.assertTrue(text.startswith("# Generated by mysql_docker.py for m84: profile=bench memory=2G cpus=2\n[mysqld]\n"))
+        self.assertIn("# --- Resource Profile (bench) ---", text)
+        self.assertIn("innodb_buffer_pool_size = 1408M\n", text)
+
+    def test_container_options(self):
+        options = container_options(cpus=1.5, memory=2 * GB, tmpfs_size=GB, fragment_path="/tmp/m84.profile.cnf")
+        self.assertEqual(options["nano_cpus"], 1500000000)
+        self.assertEqual(options["memswap_limit"], options["mem_limit"])
+        self.assertIn("/var/lib/mysql", options["tmpfs"])
+        self.assertEqual(len(options["volumes"]), 2)
+        self.assertEqual(container_options(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
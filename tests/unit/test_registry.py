@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from dblab.registry import EnvironmentRegistry, parse_legacy_bashrc, render_bashrc
+
+
+class TestEnvironmentRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rendered = []
+        self.registry = EnvironmentRegistry(os.path.join(self.tmp.name, "env.db"),
+                                            on_change=lambda rows: self.rendered.append(render_bashrc(rows)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_remove_does_not_touch_prefixed_names(self):
+        for name in ("db1", "db10", "db100"):
+            self.registry.add(name, port=20000, password="pw", cnf_path=f"/tmp/{name}.my.cnf")
+        self.registry.remove("db1")
+        self.assertEqual([e["name"] for e in self.registry.all()], ["db10", "db100"])
+        self.assertNotIn("alias db1=", self.rendered[-1])
+        self.assertIn("alias db10=", self.rendered[-1])
+
+    def test_update_keeps_existing_fields_and_creation_time(self):
+        first = self.registry.add("env", image="mysql:8.4", port=20000, password="pw")
+        self.registry.add("env", port=20001)
+        entry = self.registry.get("env")
+        self.assertEqual((entry["image"], entry["port"]), ("mysql:8.4", 20001))
+        self.assertEqual(entry["created_at"], first["created_at"])
+
+    def test_unknown_field_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.registry.add("env", colour="blue")
+
+    def test_render_round_trips_through_legacy_parser(self):
+        self.registry.add("env", password="s3cr3t", cnf_path="/tmp/env.my.cnf")
+        parsed = parse_legacy_bashrc(self.rendered[-1])
+        self.assertEqual(parsed, {"env": {"cnf_path": "/tmp/env.my.cnf", "password": "s3cr3t"}})
+
+
+if __name__ == '__main__':
+    unittest.main()
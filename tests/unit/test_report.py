@@ -0,0 +1,129 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from runner import report
+from runner.report import ReportWriter
+
+STEPS = [
+    {"id": "config", "name": "Test Configuration", "description": "Validates configuration.", "command": "make test-config"},
+    {"id": "start", "name": "Start", "description": "Starts the container.", "command": "make mysql84"},
+]
+
+
+class TestReportWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.report_file = os.path.join(self.tmp.name, "reports", "run_report.html")
+        os.makedirs(os.path.dirname(self.report_file))
+        self.writer = ReportWriter(self.report_file, STEPS, install_type="MySQL 8.4", flush_interval=60)
+
+    def tearDown(self):
+        self.writer.close()
+        self.tmp.cleanup()
+
+    def state(self):
+        with open(os.path.join(self.writer.files_dir, "state.json")) as f:
+            return json.load(f)
+
+    def test_shell_is_written_once(self):
+        self.writer.start()
+        mtime = os.stat(self.report_file).st_mtime_ns
+        with open(self.report_file) as f:
+            shell = f.read()
+        self.assertIn("run_report_files/state.js", shell)
+        self.assertNotIn("@TITLE@", shell)
+        self.writer.set_status(0, "RUNNING")
+        self.writer.append(0, "stdout", "line\n")
+        self.writer.flush()
+        self.assertEqual(os.stat(self.report_file).st_mtime_ns, mtime)
+        with open(os.path.join(self.writer.files_dir, "state.js")) as f:
+            self.assertTrue(f.read().startswith("window.RUN_STATE = {"))
+
+    def test_logs_are_appended_and_state_tracks_steps(self):
+        self.writer.start()
+        self.assertEqual([s["status"] for s in self.state()["steps"]], ["PENDING", "PENDING"])
+        self.writer.set_status(0, "RUNNING")
+        for n in range(3):
+            self.writer.append(0, "stdout", f"line {n}\n")
+        self.writer.append(0, "stderr", "warning\n")
+        self.writer.set_status(0, "FAILED", 2)
+        self.writer.set_status(1, "SKIPPED")
+        self.writer.close()
+        state = self.state()
+        first = state["steps"][0]
+        self.assertTrue(state["finished"])
+        self.assertEqual((first["status"], first["returncode"]), ("FAILED", 2))
+        self.assertGreaterEqual(first["duration"], 0)
+        self.assertGreaterEqual(first["offset"], 0)
+        self.assertIsNone(state["steps"][1]["offset"])
+        self.assertEqual(first["stdout"]["tail"], "line 0\nline 1\nline 2\n")
+        self.assertEqual(first["stdout"]["log"], "01-config.stdout.log")
+        with open(os.path.join(self.writer.files_dir, "01-config.stdout.log")) as f:
+            self.assertEqual(f.read(), "line 0\nline 1\nline 2\n")
+        self.assertEqual(state["steps"][1]["status"], "SKIPPED")
+
+    def test_tail_is_bounded(self):
+        self.writer.start()
+        self.writer.set_status(0, "RUNNING")
+        chunk = "x" * 1023 + "\n"
+        for _ in range(64):
+            self.writer.append(0, "stdout", chunk)
+        self.writer.flush()
+        output = self.state()["steps"][0]["stdout"]
+        self.assertEqual(output["bytes"], 64 * 1024)
+        self.assertEqual(len(output["tail"]), report.TAIL_BYTES)
+        self.assertTrue(output["truncated"])
+        self.assertEqual(os.path.getsize(os.path.join(self.writer.files_dir, output["log"])), 64 * 1024)
+
+    def test_head_and_tail_of_compressed_logs(self):
+        self.writer = writer = ReportWriter(self.report_file, STEPS, flush_interval=60, head_bytes=10, tail_bytes=10,
+                                            compression="gzip")
+        writer.start()
+        writer.set_status(0, "RUNNING")
+        writer.append(0, "stdout", "0123456789abcdef")
+        output = writer.step_state(0)["stdout"]
+        self.assertEqual((output["head"], output["tail"]), ("012345", "6789abcdef"))
+        for n in range(100):
+            writer.append(0, "stdout", f"line {n:03d}\n")
+        writer.set_status(0, "SUCCESS", 0)
+        writer.close()
+        output = writer.step_state(0)["stdout"]
+        self.assertEqual((output["head"], output["tail"], output["bytes"]), ("0123456789", "\nline 099\n", 916))
+        self.assertEqual(output["log"], "01-config.stdout.log.gz")
+        with gzip.open(os.path.join(writer.files_dir, output["log"]), "rt") as f:
+            self.assertEqual(f.read().count("line"), 100)
+        self.assertIn("const HEAD_CHARS = 10;", writer.render_shell("files"))
+
+    def test_retry_restarts_the_step_logs(self):
+        self.writer.start()
+        self.writer.set_status(0, "RUNNING")
+        self.writer.append(0, "stdout", "first attempt\n")
+        self.writer.set_status(0, "RUNNING")
+        self.writer.append(0, "stdout", "second attempt\n")
+        self.writer.flush()
+        self.assertEqual(self.state()["steps"][0]["stdout"]["tail"], "second attempt\n")
+        self.assertEqual(self.state()["steps"][0]["stdout"]["head"], "")
+
+    def test_flush_skips_unchanged_state(self):
+        self.writer.start()
+        self.assertFalse(self.writer.flush())
+        self.writer.set_status(1, "SKIPPED")
+        self.assertTrue(self.writer.flush())
+
+    def test_trend_is_part_of_the_header(self):
+        self.writer.start()
+        subscriber = self.writer.subscribe()
+        trend = [{"step": "start", "metric": "duration", "value": 12.0, "baseline": 10.0, "regression": False}]
+        self.writer.set_trend(trend)
+        self.assertEqual(subscriber.get_nowait(), ("header",))
+        self.writer.flush()
+        self.assertEqual(self.state()["trend"], trend)
+        self.assertIn('id="trend-table"', self.writer.render_shell("files"))
+
+
+if __name__ == '__main__':
+    unittest.main()
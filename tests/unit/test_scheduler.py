@@ -0,0 +1,114 @@
+import threading
+import time
+import unittest
+
+from runner.scheduler import Scheduler, topological_order, validate
+
+
+def step(step_id, needs=(), resources=()):
+    return {"id": step_id, "command": step_id, "needs": list(needs), "resources": list(resources)}
+
+
+class Recorder:
+
+    def __init__(self, fail=(), delay=0.05):
+        self.fail = set(fail)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.events = []
+        self.active = set()
+        self.max_active = 0
+        self.overlaps = []
+
+    def __call__(self, index, step):
+        with self.lock:
+            self.overlaps += [(step["id"], other) for other in self.active]
+            self.active.add(step["id"])
+            self.max_active = max(self.max_active, len(self.active))
+            self.events.append(("start", step["id"]))
+        time.sleep(self.delay)
+        with self.lock:
+            self.active.discard(step["id"])
+            self.events.append(("end", step["id"]))
+        return "FAILED" if step["id"] in self.fail else "SUCCESS"
+
+    def order(self, kind):
+        return [step_id for event, step_id in self.events if event == kind]
+
+
+class TestValidate(unittest.TestCase):
+
+    def test_rejects_bad_plans(self):
+        with self.assertRaises(ValueError):
+            validate([step("a"), step("a")])
+        with self.assertRaises(ValueError):
+            validate([step("a", needs=["missing"])])
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            validate([step("a", needs=["b"]), step("b", needs=["a"]), step("c")])
+
+    def test_topological_order_keeps_list_order(self):
+        steps = [step("verify", needs=["start"]), step("config"), step("start")]
+        self.assertEqual(topological_order(steps), [1, 2, 0])
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_single_worker_runs_in_list_order(self):
+        recorder = Recorder(delay=0)
+        steps = [step("config"), step("start"), step("inject", needs=["start"]), step("verify", needs=["inject"])]
+        statuses = Scheduler(steps, recorder).run()
+        self.assertEqual(recorder.order("start"), ["config", "start", "inject", "verify"])
+        self.assertEqual(statuses, ["SUCCESS"] * 4)
+
+    def test_independent_steps_run_concurrently(self):
+        recorder = Recorder()
+        steps = [step("ssl"), step("image"), step("config", needs=["ssl"]), step("extra")]
+        Scheduler(steps, recorder, workers=2).run()
+        self.assertEqual(recorder.max_active, 2)
+        self.assertLess(recorder.events.index(("end", "ssl")), recorder.events.index(("start", "config")))
+
+    def test_shared_resources_never_overlap(self):
+        recorder = Recorder()
+        steps = [step("a", resources=["port:3306"]), step("b", resources=["port:3306"]), step("c")]
+        Scheduler(steps, recorder, workers=3).run()
+        self.assertNotIn(("b", "a"), recorder.overlaps)
+        self.assertNotIn(("a", "b"), recorder.overlaps)
+        self.assertIn("c", {pair[0] for pair in recorder.overlaps} | {pair[1] for pair in recorder.overlaps})
+
+    def test_failure_blocks_dependents_only(self):
+        recorder, skipped = Recorder(fail=["start"], delay=0), []
+        steps = [step("start"), step("inject", needs=["start"]), step("verify", needs=["inject"]), step("config")]
+        statuses = Scheduler(steps, recorder, workers=2, on_skip=lambda i, s, reason: skipped.append(s["id"])).run()
+        self.assertEqual(statuses, ["FAILED", "BLOCKED", "BLOCKED", "SUCCESS"])
+        self.assertEqual(sorted(skipped), ["inject", "verify"])
+
+    def test_keep_going_and_skipped_dependencies(self):
+        steps = [step("start"), step("inject", needs=["start"])]
+        statuses = Scheduler(steps, Recorder(fail=["start"], delay=0), keep_going=True).run()
+        self.assertEqual(statuses, ["FAILED", "SUCCESS"])
+        statuses = Scheduler(steps, lambda i, s: "SKIPPED" if s["id"] == "start" else "SUCCESS").run()
+        self.assertEqual(statuses, ["SKIPPED", "SUCCESS"])
+
+    def test_always_steps_run_after_failures(self):
+        steps = [step("start"), step("verify", needs=["start"]),
+                 {**step("teardown", needs=["start", "verify"]), "always": True}]
+        recorder = Recorder(fail=["start"], delay=0)
+        statuses = Scheduler(steps, recorder, workers=2).run()
+        self.assertEqual(statuses, ["FAILED", "BLOCKED", "SUCCESS"])
+        self.assertEqual(recorder.order("start"), ["start", "teardown"])
+
+    def test_errors_are_raised_after_running_steps(self):
+        def run_step(index, s):
+            if s["id"] == "bad":
+                raise RuntimeError("boom")
+            time.sleep(0.05)
+            return "SUCCESS"
+        scheduler = Scheduler([step("slow"), step("bad"), step("later", needs=["bad"])], run_step, workers=2)
+        with self.assertRaises(RuntimeError):
+            scheduler.run()
+        self.assertEqual(scheduler.statuses[0], "SUCCESS")
+        self.assertIsNone(scheduler.statuses[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import tempfile
+import unittest
+
+from dblab import snapshot
+
+
+class FakeImage:
+
+    def __init__(self, image_id, tags=(), labels=None):
+        self.id = image_id
+        self.short_id = image_id[:12]
+        self.tags = list(tags)
+        self.labels = labels or {}
+        self.attrs = {"Size": 0}
+
+
+class FakeImages:
+
+    def __init__(self, images):
+        self.images = images
+
+    def get(self, name):
+        return next(i for i in self.images if name in i.tags)
+
+    def list(self, filters=None):
+        key, _, value = filters["label"].partition("=")
+        return [i for i in self.images if key in i.labels and (not value or i.labels[key] == value)]
+
+
+class FakeClient:
+
+    def __init__(self, images):
+        self.images = FakeImages(images)
+
+
+class TestSnapshotKey(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.tmp.name, "employees"))
+        os.makedirs(os.path.join(self.tmp.name, "sakila"))
+        self.write("employees/load_employees.dump", "INSERT 1;")
+        self.write("sakila/sakila-data.sql", "INSERT 2;")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, content):
+        with open(os.path.join(self.tmp.name, path), "w") as f:
+            f.write(content)
+
+    def key(self, image_id="sha256:aaa", datasets=("employees",)):
+        return snapshot.snapshot_key(image_id, datasets, test_db_dir=self.tmp.name)
+
+    def test_key_follows_dataset_content(self):
+        before = self.key()
+        self.write("employees/load_employees.dump", "INSERT 3;")
+        self.assertNotEqual(self.key(), before)
+
+    def test_key_ignores_other_datasets(self):
+        before = self.key()
+        self.write("sakila/sakila-data.sql", "INSERT 4;")
+        self.assertEqual(self.key(), before)
+
+    def test_key_follows_engine_image(self):
+        self.assertNotEqual(self.key("sha256:aaa"), self.key("sha256:bbb"))
+
+    def test_key_does_not_depend_on_dataset_order(self):
+        self.assertEqual(self.key(datasets=["sakila", "employees"]), self.key(datasets=["employees", "sakila"]))
+
+    def test_clean_git_checkout_uses_tree_hash(self):
+        try:
+            for cmd in (["init", "-q"], ["add", "."],
+                        ["-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init"]):
+                subprocess.run(["git", "-C", self.tmp.name] + cmd, check=True, capture_output=True)
+        except (OSError, subprocess.CalledProcessError):
+            self.skipTest("git is not available")
+        clean = self.key()
+        self.write("employees/load_employees.dump", "INSERT 5;")
+        self.assertNotEqual(self.key(), clean)
+        subprocess.run(["git", "-C", self.tmp.name, "checkout", "-q", "--", "."], check=True)
+        self.assertEqual(self.key(), clean)
+
+
+class TestSnapshotLookup(unittest.TestCase):
+
+    def test_find_matches_current_engine_build_only(self):
+        engine = FakeImage("sha256:engine", tags=["mysql:8.4"])
+        key = snapshot.snapshot_key(engine.id, ["employees"])
+        tag = snapshot.snapshot_tag("mysql:8.4", ["employees"], key)
+        snap = FakeImage("sha256:snap", tags=[tag],
+                         labels={snapshot.SNAPSHOT_LABEL: "true", f"{snapshot.SNAPSHOT_LABEL}.key": key})
+        stale = FakeImage("sha256:old", tags=["multi-db-snapshot:old"],
+                          labels={snapshot.SNAPSHOT_LABEL: "true", f"{snapshot.SNAPSHOT_LABEL}.key": "0" * 16})
+        client = FakeClient([engine, snap, stale])
+        self.assertIs(snapshot.find(client, "mysql:8.4", ["employees"]), snap)
+        self.assertIsNone(snapshot.find(client, "mysql:8.4", ["sakila"]))
+        self.assertEqual(tag, f"multi-db-snapshot:mysql-8.4-employees-{key}")
+
+    def test_json_list_quotes_values(self):
+        self.assertEqual(snapshot._json_list(["mysqld", '--x="a"']), '["mysqld", "--x=\\"a\\""]')
+
+
+if __name__ == '__main__':
+    unittest.main()
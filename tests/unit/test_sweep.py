@@ -0,0 +1,107 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from bench.sweep import find_knee, main, render_html, sweep, thread_steps
+from bench.sysbench import BenchError
+
+# Stand-in sysbench: throughput scales up to 8 threads, then only queueing grows
+FAKE_SYSBENCH = """\
+import sys
+threads = int(next(a for a in sys.argv if a.startswith("--threads=")).split("=")[1])
+tps = 100.0 * min(threads, 8) * (0.98 if threads > 8 else 1.0)
+latency = 1000.0 * threads / tps
+print(f"    transactions:                        {int(tps * 10)}  ({tps:.2f} per sec.)")
+print(f"    queries:                             {int(tps * 200)} ({tps * 20:.2f} per sec.)")
+print(f"         avg:                                    {latency:.2f}")
+print(f"         95th percentile:                        {latency * 1.5:.2f}")
+"""
+
+
+def curve(*pairs):
+    return [{"threads": t, "tps": tps, "latency_p95_ms": p95} for t, tps, p95 in pairs]
+
+
+class TestKnee(unittest.TestCase):
+
+    def test_steps_and_knee(self):
+        self.assertEqual(thread_steps(), [1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.assertEqual(thread_steps(4, 40), [4, 8, 16, 32])
+        points = curve((1, 100, 10), (2, 195, 10.5), (4, 380, 11), (8, 400, 19), (16, 405, 38))
+        knee = find_knee(points)
+        self.assertEqual(knee["threads"], 4)
+        self.assertIn("8 threads", knee["reason"])
+        # Flat throughput without a latency jump (noise) is not a knee
+        self.assertIsNone(find_knee(curve((1, 100, 10), (2, 104, 10.2), (4, 400, 10.5))))
+        self.assertIsNone(find_knee(points[:3]))
+
+    def test_sweep_stops_on_knee_and_errors(self):
+        def measure(threads):
+            if threads == 32:
+                raise BenchError("Too many connections")
+            return {"threads": threads, "tps": 100.0 * min(threads, 4), "latency_p95_ms": 10.0 * max(1, threads / 4)}
+
+        points, knee = sweep(measure, thread_steps(1, 64), log=lambda *_: None)
+        self.assertEqual([p["threads"] for p in points], [1, 2, 4, 8, 16, 32])
+        self.assertEqual(points[-1]["error"], "Too many connections")
+        self.assertEqual(knee["threads"], 4)
+        points, _ = sweep(measure, thread_steps(1, 64), stop_on_knee=True, log=lambda *_: None)
+        self.assertEqual(points[-1]["threads"], 8)
+        points, knee = sweep(lambda threads: {"threads": threads, "tps": None}, [1, 2], log=lambda *_: None)
+        self.assertEqual((len(points), points[0]["error"], knee), (1, "no throughput measured", None))
+
+
+class TestSweepRun(unittest.TestCase):
+
+    def test_run_and_compare_with_a_stand_in_sysbench(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fake = os.path.join(tmp, "sysbench.py")
+            with open(fake, "w") as f:
+                f.write(FAKE_SYSBENCH)
+            output, page = os.path.join(tmp, "sweep.json"), os.path.join(tmp, "sweep.html")
+            code = main(["run", "--topology", "galera", "--topology", "innodb", "--max-threads", "32",
+                         "--sysbench", f"{sys.executable} {fake}", "--output", output, "--html", page])
+            self.assertEqual(code, 0)
+            with open(output) as f:
+                sweeps = json.load(f)["sweeps"]
+            self.assertEqual([s["topology"] for s in sweeps], ["galera", "innodb"])
+            self.assertEqual(sweeps[0]["knee"]["threads"], 8)
+            self.assertEqual(sweeps[0]["peak"]["threads"], 8)
+            self.assertEqual(len(sweeps[1]["points"]), 6)
+            with open(page) as f:
+                content = f.read()
+            self.assertIn("innodb (sysbench, standard)", content)
+            self.assertNotIn("@DATA@", content)
+
+            compared = os.path.join(tmp, "compared.html")
+            self.assertEqual(main(["report", output, "--html", compared, "--title", "</script>"]), 0)
+            with open(compared) as f:
+                self.assertNotIn("</script><", f.read())
+
+    def test_run_options_are_validated(self):
+        for option in (["--trials", "0"], ["--time", "0"], ["--warmup", "-1"]):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                main(["run", "--threads", "1"] + option)
+
+    def test_report_script_is_valid_javascript(self):
+        node = subprocess.run(["sh", "-c", "command -v node"], capture_output=True, text=True).stdout.strip()
+        if not node:
+            self.skipTest("node is not installed")
+        sweeps = [{"topology": "repli", "driver": "sysbench", "profile": "light", "knee": None,
+                   "points": curve((1, 10, 1), (2, 20, 1)) + [{"threads": 4, "error": "boom"}]}]
+        script = render_html(sweeps).rsplit("<script>", 1)[1].split("</script>")[0]
+        with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False) as f:
+            f.write(script)
+        try:
+            self.assertEqual(subprocess.run([node, "--check", f.name]).returncode, 0)
+        finally:
+            os.unlink(f.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
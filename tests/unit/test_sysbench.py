@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from bench.stats import bucket_percentile, confidence_interval
+from bench.sysbench import build_command, main, parse_output, run_trials
+from bench.targets import resolve
+
+OUTPUT = """\
+[ 1s ] thds: 4 tps: 160.10 qps: 3205.39 (r/w/o: 2244.07/641.11/320.21) lat (ms,95%): 34.33 err/s: 0.00 reconn/s: 0.00
+[ 2s ] thds: 4 tps: 170.00 qps: 3400.00 (r/w/o: 2380.00/680.00/340.00) lat (ms,95%): 30.26 err/s: 1.00 reconn/s: 0.00
+Latency histogram (values are in milliseconds)
+       value  ------------- distribution ------------- count
+       2.106 |*                                        10
+       5.000 |********                                 80
+       9.910 |***                                      9
+      40.120 |*                                        1
+ 
+SQL statistics:
+    queries performed:
+        read:                            140000
+        write:                           40000
+        other:                           20000
+        total:                           200000
+    transactions:                        10000  (166.58 per sec.)
+    queries:                             200000 (3331.60 per sec.)
+    ignored errors:                      1      (0.50 per sec.)
+    reconnects:                          0      (0.00 per sec.)
+
+General statistics:
+    total time:                          60.0284s
+    total number of events:              10000
+
+Latency (ms):
+         min:                                    2.10
+         avg:                                    6.00
+         max:                                   50.12
+         95th percentile:                        9.91
+         sum:                                239988.20
+"""
+
+
+class TestParse(unittest.TestCase):
+
+    def test_intervals_summary_and_histogram(self):
+        result = parse_output(OUTPUT)
+        self.assertEqual([i["tps"] for i in result["intervals"]], [160.1, 170.0])
+        self.assertEqual(result["intervals"][1]["latency_p95_ms"], 30.26)
+        summary = result["summary"]
+        self.assertEqual((summary["tps"], summary["qps"], summary["transactions"]), (166.58, 3331.6, 10000))
+        self.assertEqual((summary["errors"], summary["errors_per_sec"]), (1, 0.5))
+        self.assertEqual((summary["latency_p50_ms"], summary["latency_p95_ms"], summary["latency_p99_ms"]),
+                         (5.0, 9.91, 9.91))
+        self.assertEqual(len(result["histogram"]), 4)
+        self.assertEqual(parse_output("FATAL: error 2013")["summary"], {})
+
+    def test_statistics(self):
+        ci = confidence_interval([100.0, 110.0, 90.0])
+        self.assertEqual((ci["n"], ci["mean"], ci["stdev"]), (3, 100.0, 10.0))
+        self.assertAlmostEqual(ci["ci_high"] - ci["mean"], 4.303 * 10.0 / 3 ** 0.5)
+        self.assertEqual(confidence_interval([5.0])["ci_low"], 5.0)
+        self.assertIsNone(confidence_interval([None])["mean"])
+        self.assertEqual(bucket_percentile([(1.0, 50), (2.0, 49), (3.0, 1)], 99), 2.0)
+
+
+class TestCommand(unittest.TestCase):
+
+    def test_topologies(self):
+        galera = resolve("galera", password="pw")
+        argv = build_command(galera, "run", "read", threads=16, warmup=10, sysbench="docker exec -i c1 sysbench")
+        self.assertEqual(argv[:5], ["docker", "exec", "-i", "c1", "sysbench"])
+        for option in ("oltp_read_only", "--mysql-port=3306", "--threads=16", "--time=60", "--warmup-time=10",
+                       "--histogram=on", "--mysql-password=pw"):
+            self.assertIn(option, argv)
+        self.assertEqual(argv[-1], "run")
+        self.assertIn("--mysql-port=3511", build_command(galera, "prepare"))
+        self.assertIn("--mysql-port=6447", build_command(resolve("innodb", read_only=True), "run"))
+        self.assertIn("--pgsql-user=postgres", build_command(resolve("postgres"), "run"))
+        self.assertEqual(resolve("repli", port=4406)["nodes"], [])
+        with self.assertRaises(ValueError):
+            resolve("ndb")
+
+    def test_trials_with_a_stand_in_sysbench(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fake = os.path.join(tmp, "sysbench.py")
+            with open(fake, "w") as f:
+                f.write(f"import sys\nsys.stdout.write({OUTPUT!r})\n")
+            result = run_trials(resolve("repli"), trials=2, sysbench=f"{sys.executable} {fake}", echo=False,
+                                raw_prefix=os.path.join(tmp, "bench"))
+            self.assertTrue(os.path.exists(os.path.join(tmp, "bench.trial2.txt")))
+            self.assertEqual(len(result["trials"]), 2)
+            self.assertEqual(result["summary"]["tps"]["mean"], 166.58)
+            self.assertEqual((result["port"], result["via"]), (3406, "haproxy_repli"))
+            json.dumps(result)
+            with open(os.path.join(tmp, "fail.py"), "w") as f:
+                f.write("import sys\nprint('FATAL: cannot connect')\nsys.exit(1)\n")
+            output = os.path.join(tmp, "out.json")
+            code = main(["run", "--quiet", "--sysbench", f"{sys.executable} {os.path.join(tmp, 'fail.py')}",
+                         "--output", output])
+            self.assertEqual(code, 1)
+            self.assertFalse(os.path.exists(output))
+
+
+if __name__ == '__main__':
+    unittest.main()
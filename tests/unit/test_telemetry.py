@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+import unittest
+
+from runner.telemetry import Monitor, parse_docker_size, parse_docker_stats, read_host
+
+DOCKER_STATS = (
+    '{"BlockIO":"1.5MB / 2MB","CPUPerc":"50.00%","ID":"a1","MemUsage":"100MiB / 7.7GiB","Name":"galera_01","NetIO":"1kB / 2kB"}\n'
+    'not json\n'
+)
+
+
+class TestParsing(unittest.TestCase):
+
+    def test_docker_sizes(self):
+        self.assertEqual(parse_docker_size("648B"), 648)
+        self.assertEqual(parse_docker_size("1.5kB"), 1500)
+        self.assertEqual(parse_docker_size("10MiB"), 10 << 20)
+        self.assertEqual(parse_docker_size("--"), 0)
+
+    def test_docker_stats(self):
+        stats = parse_docker_stats(DOCKER_STATS)
+        self.assertEqual(list(stats), ["galera_01"])
+        self.assertEqual(stats["galera_01"], {"cpu_pct": 50.0, "mem": 100 << 20, "net_rx": 1000, "net_tx": 2000,
+                                              "blk_read": 1500000, "blk_write": 2000000})
+
+    def test_read_host(self):
+        with tempfile.TemporaryDirectory() as proc:
+            os.makedirs(os.path.join(proc, "net"))
+            files = {
+                "stat": "cpu  100 0 50 800 50 0 0 0 0 0\ncpu0 100 0 50 800 50 0 0 0 0 0\n",
+                "meminfo": "MemTotal:       1000 kB\nMemFree:         100 kB\nMemAvailable:    400 kB\n",
+                "diskstats": "   7       0 loop0 1 0 8 0 0 0 0 0 0 0 0\n",
+                "net/dev": ("Inter-|   Receive\n face |bytes\n"
+                            "    lo: 500 1 0 0 0 0 0 0 500 1 0 0 0 0 0 0\n"
+                            "  eth0: 300 2 0 0 0 0 0 0 700 2 0 0 0 0 0 0\n"
+                            "veth1: 900 2 0 0 0 0 0 0 900 2 0 0 0 0 0 0\n"),
+            }
+            for name, content in files.items():
+                with open(os.path.join(proc, name), "w") as f:
+                    f.write(content)
+            sample = read_host(proc)
+        self.assertEqual((sample["cpu_total"], sample["cpu_idle"]), (1000, 850))
+        self.assertEqual(sample["mem_used"], 600 * 1024)
+        self.assertEqual((sample["disk_read"], sample["disk_write"]), (0, 0))
+        self.assertEqual((sample["net_rx"], sample["net_tx"]), (300, 700))
+        self.assertIsNone(read_host("/nonexistent"))
+
+
+class FakeHost:
+
+    def __init__(self):
+        self.n = 0
+
+    def __call__(self):
+        self.n += 1
+        return {"cpu_total": 100 * self.n, "cpu_idle": 75 * self.n, "mem_used": self.n << 20,
+                "disk_read": 4096 * self.n, "disk_write": 0, "net_rx": 10 * self.n, "net_tx": 0}
+
+
+class TestMonitor(unittest.TestCase):
+
+    def test_step_summary(self):
+        containers = iter([{}, {"galera_01": parse_docker_stats(DOCKER_STATS)["galera_01"]}])
+        monitor = Monitor(interval=60, host_reader=FakeHost(), docker_reader=lambda: next(containers))
+        monitor.start()
+        started = time.time()
+        monitor.sample_docker()
+        time.sleep(0.02)
+        monitor.sample_host()
+        monitor.sample_docker()
+        ended = time.time()
+        summary = monitor.step_summary(started, ended, {"cpu_seconds": 1.5, "max_rss": 1 << 20})
+        monitor.stop()
+        self.assertEqual((summary["cpu_seconds"], summary["max_rss"]), (1.5, 1 << 20))
+        self.assertAlmostEqual(summary["host"]["cpu_pct"], 25.0)
+        self.assertEqual(summary["host"]["disk_read"], 2 * 4096)
+        self.assertEqual(summary["series"]["host_cpu"], [25.0, 25.0])
+        docker = summary["docker"]
+        self.assertEqual((docker["containers"], docker["mem_peak"], docker["blk_write"]), (1, 100 << 20, 2000000))
+        self.assertGreater(docker["cpu_seconds"], 0)
+
+    def test_summary_without_samples(self):
+        monitor = Monitor(host_reader=lambda: None, docker_reader=lambda: None)
+        summary = monitor.step_summary(0, 1)
+        self.assertEqual((summary["wall"], summary["host"], summary["docker"]), (1, None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
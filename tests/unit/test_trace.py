@@ -0,0 +1,181 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+import unittest
+
+from bench.replay import compare, main, replay, schedule, skip_reason
+from bench.targets import resolve
+from bench.trace import (TraceError, TraceWriter, capture_digests, capture_history, format_trace, read_trace,
+                         HistoryDrain)
+from test_loadgen import FakeMySQL
+
+PS = 10 ** 12  # one second in performance_schema picoseconds
+
+
+def row(thread, event_id, start_s, wait_ms, sql, digest="d1", schema="employees"):
+    start = int(start_s * PS)
+    end = start + int(wait_ms * 10 ** 9)
+    return (str(thread), str(event_id), str(start), str(end), str(end - start), schema, digest,
+            f"text of {digest}", sql, "1", "0")
+
+
+class FakePerformanceSchema:
+    """Answers the capture queries from a list of history rows."""
+
+    def __init__(self, history, consumer="NO", digests=()):
+        self.history = history
+        self.consumer = consumer
+        self.digests = list(digests)
+        self.statements = []
+
+    async def query(self, sql):
+        self.statements.append(sql)
+        if sql.startswith("UPDATE performance_schema.setup_consumers"):
+            self.consumer = "YES"
+            rows = []
+        elif "@@performance_schema_max_sql_text_length" in sql:
+            rows = [("20",)]
+        elif "@@performance_schema" in sql:
+            rows = [("1",)]
+        elif "setup_consumers" in sql:
+            rows = [(self.consumer,)]
+        elif "performance_schema.threads" in sql:
+            rows = [("99",)]
+        elif "events_statements_current" in sql:
+            rows = [(str(10 * PS),)]
+        elif "MIN(TIMER_END)" in sql:
+            rows = [(min(r[3] for r in self.history),)]
+        elif "events_statements_history_long" in sql:
+            since = int(re.search(r"TIMER_END > (\d+)", sql).group(1))
+            rows = [r for r in self.history if int(r[3]) > since]
+        else:
+            rows = self.digests.pop(0)
+        return {"columns": [], "rows": rows, "affected_rows": 0, "insert_id": 0}
+
+
+class TestCapture(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "capture.trace.gz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_drain_deduplicates_the_overlap(self):
+        drain = HistoryDrain(own=99, base_ps=10 * PS, text_limit=20)
+        first = [row(1, 1, 9, 1, "SELECT old"), row(1, 2, 10.5, 2, "SELECT 1"), row(2, 7, 10.6, 1, "x" * 20)]
+        events = drain.feed(first)
+        self.assertEqual([e["event_id"] for e in events], [2, 7])
+        self.assertEqual((events[0]["start_us"], events[0]["latency_us"]), (500000, 2000))
+        self.assertTrue(events[1]["truncated"])
+        self.assertIn(f"TIMER_END > {drain.last_end - PS}", drain.sql())
+        self.assertEqual([e["event_id"] for e in drain.feed(first + [row(1, 3, 11, 1, "SELECT 2")])], [3])
+        self.assertFalse(drain.check_wrap(str(10 * PS)))
+        self.assertTrue(drain.check_wrap(str(20 * PS)))
+
+    def test_history_capture_round_trip(self):
+        pfs = FakePerformanceSchema([row(1, 1, 10.1, 1, "SELECT 1"), row(1, 2, 10.2, 3, "SELECT 2", "d2"),
+                                     row(2, 5, 10.15, 2, "SELECT 3")])
+        writer = TraceWriter(self.path, {"source": "history", "started": time.time(), "duration": 0})
+        stats = asyncio.run(capture_history(pfs.query, writer, duration=0, log=lambda *_: None))
+        writer.close()
+        self.assertEqual(stats["events"], 3)
+        self.assertEqual(pfs.consumer, "YES")
+        self.assertTrue(any("CURRENT_SCHEMA" in s and "THREAD_ID <> 99" in s for s in pfs.statements))
+        trace = read_trace(self.path)
+        self.assertEqual([e["sql"] for e in trace["events"]], ["SELECT 1", "SELECT 3", "SELECT 2"])
+        self.assertEqual(set(trace["digests"]), {"d1", "d2"})
+        self.assertEqual(trace["footer"]["events"], 3)
+        self.assertIn("3 statements, 2 sessions, 2 digests", format_trace(trace))
+
+    def test_digest_capture_keeps_the_window_delta(self):
+        before = [("employees", "d1", "SELECT ?", "10", str(10 * 10 ** 9), "10", "0", "SELECT 1")]
+        after = [("employees", "d1", "SELECT ?", "30", str(50 * 10 ** 9), "30", "1", "SELECT 1"),
+                 ("sakila", "d2", "SELECT ? FROM film", "4", str(8 * 10 ** 9), "4", "0", "SELECT 2 FROM film")]
+        pfs = FakePerformanceSchema([], digests=[before, after])
+        writer = TraceWriter(self.path, {"source": "digest", "started": time.time(), "duration": 2})
+        asyncio.run(capture_digests(pfs.query, writer, duration=0, log=lambda *_: None))
+        writer.close()
+        digests = read_trace(self.path)["digests"]
+        self.assertEqual((digests["employees:d1"]["count"], digests["employees:d1"]["latency_us"]), (20, 2000))
+        self.assertEqual(digests["sakila:d2"]["sample"], "SELECT 2 FROM film")
+        plan = schedule(read_trace(self.path), sessions=3)
+        self.assertEqual(sum(len(events) for events in plan.values()), 24)
+        self.assertLess(max(e["start_us"] for events in plan.values() for e in events), 2 * 10 ** 6)
+
+    def test_unreadable_trace(self):
+        with open(self.path, "w") as f:
+            f.write("not gzip")
+        with self.assertRaises(TraceError):
+            read_trace(self.path)
+
+
+class TestReplay(unittest.TestCase):
+
+    def write_trace(self, path):
+        writer = TraceWriter(path, {"source": "history", "topology": "standalone", "server": "8.0.40",
+                                    "started": time.time(), "duration": 1})
+        writer.digest("d1", "SELECT ?")
+        writer.digest("d2", "UPDATE t SET ?")
+        for start_ms, session, event_id, digest, sql, truncated in [
+                (0, 1, 1, "d1", "SELECT 1", False), (100, 2, 1, "d2", "UPDATE t SET a = 1", False),
+                (200, 1, 2, "d1", "SELECT 2", False), (300, 2, 2, "d1", "SELECT 3 ...", True)]:
+            writer.event({"start_us": start_ms * 1000, "session": session, "event_id": event_id,
+                          "schema": "employees", "digest": digest, "latency_us": 1, "rows_sent": 1, "errors": 0,
+                          "sql": sql, "truncated": truncated})
+        writer.close()
+
+    def test_timed_replay_and_comparison(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "t.trace.gz")
+            self.write_trace(path)
+            trace = read_trace(path)
+
+            async def scenario(speed, read_only=False):
+                async with FakeMySQL() as server:
+                    target = resolve("standalone", host="127.0.0.1", port=server.port, password="secret")
+                    results, elapsed = await replay(trace, target, speed, read_only)
+                    return results, elapsed, server.queries
+
+            results, elapsed, queries = asyncio.run(scenario(2.0))
+            self.assertGreaterEqual(elapsed, 0.1)
+            self.assertLess(elapsed, 0.5)
+            self.assertEqual(queries, ["SELECT 1", "UPDATE t SET a = 1", "SELECT 2"])
+            self.assertEqual(results.skipped["truncated"], 1)
+            self.assertEqual(results.lag.count, 3)
+            rows = compare(trace, results, threshold=1.5)
+            self.assertEqual([r["digest"] for r in rows], ["d1", "d2"])
+            self.assertEqual(rows[0]["replayed"], 2)
+            # 1 us on the source against a real round trip: flagged
+            self.assertTrue(rows[0]["regression"])
+
+            results, elapsed, queries = asyncio.run(scenario(0, read_only=True))
+            self.assertLess(elapsed, 0.1)
+            self.assertEqual(queries, ["SELECT 1", "SELECT 2"])
+            self.assertEqual(results.skipped["filtered"], 1)
+            self.assertEqual(skip_reason({"sql": "KILL 12"}), "filtered")
+
+    def test_cli_writes_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path, output = os.path.join(tmp, "t.trace.gz"), os.path.join(tmp, "replay.json")
+            self.write_trace(path)
+
+            async def scenario():
+                async with FakeMySQL() as server:
+                    args = [path, "--port", str(server.port), "--password", "secret", "--speed", "0",
+                            "--output", output]
+                    return await asyncio.get_running_loop().run_in_executor(None, main, args)
+
+            self.assertEqual(asyncio.run(scenario()), 0)
+            with open(output) as f:
+                result = json.load(f)
+            self.assertEqual((result["replayed"], result["server"]), (3, "8.4.0-fake"))
+            self.assertEqual(main([os.path.join(tmp, "missing.gz"), "--port", "1"]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()